@@ -0,0 +1,45 @@
+"""
+Add composite indexes for the hot list/filter queries
+
+Revision ID: add_composite_query_indexes
+Revises: upload_file_stats
+Create Date: 2026-10-19 13:00:00.000000
+
+Derived from the queries in app/api/v1:
+- upload list_files / get_file_stats: user_id [+ status] ORDER BY created_at
+- code_entries listing and latest entry: user_id, is_active ORDER BY created_at
+- general-analysis results: user_id ORDER BY created_at, id (keyset)
+- file-paths duplicate checks: user_id, full_path; listing: user_id ORDER BY created_at
+- analysis list_analyses: user_id ORDER BY created_at
+tests/test_query_indexes.py verifies with EXPLAIN that each query uses its index.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_composite_query_indexes'
+down_revision = 'upload_file_stats'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_uploaded_files_user_status_created", "uploaded_files", ["user_id", "status", "created_at"]),
+    ("ix_uploaded_files_user_created", "uploaded_files", ["user_id", "created_at", "id"]),
+    ("ix_code_entries_user_active_created", "code_entries", ["user_id", "is_active", "created_at"]),
+    ("ix_general_analysis_results_user_created", "general_analysis_results", ["user_id", "created_at", "id"]),
+    ("ix_file_paths_user_full_path", "file_paths", ["user_id", "full_path"]),
+    ("ix_file_paths_user_created", "file_paths", ["user_id", "created_at", "id"]),
+    ("ix_analyses_user_created", "analyses", ["user_id", "created_at", "id"]),
+]
+
+
+def upgrade():
+    """Create the composite indexes"""
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade():
+    """Drop the composite indexes"""
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
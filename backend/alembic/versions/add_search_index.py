@@ -0,0 +1,88 @@
+"""
+Add the search index (search_documents) and trigram indexes for substring filters
+
+Revision ID: add_search_index
+Revises: add_composite_query_indexes
+Create Date: 2026-10-19 14:00:00.000000
+
+PostgreSQL: pg_trgm extension, GIN tsvector expression index and trigram
+index on search_documents, trigram indexes for the ILIKE filters of the list
+endpoints. SQLite: FTS5 table and sync triggers. The table is filled from
+file_paths, code_entries and general_analysis_results.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_search_index'
+down_revision = 'add_composite_query_indexes'
+branch_labels = None
+depends_on = None
+
+TRIGRAM_INDEXES = [
+    ("ix_uploaded_files_original_name_trgm", "uploaded_files", "original_name"),
+    ("ix_uploaded_files_relative_path_trgm", "uploaded_files", "relative_path"),
+    ("ix_analyses_name_trgm", "analyses", "name"),
+    ("ix_analyses_description_trgm", "analyses", "description"),
+    ("ix_file_paths_file_name_trgm", "file_paths", "file_name"),
+    ("ix_file_paths_folder_path_trgm", "file_paths", "folder_path"),
+    ("ix_search_documents_title_trgm", "search_documents", "title"),
+]
+
+
+def upgrade():
+    """Create search_documents with its full-text indexes and fill it"""
+    from app.models.search import SEARCH_VECTOR_SQL, SQLITE_FTS_DDL, rebuild_search_index
+
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    op.create_table(
+        'search_documents',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('doc_type', sa.String(length=20), nullable=False),
+        sa.Column('ref_id', sa.String(length=64), nullable=False),
+        sa.Column('section', sa.String(length=100), nullable=False, server_default=''),
+        sa.Column('title', sa.Text(), nullable=False),
+        sa.Column('body', sa.Text(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.UniqueConstraint('doc_type', 'ref_id', 'section', name='uq_search_documents_ref')
+    )
+    op.create_index('ix_search_documents_id', 'search_documents', ['id'])
+    op.create_index('ix_search_documents_user_type', 'search_documents', ['user_id', 'doc_type'])
+
+    if bind.dialect.name == "postgresql":
+        op.execute(f"CREATE INDEX ix_search_documents_vector ON search_documents USING gin (({SEARCH_VECTOR_SQL}))")
+        for name, table, column in TRIGRAM_INDEXES:
+            op.create_index(
+                name, table, [column],
+                postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'}
+            )
+    elif bind.dialect.name == "sqlite":
+        for statement in SQLITE_FTS_DDL:
+            op.execute(statement)
+
+    session = Session(bind=bind)
+    rebuild_search_index(session)
+
+
+def downgrade():
+    """Drop the search index"""
+    from app.models.search import SQLITE_FTS_DROP
+
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        for name, table, _ in TRIGRAM_INDEXES:
+            op.drop_index(name, table_name=table)
+        op.drop_index('ix_search_documents_vector', table_name='search_documents')
+    elif bind.dialect.name == "sqlite":
+        for statement in SQLITE_FTS_DROP:
+            op.execute(statement)
+
+    op.drop_index('ix_search_documents_user_type', table_name='search_documents')
+    op.drop_index('ix_search_documents_id', table_name='search_documents')
+    op.drop_table('search_documents')
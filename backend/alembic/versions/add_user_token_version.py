@@ -0,0 +1,27 @@
+"""
+Add users.token_version (claim "ver" of the access tokens)
+
+Revision ID: add_user_token_version
+Revises: add_search_index
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_user_token_version'
+down_revision = 'add_search_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Existing users start at version 0, the version of tokens issued without the claim"""
+    op.add_column('users', sa.Column('token_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    """Drop the token version"""
+    op.drop_column('users', 'token_version')
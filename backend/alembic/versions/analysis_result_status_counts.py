@@ -0,0 +1,67 @@
+"""
+Add status_counts to general_analysis_results for the result listings
+
+The listings used to count "**Status:** ..." substrings in the criteria JSON
+text; the counts now come from the per-criterion status set when the
+response is parsed. Existing rows are backfilled from their criteria.
+
+Revision ID: analysis_result_status_counts
+Revises: add_user_token_version
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'analysis_result_status_counts'
+down_revision = 'add_user_token_version'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 200
+
+
+def upgrade():
+    """Add the column and fill it from the criteria of the existing results"""
+    from app.services.criteria_parser import count_statuses
+
+    op.add_column('general_analysis_results', sa.Column('status_counts', sa.JSON(), nullable=True))
+
+    bind = op.get_bind()
+    results = sa.table(
+        'general_analysis_results',
+        sa.column('id', sa.Integer),
+        sa.column('criteria_results', sa.JSON),
+        sa.column('status_counts', sa.JSON)
+    )
+    select = (
+        sa.select(results.c.id, results.c.criteria_results)
+        .where(results.c.status_counts.is_(None))
+        .order_by(results.c.id)
+        .limit(BATCH_SIZE)
+    )
+    update = (
+        results.update()
+        .where(results.c.id == sa.bindparam('row_id'))
+        .values(status_counts=sa.bindparam('counts', type_=sa.JSON))
+    )
+
+    while True:
+        rows = bind.execute(select).fetchall()
+        if not rows:
+            break
+        changes = []
+        for row_id, criteria_results in rows:
+            if isinstance(criteria_results, str):
+                criteria_results = json.loads(criteria_results)
+            changes.append({"row_id": row_id, "counts": count_statuses(criteria_results or {})})
+        bind.execute(update, changes)
+
+
+def downgrade():
+    """Remove the status_counts column"""
+    op.drop_column('general_analysis_results', 'status_counts')
@@ -0,0 +1,51 @@
+"""
+Add content_preview to code_entries for metadata-only listings
+
+Revision ID: code_entry_content_preview
+Revises: compress_large_text_columns
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'code_entry_content_preview'
+down_revision = 'compress_large_text_columns'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 200
+
+
+def upgrade():
+    """Add the preview column and fill it from the existing code content"""
+    from app.core.compression import text_compressor
+    from app.models.code_entry import build_content_preview
+
+    op.add_column('code_entries', sa.Column('content_preview', sa.Text(), nullable=True))
+
+    bind = op.get_bind()
+    select = sa.text(
+        "SELECT id, code_content FROM code_entries WHERE content_preview IS NULL "
+        "ORDER BY id LIMIT :limit"
+    )
+    update = sa.text("UPDATE code_entries SET content_preview = :preview WHERE id = :id")
+
+    while True:
+        rows = bind.execute(select, {"limit": BATCH_SIZE}).fetchall()
+        if not rows:
+            break
+        changes = []
+        for row_id, code_content in rows:
+            if isinstance(code_content, (bytes, memoryview)):
+                code_content = text_compressor.decompress(bytes(code_content))
+            # Empty string marks rows without content so they are not selected again
+            changes.append({"id": row_id, "preview": build_content_preview(code_content) or ""})
+        bind.execute(update, changes)
+
+
+def downgrade():
+    """Remove the preview column"""
+    op.drop_column('code_entries', 'content_preview')
@@ -0,0 +1,102 @@
+"""
+Store prompts, LLM responses and code content compressed
+
+Revision ID: compress_large_text_columns
+Revises: update_file_paths
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'compress_large_text_columns'
+down_revision = 'update_file_paths'
+branch_labels = None
+depends_on = None
+
+COMPRESSED_COLUMNS = [
+    ("general_analysis_results", "id", "raw_response"),
+    ("general_analysis_results", "id", "modified_prompt"),
+    ("code_entries", "id", "code_content"),
+    ("analyses", "id", "code_content"),
+]
+
+BATCH_SIZE = 200
+
+
+def _alter_type(table, column, type_, using):
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        op.alter_column(table, column, type_=type_, postgresql_using=using)
+    else:
+        # SQLite: the table is rebuilt; values keep their storage class until rewritten
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column(column, type_=type_)
+
+
+def _rewrite(table, key, column, convert):
+    """Rewrite every value of a column in batches (keyset on the primary key)"""
+    bind = op.get_bind()
+    first = sa.text(
+        f"SELECT {key}, {column} FROM {table} WHERE {column} IS NOT NULL "
+        f"ORDER BY {key} LIMIT :limit"
+    )
+    following = sa.text(
+        f"SELECT {key}, {column} FROM {table} WHERE {column} IS NOT NULL "
+        f"AND {key} > :last ORDER BY {key} LIMIT :limit"
+    )
+    update = sa.text(f"UPDATE {table} SET {column} = :value WHERE {key} = :key")
+
+    last = None
+    while True:
+        if last is None:
+            rows = bind.execute(first, {"limit": BATCH_SIZE}).fetchall()
+        else:
+            rows = bind.execute(following, {"last": last, "limit": BATCH_SIZE}).fetchall()
+        if not rows:
+            break
+        changes = []
+        for row_key, value in rows:
+            converted = convert(value)
+            if converted is not None:
+                changes.append({"key": row_key, "value": converted})
+        if changes:
+            bind.execute(update, changes)
+        last = rows[-1][0]
+
+
+def upgrade():
+    """Convert the large text columns to binary and compress existing rows"""
+    from app.core.compression import ZSTD_MAGIC, GZIP_MAGIC, text_compressor
+
+    def compress(value):
+        if isinstance(value, str):
+            return text_compressor.compress(value)
+        data = bytes(value)
+        if data.startswith(ZSTD_MAGIC) or data.startswith(GZIP_MAGIC):
+            return None  # already compressed
+        return text_compressor.compress(data.decode("utf-8"))
+
+    for table, key, column in COMPRESSED_COLUMNS:
+        _alter_type(table, column, sa.LargeBinary(), f"convert_to({column}, 'UTF8')")
+        _rewrite(table, key, column, compress)
+
+
+def downgrade():
+    """Decompress the rows and convert the columns back to text"""
+    from app.core.compression import text_compressor
+
+    postgresql = op.get_bind().dialect.name == "postgresql"
+
+    def decompress(value):
+        if isinstance(value, str):
+            return None
+        text = text_compressor.decompress(bytes(value))
+        # PostgreSQL: keep UTF-8 bytes so convert_from() below can read them
+        return text.encode("utf-8") if postgresql else text
+
+    for table, key, column in COMPRESSED_COLUMNS:
+        _rewrite(table, key, column, decompress)
+        _alter_type(table, column, sa.Text(), f"convert_from({column}, 'UTF8')")
@@ -0,0 +1,42 @@
+"""
+Add upload_file_stats, maintained incrementally from uploaded_files
+
+Revision ID: upload_file_stats
+Revises: code_entry_content_preview
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'upload_file_stats'
+down_revision = 'code_entry_content_preview'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create the stats table and fill it from the existing uploads"""
+    op.create_table(
+        'upload_file_stats',
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('file_extension', sa.String(length=10), nullable=False, server_default=''),
+        sa.Column('file_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total_size', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('user_id', 'status', 'file_extension')
+    )
+
+    op.execute("""
+        INSERT INTO upload_file_stats (user_id, status, file_extension, file_count, total_size)
+        SELECT user_id, status, COALESCE(file_extension, ''), COUNT(id), COALESCE(SUM(file_size), 0)
+        FROM uploaded_files
+        GROUP BY user_id, status, COALESCE(file_extension, '')
+    """)
+
+
+def downgrade():
+    """Drop the stats table"""
+    op.drop_table('upload_file_stats')
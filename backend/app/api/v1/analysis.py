@@ -8,8 +8,10 @@ from sqlalchemy.orm import Session
 
 from app.core.database import get_db
 from app.core.dependencies import get_current_user, CommonQueryParams, get_pagination_params
+from app.core.pagination import paginate, resolve_sort, count_cache_key
 from app.models.user import User
 from app.models.analysis import Analysis, AnalysisStatus
+from app.services.search import contains_pattern
 from app.schemas.analysis import (
     AnalysisCreate, AnalysisUpdate, AnalysisResponse, AnalysisListResponse,
     AnalysisResultResponse, AnalysisSearchFilters, AnalysisStats,
@@ -93,38 +95,23 @@ def list_analyses(
         query = query.filter(Analysis.overall_score <= filters.max_score)
     if filters.search:
         query = query.filter(
-            Analysis.name.contains(filters.search) |
-            Analysis.description.contains(filters.search)
+            Analysis.name.ilike(contains_pattern(filters.search), escape="\\") |
+            Analysis.description.ilike(contains_pattern(filters.search), escape="\\")
         )
 
-    # Get total count
-    total = query.count()
-
-    # Apply sorting
-    if params.sort_by:
-        sort_column = getattr(Analysis, params.sort_by, None)
-        if sort_column:
-            if params.sort_order == "desc":
-                query = query.order_by(sort_column.desc())
-            else:
-                query = query.order_by(sort_column.asc())
-    else:
-        query = query.order_by(Analysis.created_at.desc())
-
-    # Apply pagination
-    analyses = query.offset(params.skip).limit(params.limit).all()
-
-    return PaginatedResponse(
-        items=analyses,
-        total=total,
-        skip=params.skip,
-        limit=params.limit,
-        pages=(total + params.limit - 1) // params.limit,
-        current_page=(params.skip // params.limit) + 1,
-        has_next=params.skip + params.limit < total,
-        has_prev=params.skip > 0
+    # Keyset pagination on an indexed sort key (id as tie-breaker)
+    sort_keys = resolve_sort(
+        {"created_at": Analysis.created_at, "name": Analysis.name, "id": Analysis.id},
+        params.sort_by, params.sort_order, default="created_at", tiebreaker=Analysis.id
+    )
+    page = paginate(
+        query, sort_keys, params.limit,
+        cursor=params.cursor, skip=params.skip, total=params.total,
+        count_key=count_cache_key("analyses", current_user.id, **filters.dict())
     )
 
+    return PaginatedResponse(items=page.items, **page.paginated_fields())
+
 
 @router.get("/{analysis_id}", response_model=AnalysisResponse)
 def get_analysis(
@@ -2,15 +2,17 @@
 Authentication endpoints for VerificAI Backend
 """
 
+import logging
 from datetime import timedelta
 from typing import Any
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
-from app.core.database import get_db
-from app.core.security import create_access_token
+from app.core.database import get_async_db
+from app.core.security import create_access_token, password_hasher
 from app.core.dependencies import get_current_user
 from app.models.user import User
 from app.schemas.user import UserCreate, UserResponse, UserLogin
@@ -18,77 +20,83 @@ from app.schemas.common import BaseResponse
 
 router = APIRouter()
 
+logger = logging.getLogger(__name__)
+
+
+async def _verify_login(user: User, password: str) -> bool:
+    """Check the password off the event loop, rehashing it when the bcrypt cost changed"""
+    is_valid, new_hash = await password_hasher.verify_and_update(password, user.hashed_password)
+    if is_valid and new_hash:
+        user.hashed_password = new_hash
+    return is_valid
+
 
 @router.post("/register", response_model=UserResponse)
-def register(
+async def register(
     user_data: UserCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
     """Register a new user"""
     # Check if user already exists
-    if db.query(User).filter(User.username == user_data.username).first():
+    if await db.scalar(select(User.id).where(User.username == user_data.username)):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username already registered"
         )
 
-    if db.query(User).filter(User.email == user_data.email).first():
+    if await db.scalar(select(User.id).where(User.email == user_data.email)):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
 
     # Create new user
-    user = User(**user_data.dict(exclude={"confirm_password"}))
+    user = User(
+        **user_data.dict(exclude={"confirm_password", "password"}),
+        hashed_password=await password_hasher.hash(user_data.password)
+    )
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
 
     return user
 
 
 @router.post("/login")
-def login(
+async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
     """Login user and return access token"""
-    print("--- LOGIN ATTEMPT ---")
-    print(f"Username: {form_data.username}")
-    user = db.query(User).filter(User.username == form_data.username).first()
-    print(f"User found in DB: {'Yes' if user else 'No'}")
+    logger.debug("Login attempt for %s", form_data.username)
+    user = await db.scalar(select(User).where(User.username == form_data.username))
 
-    if not user or not user.verify_password(form_data.password):
-        print("Authentication failed: Incorrect username or password.")
+    if not user or not await _verify_login(user, form_data.password):
+        logger.debug("Login failed for %s: incorrect username or password", form_data.username)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    print("Password verification successful.")
-    print(f"Is user active? {user.is_active}")
-
     if not user.is_active:
-        print("Authentication failed: Inactive user.")
+        logger.debug("Login failed for %s: inactive user", form_data.username)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Inactive user"
         )
 
     # Update last login
-    print("Updating last login...")
     user.update_last_login()
-    db.commit()
-    print("Last login updated.")
+    await db.commit()
 
     # Create access token
-    print("Creating access token...")
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        subject=user.username, expires_delta=access_token_expires
+        subject=user.username, expires_delta=access_token_expires,
+        token_version=user.token_version
     )
-    print("Access token created.")
+    logger.debug("Access token created for %s", user.username)
     return {
         "access_token": access_token,
         "token_type": "bearer",
@@ -110,15 +118,15 @@ def login(
 
 
 @router.post("/login-simple")
-def login_simple(
+async def login_simple(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
     """Simple login test without update_last_login"""
     try:
-        user = db.query(User).filter(User.username == form_data.username).first()
+        user = await db.scalar(select(User).where(User.username == form_data.username))
 
-        if not user or not user.verify_password(form_data.password):
+        if not user or not await password_hasher.verify(form_data.password, user.hashed_password):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect username or password",
@@ -134,7 +142,8 @@ def login_simple(
         # Create access token
         access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
         access_token = create_access_token(
-            subject=user.username, expires_delta=access_token_expires
+            subject=user.username, expires_delta=access_token_expires,
+            token_version=user.token_version
         )
 
         return {
@@ -156,14 +165,14 @@ def login_simple(
 
 
 @router.post("/login/json", response_model=dict)
-def login_json(
+async def login_json(
     user_data: UserLogin,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
     """Login user using JSON payload"""
-    user = db.query(User).filter(User.username == user_data.username).first()
+    user = await db.scalar(select(User).where(User.username == user_data.username))
 
-    if not user or not user.verify_password(user_data.password):
+    if not user or not await _verify_login(user, user_data.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -178,12 +187,13 @@ def login_json(
 
     # Update last login
     user.update_last_login()
-    db.commit()
+    await db.commit()
 
     # Create access token
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        subject=user.username, expires_delta=access_token_expires
+        subject=user.username, expires_delta=access_token_expires,
+        token_version=user.token_version
     )
 
     return {
@@ -221,7 +231,8 @@ def refresh_token(
     """Refresh access token"""
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        subject=current_user.username, expires_delta=access_token_expires
+        subject=current_user.username, expires_delta=access_token_expires,
+        token_version=current_user.token_version
     )
 
     return {
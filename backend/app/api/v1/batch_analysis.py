@@ -0,0 +1,58 @@
+"""
+Batch analysis endpoints for VerificAI Backend
+"""
+
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from pydantic import BaseModel
+
+from app.core.database import get_db
+from app.core.dependencies import verify_admin_permission
+from app.models.user import User
+from app.services.batch_analysis import batch_analysis_service
+
+router = APIRouter()
+
+
+class BatchAnalysisRequest(BaseModel):
+    """Request model for a batch analysis run"""
+    criteria_ids: List[str]
+    code_entry_ids: Optional[List[str]] = None  # None = every active code entry of the user
+    analysis_name: Optional[str] = "Reanálise em lote"
+    user_id: Optional[int] = None  # Owner of the code entries (defaults to the admin)
+
+
+@router.post("/batches")
+def create_batch_analysis(
+    request: BatchAnalysisRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(verify_admin_permission)
+):
+    """Queue a batch analysis; it is submitted and ingested by the batch scheduler"""
+    try:
+        job = batch_analysis_service.create_batch(
+            db,
+            user_id=request.user_id or current_user.id,
+            criteria_ids=request.criteria_ids,
+            code_entry_ids=request.code_entry_ids,
+            analysis_name=request.analysis_name
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return job.summary()
+
+
+@router.get("/batches")
+def list_batch_analyses(current_user: User = Depends(verify_admin_permission)):
+    """List batch analyses"""
+    return [job.summary() for job in batch_analysis_service.list_jobs()]
+
+
+@router.get("/batches/{batch_id}")
+def get_batch_analysis(batch_id: str, current_user: User = Depends(verify_admin_permission)):
+    """Get the status of a batch analysis"""
+    job = batch_analysis_service.get_job(batch_id)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Batch not found")
+    return job.summary()
@@ -2,14 +2,17 @@
 API endpoints for code entries
 """
 
+import logging
 import re
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, Body
-from sqlalchemy.orm import Session
-from sqlalchemy import desc, func
+from fastapi import APIRouter, Depends, HTTPException, Query, Body, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only, undefer
+from sqlalchemy import desc, func, select
 
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.core.dependencies import get_current_user, get_optional_user
+from app.core.pagination import paginate_async, count_cache_key
 # Force reload
 from app.models.user import User
 from app.models.code_entry import CodeEntry
@@ -19,6 +22,7 @@ from app.schemas import (
 )
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 
 def detect_programming_language(code: str) -> str:
@@ -325,7 +329,6 @@ def detect_programming_language(code: str) -> str:
 @router.get("/code-entries/test")
 async def test_endpoint():
     """Test endpoint to check if module is loading"""
-    print("DEBUG: test_endpoint called")
     return {"message": "Module is working correctly", "authenticated": "no"}
 
 
@@ -341,7 +344,7 @@ async def detect_language(code_content: str = Body(...)):
 @router.post("/code-entries", response_model=CodeEntryResponse)
 async def create_code_entry(
     code_entry: CodeEntryCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -364,42 +367,70 @@ async def create_code_entry(
     )
 
     db.add(db_code_entry)
-    db.commit()
-    db.refresh(db_code_entry)
+    await db.commit()
 
     return db_code_entry
 
 
+# Metadata columns loaded by the code entry listing
+CODE_ENTRY_LIST_COLUMNS = (
+    "id", "title", "description", "language", "lines_count",
+    "characters_count", "created_at", "is_active"
+)
+
+
 @router.get("/code-entries", response_model=List[CodeEntryList])
 async def list_code_entries(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     language: Optional[str] = Query(None),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    total: Optional[str] = Query(None, description="exact | cached | estimate | none"),
+    projection: str = Query("metadata", pattern="^(metadata|preview|full)$", description="metadata | preview | full"),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
-    List code entries for the current user
+    List code entries for the current user.
+    The body stays a plain list; pagination goes in the X-Next-Cursor and X-Total-Count headers
+    and the projection used in X-Projection. The content is fetched with GET /code-entries/{id}
+    (or projection=full).
     """
-    print(f"DEBUG: list_code_entries called for user {current_user.id}")
-
-    # Query code entries for the current user
-    query = db.query(CodeEntry).filter(
-        CodeEntry.user_id == current_user.id,
-        CodeEntry.is_active == True
+    # Only the columns of the projection are loaded
+    columns = [getattr(CodeEntry, name) for name in CODE_ENTRY_LIST_COLUMNS]
+    if projection == "preview":
+        columns.append(CodeEntry.content_preview)
+    elif projection == "full":
+        columns.append(CodeEntry.code_content)
+
+    def build_query(session):
+        query = session.query(CodeEntry).options(load_only(*columns)).filter(
+            CodeEntry.user_id == current_user.id,
+            CodeEntry.is_active == True
+        )
+
+        # Filter by language if specified
+        if language:
+            query = query.filter(CodeEntry.language == language)
+        return query
+
+    # Most recent first, keyset pagination (id as tie-breaker)
+    page = await paginate_async(
+        db, build_query, [(CodeEntry.created_at, "desc"), (CodeEntry.id, "desc")], limit,
+        cursor=cursor, skip=skip, total=total,
+        count_key=count_cache_key("code_entries", current_user.id, language=language)
     )
-
-    # Filter by language if specified
-    if language:
-        query = query.filter(CodeEntry.language == language)
-
-    # Order by most recent and apply pagination
-    code_entries = query.order_by(CodeEntry.created_at.desc()).offset(skip).limit(limit).all()
+    code_entries = page.items
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    if page.total is not None:
+        response.headers["X-Total-Count"] = str(page.total)
+    response.headers["X-Projection"] = projection
 
     # Convert to response format
     result = []
     for entry in code_entries:
-        print(f"DEBUG: Processing entry {entry.id}, code_content length: {len(entry.code_content) if entry.code_content else 0}")
         result.append(CodeEntryList(
             id=entry.id,
             title=entry.title,
@@ -409,27 +440,28 @@ async def list_code_entries(
             characters_count=entry.characters_count,
             created_at=entry.created_at,
             is_active=entry.is_active,
-            code_content=entry.code_content  # Added code_content field
+            content_preview=entry.content_preview if projection == "preview" else None,
+            code_content=entry.code_content if projection == "full" else None
         ))
 
-    print(f"DEBUG: Returning {len(result)} code entries for user {current_user.id}")
+    logger.debug("Returning %d code entries for user %s", len(result), current_user.id)
     return result
 
 
 @router.get("/code-entries/{entry_id}", response_model=CodeEntryResponse)
 async def get_code_entry(
     entry_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Get a specific code entry by ID
     """
-    code_entry = db.query(CodeEntry).filter(
+    code_entry = await db.scalar(select(CodeEntry).options(undefer(CodeEntry.code_content)).where(
         CodeEntry.id == entry_id,
         CodeEntry.user_id == current_user.id,
         CodeEntry.is_active == True
-    ).first()
+    ))
 
     if not code_entry:
         raise HTTPException(status_code=404, detail="Code entry not found")
@@ -441,17 +473,17 @@ async def get_code_entry(
 async def update_code_entry(
     entry_id: str,
     code_entry_update: CodeEntryUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Update a code entry
     """
-    code_entry = db.query(CodeEntry).filter(
+    code_entry = await db.scalar(select(CodeEntry).options(undefer(CodeEntry.code_content)).where(
         CodeEntry.id == entry_id,
         CodeEntry.user_id == current_user.id,
         CodeEntry.is_active == True
-    ).first()
+    ))
 
     if not code_entry:
         raise HTTPException(status_code=404, detail="Code entry not found")
@@ -461,8 +493,7 @@ async def update_code_entry(
     for field, value in update_data.items():
         setattr(code_entry, field, value)
 
-    db.commit()
-    db.refresh(code_entry)
+    await db.commit()
 
     return code_entry
 
@@ -470,24 +501,24 @@ async def update_code_entry(
 @router.delete("/code-entries/{entry_id}", response_model=CodeEntryDeleteResponse)
 async def delete_code_entry(
     entry_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Delete a code entry (soft delete)
     """
-    code_entry = db.query(CodeEntry).filter(
+    code_entry = await db.scalar(select(CodeEntry).where(
         CodeEntry.id == entry_id,
         CodeEntry.user_id == current_user.id,
         CodeEntry.is_active == True
-    ).first()
+    ))
 
     if not code_entry:
         raise HTTPException(status_code=404, detail="Code entry not found")
 
     # Soft delete
     code_entry.is_active = False
-    db.commit()
+    await db.commit()
 
     return CodeEntryDeleteResponse(
         message="Code entry deleted successfully",
@@ -497,19 +528,19 @@ async def delete_code_entry(
 
 @router.get("/code-entries/stats/languages")
 async def get_language_stats(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Get statistics about programming languages used
     """
-    stats = db.query(
+    stats = (await db.execute(select(
         CodeEntry.language,
         func.count(CodeEntry.id).label('count')
-    ).filter(
+    ).where(
         CodeEntry.user_id == current_user.id,
         CodeEntry.is_active == True,
         CodeEntry.language.isnot(None)
-    ).group_by(CodeEntry.language).all()
+    ).group_by(CodeEntry.language))).all()
 
     return {lang: count for lang, count in stats}# Force reload
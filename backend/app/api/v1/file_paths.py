@@ -8,13 +8,15 @@ from uuid import uuid4
 from datetime import datetime
 from pathlib import Path
 from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks, Body
-from sqlalchemy.orm import Session
-from sqlalchemy import func, desc, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, desc, or_, select
 
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.core.security import get_current_user
+from app.core.pagination import paginate_async, count_cache_key
 from app.models.user import User
 from app.models.file_path import FilePath
+from app.services.search import contains_pattern
 from app.schemas.file_path import (
     FilePathCreate,
     FilePathResponse,
@@ -31,14 +33,14 @@ router = APIRouter()
 
 
 @router.get("/public")
-async def get_public_file_paths(db: Session = Depends(get_db)):
+async def get_public_file_paths(db: AsyncSession = Depends(get_async_db)):
     """Get file paths for public access - no authentication required"""
     try:
         # Get ALL file paths without user filtering - NO LIMIT
-        file_paths = db.query(FilePath).order_by(desc(FilePath.created_at)).all()
+        full_paths = (await db.scalars(select(FilePath.full_path).order_by(desc(FilePath.created_at)))).all()
 
         # Extract just the full paths for simplicity
-        paths = [fp.full_path for fp in file_paths if fp.full_path]
+        paths = [full_path for full_path in full_paths if full_path]
 
         logger.info(f"🔥🔥🔥 Public endpoint returning {len(paths)} file paths - ALL FILES - NO LIMIT 🔥🔥🔥")
 
@@ -56,29 +58,29 @@ async def get_public_file_paths(db: Session = Depends(get_db)):
 @router.post("/sync-uploaded")
 async def sync_uploaded_files(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
     """Sync uploaded files to file_paths table for display"""
     try:
         from app.models.uploaded_file import UploadedFile, FileStatus
 
         # Get all uploaded files for this user that don't have corresponding file_paths
-        uploaded_files = db.query(UploadedFile).filter(
+        uploaded_files = (await db.scalars(select(UploadedFile).where(
             UploadedFile.user_id == current_user.id,
             UploadedFile.status == FileStatus.COMPLETED
-        ).all()
+        ))).all()
 
         synced_count = 0
 
         for uploaded_file in uploaded_files:
             # Check if file_path already exists for this uploaded file
-            existing_path = db.query(FilePath).filter(
+            existing_path = await db.scalar(select(FilePath.id).where(
                 FilePath.user_id == current_user.id,
                 or_(
                     FilePath.full_path == uploaded_file.relative_path,
                     FilePath.full_path == uploaded_file.original_name
                 )
-            ).first()
+            ).limit(1))
 
             if not existing_path:
                 # Create file_path record for uploaded file
@@ -97,7 +99,7 @@ async def sync_uploaded_files(
                 db.add(file_path)
                 synced_count += 1
 
-        db.commit()
+        await db.commit()
 
         return {
             "success": True,
@@ -106,7 +108,7 @@ async def sync_uploaded_files(
         }
 
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error syncing uploaded files: {str(e)}"
@@ -114,15 +116,15 @@ async def sync_uploaded_files(
 
 
 @router.get("/dev-paths")
-async def get_dev_file_paths(db: Session = Depends(get_db)):
+async def get_dev_file_paths(db: AsyncSession = Depends(get_async_db)):
     """Get file paths for development - simple endpoint without authentication"""
     try:
         # Get all file paths - NO LIMIT
-        file_paths = db.query(FilePath).order_by(desc(FilePath.created_at)).all()
-        logger.info(f"DEBUG: Total file_paths queried: {len(file_paths)}")
+        full_paths = (await db.scalars(select(FilePath.full_path).order_by(desc(FilePath.created_at)))).all()
+        logger.debug("Total file_paths queried: %d", len(full_paths))
 
         # Extract just the full paths for simplicity
-        paths = [fp.full_path for fp in file_paths if fp.full_path]
+        paths = [full_path for full_path in full_paths if full_path]
         logger.info(f"DEBUG: Paths with non-null full_path: {len(paths)}")
 
         # Returns ALL FILES with NO LIMIT
@@ -150,7 +152,7 @@ async def create_file_paths_bulk(
     file_paths_data: FilePathBulkCreate,
     background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create multiple file paths at once"""
     try:
@@ -160,10 +162,10 @@ async def create_file_paths_bulk(
         for file_path_data in file_paths_data.file_paths:
             try:
                 # Check if file path already exists
-                existing_path = db.query(FilePath).filter(
+                existing_path = await db.scalar(select(FilePath.id).where(
                     FilePath.full_path == file_path_data.full_path,
                     FilePath.user_id == current_user.id
-                ).first()
+                ).limit(1))
 
                 if existing_path:
                     errors.append(f"File path already exists: {file_path_data.full_path}")
@@ -175,16 +177,17 @@ async def create_file_paths_bulk(
                     user_id=current_user.id
                 )
                 db.add(db_file_path)
-                db.commit()
-                db.refresh(db_file_path)
-                created_paths.append(db_file_path)
+                await db.commit()
+                await db.refresh(db_file_path)
+                # Serialized now: a rollback of a later path expires the session objects
+                created_paths.append(FilePathResponse.model_validate(db_file_path))
 
                 logger.info(f"File path created: {file_path_data.full_path} by user {current_user.id}")
 
             except Exception as e:
                 logger.error(f"Error creating file path {file_path_data.full_path}: {str(e)}")
                 errors.append(f"Failed to create path: {file_path_data.full_path} - {str(e)}")
-                db.rollback()
+                await db.rollback()
 
         return FilePathBulkResponse(
             created_count=len(created_paths),
@@ -201,15 +204,15 @@ async def create_file_paths_bulk(
 async def create_file_path(
     file_path_data: FilePathCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a single file path"""
     try:
         # Check if file path already exists
-        existing_path = db.query(FilePath).filter(
+        existing_path = await db.scalar(select(FilePath.id).where(
             FilePath.full_path == file_path_data.full_path,
             FilePath.user_id == current_user.id
-        ).first()
+        ).limit(1))
 
         if existing_path:
             raise HTTPException(status_code=400, detail="File path already exists")
@@ -220,8 +223,8 @@ async def create_file_path(
             user_id=current_user.id
         )
         db.add(db_file_path)
-        db.commit()
-        db.refresh(db_file_path)
+        await db.commit()
+        await db.refresh(db_file_path)
 
         logger.info(f"File path created: {file_path_data.full_path} by user {current_user.id}")
 
@@ -239,42 +242,45 @@ async def get_file_paths(
     search: str = Query(None, description="Search in file names"),
     extension: str = Query(None, description="Filter by file extension"),
     folder: str = Query(None, description="Filter by folder path"),
+    cursor: str = Query(None, description="next_cursor of the previous page (replaces page)"),
+    total: str = Query(None, description="exact | cached | estimate | none"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get file paths with pagination and filtering"""
     try:
-        # Build query - get file paths only for current user
-        query = db.query(FilePath).filter(FilePath.user_id == current_user.id)
-
-        # Apply filters
-        if search:
-            query = query.filter(FilePath.file_name.contains(search))
-        if extension:
-            query = query.filter(FilePath.file_extension == extension)
-        if folder:
-            query = query.filter(FilePath.folder_path.contains(folder))
-
-        # Get total count
-        total_count = query.count()
-
-        # Calculate total pages
-        total_pages = (total_count + per_page - 1) // per_page
-
-        # Get paginated results
-        file_paths = query.order_by(desc(FilePath.created_at))\
-            .offset((page - 1) * per_page)\
-            .limit(per_page)\
-            .all()
+        def build_query(session):
+            # Build query - get file paths only for current user
+            query = session.query(FilePath).filter(FilePath.user_id == current_user.id)
+
+            # Apply filters
+            if search:
+                query = query.filter(FilePath.file_name.ilike(contains_pattern(search), escape="\\"))
+            if extension:
+                query = query.filter(FilePath.file_extension == extension)
+            if folder:
+                query = query.filter(FilePath.folder_path.ilike(contains_pattern(folder), escape="\\"))
+            return query
+
+        # Keyset pagination (newest first, id as tie-breaker)
+        result_page = await paginate_async(
+            db, build_query, [(FilePath.created_at, "desc"), (FilePath.id, "desc")], per_page,
+            cursor=cursor, skip=(page - 1) * per_page, total=total,
+            count_key=count_cache_key("file_paths", current_user.id, search=search, extension=extension, folder=folder)
+        )
+        total_count = result_page.paginated_fields()["total"]
 
         return FilePathListResponse(
-            file_paths=file_paths,
+            file_paths=result_page.items,
             total_count=total_count,
             page=page,
             per_page=per_page,
-            total_pages=total_pages
+            total_pages=(total_count + per_page - 1) // per_page,
+            next_cursor=result_page.next_cursor
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting file paths: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -284,14 +290,14 @@ async def get_file_paths(
 async def get_file_path(
     file_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get a specific file path by ID"""
     try:
-        file_path = db.query(FilePath).filter(
+        file_path = await db.scalar(select(FilePath).where(
             FilePath.file_id == file_id,
             FilePath.user_id == current_user.id
-        ).first()
+        ))
 
         if not file_path:
             raise HTTPException(status_code=404, detail="File path not found")
@@ -308,14 +314,14 @@ async def update_file_path(
     file_id: str,
     file_path_data: FilePathUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update a file path"""
     try:
-        file_path = db.query(FilePath).filter(
+        file_path = await db.scalar(select(FilePath).where(
             FilePath.file_id == file_id,
             FilePath.user_id == current_user.id
-        ).first()
+        ))
 
         if not file_path:
             raise HTTPException(status_code=404, detail="File path not found")
@@ -326,8 +332,8 @@ async def update_file_path(
             setattr(file_path, field, value)
 
         file_path.updated_at = datetime.utcnow()
-        db.commit()
-        db.refresh(file_path)
+        await db.commit()
+        await db.refresh(file_path)
 
         logger.info(f"File path updated: {file_id} by user {current_user.id}")
 
@@ -341,16 +347,16 @@ async def update_file_path(
 @router.delete("/all")
 async def delete_all_file_paths(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete all file paths for current user"""
     try:
         logger.info(f"Starting delete all file paths for user {current_user.id}")
 
         # Get all file paths for this user first
-        file_paths = db.query(FilePath).filter(
+        file_paths = (await db.scalars(select(FilePath).where(
             FilePath.user_id == current_user.id
-        ).all()
+        ))).all()
 
         logger.info(f"Found {len(file_paths)} file paths to delete for user {current_user.id}")
 
@@ -364,14 +370,14 @@ async def delete_all_file_paths(
         deleted_count = 0
         for file_path in file_paths:
             try:
-                db.delete(file_path)
+                await db.delete(file_path)
                 deleted_count += 1
             except Exception as e:
                 logger.error(f"Error deleting file path {file_path.file_id}: {str(e)}")
-                db.rollback()
+                await db.rollback()
                 raise HTTPException(status_code=500, detail=f"Error deleting file path {file_path.file_id}")
 
-        db.commit()
+        await db.commit()
 
         logger.info(f"Successfully deleted {deleted_count} file paths for user {current_user.id}")
 
@@ -382,7 +388,7 @@ async def delete_all_file_paths(
 
     except Exception as e:
         logger.error(f"Error in delete all file paths: {str(e)}", exc_info=True)
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
@@ -390,17 +396,17 @@ async def delete_all_file_paths(
 async def delete_file_path(
     file_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a file path and its physical file"""
     try:
         import os
         from app.models.uploaded_file import UploadedFile
 
-        file_path = db.query(FilePath).filter(
+        file_path = await db.scalar(select(FilePath).where(
             FilePath.file_id == file_id,
             FilePath.user_id == current_user.id
-        ).first()
+        ))
 
         if not file_path:
             raise HTTPException(status_code=404, detail="File path not found")
@@ -409,13 +415,13 @@ async def delete_file_path(
         errors = []
 
         # Look for corresponding uploaded files with matching paths
-        uploaded_files = db.query(UploadedFile).filter(
+        uploaded_files = (await db.scalars(select(UploadedFile).where(
             UploadedFile.user_id == current_user.id,
             or_(
                 UploadedFile.relative_path == file_path.full_path,
                 UploadedFile.original_name == file_path.file_name
             )
-        ).all()
+        ))).all()
 
         # Delete physical files
         for uploaded_file in uploaded_files:
@@ -430,11 +436,11 @@ async def delete_file_path(
                     errors.append(error_msg)
 
             # Delete the uploaded file record from database
-            db.delete(uploaded_file)
+            await db.delete(uploaded_file)
 
         # Delete the file path record from database
-        db.delete(file_path)
-        db.commit()
+        await db.delete(file_path)
+        await db.commit()
 
         logger.info(f"File path deleted: {file_id} by user {current_user.id}")
 
@@ -448,7 +454,7 @@ async def delete_file_path(
         raise
     except Exception as e:
         logger.error(f"Error deleting file path {file_id}: {str(e)}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
@@ -456,7 +462,7 @@ async def delete_file_path(
 async def delete_file_paths_bulk(
     file_ids: List[str] = Body(default=[]),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete multiple file paths and their physical files"""
     try:
@@ -467,10 +473,10 @@ async def delete_file_paths_bulk(
         from app.models.uploaded_file import UploadedFile
 
         # Get file paths before deletion to know which physical files to delete
-        file_paths_to_delete = db.query(FilePath).filter(
+        file_paths_to_delete = (await db.scalars(select(FilePath).where(
             FilePath.file_id.in_(file_ids),
             FilePath.user_id == current_user.id
-        ).all()
+        ))).all()
 
         deleted_physical_files = 0
         deleted_db_records = 0
@@ -480,13 +486,13 @@ async def delete_file_paths_bulk(
         for file_path in file_paths_to_delete:
             try:
                 # Look for corresponding uploaded files with matching paths
-                uploaded_files = db.query(UploadedFile).filter(
+                uploaded_files = (await db.scalars(select(UploadedFile).where(
                     UploadedFile.user_id == current_user.id,
                     or_(
                         UploadedFile.relative_path == file_path.full_path,
                         UploadedFile.original_name == file_path.file_name
                     )
-                ).all()
+                ))).all()
 
                 # Delete physical files
                 for uploaded_file in uploaded_files:
@@ -501,20 +507,19 @@ async def delete_file_paths_bulk(
                             errors.append(error_msg)
 
                     # Delete the uploaded file record from database
-                    db.delete(uploaded_file)
+                    await db.delete(uploaded_file)
 
             except Exception as e:
                 error_msg = f"Error processing file path {file_path.file_id}: {str(e)}"
                 logger.error(error_msg)
                 errors.append(error_msg)
 
-        # Delete the file path records from database
-        deleted_db_records = db.query(FilePath).filter(
-            FilePath.file_id.in_(file_ids),
-            FilePath.user_id == current_user.id
-        ).delete()
+        # Delete the file path records from database (through the session, so the search index follows)
+        for file_path in file_paths_to_delete:
+            await db.delete(file_path)
+        deleted_db_records = len(file_paths_to_delete)
 
-        db.commit()
+        await db.commit()
 
         return {
             "message": f"Successfully deleted {deleted_db_records} file paths and {deleted_physical_files} physical files",
@@ -527,46 +532,46 @@ async def delete_file_paths_bulk(
         raise
     except Exception as e:
         logger.error(f"Error in bulk file path deletion: {str(e)}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
 @router.get("/summary")
 async def get_file_paths_summary(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get summary statistics for file paths"""
     try:
         # Get total count
-        total_count = db.query(FilePath).filter(
+        total_count = await db.scalar(select(func.count(FilePath.id)).where(
             FilePath.user_id == current_user.id
-        ).count()
+        ))
 
         # Get unique extensions
-        extensions = db.query(
+        extensions = (await db.execute(select(
             FilePath.file_extension,
             func.count(FilePath.file_extension).label('count')
-        ).filter(
+        ).where(
             FilePath.user_id == current_user.id,
             FilePath.file_extension.isnot(None)
-        ).group_by(FilePath.file_extension).all()
+        ).group_by(FilePath.file_extension))).all()
 
         # Get unique folders
-        folders = db.query(
+        folders = (await db.execute(select(
             FilePath.folder_path,
             func.count(FilePath.folder_path).label('count')
-        ).filter(
+        ).where(
             FilePath.user_id == current_user.id
-        ).group_by(FilePath.folder_path).all()
+        ).group_by(FilePath.folder_path))).all()
 
         # Get total size
-        total_size = db.query(
+        total_size = await db.scalar(select(
             func.sum(FilePath.file_size)
-        ).filter(
+        ).where(
             FilePath.user_id == current_user.id,
             FilePath.file_size.isnot(None)
-        ).scalar() or 0
+        )) or 0
 
         return {
             "total_count": total_count,
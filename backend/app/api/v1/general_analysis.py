@@ -3,16 +3,24 @@ General analysis endpoints for VerificAI Backend - STO-007
 Updated for token display fix - FINAL VERSION
 """
 
-print("MODULE LOADED: general_analysis.py - 2025-12-09 22:08 - LATEST-CODE-ENTRY TEST")
 
+import json
+import logging
 from typing import List, Optional, Any
 from pathlib import Path
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, BackgroundTasks, Body, Request
-from sqlalchemy.orm import Session
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, BackgroundTasks, Body, Request, Query
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload, undefer
 from pydantic import BaseModel
 
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import get_async_db, SessionLocal
 from app.core.dependencies import get_current_user
+from app.core.logging import preview
+from app.core.pagination import paginate
+from app.core.tracing import span
 from app.models.user import User
 from app.models.analysis import Analysis, AnalysisStatus
 from app.models.prompt import Prompt, PromptCategory
@@ -23,8 +31,13 @@ from app.schemas.analysis import AnalysisCreate, AnalysisResponse
 from app.api.v1.analysis import process_analysis
 from app.services.prompt_service import get_prompt_service
 from app.services.llm_service import llm_service
+from app.services.output_budget import output_budget_estimator
+from app.services.prompt_builder import PromptBuilder
+from app.services.artifact_store import artifact_store, load_artifact
+from app.services.criteria_parser import CRITERIA_STATUSES, count_statuses
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 def get_uploaded_file_path(file_path: str, db: Session, user_id: int) -> str:
     """
@@ -32,7 +45,7 @@ def get_uploaded_file_path(file_path: str, db: Session, user_id: int) -> str:
     This handles the transition from path-based to upload-based file access.
     """
     try:
-        print(f"DEBUG: get_uploaded_file_path called with: file_path='{file_path}', user_id={user_id}")
+        logger.debug("Resolving uploaded file '%s' for user %s", file_path, user_id)
 
         # Helper function to find the most recent file that exists on disk
         def find_most_recent_existing(files_query):
@@ -44,15 +57,14 @@ def get_uploaded_file_path(file_path: str, db: Session, user_id: int) -> str:
                 # Use storage_path which contains the full path to the file
                 full_disk_path = uploaded_file.storage_path
                 if os.path.exists(full_disk_path):
-                    print(f"DEBUG: Found existing file: {uploaded_file.original_name} at {full_disk_path} from {uploaded_file.created_at}")
+                    logger.debug("Found %s at %s (%s)", uploaded_file.original_name, full_disk_path, uploaded_file.created_at)
                     return uploaded_file, full_disk_path
                 else:
-                    print(f"DEBUG: File not found on disk: {full_disk_path}")
+                    logger.debug("File not found on disk: %s", full_disk_path)
 
             return None, None
 
         # First, try to find by relative_path (for folder uploads)
-        print(f"DEBUG: Trying to find by relative_path: '{file_path}'")
         files_query = db.query(UploadedFile).filter(
             UploadedFile.relative_path == file_path,
             UploadedFile.user_id == user_id,
@@ -62,7 +74,7 @@ def get_uploaded_file_path(file_path: str, db: Session, user_id: int) -> str:
 
         if not uploaded_file:
             # If not found, try by original_name (for single file uploads)
-            print(f"DEBUG: Trying to find by original_name: '{file_path}'")
+            logger.debug("Trying original_name '%s'", file_path)
             files_query = db.query(UploadedFile).filter(
                 UploadedFile.original_name == file_path,
                 UploadedFile.user_id == user_id,
@@ -73,7 +85,7 @@ def get_uploaded_file_path(file_path: str, db: Session, user_id: int) -> str:
         if not uploaded_file:
             # If still not found, try partial matching (filename only)
             filename = file_path.split('/')[-1].split('\\')[-1]
-            print(f"DEBUG: Trying to find by filename only: '{filename}'")
+            logger.debug("Trying filename '%s'", filename)
             files_query = db.query(UploadedFile).filter(
                 UploadedFile.original_name == filename,
                 UploadedFile.user_id == user_id,
@@ -83,7 +95,7 @@ def get_uploaded_file_path(file_path: str, db: Session, user_id: int) -> str:
 
         if not uploaded_file:
             # If still not found, try by storage_path containing the filename
-            print(f"DEBUG: Trying to find by storage_path containing: '{file_path}'")
+            logger.debug("Trying storage_path containing '%s'", file_path)
             files_query = db.query(UploadedFile).filter(
                 UploadedFile.storage_path.like(f'%{file_path}%'),
                 UploadedFile.user_id == user_id,
@@ -91,29 +103,15 @@ def get_uploaded_file_path(file_path: str, db: Session, user_id: int) -> str:
             )
             uploaded_file, full_disk_path = find_most_recent_existing(files_query)
 
-        # Let's also check what files are available for this user if still not found
-        if not uploaded_file:
-            print(f"DEBUG: Checking all available files for user {user_id}:")
-            all_files = db.query(UploadedFile).filter(
-                UploadedFile.user_id == user_id,
-                UploadedFile.status == FileStatus.COMPLETED
-            ).order_by(UploadedFile.created_at.desc()).all()
-            print(f"DEBUG: Found {len(all_files)} total files for user")
-            for f in all_files[:5]:  # Show first 5 files
-                print(f"DEBUG:  - original_name: '{f.original_name}', file_path: '{f.file_path}', date: {f.created_at}")
-
         if uploaded_file and full_disk_path:
-            print(f"DEBUG: Returning valid file path: {full_disk_path}")
             return full_disk_path
 
         # If no uploaded file found, fall back to original path (for backward compatibility)
-        print(f"DEBUG: No uploaded file found for path: {file_path}, using original path")
+        logger.info("No uploaded file found for path %s, using the original path", file_path)
         return file_path
 
-    except Exception as e:
-        print(f"DEBUG: Error finding uploaded file: {e}")
-        import traceback
-        traceback.print_exc()
+    except Exception:
+        logger.exception("Error finding uploaded file %s", file_path)
         return file_path
 
 
@@ -168,15 +166,15 @@ async def create_general_analysis(
     request: GeneralAnalysisRequest,
     background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
     """Create a general analysis with custom criteria"""
     # Create or get general prompt
-    general_prompt = db.query(Prompt).filter(
+    general_prompt = await db.scalar(select(Prompt).where(
         Prompt.name == "General Analysis",
         Prompt.category == PromptCategory.GENERAL,
         Prompt.author_id == current_user.id
-    ).first()
+    ))
 
     if not general_prompt:
         # Create general prompt with user criteria
@@ -208,8 +206,8 @@ Format your response in markdown.
             is_public=False
         )
         db.add(general_prompt)
-        db.commit()
-        db.refresh(general_prompt)
+        await db.commit()
+        await db.refresh(general_prompt)
     else:
         # Update prompt content with new criteria
         criteria_text = "\n".join([f"- {criterion}" for criterion in request.criteria])
@@ -233,7 +231,7 @@ Provide your analysis in a structured format that includes:
 Format your response in markdown.
 """
         general_prompt.content = prompt_content
-        db.commit()
+        await db.commit()
 
     # Create analysis
     analysis_data = AnalysisCreate(
@@ -256,26 +254,35 @@ Format your response in markdown.
         status=AnalysisStatus.PENDING
     )
     db.add(analysis)
-    db.commit()
-    db.refresh(analysis)
+    await db.commit()
+    await db.refresh(analysis)
 
     # Start background processing
-    background_tasks.add_task(process_analysis, analysis.id, db)
+    background_tasks.add_task(_process_analysis_in_session, analysis.id)
 
     return analysis
 
 
+async def _process_analysis_in_session(analysis_id: int) -> None:
+    """process_analysis with its own session (the request session is closed by then)"""
+    db = SessionLocal()
+    try:
+        await process_analysis(analysis_id, db)
+    finally:
+        db.close()
+
+
 @router.get("/criteria")
 async def get_user_criteria(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
     """Get shared criteria from all users"""
     try:
         # Get all criteria from database (shared access)
-        all_criteria = db.query(GeneralCriteria).filter(
+        all_criteria = (await db.scalars(select(GeneralCriteria).where(
             GeneralCriteria.is_active == True
-        ).order_by(GeneralCriteria.order, GeneralCriteria.created_at).all()
+        ).order_by(GeneralCriteria.order, GeneralCriteria.created_at))).all()
 
         # Deduplicate by text and convert to response format
         seen_texts = set()
@@ -291,9 +298,7 @@ async def get_user_criteria(
 
         return result
     except Exception as e:
-        print(f"ERROR in get_user_criteria: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in get_user_criteria")
         raise e
 
 
@@ -301,15 +306,15 @@ async def get_user_criteria(
 async def create_criteria(
     request: CriterionCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
     """Create a new criterion"""
     # Get the highest order number for this user
-    max_order = db.query(GeneralCriteria).filter(
+    max_order = await db.scalar(select(func.max(GeneralCriteria.order)).where(
         GeneralCriteria.user_id == current_user.id
-    ).order_by(GeneralCriteria.order.desc()).first()
+    ))
 
-    next_order = (max_order.order + 1) if max_order else 0
+    next_order = (max_order + 1) if max_order is not None else 0
 
     # Create new criterion
     new_criterion = GeneralCriteria(
@@ -320,8 +325,8 @@ async def create_criteria(
     )
 
     db.add(new_criterion)
-    db.commit()
-    db.refresh(new_criterion)
+    await db.commit()
+    await db.refresh(new_criterion)
 
     # Return created criterion
     return GeneralCriteriaResponse(
@@ -336,7 +341,7 @@ async def update_criteria(
     criteria_id: str,
     request: CriterionCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
     """Update an existing criterion"""
     # Extract the actual ID from the criteria_id string
@@ -349,9 +354,9 @@ async def update_criteria(
         )
 
     # Find the criterion (allow update of any criteria since they are shared)
-    criterion = db.query(GeneralCriteria).filter(
+    criterion = await db.scalar(select(GeneralCriteria).where(
         GeneralCriteria.id == actual_id
-    ).first()
+    ))
 
     if not criterion:
         raise HTTPException(
@@ -361,8 +366,8 @@ async def update_criteria(
 
     # Update the criterion
     criterion.text = request.text
-    db.commit()
-    db.refresh(criterion)
+    await db.commit()
+    await db.refresh(criterion)
 
     return GeneralCriteriaResponse(
         id=f"criteria_{criterion.id}",
@@ -375,7 +380,7 @@ async def update_criteria(
 async def delete_criteria(
     criteria_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
     """Delete a criterion"""
     # Extract the actual ID from the criteria_id string
@@ -388,27 +393,28 @@ async def delete_criteria(
         )
 
     # Debug: Log the ID being searched
-    print(f"DEBUG: Searching for criterion with ID: {actual_id}")
-    print(f"DEBUG: Original criteria_id: {criteria_id}")
+    logger.debug("Searching for criterion with ID %s", actual_id)
+    logger.debug("Original criteria_id: %s", criteria_id)
 
     # Find the criterion (allow deletion of any criteria since they are shared)
-    criterion = db.query(GeneralCriteria).filter(
+    criterion = await db.scalar(select(GeneralCriteria).where(
         GeneralCriteria.id == actual_id
-    ).first()
+    ))
 
     if not criterion:
-        # Debug: Check if criterion exists with different query
-        all_criteria = db.query(GeneralCriteria).all()
-        print(f"DEBUG: All criteria IDs: {[c.id for c in all_criteria]}")
-        print(f"DEBUG: Criterion with ID {actual_id} not found")
+        # Debug: Check if criterion exists with different query (only queried when DEBUG is on)
+        if logger.isEnabledFor(logging.DEBUG):
+            all_ids = (await db.scalars(select(GeneralCriteria.id))).all()
+            logger.debug("All criteria IDs: %s", list(all_ids))
+        logger.debug("Criterion with ID %s not found", actual_id)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Criterion not found"
         )
 
     # Delete the criterion
-    db.delete(criterion)
-    db.commit()
+    await db.delete(criterion)
+    await db.commit()
 
     return {"message": "Criterion deleted successfully"}
 
@@ -417,7 +423,7 @@ async def delete_criteria(
 async def delete_criteria_post(
     criteria_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
     """Delete criterion using POST method"""
     try:
@@ -425,15 +431,15 @@ async def delete_criteria_post(
     except ValueError:
         return {"error": "Invalid criteria ID format"}
 
-    criterion = db.query(GeneralCriteria).filter(
+    criterion = await db.scalar(select(GeneralCriteria).where(
         GeneralCriteria.id == actual_id
-    ).first()
+    ))
 
     if not criterion:
         return {"error": f"Criterion not found with ID {actual_id}"}
 
-    db.delete(criterion)
-    db.commit()
+    await db.delete(criterion)
+    await db.commit()
 
     return {"message": "Criterion deleted successfully", "deleted_id": actual_id}
 
@@ -442,7 +448,7 @@ async def delete_criteria_post(
 async def delete_criteria_temp(
     criteria_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
     """Temporary delete criterion endpoint"""
     try:
@@ -450,15 +456,15 @@ async def delete_criteria_temp(
     except ValueError:
         return {"error": "Invalid criteria ID format"}
 
-    criterion = db.query(GeneralCriteria).filter(
+    criterion = await db.scalar(select(GeneralCriteria).where(
         GeneralCriteria.id == actual_id
-    ).first()
+    ))
 
     if not criterion:
         return {"error": f"Criterion not found with ID {actual_id}"}
 
-    db.delete(criterion)
-    db.commit()
+    await db.delete(criterion)
+    await db.commit()
 
     return {"message": "Criterion deleted successfully", "deleted_id": actual_id}
 
@@ -467,7 +473,7 @@ async def delete_criteria_temp(
 async def delete_criteria_simple(
     criteria_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
     """Simple delete criterion endpoint"""
     try:
@@ -475,15 +481,15 @@ async def delete_criteria_simple(
     except ValueError:
         return {"error": "Invalid criteria ID format"}
 
-    criterion = db.query(GeneralCriteria).filter(
+    criterion = await db.scalar(select(GeneralCriteria).where(
         GeneralCriteria.id == actual_id
-    ).first()
+    ))
 
     if not criterion:
         return {"error": f"Criterion not found with ID {actual_id}"}
 
-    db.delete(criterion)
-    db.commit()
+    await db.delete(criterion)
+    await db.commit()
 
     return {"message": "Criterion deleted successfully", "deleted_id": actual_id}
 
@@ -491,17 +497,17 @@ async def delete_criteria_simple(
 @router.get("/debug-direct")
 async def debug_direct(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
     """Direct database test"""
     try:
         # Test direct database access
-        criterion = db.query(GeneralCriteria).filter(GeneralCriteria.id == 57).first()
+        criterion = await db.get(GeneralCriteria, 57)
         return {
             "criterion_57_found": criterion is not None,
             "criterion_57_text": criterion.text if criterion else None,
             "criterion_57_user_id": criterion.user_id if criterion else None,
-            "total_criteria": db.query(GeneralCriteria).count()
+            "total_criteria": await db.scalar(select(func.count(GeneralCriteria.id)))
         }
     except Exception as e:
         return {"error": str(e)}
@@ -510,7 +516,7 @@ async def debug_direct(
 @router.get("/debug-delete-test")
 async def debug_delete_test(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
     """Test DELETE logic directly"""
     try:
@@ -518,9 +524,9 @@ async def debug_delete_test(
         criteria_id = 'criteria_23'
         actual_id = int(criteria_id.replace('criteria_', ''))
 
-        criterion = db.query(GeneralCriteria).filter(
+        criterion = await db.scalar(select(GeneralCriteria).where(
             GeneralCriteria.id == actual_id
-        ).first()
+        ))
 
         if criterion:
             result = {
@@ -531,8 +537,7 @@ async def debug_delete_test(
                 "is_active": criterion.is_active
             }
         else:
-            all_criteria = db.query(GeneralCriteria).all()
-            all_ids = [c.id for c in all_criteria]
+            all_ids = list((await db.scalars(select(GeneralCriteria.id))).all())
             result = {
                 "found": False,
                 "searched_id": actual_id,
@@ -547,13 +552,11 @@ async def debug_delete_test(
 @router.get("/debug-test")
 async def debug_test(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
     """Debug endpoint to verify if changes are applied"""
     # Test finding a criterion without user_id filter
-    criterion = db.query(GeneralCriteria).filter(
-        GeneralCriteria.id == 55
-    ).first()
+    criterion = await db.get(GeneralCriteria, 55)
 
     return {
         "message": "Debug test successful",
@@ -567,17 +570,17 @@ async def debug_test(
 @router.get("/latest-code-entry")
 async def get_latest_code_entry(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
     """Get the latest code entry from the current user"""
     try:
-        print(f"DEBUG: Getting latest code entry for user {current_user.id}")
+        logger.debug("Getting latest code entry for user %s", current_user.id)
 
         # Get the most recent code entry for the current user
-        latest_entry = db.query(CodeEntry).filter(
+        latest_entry = await db.scalar(select(CodeEntry).options(undefer(CodeEntry.code_content)).where(
             CodeEntry.user_id == current_user.id,
             CodeEntry.is_active == True
-        ).order_by(CodeEntry.created_at.desc()).first()
+        ).order_by(CodeEntry.created_at.desc()).limit(1))
 
         if not latest_entry:
             return {
@@ -590,7 +593,7 @@ async def get_latest_code_entry(
                 "characters_count": 0
             }
 
-        print(f"DEBUG: Found latest code entry: {latest_entry.title} ({latest_entry.lines_count} lines)")
+        logger.debug("Found latest code entry: %s (%s lines)", latest_entry.title, latest_entry.lines_count)
 
         return {
             "success": True,
@@ -606,9 +609,7 @@ async def get_latest_code_entry(
         }
 
     except Exception as e:
-        print(f"ERROR in get_latest_code_entry: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in get_latest_code_entry")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error retrieving latest code entry: {str(e)}"
@@ -619,10 +620,13 @@ async def get_latest_code_entry(
 async def get_general_analysis_result(
     analysis_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
     """Get general analysis result"""
-    analysis = db.query(Analysis).filter(Analysis.id == analysis_id).first()
+    analysis = await db.scalar(
+        select(Analysis).options(selectinload(Analysis.result)).where(Analysis.id == analysis_id)
+        .execution_options(populate_existing=True)
+    )
     if not analysis:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -674,17 +678,17 @@ async def get_general_analysis_result(
 @router.post("/get-latest-code-entry")
 async def get_latest_code_entry_post(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
     """Get the latest code entry from the current user using POST method"""
     try:
-        print(f"DEBUG: Getting latest code entry for user {current_user.id}")
+        logger.debug("Getting latest code entry for user %s", current_user.id)
 
         # Get the most recent code entry for the current user
-        latest_entry = db.query(CodeEntry).filter(
+        latest_entry = await db.scalar(select(CodeEntry).options(undefer(CodeEntry.code_content)).where(
             CodeEntry.user_id == current_user.id,
             CodeEntry.is_active == True
-        ).order_by(CodeEntry.created_at.desc()).first()
+        ).order_by(CodeEntry.created_at.desc()).limit(1))
 
         if not latest_entry:
             return {
@@ -697,7 +701,7 @@ async def get_latest_code_entry_post(
                 "characters_count": 0
             }
 
-        print(f"DEBUG: Found latest code entry: {latest_entry.title} ({latest_entry.lines_count} lines)")
+        logger.debug("Found latest code entry: %s (%s lines)", latest_entry.title, latest_entry.lines_count)
 
         return {
             "success": True,
@@ -713,9 +717,7 @@ async def get_latest_code_entry_post(
         }
 
     except Exception as e:
-        print(f"ERROR in get_latest_code_entry_post: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in get_latest_code_entry_post")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error retrieving latest code entry: {str(e)}"
@@ -731,40 +733,41 @@ async def options_analyze_selected(request: Request):
 async def analyze_selected_criteria(
     request: AnalyzeSelectedRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
     """Analyze selected criteria using LLM with dynamic prompt insertion"""
-    # DEBUG: Updated with better logging for debugging
     try:
-        print(f"DEBUG: === STARTING ANALYZE-SELECTED FUNCTION ===")
-        print(f"DEBUG: Starting analysis for criteria: {request.criteria_ids}")
-        print(f"DEBUG: File paths: {request.file_paths}")
-        print(f"DEBUG: User: {current_user.username} (ID: {current_user.id})")
-        print(f"DEBUG: use_code_entry: {request.use_code_entry}")
-        print(f"DEBUG: code_entry_id: {request.code_entry_id}")
-
-        # Get prompt service
-        print("DEBUG: Getting prompt service...")
-        prompt_service = get_prompt_service(db)
-
-        # Step 1: Read the general prompt from database (CORRECTED TO USE PROMPT ID 4)
-        print("DEBUG: Getting general prompt from database...")
-        try:
-            # CORRECTED: Use prompt ID 4 which has the correct structure and placeholder
-            general_prompt = prompt_service.get_general_prompt(4)  # Use Template com Código Fonte no Início
-            print(f"DEBUG: Using prompt ID 4 (Template com Código Fonte no Início) - contains [INSERIR CÓDIGO AQUI]")
-            if "[INSERIR CÓDIGO AQUI]" not in general_prompt:
-                print(f"DEBUG: WARNING - Prompt ID 4 doesn't contain placeholder, using default")
-                general_prompt = prompt_service._get_default_general_prompt()
-        except Exception as e:
-            print(f"DEBUG: Error getting prompt 4, using default: {e}")
-            general_prompt = prompt_service._get_default_general_prompt()
-        print(f"DEBUG: Retrieved general prompt length: {len(general_prompt)}")
+        logger.info(
+            "Analyzing criteria %s for user %s (use_code_entry=%s, code_entry_id=%s, files=%s)",
+            request.criteria_ids, current_user.id, request.use_code_entry, request.code_entry_id, request.file_paths
+        )
+
+        # The prompt service works on a sync Session: run it on the async connection
+        def load_prompt(session: Session):
+            # Get prompt service
+            prompt_service = get_prompt_service(session)
+
+            # Step 1: Read the general prompt from database (CORRECTED TO USE PROMPT ID 4)
+            try:
+                # CORRECTED: Use prompt ID 4 which has the correct structure and placeholder
+                # Served from the template cache: no DB hit unless the template changed
+                compiled_prompt = prompt_service.get_compiled_prompt(4)  # Use Template com Código Fonte no Início
+                if not compiled_prompt.has_code_placeholder:
+                    logger.warning("Prompt 4 has no code placeholder, using the default prompt")
+                    compiled_prompt = prompt_service.get_default_compiled_prompt()
+            except Exception as e:
+                logger.warning("Error getting prompt 4, using the default prompt: %s", e)
+                compiled_prompt = prompt_service.get_default_compiled_prompt()
+            logger.debug("General prompt: %d characters", len(compiled_prompt.content))
+            return prompt_service, compiled_prompt
+
+        with span("analysis.prompt_fetch"):
+            prompt_service, compiled_prompt = await db.run_sync(load_prompt)
 
         # Step 2: Get selected criteria from database
-        print("DEBUG: Getting selected criteria from database...")
-        selected_criteria = prompt_service.get_selected_criteria(request.criteria_ids)
-        print(f"DEBUG: Found {len(selected_criteria)} criteria")
+        with span("analysis.criteria_fetch", {"analysis.criteria_requested": len(request.criteria_ids)}):
+            selected_criteria = await db.run_sync(lambda session: prompt_service.get_selected_criteria(request.criteria_ids))
+        logger.debug("Found %d criteria", len(selected_criteria))
 
         if not selected_criteria:
             raise HTTPException(
@@ -772,404 +775,352 @@ async def analyze_selected_criteria(
                 detail="No valid criteria found"
             )
 
-        # Step 3: Insert criteria into prompt (in memory only)
-        modified_prompt = prompt_service.insert_criteria_into_prompt(general_prompt, selected_criteria)
-        print(f"DEBUG: Modified prompt length: {len(modified_prompt)}")
+        # Step 3: Insert criteria into prompt (in memory only, cached per template version and criteria set)
+        with span("analysis.prompt_build", {"analysis.criteria_count": len(selected_criteria)}):
+            rendered_prompt = prompt_service.render_prompt(compiled_prompt, selected_criteria)
+            modified_prompt = rendered_prompt.text
+            logger.debug("Prompt with criteria: %d characters", len(modified_prompt))
 
         # Step 4: Get source code from code_entries table or files
-        try:
-            all_source_code = ""
-            source_info = ""
-            total_files_processed = 0
-
-            if request.use_code_entry:
-                # Buscar código da tabela code_entries
-                print(f"DEBUG: Getting code from code_entries table")
-
-                code_entry = None
-
-                # Se um ID específico foi fornecido, usar esse
-                if request.code_entry_id:
-                    code_entry = db.query(CodeEntry).filter(
-                        CodeEntry.id == request.code_entry_id,
-                        CodeEntry.user_id == current_user.id,
-                        CodeEntry.is_active == True
-                    ).first()
-                    print(f"DEBUG: Looking for specific code_entry_id: {request.code_entry_id}")
-                else:
-                    # Caso contrário, buscar o mais recente
-                    code_entry = db.query(CodeEntry).filter(
-                        CodeEntry.user_id == current_user.id,
-                        CodeEntry.is_active == True
-                    ).order_by(CodeEntry.created_at.desc()).first()
-                    print(f"DEBUG: Looking for latest code entry")
-
-                if not code_entry:
-                    raise HTTPException(
-                        status_code=400,
-                        detail="Nenhum código encontrado na tabela de colagem. Por favor, cole um código na página de colagem primeiro."
+        # The code is kept as a list of parts and only joined once, when the LLM payload is built
+        prompt_builder = PromptBuilder(segments=rendered_prompt.segments)
+        with span("analysis.code_load", {"analysis.source": "code_entry" if request.use_code_entry else "files"}):
+            try:
+                total_files_processed = 0
+
+                if request.use_code_entry:
+                    # Buscar código da tabela code_entries
+                    code_entry = None
+
+                    # Se um ID específico foi fornecido, usar esse
+                    if request.code_entry_id:
+                        code_entry = await db.scalar(select(CodeEntry).options(undefer(CodeEntry.code_content)).where(
+                            CodeEntry.id == request.code_entry_id,
+                            CodeEntry.user_id == current_user.id,
+                            CodeEntry.is_active == True
+                        ))
+                    else:
+                        # Caso contrário, buscar o mais recente
+                        code_entry = await db.scalar(select(CodeEntry).options(undefer(CodeEntry.code_content)).where(
+                            CodeEntry.user_id == current_user.id,
+                            CodeEntry.is_active == True
+                        ).order_by(CodeEntry.created_at.desc()).limit(1))
+
+                    if not code_entry:
+                        raise HTTPException(
+                            status_code=400,
+                            detail="Nenhum código encontrado na tabela de colagem. Por favor, cole um código na página de colagem primeiro."
+                        )
+
+                    file_size = len(code_entry.code_content)
+
+                    # Adicionar informações sobre o código
+                    source_info = (
+                        f"\n\n{'='*60}\n"
+                        f"CÓDIGO COLADO: {code_entry.title}\n"
+                        f"DESCRIÇÃO: {code_entry.description or 'Sem descrição'}\n"
+                        f"LINGUAGEM: {code_entry.language or 'Não detectada'}\n"
+                        f"TAMANHO: {file_size} caracteres\n"
+                        f"LINHAS: {code_entry.lines_count}\n"
+                        f"CRIADO EM: {code_entry.created_at}\n"
+                        f"{'='*60}\n\n"
                     )
+                    prompt_builder.add_source(source_info, code_entry.code_content)
 
-                all_source_code = code_entry.code_content
-                file_size = len(all_source_code)
-
-                # Adicionar informações sobre o código
-                source_info = f"\n\n{'='*60}\n"
-                source_info += f"CÓDIGO COLADO: {code_entry.title}\n"
-                source_info += f"DESCRIÇÃO: {code_entry.description or 'Sem descrição'}\n"
-                source_info += f"LINGUAGEM: {code_entry.language or 'Não detectada'}\n"
-                source_info += f"TAMANHO: {file_size} caracteres\n"
-                source_info += f"LINHAS: {code_entry.lines_count}\n"
-                source_info += f"CRIADO EM: {code_entry.created_at}\n"
-                source_info += f"{'='*60}\n\n"
-
-                print(f"DEBUG: Found code entry: {code_entry.title} ({file_size} characters)")
-                total_files_processed = 1
-
-            else:
-                # Mantido para compatibilidade: ler dos arquivos (caminho original)
-                if not request.file_paths or len(request.file_paths) == 0:
-                    raise HTTPException(status_code=400, detail="No file paths provided")
+                    logger.debug("Code entry %s: %s (%d characters)", code_entry.id, code_entry.title, file_size)
+                    total_files_processed = 1
 
-                print(f"DEBUG: Processing {len(request.file_paths)} files for analysis")
-
-                # Process each file and combine them
-                for i, source_file_path in enumerate(request.file_paths):
-                    try:
-                        print(f"DEBUG: Processing file {i+1}/{len(request.file_paths)}: {source_file_path}")
-
-                        # Try to find the uploaded file and get its real storage path
-                        actual_file_path = get_uploaded_file_path(source_file_path, db, current_user.id)
-                        print(f"DEBUG: Actual file path to read: {actual_file_path}")
-
-                        with open(actual_file_path, "r", encoding="utf-8") as f:
-                            file_content = f.read()
-                            file_size = len(file_content)
-                            print(f"DEBUG: File read successfully: {file_size} characters")
-
-                        # Add file header and content to the combined source code
-                        file_extension = source_file_path.split('.')[-1] if '.' in source_file_path else 'txt'
-                        source_info += f"\n\n{'='*60}\n"
-                        source_info += f"ARQUIVO: {source_file_path}\n"
-                        source_info += f"TAMANHO: {file_size} caracteres\n"
-                        source_info += f"TIPO: {file_extension.upper()}\n"
-                        source_info += f"{'='*60}\n\n"
-                        all_source_code += file_content
-
-                        total_files_processed += 1
-
-                    except Exception as file_error:
-                        print(f"DEBUG: Error processing file {source_file_path}: {file_error}")
-                        # Continue with other files even if one fails
-                        continue
-
-                print(f"DEBUG: Successfully processed {total_files_processed}/{len(request.file_paths)} files")
-
-            print(f"DEBUG: Total source code size: {len(all_source_code)} characters")
-
-            if total_files_processed == 0:
-                raise HTTPException(status_code=500, detail="Nenhum código pôde ser lido para análise")
-
-        except HTTPException:
-            raise
-        except Exception as e:
-            print(f"DEBUG: Error reading source code: {e}")
-            raise HTTPException(status_code=500, detail=f"Erro ao ler código fonte: {str(e)}")
+                else:
+                    # Mantido para compatibilidade: ler dos arquivos (caminho original)
+                    if not request.file_paths or len(request.file_paths) == 0:
+                        raise HTTPException(status_code=400, detail="No file paths provided")
+
+                    # Process each file and combine them
+                    for i, source_file_path in enumerate(request.file_paths):
+                        try:
+                            # Try to find the uploaded file and get its real storage path
+                            with span("analysis.file_resolution", {"file.path": source_file_path}):
+                                actual_file_path = await db.run_sync(
+                                    lambda session: get_uploaded_file_path(source_file_path, session, current_user.id)
+                                )
+
+                            with open(actual_file_path, "r", encoding="utf-8") as f:
+                                file_content = f.read()
+                                file_size = len(file_content)
+                                logger.debug("Read file %d/%d %s: %d characters",
+                                             i + 1, len(request.file_paths), actual_file_path, file_size)
+
+                            # Add file header and content to the combined source code
+                            file_extension = source_file_path.split('.')[-1] if '.' in source_file_path else 'txt'
+                            source_info = (
+                                f"\n\n{'='*60}\n"
+                                f"ARQUIVO: {source_file_path}\n"
+                                f"TAMANHO: {file_size} caracteres\n"
+                                f"TIPO: {file_extension.upper()}\n"
+                                f"{'='*60}\n\n"
+                            )
+                            prompt_builder.add_source(source_info, file_content)
+
+                            total_files_processed += 1
+
+                        except Exception as file_error:
+                            logger.warning("Error processing file %s: %s", source_file_path, file_error)
+                            # Continue with other files even if one fails
+                            continue
+
+                    logger.debug("Processed %d/%d files", total_files_processed, len(request.file_paths))
+
+                logger.debug("Total source code size: %d characters", prompt_builder.code_length)
+
+                if total_files_processed == 0:
+                    raise HTTPException(status_code=500, detail="Nenhum código pôde ser lido para análise")
+
+            except HTTPException:
+                raise
+            except Exception as e:
+                logger.error("Error reading source code: %s", e)
+                raise HTTPException(status_code=500, detail=f"Erro ao ler código fonte: {str(e)}")
 
         # Replace placeholder with source code (from code_entries or files)
-        full_source_code = source_info + all_source_code
-        final_prompt = modified_prompt.replace("[INSERIR CÓDIGO AQUI]", full_source_code)
-        print(f"DEBUG: Replaced placeholder with source code")
-        print(f"DEBUG: Final prompt length: {len(final_prompt)}")
-
-        # DEBUG: Check if we're reaching the prompt saving section
-        print(f"DEBUG: About to save prompt - total_files_processed: {total_files_processed}")
-        print(f"DEBUG: Prompt directory will be: {Path(__file__).parent.parent.parent.parent / 'prompts'}")
-
-        # Save the final prompt to files for analysis
-        try:
-            import os
-            from datetime import datetime
-
-            # Create prompts directory if it doesn't exist
-            prompts_dir = Path(__file__).parent.parent.parent.parent / "prompts"
-            print(f"DEBUG: Creating prompts directory at: {prompts_dir}")
-            prompts_dir.mkdir(exist_ok=True)
-            print(f"DEBUG: Prompts directory exists: {prompts_dir.exists()}")
-
-            # Create latest prompt file (always overwritten with the most recent)
-            latest_prompt_path = prompts_dir / "latest_prompt.txt"
-
-            # Write the complete prompt to latest file (always the most recent)
-            with open(latest_prompt_path, "w", encoding="utf-8") as f:
-                f.write("="*80 + "\n")
-                f.write(f"LTIMO PROMPT ENVIADO PARA LLM - {datetime.now().isoformat()}\n")
-                f.write("="*80 + "\n\n")
-                f.write(f"TAMANHO TOTAL: {len(final_prompt)} caracteres\n")
-                f.write(f"ARQUIVOS PROCESSADOS: {total_files_processed}\n")
-                f.write(f"CRITRIOS: {len(request.criteria_ids)}\n")
-                f.write(f"USURIO: {current_user.username} (ID: {current_user.id})\n\n")
-                f.write("="*80 + "\n")
-                f.write("CONTEDO COMPLETO DO PROMPT:\n")
-                f.write("="*80 + "\n\n")
-                f.write(final_prompt)
-                f.write("\n\n" + "="*80 + "\n")
-                f.write("FIM DO PROMPT\n")
-                f.write("="*80 + "\n")
-
-            print(f"DEBUG: ltimo prompt salvo em: {latest_prompt_path}")
-
-        except Exception as save_error:
-            print(f"DEBUG: Erro ao salvar prompt em arquivo: {save_error}")
-
-        # Log do prompt completo para debug
-        print("\n" + "="*80)
-        print("PROMPT FINAL ENVIADO PARA A LLM:")
-        print("="*80)
-        print(final_prompt[:1000] + "..." if len(final_prompt) > 1000 else final_prompt)
-        print("="*80)
-        print("FIM DO PROMPT")
-        print("="*80 + "\n")
-
-        # Force override max_tokens to prevent truncation
-        forced_max_tokens = 32000  # Force 32000 tokens to ensure complete response
-
-        print(f"=== SENDING TO LLM SERVICE ===")
-        print(f"DEBUG: About to send prompt of length {len(final_prompt)}")
-        print(f"DEBUG: Temperature: {request.temperature}, Original Max tokens: {request.max_tokens}")
-        print(f"DEBUG: FORCED Max tokens: {forced_max_tokens} (overriding frontend value)")
-
-        # Increase timeout for LLM response to ensure complete analysis
-        try:
-            llm_response = await llm_service.send_prompt(
-                final_prompt,
-                temperature=request.temperature,
-                max_tokens=forced_max_tokens  # Force 32000 tokens to prevent truncation
-            )
-        except Exception as llm_error:
-            print(f"ERROR: LLM service failed: {llm_error}")
-            import traceback
-            traceback.print_exc()
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Erro na comunicao com o servio de LLM: {str(llm_error)}"
-            )
+        # With prompt caching, template + criteria go first as a cacheable prefix and the code goes last
+        cacheable = settings.LLM_PROMPT_CACHE_ENABLED
+        final_prompt_length = prompt_builder.length(cacheable)
+        logger.debug(
+            "Prompt assembled from %d sources: %d characters (cacheable prefix: %s)",
+            prompt_builder.sources, final_prompt_length, cacheable
+        )
+        # The head is only built when DEBUG is on (the full prompt is kept as an artifact)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Prompt head: %s", preview(prompt_builder.head(settings.LOG_PREVIEW_CHARS, cacheable)))
+
+        # Size the output budget from the number of criteria and the tokens per criterion seen so far;
+        # truncated responses are completed by the LLM service continuations. The client max_tokens
+        # (the frontend always sends 4000) is ignored, as before; the cap is LLM_MAX_OUTPUT_TOKENS
+        with span("analysis.output_budget"):
+            await db.run_sync(output_budget_estimator.seed_from_db)
+        max_output_tokens = output_budget_estimator.estimate(len(selected_criteria))
+
+        logger.info(
+            "Sending %d-character prompt to the LLM: temperature %s, max output tokens %d "
+            "for %d criteria (~%.0f tokens/criterion)",
+            final_prompt_length, request.temperature, max_output_tokens,
+            len(selected_criteria), output_budget_estimator.tokens_per_criterion()
+        )
 
-        print("XXXXXXXXXX DEBUG: LLM response received XXXXXXXXXX")
-        print(f"DEBUG: LLM response type: {type(llm_response)}")
-        print(f"DEBUG: LLM response keys: {llm_response.keys() if isinstance(llm_response, dict) else 'Not a dict'}")
-        print(f"DEBUG: Full LLM response: {llm_response}")
+        with span("analysis.llm", {
+            "llm.prompt_chars": final_prompt_length,
+            "llm.max_output_tokens": max_output_tokens,
+            "llm.streaming": settings.LLM_STREAMING_ENABLED
+        }):
+            try:
+                llm_response = await llm_service.send_prompt(
+                    prompt_builder.suffix_parts() if cacheable else prompt_builder.inline_parts(),
+                    cacheable_prefix=prompt_builder.prefix if cacheable else None,
+                    inline_prompt=prompt_builder.inline_parts() if cacheable else None,
+                    temperature=request.temperature,
+                    max_tokens=max_output_tokens,
+                    stream=settings.LLM_STREAMING_ENABLED
+                )
+            except Exception as llm_error:
+                logger.exception("LLM service failed")
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail=f"Erro na comunicao com o servio de LLM: {str(llm_error)}"
+                )
 
         llm_response_content = llm_response.get('response', '')
-        print("YYYYYYYYYY DEBUG: Checking response content YYYYYYYYYY")
-        print(f"DEBUG: LLM response['response'] type: {type(llm_response_content)}")
-        print(f"DEBUG: LLM response['response'] length: {len(llm_response_content)}")
-        print(f"DEBUG: LLM response['response'] preview: {llm_response_content[:200]}")
-        print(f"DEBUG: Is response empty? {not llm_response_content}")
-        print("ZZZZZZZZZ END LLM SERVICE DEBUG ZZZZZZZZZ")
+        logger.info("LLM response from %s: %d characters", llm_response.get('model'), len(llm_response_content))
+        logger.debug("LLM response: %s", preview(llm_response_content))
 
         # Check if response is empty
         if not llm_response_content:
-            print("ERROR: LLM response is empty!")
+            logger.error("LLM response is empty")
             extracted_content = {"criteria_results": {}, "raw_response": ""}
         else:
             # Step 7: Extract content from LLM response
-            print(f"=== RAW LLM RESPONSE FOR DEBUG ===")
-            print(f"Content type: {type(llm_response_content)}")
-            print(f"Content length: {len(llm_response_content)}")
-            print(f"Content preview: {llm_response_content[:500]}")
-            print(f"=== END RAW LLM RESPONSE ===")
-
-            # DEBUG: Test if response contains expected patterns
-            print(f"=== DEBUG RESPONSE PATTERNS ===")
-            print(f"Contains 'Critrio': {'Critrio' in llm_response_content}")
-            print(f"Contains '##': {'##' in llm_response_content}")
-            print(f"Contains 'Status:': {'Status:' in llm_response_content}")
-            print(f"Contains 'Confiana': {'Confiana' in llm_response_content}")
-            print(f"=== END DEBUG PATTERNS ===")
-
-            print(f"DEBUG: About to call extract_markdown_content with response of length {len(llm_response_content)}")
-            try:
-                extracted_content = llm_service.extract_markdown_content(llm_response_content)
-            except Exception as extract_error:
-                print(f"ERROR: extract_markdown_content failed: {extract_error}")
-                import traceback
-                traceback.print_exc()
-                # Fallback content if extraction fails
-                extracted_content = {
-                    "criteria_results": {},
-                    "raw_response": llm_response_content
-                }
-            print(f"DEBUG: extract_markdown_content returned: {type(extracted_content)}")
-            print(f"DEBUG: extracted_content keys: {extracted_content.keys() if isinstance(extracted_content, dict) else 'Not a dict'}")
-            print(f"DEBUG: criteria_results in extracted_content: {extracted_content.get('criteria_results', {}) if isinstance(extracted_content, dict) else 'N/A'}")
-
-            # DEBUG: Show criteria_results details
-            if isinstance(extracted_content, dict) and 'criteria_results' in extracted_content:
-                criteria_results = extracted_content['criteria_results']
-                print(f"DEBUG: criteria_results type: {type(criteria_results)}")
-                print(f"DEBUG: criteria_results content: {criteria_results}")
-                print(f"DEBUG: criteria_results empty: {not criteria_results}")
-                if isinstance(criteria_results, dict):
-                    print(f"DEBUG: criteria_results keys: {list(criteria_results.keys())}")
-                    for key, value in criteria_results.items():
-                        print(f"DEBUG: {key}: {type(value)} - {str(value)[:100] if value else 'None'}")
-
-            # Step 7.5: Map extracted criteria results to actual criteria IDs
-            print(f"DEBUG: Starting criteria ID mapping...")
-            print(f"DEBUG: Selected criteria: {selected_criteria}")
-            print(f"DEBUG: Request criteria IDs: {request.criteria_ids}")
-
-            # Create mapping from criteria name to criteria ID
-            criteria_name_to_id = {}
-            for criteria in selected_criteria:
-                # criteria is a GeneralCriteria object with id and text attributes
-                criteria_name_to_id[criteria.text.strip().lower()] = criteria.id
-                print(f"DEBUG: Mapping '{criteria.text.strip().lower()}' to ID {criteria.id}")
-
-            # Also create a mapping from the position in the request to the criteria ID
-            position_to_id = {}
-            for i, criteria_id_str in enumerate(request.criteria_ids):
-                actual_id = int(criteria_id_str.replace("criteria_", ""))
-                position_to_id[i] = actual_id
-                print(f"DEBUG: Position {i} maps to criteria_{actual_id}")
-
-            # Remap criteria_results to use actual criteria IDs instead of position-based keys
-            remapped_criteria_results = {}
-
-            # First pass: Try to map by name matching and position
-            for extracted_key, result_data in extracted_content.get("criteria_results", {}).items():
-                print(f"DEBUG: Processing extracted key: {extracted_key}, result: {result_data}")
-
-                # Extract the position number from the key (criteria_1, criteria_2, etc.)
-                key_position = None
-                if extracted_key.startswith("criteria_"):
-                    try:
-                        key_position = int(extracted_key.replace("criteria_", "")) - 1  # Convert to 0-based index
-                    except ValueError:
-                        pass
-
-                # Method 1: Try to map by position first (most reliable)
-                if key_position is not None and key_position in position_to_id:
-                    criteria_id = position_to_id[key_position]
-                    # IMPORTANT: Always use the original criteria text from database
-                    original_criteria = next((c for c in selected_criteria if c.id == criteria_id), None)
-                    if original_criteria:
-                        result_data["name"] = original_criteria.text  # Override LLM name with original
-                        remapped_criteria_results[f"criteria_{criteria_id}"] = result_data
-                        print(f"DEBUG: Mapped by position {key_position} to criteria_{criteria_id}, using original name: '{original_criteria.text}'")
-                        continue
-
-                # Method 2: Try to find matching criteria by name (fallback)
-                result_name = result_data.get("name", "").strip().lower()
-                print(f"DEBUG: Looking for criteria with name: '{result_name}'")
-
-                # Try exact match first
-                if result_name in criteria_name_to_id:
-                    criteria_id = criteria_name_to_id[result_name]
-                    # IMPORTANT: Always use the original criteria text from database
-                    original_criteria = next((c for c in selected_criteria if c.id == criteria_id), None)
-                    if original_criteria:
-                        result_data["name"] = original_criteria.text  # Override LLM name with original
-                        remapped_criteria_results[f"criteria_{criteria_id}"] = result_data
-                        print(f"DEBUG: Found exact match - mapped to criteria_{criteria_id}, using original name: '{original_criteria.text}'")
-                else:
-                    # Try fuzzy matching
-                    found_match = False
-                    for criteria_text, candidate_id in criteria_name_to_id.items():
-                        # Check if the result name contains the criteria text or vice versa
-                        if (result_name in criteria_text or
-                            criteria_text in result_name or
-                            result_name.split(':')[0].strip() in criteria_text or
-                            criteria_text.split(':')[0].strip() in result_name):
-                            # IMPORTANT: Always use the original criteria text from database
-                            original_criteria = next((c for c in selected_criteria if c.id == candidate_id), None)
-                            if original_criteria:
-                                result_data["name"] = original_criteria.text  # Override LLM name with original
-                                remapped_criteria_results[f"criteria_{candidate_id}"] = result_data
-                                print(f"DEBUG: Found fuzzy match - mapped '{result_name}' to criteria_{candidate_id}, using original name: '{original_criteria.text}'")
-                                found_match = True
-                                break
-
-                    if not found_match:
-                        # CRITICAL FIX: Never keep problematic names like "criteria_2"
-                        # Always override with a clean name or use position-based mapping as final fallback
-                        if key_position is not None and key_position < len(selected_criteria):
-                            # Final fallback: use the criteria at this position
-                            fallback_criteria = selected_criteria[key_position]
-                            result_data["name"] = fallback_criteria.text
-                            remapped_criteria_results[f"criteria_{fallback_criteria.id}"] = result_data
-                            print(f"DEBUG: FINAL FALLBACK - Using position {key_position} to get criteria '{fallback_criteria.text}'")
-                        else:
-                            # Clean up problematic names
-                            if result_name:
-                                # Remove common problematic patterns
-                                cleaned_name = result_name
-                                for prefix in ['criteria_', 'critrio ', 'criterion ', '##']:
-                                    if cleaned_name.lower().startswith(prefix):
-                                        cleaned_name = cleaned_name[len(prefix):].strip()
-
-                                # If still looks like a technical ID, use generic name
-                                if cleaned_name.startswith('criteria_') or len(cleaned_name) < 3:
-                                    result_data["name"] = "Critrio analisado"
-                                else:
-                                    result_data["name"] = cleaned_name.capitalize()
+            with span("analysis.parse", {"llm.response_chars": len(llm_response_content)}):
+                try:
+                    extracted_content = llm_service.extract_markdown_content(llm_response_content)
+                except Exception:
+                    logger.exception("extract_markdown_content failed")
+                    # Fallback content if extraction fails
+                    extracted_content = {
+                        "criteria_results": {},
+                        "raw_response": llm_response_content
+                    }
+            logger.debug("Extracted criteria results: %s", list(extracted_content.get("criteria_results", {})))
+
+            with span("analysis.id_remap", {"analysis.criteria_count": len(selected_criteria)}):
+                # Step 7.5: Map extracted criteria results to actual criteria IDs
+                # Create mapping from criteria name to criteria ID
+                criteria_name_to_id = {}
+                for criteria in selected_criteria:
+                    # criteria is a GeneralCriteria object with id and text attributes
+                    criteria_name_to_id[criteria.text.strip().lower()] = criteria.id
+
+                # Also create a mapping from the position in the request to the criteria ID
+                position_to_id = {}
+                for i, criteria_id_str in enumerate(request.criteria_ids):
+                    actual_id = int(criteria_id_str.replace("criteria_", ""))
+                    position_to_id[i] = actual_id
+
+                # Remap criteria_results to use actual criteria IDs instead of position-based keys
+                remapped_criteria_results = {}
+
+                # First pass: Try to map by name matching and position
+                for extracted_key, result_data in extracted_content.get("criteria_results", {}).items():
+                    # Extract the position number from the key (criteria_1, criteria_2, etc.)
+                    key_position = None
+                    if extracted_key.startswith("criteria_"):
+                        try:
+                            key_position = int(extracted_key.replace("criteria_", "")) - 1  # Convert to 0-based index
+                        except ValueError:
+                            pass
+
+                    # Method 1: Try to map by position first (most reliable)
+                    if key_position is not None and key_position in position_to_id:
+                        criteria_id = position_to_id[key_position]
+                        # IMPORTANT: Always use the original criteria text from database
+                        original_criteria = next((c for c in selected_criteria if c.id == criteria_id), None)
+                        if original_criteria:
+                            result_data["name"] = original_criteria.text  # Override LLM name with original
+                            remapped_criteria_results[f"criteria_{criteria_id}"] = result_data
+                            logger.debug("Mapped %s by position to criteria_%s", extracted_key, criteria_id)
+                            continue
+
+                    # Method 2: Try to find matching criteria by name (fallback)
+                    result_name = result_data.get("name", "").strip().lower()
+
+                    # Try exact match first
+                    if result_name in criteria_name_to_id:
+                        criteria_id = criteria_name_to_id[result_name]
+                        # IMPORTANT: Always use the original criteria text from database
+                        original_criteria = next((c for c in selected_criteria if c.id == criteria_id), None)
+                        if original_criteria:
+                            result_data["name"] = original_criteria.text  # Override LLM name with original
+                            remapped_criteria_results[f"criteria_{criteria_id}"] = result_data
+                            logger.debug("Mapped %s by name to criteria_%s", extracted_key, criteria_id)
+                    else:
+                        # Try fuzzy matching
+                        found_match = False
+                        for criteria_text, candidate_id in criteria_name_to_id.items():
+                            # Check if the result name contains the criteria text or vice versa
+                            if (result_name in criteria_text or
+                                criteria_text in result_name or
+                                result_name.split(':')[0].strip() in criteria_text or
+                                criteria_text.split(':')[0].strip() in result_name):
+                                # IMPORTANT: Always use the original criteria text from database
+                                original_criteria = next((c for c in selected_criteria if c.id == candidate_id), None)
+                                if original_criteria:
+                                    result_data["name"] = original_criteria.text  # Override LLM name with original
+                                    remapped_criteria_results[f"criteria_{candidate_id}"] = result_data
+                                    logger.debug("Mapped %s by fuzzy name match to criteria_%s", extracted_key, candidate_id)
+                                    found_match = True
+                                    break
+
+                        if not found_match:
+                            # CRITICAL FIX: Never keep problematic names like "criteria_2"
+                            # Always override with a clean name or use position-based mapping as final fallback
+                            if key_position is not None and key_position < len(selected_criteria):
+                                # Final fallback: use the criteria at this position
+                                fallback_criteria = selected_criteria[key_position]
+                                result_data["name"] = fallback_criteria.text
+                                remapped_criteria_results[f"criteria_{fallback_criteria.id}"] = result_data
+                                logger.debug("Mapped %s by fallback position to criteria_%s", extracted_key, fallback_criteria.id)
                             else:
-                                result_data["name"] = "Critrio analisado"
+                                # Clean up problematic names
+                                if result_name:
+                                    # Remove common problematic patterns
+                                    cleaned_name = result_name
+                                    for prefix in ['criteria_', 'critrio ', 'criterion ', '##']:
+                                        if cleaned_name.lower().startswith(prefix):
+                                            cleaned_name = cleaned_name[len(prefix):].strip()
+
+                                    # If still looks like a technical ID, use generic name
+                                    if cleaned_name.startswith('criteria_') or len(cleaned_name) < 3:
+                                        result_data["name"] = "Critrio analisado"
+                                    else:
+                                        result_data["name"] = cleaned_name.capitalize()
+                                else:
+                                    result_data["name"] = "Critrio analisado"
 
-                            remapped_criteria_results[extracted_key] = result_data
-                            print(f"DEBUG: No match found for '{result_name}', using cleaned name: '{result_data.get('name')}'")
+                                remapped_criteria_results[extracted_key] = result_data
+                                logger.warning("No criteria matched %s ('%s'), kept as '%s'",
+                                               extracted_key, result_name, result_data.get('name'))
 
-            # Remove fallback logic to prevent duplicate results
-            # Only use results that were actually returned by the LLM analysis
+                # Remove fallback logic to prevent duplicate results
+                # Only use results that were actually returned by the LLM analysis
 
-            print(f"DEBUG: Final remapped criteria_results: {remapped_criteria_results}")
-            extracted_content["criteria_results"] = remapped_criteria_results
+                logger.debug("Remapped criteria results: %s", list(remapped_criteria_results))
+                extracted_content["criteria_results"] = remapped_criteria_results
+
+            # Feed the output budget history with complete responses only
+            if "#FIM#" in llm_response_content:
+                output_budget_estimator.record(
+                    len(selected_criteria),
+                    llm_response.get("usage", {}).get("candidatesTokenCount")
+                )
 
         # Step 8: Save analysis results to database
         import json
+        import uuid
         from datetime import datetime
         import time
 
-        print("DEBUG: Starting database save process...")
-
         # Calculate processing time
         processing_start = time.time()
         processing_time = f"{time.time() - processing_start:.2f}s"
 
-        try:
-            print("DEBUG: Creating GeneralAnalysisResult record...")
-            # Create GeneralAnalysisResult record
-            db_analysis_result = GeneralAnalysisResultModel(
-                analysis_name=request.analysis_name,
-                criteria_count=len(selected_criteria),
-                user_id=current_user.id,
-                criteria_results=extracted_content.get("criteria_results", {}),
-                raw_response=extracted_content.get("raw_response", ""),
-                model_used=llm_response.get("model", "claude-3-sonnet-20240229"),
-                usage=llm_response.get("usage", {}),
-                file_paths=json.dumps(request.file_paths),
-                modified_prompt=modified_prompt,
-                processing_time=processing_time
-            )
-
-            print("DEBUG: Adding record to session...")
-            db.add(db_analysis_result)
-
-            print("DEBUG: Committing transaction...")
-            db.commit()
-
-            print("DEBUG: Refreshing record...")
-            db.refresh(db_analysis_result)
-
-            print(f"DEBUG: Successfully saved analysis result to database with ID: {db_analysis_result.id}")
-
-        except Exception as db_error:
-            print(f"DEBUG: Database save failed: {db_error}")
-            import traceback
-            traceback.print_exc()
-            # Don't re-raise - continue with returning the result to the user
-            db_analysis_result = None
+        with span("analysis.db_save", {"analysis.criteria_count": len(selected_criteria)}):
+            try:
+                # Create GeneralAnalysisResult record
+                db_analysis_result = GeneralAnalysisResultModel(
+                    analysis_name=request.analysis_name,
+                    criteria_count=len(selected_criteria),
+                    user_id=current_user.id,
+                    criteria_results=extracted_content.get("criteria_results", {}),
+                    status_counts=count_statuses(extracted_content.get("criteria_results", {})),
+                    raw_response=extracted_content.get("raw_response", ""),
+                    model_used=llm_response.get("model", "claude-3-sonnet-20240229"),
+                    usage=llm_response.get("usage", {}),
+                    file_paths=json.dumps(request.file_paths),
+                    modified_prompt=modified_prompt,
+                    processing_time=processing_time
+                )
+
+                db.add(db_analysis_result)
+
+                await db.commit()
+
+                await db.refresh(db_analysis_result)
+
+                logger.info("Saved analysis result %s", db_analysis_result.id)
+                artifact_id = db_analysis_result.id
+
+            except Exception:
+                logger.exception("Database save of the analysis result failed")
+                await db.rollback()
+                # Don't re-raise - continue with returning the result to the user
+                db_analysis_result = None
+                artifact_id = f"unsaved-{uuid.uuid4().hex}"
+
+        # Prompt and response are kept per analysis; written in the background
+        prompt_header = (
+            f"{'='*80}\n"
+            f"PROMPT ENVIADO PARA LLM - {datetime.now().isoformat()}\n"
+            f"{'='*80}\n\n"
+            f"TAMANHO TOTAL: {final_prompt_length} caracteres\n"
+            f"ARQUIVOS PROCESSADOS: {total_files_processed}\n"
+            f"CRITÉRIOS: {len(request.criteria_ids)}\n"
+            f"USUÁRIO: {current_user.username} (ID: {current_user.id})\n\n"
+            f"{'='*80}\n"
+            f"CONTEÚDO COMPLETO DO PROMPT:\n"
+            f"{'='*80}\n\n"
+        )
+        artifact_store.save_in_background(artifact_id, current_user.id, {
+            "prompt": [prompt_header, *prompt_builder.full_parts(llm_response.get("prompt_cached", False)), f"\n\n{'='*80}\nFIM DO PROMPT\n{'='*80}\n"],
+            "response": llm_response_content
+        })
 
         # Step 9: Create analysis result structure
         result_data = {
@@ -1184,8 +1135,9 @@ async def analyze_selected_criteria(
             "debug_raw_llm_response": llm_response_content,  # For debugging
             "modified_prompt": modified_prompt,
             "file_paths": request.file_paths,
-            "saved_to_db": True,
-            "db_result_id": db_analysis_result.id
+            "saved_to_db": db_analysis_result is not None,
+            "db_result_id": db_analysis_result.id if db_analysis_result else None,
+            "artifact_id": str(artifact_id)
         }
 
         return result_data
@@ -1193,53 +1145,74 @@ async def analyze_selected_criteria(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"ERROR in analyze_selected_criteria: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in analyze_selected_criteria")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error analyzing selected criteria: {str(e)}"
         )
 
 
+def _list_result_summaries(db: Session, user_id: int, limit: int, cursor: Optional[str]) -> dict:
+    """
+    One page of result summaries, newest first, with keyset pagination on (created_at, id).
+    raw_response, modified_prompt and criteria_results are never loaded; see /results/{id}/detail.
+    """
+    model = GeneralAnalysisResultModel
+    query = db.query(
+        model.id,
+        model.analysis_name,
+        model.criteria_count,
+        model.created_at,
+        model.model_used,
+        model.processing_time,
+        model.file_paths,
+        model.usage,
+        model.status_counts
+    ).filter(model.user_id == user_id)
+
+    page = paginate(
+        query, [(model.created_at, "desc"), (model.id, "desc")], limit,
+        cursor=cursor, total="none"
+    )
+
+    results = []
+    for row in page.items:
+        results.append({
+            "id": row.id,
+            "analysis_name": row.analysis_name,
+            "criteria_count": row.criteria_count,
+            "timestamp": row.created_at,
+            "model_used": row.model_used,
+            "processing_time": row.processing_time,
+            "file_paths": json.loads(row.file_paths) if row.file_paths else [],
+            "usage": row.usage or {},
+            "status_counts": row.status_counts or dict.fromkeys(CRITERIA_STATUSES, 0)
+        })
+
+    return {
+        "success": True,
+        "results": results,
+        "count": len(results),
+        "next_cursor": page.next_cursor,
+        "has_more": page.has_more
+    }
+
+
 @router.get("/results")
 async def get_analysis_results(
+    limit: int = Query(20, ge=1, le=100, description="Results per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
-    """Get all analysis results for the current user"""
+    """Get a page of analysis result summaries for the current user (full body at /results/{id})"""
     try:
-        # Get all analysis results for the user
-        results = db.query(GeneralAnalysisResultModel).filter(
-            GeneralAnalysisResultModel.user_id == current_user.id
-        ).order_by(GeneralAnalysisResultModel.created_at.desc()).all()
-
-        # Convert to response format
-        formatted_results = []
-        for result in results:
-            formatted_results.append({
-                "id": result.id,
-                "analysis_name": result.analysis_name,
-                "criteria_count": result.criteria_count,
-                "timestamp": result.created_at,
-                "model_used": result.model_used,
-                "processing_time": result.processing_time,
-                "file_paths": result.get_file_paths(),
-                "criteria_results": result.get_criteria_results(),
-                "raw_response": result.raw_response,
-                "usage": result.get_usage()
-            })
-
-        return {
-            "success": True,
-            "results": formatted_results,
-            "total": len(formatted_results)
-        }
+        return await db.run_sync(_list_result_summaries, current_user.id, limit, cursor)
 
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"ERROR in get_analysis_results: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in get_analysis_results")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error retrieving analysis results: {str(e)}"
@@ -1253,11 +1226,11 @@ async def test_endpoint() -> Any:
 
 
 @router.get("/debug-file-path")
-async def debug_file_path(file_path: str, db: Session = Depends(get_db)) -> Any:
+async def debug_file_path(file_path: str, db: AsyncSession = Depends(get_async_db)) -> Any:
     """Debug endpoint to test file path resolution"""
     try:
         # Test with user_id = 1 (test user)
-        actual_path = get_uploaded_file_path(file_path, db, 1)
+        actual_path = await db.run_sync(lambda session: get_uploaded_file_path(file_path, session, 1))
 
         import os
         file_exists = os.path.exists(actual_path)
@@ -1280,47 +1253,33 @@ async def debug_cors_test() -> Any:
 
 @router.get("/latest-raw-response")
 async def get_latest_raw_response(
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
-    """Get the latest raw LLM response without any processing"""
+    """Get the raw LLM response of the current user's latest analysis"""
     try:
-        from pathlib import Path
-
-        # Path to the raw response file
-        prompts_dir = Path(__file__).parent.parent.parent.parent / "prompts"
-        raw_response_path = prompts_dir / "raw_response.txt"
-
-        # Check if the file exists
-        if not raw_response_path.exists():
+        latest = await _get_latest_artifact(db, current_user, "response")
+        if not latest:
             return {
                 "success": False,
-                "message": "Nenhuma resposta bruta da LLM encontrada. Execute uma anlise primeiro.",
+                "message": "Nenhuma resposta bruta da LLM encontrada. Execute uma análise primeiro.",
                 "response_content": None,
                 "file_exists": False
             }
 
-        # Read the raw response content
-        with open(raw_response_path, "r", encoding="utf-8") as f:
-            response_content = f.read()
-
-        # Get file metadata
-        import os
-        file_stats = os.stat(raw_response_path)
-        file_size = file_stats.st_size
-        modified_time = file_stats.st_mtime
-
         return {
             "success": True,
             "message": "Resposta bruta da LLM carregada com sucesso",
-            "response_content": response_content,
-            "file_size": file_size,
-            "modified_time": modified_time,
-            "file_path": str(raw_response_path),
+            "response_content": latest["content"],
+            "file_size": latest["size"],
+            "modified_time": latest["modified_time"],
+            "file_path": latest["artifact_path"],
+            "result_id": latest["result_id"],
             "is_raw": True
         }
 
     except Exception as e:
-        print(f"DEBUG: Error reading raw response: {e}")
+        logger.debug("Error reading raw response: %s", e)
         return {
             "success": False,
             "message": f"Erro ao ler resposta bruta da LLM: {str(e)}",
@@ -1331,14 +1290,14 @@ async def get_latest_raw_response(
 
 @router.get("/criteria-working")
 async def get_criteria_working(
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
     """Get all criteria (working public endpoint)"""
     try:
         # Get all active criteria from database
-        all_criteria = db.query(GeneralCriteria).filter(
+        all_criteria = (await db.scalars(select(GeneralCriteria).where(
             GeneralCriteria.is_active == True
-        ).order_by(GeneralCriteria.order, GeneralCriteria.created_at).all()
+        ).order_by(GeneralCriteria.order, GeneralCriteria.created_at))).all()
 
         # Convert to response format
         result = []
@@ -1352,9 +1311,7 @@ async def get_criteria_working(
         return result
 
     except Exception as e:
-        print(f"ERROR in get_criteria_working: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in get_criteria_working")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error retrieving criteria: {str(e)}"
@@ -1363,14 +1320,14 @@ async def get_criteria_working(
 
 @router.get("/criteria_public_test")
 async def get_criteria_public_test(
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
     """Alternative test endpoint without hyphen"""
     try:
         # Get all active criteria from database
-        all_criteria = db.query(GeneralCriteria).filter(
+        all_criteria = (await db.scalars(select(GeneralCriteria).where(
             GeneralCriteria.is_active == True
-        ).order_by(GeneralCriteria.order, GeneralCriteria.created_at).all()
+        ).order_by(GeneralCriteria.order, GeneralCriteria.created_at))).all()
 
         # Convert to response format
         result = []
@@ -1384,9 +1341,7 @@ async def get_criteria_public_test(
         return result
 
     except Exception as e:
-        print(f"ERROR in get_criteria_public_test: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in get_criteria_public_test")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error retrieving criteria: {str(e)}"
@@ -1395,60 +1350,44 @@ async def get_criteria_public_test(
 
 @router.get("/results-public")
 async def get_analysis_results_public(
-    db: Session = Depends(get_db)
+    limit: int = Query(20, ge=1, le=100, description="Results per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
-    """Get all analysis results (public endpoint for testing)"""
+    """Get a page of analysis result summaries (public endpoint for testing)"""
     try:
-        # Get all analysis results for user_id = 1 (testing)
-        results = db.query(GeneralAnalysisResultModel).filter(
-            GeneralAnalysisResultModel.user_id == 1
-        ).order_by(GeneralAnalysisResultModel.created_at.desc()).all()
-
-        # Convert to response format
-        formatted_results = []
-        for result in results:
-            formatted_results.append({
-                "id": result.id,
-                "analysis_name": result.analysis_name,
-                "criteria_count": result.criteria_count,
-                "timestamp": result.created_at,
-                "model_used": result.model_used,
-                "processing_time": result.processing_time,
-                "file_paths": result.get_file_paths(),
-                "criteria_results": result.get_criteria_results(),
-                "raw_response": result.raw_response,
-                "usage": result.get_usage()
-            })
-
-        return {
-            "success": True,
-            "results": formatted_results,
-            "total": len(formatted_results)
-        }
+        # Results of user_id = 1 (testing)
+        return await db.run_sync(_list_result_summaries, 1, limit, cursor)
 
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"ERROR in get_analysis_results_public: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in get_analysis_results_public")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error retrieving analysis results: {str(e)}"
         )
 
 
+# /results/{result_id} is shadowed by the legacy Analysis-based route above;
+# /results/{result_id}/detail always reaches this one
+@router.get("/results/{result_id}/detail")
 @router.get("/results/{result_id}")
 async def get_analysis_result(
     result_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
-    """Get a specific analysis result by ID"""
+    """Get a specific analysis result by ID, with the full criteria results and LLM response"""
     try:
         # Get the analysis result
-        result = db.query(GeneralAnalysisResultModel).filter(
+        result = await db.scalar(select(GeneralAnalysisResultModel).options(
+            undefer(GeneralAnalysisResultModel.raw_response),
+            undefer(GeneralAnalysisResultModel.modified_prompt)
+        ).where(
             GeneralAnalysisResultModel.id == result_id,
             GeneralAnalysisResultModel.user_id == current_user.id
-        ).first()
+        ))
 
         if not result:
             raise HTTPException(
@@ -1476,9 +1415,7 @@ async def get_analysis_result(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"ERROR in get_analysis_result: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in get_analysis_result")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error retrieving analysis result: {str(e)}"
@@ -1490,10 +1427,13 @@ async def update_manual_result(
     analysis_id: int,
     result_data: dict,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
     """Update analysis result manually"""
-    analysis = db.query(Analysis).filter(Analysis.id == analysis_id).first()
+    analysis = await db.scalar(
+        select(Analysis).options(selectinload(Analysis.result)).where(Analysis.id == analysis_id)
+        .execution_options(populate_existing=True)
+    )
     if not analysis:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -1531,8 +1471,7 @@ async def update_manual_result(
         analysis.result.issues = result_data.get("criteria_results", analysis.result.issues)
         analysis.result.model_used = "manual"
 
-    db.commit()
-    db.refresh(analysis)
+    await db.commit()
 
     # Return updated result
     return await get_general_analysis_result(analysis_id, current_user, db)
@@ -1542,14 +1481,12 @@ async def update_manual_result(
 @router.delete("/results/{result_id}")
 async def delete_analysis_result(
     result_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
     """Delete a specific analysis result"""
     try:
         # Find the analysis result
-        result = db.query(GeneralAnalysisResultModel).filter(
-            GeneralAnalysisResultModel.id == result_id
-        ).first()
+        result = await db.get(GeneralAnalysisResultModel, result_id)
 
         if not result:
             raise HTTPException(
@@ -1558,8 +1495,8 @@ async def delete_analysis_result(
             )
 
         # Delete the result
-        db.delete(result)
-        db.commit()
+        await db.delete(result)
+        await db.commit()
 
         return {
             "success": True,
@@ -1570,9 +1507,7 @@ async def delete_analysis_result(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"ERROR in delete_analysis_result: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in delete_analysis_result")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error deleting analysis result: {str(e)}"
@@ -1582,7 +1517,7 @@ async def delete_analysis_result(
 @router.delete("/results")
 async def delete_multiple_analysis_results(
     request: dict,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
     """Delete multiple analysis results"""
     try:
@@ -1597,15 +1532,13 @@ async def delete_multiple_analysis_results(
         # Find and delete the results
         deleted_count = 0
         for result_id in result_ids:
-            result = db.query(GeneralAnalysisResultModel).filter(
-                GeneralAnalysisResultModel.id == result_id
-            ).first()
+            result = await db.get(GeneralAnalysisResultModel, result_id)
             
             if result:
-                db.delete(result)
+                await db.delete(result)
                 deleted_count += 1
 
-        db.commit()
+        await db.commit()
 
         return {
             "success": True,
@@ -1617,9 +1550,7 @@ async def delete_multiple_analysis_results(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"ERROR in delete_multiple_analysis_results: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in delete_multiple_analysis_results")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error deleting analysis results: {str(e)}"
@@ -1629,18 +1560,18 @@ async def delete_multiple_analysis_results(
 @router.delete("/results/all")
 async def delete_all_analysis_results(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete all analysis results for current user"""
     try:
-        print(f"Starting delete all analysis results for user {current_user.id}")
+        logger.debug("Deleting all analysis results of user %s", current_user.id)
 
         # Get all analysis results for this user first
-        analysis_results = db.query(GeneralAnalysisResultModel).filter(
+        analysis_results = (await db.scalars(select(GeneralAnalysisResultModel).where(
             GeneralAnalysisResultModel.user_id == current_user.id
-        ).all()
+        ))).all()
 
-        print(f"Found {len(analysis_results)} analysis results to delete for user {current_user.id}")
+        logger.debug("Found %d analysis results to delete for user %s", len(analysis_results), current_user.id)
 
         if len(analysis_results) == 0:
             return {
@@ -1652,12 +1583,12 @@ async def delete_all_analysis_results(
         # Delete all results
         deleted_count = 0
         for result in analysis_results:
-            db.delete(result)
+            await db.delete(result)
             deleted_count += 1
 
-        db.commit()
+        await db.commit()
 
-        print(f"Successfully deleted {deleted_count} analysis results for user {current_user.id}")
+        logger.info("Deleted %d analysis results of user %s", deleted_count, current_user.id)
 
         return {
             "success": True,
@@ -1666,9 +1597,7 @@ async def delete_all_analysis_results(
         }
 
     except Exception as e:
-        print(f"ERROR in delete_all_analysis_results: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in delete_all_analysis_results")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error deleting all analysis results: {str(e)}"
@@ -1677,88 +1606,70 @@ async def delete_all_analysis_results(
 
 
 
+async def _get_latest_artifact(db: AsyncSession, current_user: User, name: str) -> Optional[dict]:
+    """Load an artifact of the current user's most recent analysis, with its token usage"""
+    latest_result = (await db.execute(select(
+        GeneralAnalysisResultModel.id,
+        GeneralAnalysisResultModel.usage
+    ).where(
+        GeneralAnalysisResultModel.user_id == current_user.id
+    ).order_by(GeneralAnalysisResultModel.created_at.desc()).limit(1))).first()
+
+    if not latest_result:
+        return None
+
+    content = await load_artifact(latest_result.id, name)
+    if content is None:
+        return None
+
+    info = artifact_store.describe(latest_result.id)["artifacts"][name]
+    usage_data = latest_result.usage or {}
+    return {
+        "result_id": latest_result.id,
+        "content": content,
+        "size": info["size"],
+        "modified_time": datetime.fromisoformat(info["created_at"]).timestamp(),
+        "artifact_path": f"/general-analysis/results/{latest_result.id}/artifacts/{name}",
+        "token_usage": {
+            "total_tokens": usage_data.get("totalTokenCount", 0),
+            "prompt_tokens": usage_data.get("promptTokenCount", 0),
+            "completion_tokens": usage_data.get("candidatesTokenCount", 0),
+            # Include additional token data for completeness
+            "thoughts_tokens": usage_data.get("thoughtsTokenCount", 0)
+        } if usage_data else {}
+    }
+
+
 @router.get("/latest-prompt")
 async def get_latest_prompt(
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
-    """Get the latest prompt sent to LLM"""
-    print("DEBUG: LATEST PROMPT ENDPOINT CALLED")
+    """Get the prompt of the current user's latest analysis"""
     try:
-        from pathlib import Path
-
-        # Path to the latest prompt file
-        prompts_dir = Path(__file__).parent.parent.parent.parent / "prompts"
-        latest_prompt_path = prompts_dir / "latest_prompt.txt"
-
-        # Check if the file exists
-        if not latest_prompt_path.exists():
+        latest = await _get_latest_artifact(db, current_user, "prompt")
+        if not latest:
             return {
                 "success": False,
-                "message": "Nenhum prompt encontrado. Execute uma anlise primeiro.",
+                "message": "Nenhum prompt encontrado. Execute uma análise primeiro.",
                 "prompt_content": None,
                 "file_exists": False
             }
 
-        # Read the prompt content
-        with open(latest_prompt_path, "r", encoding="utf-8") as f:
-            prompt_content = f.read()
-
-        # Get file metadata
-        import os
-        file_stats = os.stat(latest_prompt_path)
-        file_size = file_stats.st_size
-        modified_time = file_stats.st_mtime
-
-        # Try to get token usage information from the latest general analysis result
-        # FIXED VERSION - Token retrieval implemented correctly - 2025-10-05
-        print("DEBUG: TOKEN FIX FINAL - Starting token usage retrieval")  # Final debug marker
-        token_usage = {}
-        try:
-            from app.core.database import SessionLocal
-            from app.models.prompt import GeneralAnalysisResult
-
-            db = SessionLocal()
-            # Get the most recent general analysis result for the current user
-            latest_result = db.query(GeneralAnalysisResult)\
-                .filter(GeneralAnalysisResult.user_id == current_user.id)\
-                .order_by(GeneralAnalysisResult.created_at.desc())\
-                .first()
-
-            if latest_result and latest_result.usage:
-                # Use the complete token usage data from Gemini
-                usage_data = latest_result.usage
-                print("DEBUG: TOKEN FIX FINAL - Found usage data")  # Final debug marker
-
-                token_usage = {
-                    "total_tokens": usage_data.get("totalTokenCount", 0),
-                    "prompt_tokens": usage_data.get("promptTokenCount", 0),
-                    "completion_tokens": usage_data.get("candidatesTokenCount", 0),
-                    # Include additional token data for completeness
-                    "thoughts_tokens": usage_data.get("thoughtsTokenCount", 0)
-                }
-                print(f"DEBUG: TOKEN FIX FINAL - Mapped token_usage: {token_usage}")  # Final debug marker
-            else:
-                print("DEBUG: TOKEN FIX FINAL - No usage data found")  # Final debug marker
-
-            db.close()
-        except Exception as token_error:
-            print(f"DEBUG: TOKEN FIX FINAL - Error getting token usage: {token_error}")
-            # Continue without token info
-            token_usage = {}
-
         return {
             "success": True,
             "message": "Prompt recuperado com sucesso",
-            "prompt_content": prompt_content,
+            "prompt_content": latest["content"],
             "file_exists": True,
-            "file_size": file_size,
-            "modified_time": modified_time,
-            "file_path": str(latest_prompt_path),
-            "token_usage": token_usage
+            "file_size": latest["size"],
+            "modified_time": latest["modified_time"],
+            "file_path": latest["artifact_path"],
+            "result_id": latest["result_id"],
+            "token_usage": latest["token_usage"]
         }
 
     except Exception as e:
-        print(f"DEBUG: Error reading latest prompt: {e}")
+        logger.debug("Error reading latest prompt: %s", e)
         return {
             "success": False,
             "message": f"Erro ao ler prompt: {str(e)}",
@@ -1770,85 +1681,34 @@ async def get_latest_prompt(
 
 @router.get("/latest-response")
 async def get_latest_response(
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
-    """Get the latest LLM response"""
+    """Get the LLM response of the current user's latest analysis"""
     try:
-        from pathlib import Path
-
-        # Path to the latest response file
-        prompts_dir = Path(__file__).parent.parent.parent.parent / "prompts"
-        latest_response_path = prompts_dir / "latest_response.txt"
-
-        # Check if the file exists
-        if not latest_response_path.exists():
+        latest = await _get_latest_artifact(db, current_user, "response")
+        if not latest:
             return {
                 "success": False,
-                "message": "Nenhuma resposta da LLM encontrada. Execute uma anlise primeiro.",
+                "message": "Nenhuma resposta da LLM encontrada. Execute uma análise primeiro.",
                 "response_content": None,
                 "file_exists": False
             }
 
-        # Read the response content
-        with open(latest_response_path, "r", encoding="utf-8") as f:
-            response_content = f.read()
-
-        # Get file metadata
-        import os
-        file_stats = os.stat(latest_response_path)
-        file_size = file_stats.st_size
-        modified_time = file_stats.st_mtime
-
-        # Try to get token usage information from the latest general analysis result
-        # FIXED VERSION - Token retrieval implemented correctly - 2025-10-05
-        print("DEBUG: TOKEN FIX FINAL - Starting token usage retrieval")  # Final debug marker
-        token_usage = {}
-        try:
-            from app.core.database import SessionLocal
-            from app.models.prompt import GeneralAnalysisResult
-
-            db = SessionLocal()
-            # Get the most recent general analysis result for the current user
-            latest_result = db.query(GeneralAnalysisResult)\
-                .filter(GeneralAnalysisResult.user_id == current_user.id)\
-                .order_by(GeneralAnalysisResult.created_at.desc())\
-                .first()
-
-            if latest_result and latest_result.usage:
-                # Use the complete token usage data from Gemini
-                usage_data = latest_result.usage
-                print("DEBUG: TOKEN FIX FINAL - Found usage data")  # Final debug marker
-
-                token_usage = {
-                    "total_tokens": usage_data.get("totalTokenCount", 0),
-                    "prompt_tokens": usage_data.get("promptTokenCount", 0),
-                    "completion_tokens": usage_data.get("candidatesTokenCount", 0),
-                    # Include additional token data for completeness
-                    "thoughts_tokens": usage_data.get("thoughtsTokenCount", 0)
-                }
-                print(f"DEBUG: TOKEN FIX FINAL - Mapped token_usage: {token_usage}")  # Final debug marker
-            else:
-                print("DEBUG: TOKEN FIX FINAL - No usage data found")  # Final debug marker
-
-            db.close()
-        except Exception as token_error:
-            print(f"DEBUG: TOKEN FIX FINAL - Error getting token usage: {token_error}")
-            # Continue without token info
-            token_usage = {}
-
         return {
             "success": True,
             "message": "Resposta da LLM recuperada com sucesso",
-            "response_content": response_content,
+            "response_content": latest["content"],
             "file_exists": True,
-            "file_size": file_size,
-            "modified_time": modified_time,
-            "file_path": str(latest_response_path),
-            "token_usage": token_usage
+            "file_size": latest["size"],
+            "modified_time": latest["modified_time"],
+            "file_path": latest["artifact_path"],
+            "result_id": latest["result_id"],
+            "token_usage": latest["token_usage"]
         }
 
     except Exception as e:
-        print(f"DEBUG: Error reading latest response: {e}")
+        logger.debug("Error reading latest response: %s", e)
         return {
             "success": False,
             "message": f"Erro ao ler resposta da LLM: {str(e)}",
@@ -1857,3 +1717,52 @@ async def get_latest_response(
             "token_usage": {}
         }
 
+
+@router.get("/results/{result_id}/artifacts")
+async def list_analysis_artifacts(
+    result_id: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+) -> Any:
+    """List the stored artifacts (prompt, response) of one analysis"""
+    await _get_owned_result_id(db, result_id, current_user)
+    meta = artifact_store.describe(result_id)
+    return {
+        "result_id": result_id,
+        "artifacts": meta["artifacts"] if meta else {}
+    }
+
+
+@router.get("/results/{result_id}/artifacts/{name}")
+async def get_analysis_artifact(
+    result_id: int,
+    name: str,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+) -> Any:
+    """Get one stored artifact of an analysis"""
+    await _get_owned_result_id(db, result_id, current_user)
+    content = await load_artifact(result_id, name)
+    if content is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Artifact not found (it may have been removed by retention)"
+        )
+    return {
+        "result_id": result_id,
+        "name": name,
+        "content": content,
+        "size": len(content)
+    }
+
+
+async def _get_owned_result_id(db: AsyncSession, result_id: int, current_user: User) -> int:
+    """404 unless the analysis result exists and belongs to the user"""
+    owned_id = await db.scalar(select(GeneralAnalysisResultModel.id).where(
+        GeneralAnalysisResultModel.id == result_id,
+        GeneralAnalysisResultModel.user_id == current_user.id
+    ))
+    if owned_id is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Analysis result not found")
+    return owned_id
+
@@ -0,0 +1,55 @@
+"""
+Profiling endpoints for VerificAI Backend (admin only, see app/core/profiling.py)
+"""
+
+from typing import Any
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import FileResponse
+from pydantic import BaseModel, Field
+from starlette.concurrency import run_in_threadpool
+
+from app.core.dependencies import verify_admin_permission
+from app.core.profiling import profiler
+from app.models.user import User
+
+router = APIRouter()
+
+
+class ProfileAnalysesRequest(BaseModel):
+    count: int = Field(..., ge=0, le=100, description="Number of upcoming analyses to profile (0 disarms)")
+
+
+@router.get("")
+async def list_profiles(current_user: User = Depends(verify_admin_permission)) -> Any:
+    """Stored profiles, newest first"""
+    profiles = await run_in_threadpool(profiler.store.list)
+    return {
+        "enabled": profiler.enabled,
+        "armed_analyses": profiler.armed_analyses,
+        "max_profiles": profiler.store.max_profiles,
+        "profiles": profiles
+    }
+
+
+@router.get("/{profile_id}")
+async def download_profile(profile_id: str, current_user: User = Depends(verify_admin_permission)) -> Any:
+    """Flame graph of a profile (request id or analysis-<id>)"""
+    path = profiler.store.path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    media_type = "text/html" if path.suffix == ".html" else "application/json"
+    return FileResponse(path, media_type=media_type, filename=path.name)
+
+
+@router.post("/analyses")
+async def profile_next_analyses(
+    request: ProfileAnalysesRequest,
+    current_user: User = Depends(verify_admin_permission)
+) -> Any:
+    """Profile the next N analyses run by the orchestrator of this worker process"""
+    if not profiler.enabled:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Profiling is disabled or pyinstrument is not installed"
+        )
+    return {"armed_analyses": profiler.arm_analyses(request.count)}
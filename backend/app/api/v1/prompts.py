@@ -4,6 +4,7 @@ Updated with config and backup endpoints
 Real persistence implemented for prompt configurations
 """
 
+import logging
 from datetime import datetime
 from typing import List, Optional, Any
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
@@ -19,9 +20,13 @@ from app.schemas.prompt import (
     PromptCloneRequest, PromptValidationResult
 )
 from app.schemas.common import PaginatedResponse
+from app.services.prompt import PromptService
+from app.services.prompt_template_cache import prompt_template_cache
 
 router = APIRouter()
 
+logger = logging.getLogger(__name__)
+
 
 # Force reload 3 - test file modification again
 @router.get("/prompts/config", response_model=dict)
@@ -111,16 +116,13 @@ def create_prompt_backup(
     db: Session = Depends(get_db)
 ) -> Any:
     """Save prompt configuration to database (real persistence)"""
-    print("DEBUG: New create_prompt_backup function called!")
-    print(f"DEBUG: User ID: {current_user.id}")
-    print(f"DEBUG: Prompt config keys: {list(prompt_config.keys())}")
+    logger.debug("Saving prompt configurations %s for user %s", list(prompt_config.keys()), current_user.id)
 
     try:
         # Save each prompt configuration in the database
         saved_configs = []
 
         for config_key, config_data in prompt_config.items():
-            print(f"DEBUG: Processing config key: {config_key}")
             # Check if configuration already exists
             existing_config = db.query(PromptConfiguration).filter(
                 PromptConfiguration.user_id == current_user.id,
@@ -129,7 +131,7 @@ def create_prompt_backup(
             ).first()
 
             if existing_config:
-                print(f"DEBUG: Updating existing config for {config_key}")
+                logger.debug("Updating existing config for %s", config_key)
                 # Update existing configuration
                 existing_config.content = config_data.get('content', '')
                 existing_config.settings = config_data.get('settings', {})
@@ -140,7 +142,7 @@ def create_prompt_backup(
                 db.refresh(existing_config)
                 saved_configs.append(existing_config)
             else:
-                print(f"DEBUG: Creating new config for {config_key}")
+                logger.debug("Creating new config for %s", config_key)
                 # Create new configuration
                 new_config = PromptConfiguration(
                     user_id=current_user.id,
@@ -156,7 +158,8 @@ def create_prompt_backup(
                 db.refresh(new_config)
                 saved_configs.append(new_config)
 
-        print(f"DEBUG: Saved {len(saved_configs)} configurations")
+        logger.debug("Saved %d configurations", len(saved_configs))
+        prompt_template_cache.invalidate()
         result = {
             "success": True,
             "message": "Prompt configuration saved successfully (NEW VERSION)",
@@ -164,12 +167,9 @@ def create_prompt_backup(
             "saved_by": current_user.username,
             "saved_configs": len(saved_configs)
         }
-        print(f"DEBUG: Returning result: {result}")
         return result
     except Exception as e:
-        print(f"DEBUG: Error occurred: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error saving the prompt configurations")
         db.rollback()
         return {
             "success": False,
@@ -224,6 +224,7 @@ def save_prompt_configuration(
                 db.refresh(new_config)
                 saved_configs.append(new_config)
 
+        prompt_template_cache.invalidate()
         return {
             "success": True,
             "message": "Prompt configuration saved successfully",
@@ -268,66 +269,21 @@ def list_prompts(
     db: Session = Depends(get_db)
 ) -> Any:
     """List prompts with filtering and pagination"""
-    query = db.query(Prompt)
-
-    # Apply filters
-    if filters.category:
-        query = query.filter(Prompt.category == filters.category)
-    if filters.status:
-        query = query.filter(Prompt.status == filters.status)
-    if filters.is_public is not None:
-        query = query.filter(Prompt.is_public == filters.is_public)
-    if filters.is_featured is not None:
-        query = query.filter(Prompt.is_featured == filters.is_featured)
-    if filters.author_id:
-        query = query.filter(Prompt.author_id == filters.author_id)
-    if filters.supported_language:
-        # Simple contains check - in production, use JSON operations
-        query = query.filter(Prompt.supported_languages.contains(filters.supported_language))
-    if filters.supported_file_type:
-        query = query.filter(Prompt.supported_file_types.contains(filters.supported_file_type))
-    if filters.search:
-        query = query.filter(
-            Prompt.name.contains(filters.search) |
-            Prompt.description.contains(filters.search)
-        )
-
-    # Filter by visibility: users can see their own prompts + public prompts
-    # Admins can see all prompts
-    if not current_user.is_admin:
-        query = query.filter(
-            (Prompt.author_id == current_user.id) |
-            (Prompt.is_public == True)
-        )
-
-    # Get total count
-    total = query.count()
-
-    # Apply sorting
-    if params.sort_by:
-        sort_column = getattr(Prompt, params.sort_by, None)
-        if sort_column:
-            if params.sort_order == "desc":
-                query = query.order_by(sort_column.desc())
-            else:
-                query = query.order_by(sort_column.asc())
-    else:
-        query = query.order_by(Prompt.created_at.desc())
-
-    # Apply pagination
-    prompts = query.offset(params.skip).limit(params.limit).all()
-
-    return PaginatedResponse(
-        items=prompts,
-        total=total,
+    # Users can see their own prompts + public prompts; admins can see all prompts
+    page = PromptService(db).get_prompts(
+        user_id=None if current_user.is_admin else current_user.id,
         skip=params.skip,
         limit=params.limit,
-        pages=(total + params.limit - 1) // params.limit,
-        current_page=(params.skip // params.limit) + 1,
-        has_next=params.skip + params.limit < total,
-        has_prev=params.skip > 0
+        filters=filters.dict(exclude={"search"}, exclude_none=True),
+        search=filters.search or params.search,
+        sort_by=params.sort_by,
+        sort_order=params.sort_order,
+        cursor=params.cursor,
+        total=params.total
     )
 
+    return PaginatedResponse(items=page.items, **page.paginated_fields())
+
 
 
 
@@ -0,0 +1,52 @@
+"""
+Search endpoint: file paths, code entries and criteria findings
+"""
+
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.core.database import get_db
+from app.core.dependencies import get_current_user
+from app.models.search import DOC_TYPES
+from app.models.user import User
+from app.schemas.search import SearchHitResponse, SearchResponse
+from app.services.search import SearchService
+
+router = APIRouter()
+
+
+@router.get("/", response_model=SearchResponse)
+def search(
+    q: str = Query(..., min_length=1, max_length=200, description="Search terms"),
+    types: Optional[List[str]] = Query(None, description="file_path | code_entry | criteria (default: all)"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=1000),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Ranked search over the current user's file paths, code entries and criteria findings"""
+    doc_types = [t for t in (types or []) if t in DOC_TYPES] or None
+    hits = SearchService(db).search(current_user.id, q, doc_types=doc_types, limit=limit + 1, offset=offset)
+    has_more = len(hits) > limit
+    hits = hits[:limit]
+
+    return SearchResponse(
+        query=q,
+        results=[
+            SearchHitResponse(
+                type=hit.doc_type,
+                id=hit.ref_id,
+                section=hit.section or None,
+                title=hit.title,
+                snippet=hit.snippet,
+                rank=hit.rank,
+                updated_at=hit.updated_at
+            )
+            for hit in hits
+        ],
+        count=len(hits),
+        limit=limit,
+        offset=offset,
+        has_more=has_more
+    )
@@ -5,18 +5,22 @@ File upload API endpoints for VerificAI Backend
 import os
 import uuid
 import shutil
+import asyncio
 from typing import List, Optional
 from pathlib import Path
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, BackgroundTasks, Query
 from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, or_, func, select
 
-from app.core.database import get_db
+from app.core.database import get_async_db, AsyncSessionLocal
 from app.core.security import get_current_user
+from app.core.pagination import paginate_async, resolve_sort, count_cache_key
 from app.models.user import User
 from app.models.uploaded_file import UploadedFile, FileStatus, ProcessingStatus
+from app.models.stats import UploadFileStats
+from app.services.search import contains_pattern
 from app.schemas.upload import (
     FileUploadRequest, FileUploadResponse, FileListResponse,
     FileUpdateRequest, FileDeleteRequest, FileDeleteResponse,
@@ -97,7 +101,7 @@ async def upload_folder(
     background_tasks: BackgroundTasks,
     files: List[UploadFile] = File(...),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Upload multiple files from a folder"""
     ensure_upload_dir()
@@ -145,8 +149,8 @@ async def upload_folder(
             )
 
             db.add(uploaded_file)
-            db.commit()
-            db.refresh(uploaded_file)
+            await db.commit()
+            await db.refresh(uploaded_file)
 
             # Also create file_path record for display
             from app.models.file_path import FilePath
@@ -163,10 +167,10 @@ async def upload_folder(
                 access_level="private"
             )
             db.add(file_path_record)
-            db.commit()
+            await db.commit()
 
             # Add background task for file processing
-            background_tasks.add_task(process_uploaded_file, uploaded_file.id, db)
+            background_tasks.add_task(process_uploaded_file, uploaded_file.id)
 
             uploaded_files.append({
                 "id": uploaded_file.file_id,
@@ -182,6 +186,7 @@ async def upload_folder(
 
         except Exception as e:
             logger.error(f"Error uploading file {file.filename}: {str(e)}")
+            await db.rollback()
             failed_files.append({
                 "filename": file.filename,
                 "error": str(e)
@@ -204,7 +209,7 @@ async def upload_file(
     original_name: str = Form(...),
     relative_path: Optional[str] = Form(None),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Upload a single file"""
     ensure_upload_dir()
@@ -241,11 +246,11 @@ async def upload_file(
         )
 
         db.add(uploaded_file)
-        db.commit()
-        db.refresh(uploaded_file)
+        await db.commit()
+        await db.refresh(uploaded_file)
 
         # Add background task for file processing
-        background_tasks.add_task(process_uploaded_file, uploaded_file.id, db)
+        background_tasks.add_task(process_uploaded_file, uploaded_file.id)
 
         logger.info(f"File uploaded successfully: {file_id} by user {current_user.id}")
 
@@ -271,18 +276,29 @@ async def upload_file(
         raise HTTPException(status_code=500, detail=f"Failed to upload file: {str(e)}")
 
 
-async def process_uploaded_file(file_id: int, db: Session):
-    """Process uploaded file in background"""
+def count_file_lines(path: str) -> int:
+    """Number of lines of a text file"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return sum(1 for _ in f)
+
+
+async def process_uploaded_file(file_id: int):
+    """Process uploaded file in background (own session: the request session is closed by then)"""
+    async with AsyncSessionLocal() as db:
+        await _process_uploaded_file(file_id, db)
+
+
+async def _process_uploaded_file(file_id: int, db: AsyncSession):
     try:
         # Get file from database
-        uploaded_file = db.query(UploadedFile).filter(UploadedFile.id == file_id).first()
+        uploaded_file = await db.get(UploadedFile, file_id)
         if not uploaded_file:
             return
 
         # Update processing status
         uploaded_file.processing_status = ProcessingStatus.PROCESSING
         uploaded_file.is_processed = False
-        db.commit()
+        await db.commit()
 
         # Analyze file
         try:
@@ -292,10 +308,10 @@ async def process_uploaded_file(file_id: int, db: Session):
                 uploaded_file.language_detected = detected_language
 
             # Count lines (simplified - in production would use proper parsing)
+            line_count = None
             try:
                 # Use the file_path which is relative to current working directory
-                with open(uploaded_file.file_path, 'r', encoding='utf-8') as f:
-                    line_count = sum(1 for _ in f)
+                line_count = await asyncio.to_thread(count_file_lines, uploaded_file.file_path)
                 uploaded_file.line_count = line_count
             except Exception:
                 pass  # Skip line count for binary files or encoding issues
@@ -325,7 +341,7 @@ async def process_uploaded_file(file_id: int, db: Session):
             uploaded_file.processing_error = str(e)
             logger.error(f"Error processing file {uploaded_file.file_id}: {str(e)}")
 
-        db.commit()
+        await db.commit()
 
     except Exception as e:
         logger.error(f"Error in background processing for file {file_id}: {str(e)}")
@@ -337,25 +353,39 @@ async def list_files(
     limit: int = Query(100, ge=1, le=1000),
     status: Optional[FileStatus] = Query(None),
     search: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    sort_by: Optional[str] = Query(None, description="created_at | original_name | file_size"),
+    sort_order: Optional[str] = Query("desc"),
+    total: Optional[str] = Query(None, description="exact | cached | estimate | none"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """List uploaded files"""
-    query = db.query(UploadedFile).filter(UploadedFile.user_id == current_user.id)
-
-    if status:
-        query = query.filter(UploadedFile.status == status)
-
-    if search:
-        query = query.filter(
-            or_(
-                UploadedFile.original_name.ilike(f"%{search}%"),
-                UploadedFile.relative_path.ilike(f"%{search}%")
+    """List uploaded files (keyset pagination with cursor; skip is kept for older clients)"""
+    def build_query(session):
+        query = session.query(UploadedFile).filter(UploadedFile.user_id == current_user.id)
+
+        if status:
+            query = query.filter(UploadedFile.status == status)
+
+        if search:
+            query = query.filter(
+                or_(
+                    UploadedFile.original_name.ilike(contains_pattern(search), escape="\\"),
+                    UploadedFile.relative_path.ilike(contains_pattern(search), escape="\\")
+                )
             )
-        )
+        return query
 
-    total = query.count()
-    files = query.order_by(UploadedFile.created_at.desc()).offset(skip).limit(limit).all()
+    sort_keys = resolve_sort(
+        {"created_at": UploadedFile.created_at, "original_name": UploadedFile.original_name, "file_size": UploadedFile.file_size},
+        sort_by, sort_order, default="created_at", tiebreaker=UploadedFile.id
+    )
+    page = await paginate_async(
+        db, build_query, sort_keys, limit,
+        cursor=cursor, skip=skip, total=total,
+        count_key=count_cache_key("files", current_user.id, status=status, search=search)
+    )
+    files = page.items
 
     total_size = sum(f.file_size for f in files)
 
@@ -375,8 +405,10 @@ async def list_files(
 
     return FileListResponse(
         files=file_responses,
-        total_count=total,
-        total_size=total_size
+        total_count=page.paginated_fields()["total"],
+        total_size=total_size,
+        next_cursor=page.next_cursor,
+        has_more=page.has_more
     )
 
 
@@ -384,15 +416,15 @@ async def list_files(
 async def get_file(
     file_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get file details"""
-    file = db.query(UploadedFile).filter(
+    file = await db.scalar(select(UploadedFile).where(
         and_(
             UploadedFile.file_id == file_id,
             UploadedFile.user_id == current_user.id
         )
-    ).first()
+    ))
 
     if not file:
         raise HTTPException(status_code=404, detail="File not found")
@@ -415,15 +447,15 @@ async def update_file(
     file_id: str,
     update_data: FileUpdateRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update file metadata"""
-    file = db.query(UploadedFile).filter(
+    file = await db.scalar(select(UploadedFile).where(
         and_(
             UploadedFile.file_id == file_id,
             UploadedFile.user_id == current_user.id
         )
-    ).first()
+    ))
 
     if not file:
         raise HTTPException(status_code=404, detail="File not found")
@@ -434,8 +466,8 @@ async def update_file(
         setattr(file, field, value)
 
     file.updated_at = datetime.utcnow()
-    db.commit()
-    db.refresh(file)
+    await db.commit()
+    await db.refresh(file)
 
     return FileUploadResponse(
         file_id=file.file_id,
@@ -454,16 +486,16 @@ async def update_file(
 async def delete_file(
     file_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a single file"""
     try:
-        file = db.query(UploadedFile).filter(
+        file = await db.scalar(select(UploadedFile).where(
             and_(
                 UploadedFile.file_id == file_id,
                 UploadedFile.user_id == current_user.id
             )
-        ).first()
+        ))
 
         if not file:
             raise HTTPException(status_code=404, detail="File not found")
@@ -474,19 +506,19 @@ async def delete_file(
 
         # Also delete from file_paths table
         from app.models.file_path import FilePath
-        file_path_record = db.query(FilePath).filter(
+        file_path_record = await db.scalar(select(FilePath).where(
             FilePath.user_id == current_user.id,
             (FilePath.full_path == file.original_name) |
             (FilePath.full_path == file.relative_path) |
             (FilePath.file_name == file.original_name)
-        ).first()
+        ).limit(1))
 
         if file_path_record:
-            db.delete(file_path_record)
+            await db.delete(file_path_record)
 
         # Delete database record
-        db.delete(file)
-        db.commit()
+        await db.delete(file)
+        await db.commit()
 
         logger.info(f"File deleted successfully: {file_id} by user {current_user.id}")
 
@@ -506,7 +538,7 @@ async def delete_file(
 async def delete_files(
     delete_request: FileDeleteRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete multiple files"""
     deleted_files = []
@@ -514,12 +546,12 @@ async def delete_files(
 
     for file_id in delete_request.file_ids:
         try:
-            file = db.query(UploadedFile).filter(
+            file = await db.scalar(select(UploadedFile).where(
                 and_(
                     UploadedFile.file_id == file_id,
                     UploadedFile.user_id == current_user.id
                 )
-            ).first()
+            ))
 
             if not file:
                 failed_files.append(file_id)
@@ -531,25 +563,25 @@ async def delete_files(
 
             # Also delete from file_paths table
             from app.models.file_path import FilePath
-            file_path_record = db.query(FilePath).filter(
+            file_path_record = await db.scalar(select(FilePath).where(
                 FilePath.user_id == current_user.id,
                 (FilePath.full_path == file.original_name) |
                 (FilePath.full_path == file.relative_path) |
                 (FilePath.file_name == file.original_name)
-            ).first()
+            ).limit(1))
 
             if file_path_record:
-                db.delete(file_path_record)
+                await db.delete(file_path_record)
 
             # Delete database record
-            db.delete(file)
+            await db.delete(file)
             deleted_files.append(file_id)
 
         except Exception as e:
             logger.error(f"Error deleting file {file_id}: {str(e)}")
             failed_files.append(file_id)
 
-    db.commit()
+    await db.commit()
 
     return FileDeleteResponse(
         deleted_files=deleted_files,
@@ -561,37 +593,50 @@ async def delete_files(
 @router.get("/stats/", response_model=FileStatsResponse)
 async def get_file_stats(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get file statistics"""
-    files = db.query(UploadedFile).filter(UploadedFile.user_id == current_user.id).all()
-
-    # Basic stats
-    total_files = len(files)
-    total_size = sum(f.file_size for f in files)
-
-    # Status counts
-    status_counts = {}
-    for status in FileStatus:
-        status_counts[status.value] = sum(1 for f in files if f.status == status)
-
-    # File type counts
+    """Get file statistics (read from the incrementally maintained upload_file_stats table)"""
+    stats = (await db.execute(select(
+        UploadFileStats.status,
+        UploadFileStats.file_extension,
+        UploadFileStats.file_count,
+        UploadFileStats.total_size
+    ).where(
+        UploadFileStats.user_id == current_user.id,
+        UploadFileStats.file_count > 0
+    ))).all()
+
+    # Pre-aggregated rows: one per (status, extension)
+    total_files = 0
+    total_size = 0
+    status_counts = {status.value: 0 for status in FileStatus}
     file_type_counts = {}
-    for file in files:
-        ext = file.file_extension or 'unknown'
-        file_type_counts[ext] = file_type_counts.get(ext, 0) + 1
+    for row in stats:
+        total_files += row.file_count
+        total_size += row.total_size
+        status_counts[row.status] = status_counts.get(row.status, 0) + row.file_count
+        ext = row.file_extension or 'unknown'
+        file_type_counts[ext] = file_type_counts.get(ext, 0) + row.file_count
 
     # User counts (for admin view)
     user_counts = {}
     if current_user.is_admin:
-        from sqlalchemy import func
-        user_stats = db.query(
-            UploadedFile.user_id,
-            func.count(UploadedFile.id).label('count')
-        ).group_by(UploadedFile.user_id).all()
-        user_counts = {str(user_id): count for user_id, count in user_stats}
-
-    # Recent uploads
+        user_stats = (await db.execute(select(
+            UploadFileStats.user_id,
+            func.sum(UploadFileStats.file_count).label('count')
+        ).group_by(UploadFileStats.user_id))).all()
+        user_counts = {str(user_id): int(count or 0) for user_id, count in user_stats}
+
+    # Recent uploads (metadata columns only, newest first)
+    recent = (await db.execute(select(
+        UploadedFile.file_id,
+        UploadedFile.original_name,
+        UploadedFile.file_size,
+        UploadedFile.status,
+        UploadedFile.created_at
+    ).where(
+        UploadedFile.user_id == current_user.id
+    ).order_by(UploadedFile.created_at.desc()).limit(10))).all()
     recent_uploads = [
         {
             'file_id': f.file_id,
@@ -600,7 +645,7 @@ async def get_file_stats(
             'status': f.status,
             'upload_date': f.created_at.isoformat()
         }
-        for f in sorted(files, key=lambda x: x.created_at, reverse=True)[:10]
+        for f in recent
     ]
 
     return FileStatsResponse(
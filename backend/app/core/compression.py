@@ -0,0 +1,131 @@
+"""
+Compression of large text columns for VerificAI Backend
+
+Prompts, LLM responses and pasted code are highly repetitive (the same
+template and criteria text appear in every row), so they are stored
+zstd-compressed with a shared dictionary trained on samples of real rows
+(see train_compression_dictionary.py). Every frame records the id of the
+dictionary it was written with; older dictionaries stay in the dictionary
+directory so rows written before a retrain can still be read. Without the
+zstandard package, values are gzip-compressed.
+"""
+
+import gzip
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from app.core.config import settings
+
+try:
+    import zstandard
+except ImportError:  # gzip fallback
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+GZIP_MAGIC = b"\x1f\x8b"
+DICTIONARY_SUFFIX = ".dict"
+
+
+class TextCompressor:
+    """Compresses text to bytes and back, using trained zstd dictionaries when available"""
+
+    def __init__(self, dictionary_dir: Optional[str] = None, level: int = 3):
+        self.dictionary_dir = Path(dictionary_dir) if dictionary_dir else None
+        self.level = level
+        self._dictionaries: Dict[int, "zstandard.ZstdCompressionDict"] = {}
+        self._current = None
+        self._loaded = False
+        self._lock = threading.Lock()
+        # zstd (de)compressor objects are not thread-safe: one per thread
+        self._local = threading.local()
+
+    def _load_dictionaries(self) -> None:
+        with self._lock:
+            if self._loaded:
+                return
+            if zstandard and self.dictionary_dir and self.dictionary_dir.exists():
+                # Files are named so that the newest sorts last (e.g. text_v3.dict)
+                for path in sorted(self.dictionary_dir.glob(f"*{DICTIONARY_SUFFIX}")):
+                    try:
+                        dictionary = zstandard.ZstdCompressionDict(path.read_bytes())
+                        dictionary.precompute_compress(level=self.level)
+                    except Exception as e:
+                        logger.warning("Ignoring unreadable compression dictionary %s: %s", path, e)
+                        continue
+                    self._dictionaries[dictionary.dict_id()] = dictionary
+                    self._current = dictionary
+                if self._current is not None:
+                    logger.info("Compression dictionary %s loaded (%s available)", self._current.dict_id(), len(self._dictionaries))
+            self._loaded = True
+
+    def _compressor(self):
+        compressor = getattr(self._local, "compressor", None)
+        if compressor is None:
+            self._load_dictionaries()
+            if self._current is not None:
+                compressor = zstandard.ZstdCompressor(level=self.level, dict_data=self._current)
+            else:
+                compressor = zstandard.ZstdCompressor(level=self.level)
+            self._local.compressor = compressor
+        return compressor
+
+    def _decompressor(self, dict_id: int):
+        decompressors = getattr(self._local, "decompressors", None)
+        if decompressors is None:
+            decompressors = self._local.decompressors = {}
+        decompressor = decompressors.get(dict_id)
+        if decompressor is None:
+            if dict_id:
+                self._load_dictionaries()
+                dictionary = self._dictionaries.get(dict_id)
+                if dictionary is None:
+                    raise ValueError(f"Compression dictionary {dict_id} not found in {self.dictionary_dir}")
+                decompressor = zstandard.ZstdDecompressor(dict_data=dictionary)
+            else:
+                decompressor = zstandard.ZstdDecompressor()
+            decompressors[dict_id] = decompressor
+        return decompressor
+
+    def compress(self, text: str) -> bytes:
+        data = text.encode("utf-8")
+        if zstandard:
+            return self._compressor().compress(data)
+        return gzip.compress(data, compresslevel=6)
+
+    def decompress(self, data: bytes) -> str:
+        if data.startswith(ZSTD_MAGIC):
+            if not zstandard:
+                raise RuntimeError("zstandard is required to read this value")
+            dict_id = zstandard.get_frame_parameters(data).dict_id
+            return self._decompressor(dict_id).decompress(data).decode("utf-8")
+        if data.startswith(GZIP_MAGIC):
+            return gzip.decompress(data).decode("utf-8")
+        # Rows converted from text columns and not compressed yet
+        return data.decode("utf-8")
+
+    def reload(self) -> None:
+        """Pick up a newly trained dictionary"""
+        with self._lock:
+            self._dictionaries.clear()
+            self._current = None
+            self._loaded = False
+        self._local = threading.local()
+
+
+def train_dictionary(samples: Iterable[str], size: int = 112640) -> bytes:
+    """Train a zstd dictionary on sample values; returns the dictionary bytes"""
+    if not zstandard:
+        raise RuntimeError("zstandard is required to train a compression dictionary")
+    data = [sample.encode("utf-8") for sample in samples if sample]
+    return zstandard.train_dictionary(size, data).as_bytes()
+
+
+# Global text compressor instance
+text_compressor = TextCompressor(
+    dictionary_dir=settings.COMPRESSION_DICTIONARY_DIR,
+    level=settings.COMPRESSION_LEVEL
+)
@@ -3,7 +3,7 @@ Configuration management for VerificAI Backend
 """
 
 import os
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic import AnyHttpUrl, Field, field_validator
 from pydantic_settings import BaseSettings
 
@@ -48,6 +48,8 @@ class Settings(BaseSettings):
     DATABASE_MAX_OVERFLOW: int = Field(default=10, env="DATABASE_MAX_OVERFLOW")
     DATABASE_POOL_TIMEOUT: int = Field(default=30, env="DATABASE_POOL_TIMEOUT")
     DATABASE_POOL_RECYCLE: int = Field(default=3600, env="DATABASE_POOL_RECYCLE")
+    # Async engine URL (default: DATABASE_URL with the asyncpg / aiosqlite driver)
+    DATABASE_ASYNC_URL: Optional[str] = Field(default=None, env="DATABASE_ASYNC_URL")
 
     # Redis Configuration
     REDIS_URL: str = Field(default="redis://localhost:6379", env="REDIS_URL")
@@ -64,6 +66,10 @@ class Settings(BaseSettings):
     )
     JWT_ALGORITHM: str = Field(default="HS256", env="JWT_ALGORITHM")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = Field(default=30, env="ACCESS_TOKEN_EXPIRE_MINUTES")
+    AUTH_USER_CACHE_SECONDS: int = Field(default=30, env="AUTH_USER_CACHE_SECONDS")
+    AUTH_USER_CACHE_SIZE: int = Field(default=4096, env="AUTH_USER_CACHE_SIZE")
+    PASSWORD_BCRYPT_ROUNDS: int = Field(default=12, env="PASSWORD_BCRYPT_ROUNDS")
+    PASSWORD_HASH_WORKERS: int = Field(default=2, env="PASSWORD_HASH_WORKERS")
 
     # CORS Configuration
     BACKEND_CORS_ORIGINS: List[str] = Field(
@@ -84,6 +90,8 @@ class Settings(BaseSettings):
     # LLM API Configuration
     OPENAI_API_KEY: Optional[str] = Field(default=None, env="OPENAI_API_KEY")
     ANTHROPIC_API_KEY: Optional[str] = Field(default=None, env="ANTHROPIC_API_KEY")
+    # Gemini REST endpoint (point it at benchmarks/fake_llm_server.py for load tests)
+    GEMINI_BASE_URL: str = Field(default="https://generativelanguage.googleapis.com/v1beta/models", env="GEMINI_BASE_URL")
 
     # LLM Configuration
     MAX_TOKENS: int = Field(default=16000, env="MAX_TOKENS")
@@ -91,9 +99,58 @@ class Settings(BaseSettings):
     TOP_P: float = Field(default=0.9, env="TOP_P")
     MODEL: str = Field(default="claude-3-5-sonnet-20241022", env="MODEL")
 
+    # Upper bound for the dynamically sized maxOutputTokens of criteria analyses
+    LLM_MAX_OUTPUT_TOKENS: int = Field(default=32000, env="LLM_MAX_OUTPUT_TOKENS")
+    # Stream responses so generation can be cut off once #FIM# is seen
+    LLM_STREAMING_ENABLED: bool = Field(default=True, env="LLM_STREAMING_ENABLED")
+
+    # Provider-side caching of the stable prompt prefix (template + criteria)
+    LLM_PROMPT_CACHE_ENABLED: bool = Field(default=True, env="LLM_PROMPT_CACHE_ENABLED")
+    LLM_PROMPT_CACHE_BACKEND: str = Field(default="gemini", env="LLM_PROMPT_CACHE_BACKEND")  # gemini | local
+    LLM_PROMPT_CACHE_TTL: int = Field(default=3600, env="LLM_PROMPT_CACHE_TTL")
+    LLM_PROMPT_CACHE_MIN_CHARS: int = Field(default=8000, env="LLM_PROMPT_CACHE_MIN_CHARS")
+
+    # Seconds a cached prompt template is trusted before its updated_at is checked again
+    PROMPT_TEMPLATE_CACHE_REVALIDATE_SECONDS: int = Field(default=60, env="PROMPT_TEMPLATE_CACHE_REVALIDATE_SECONDS")
+
+    # Continuation of truncated LLM responses (finishReason MAX_TOKENS without #FIM#)
+    LLM_MAX_CONTINUATIONS: int = Field(default=3, env="LLM_MAX_CONTINUATIONS")
+    LLM_CONTINUATION_TOKEN_BUDGET: int = Field(default=64000, env="LLM_CONTINUATION_TOKEN_BUDGET")
+
+    # Batch analysis (non-interactive runs through the provider batch API)
+    BATCH_ANALYSIS_BACKEND: str = Field(default="gemini", env="BATCH_ANALYSIS_BACKEND")  # gemini | local
+    BATCH_ANALYSIS_DIR: str = Field(default="batches", env="BATCH_ANALYSIS_DIR")
+    BATCH_POLL_INTERVAL: int = Field(default=300, env="BATCH_POLL_INTERVAL")
+    BATCH_SCHEDULER_ENABLED: bool = Field(default=True, env="BATCH_SCHEDULER_ENABLED")
+
+    # Per-analysis artifacts (prompt, LLM response)
+    ARTIFACT_STORE_DIR: str = Field(default="artifacts", env="ARTIFACT_STORE_DIR")
+    ARTIFACT_STORE_MAX_BYTES: int = Field(default=2147483648, env="ARTIFACT_STORE_MAX_BYTES")  # 2GB
+    ARTIFACT_STORE_COMPRESSION: str = Field(default="auto", env="ARTIFACT_STORE_COMPRESSION")  # auto | zstd | gzip
+
+    # Compressed text columns (prompts, responses, code)
+    COMPRESSION_DICTIONARY_DIR: str = Field(default="compression_dicts", env="COMPRESSION_DICTIONARY_DIR")
+    COMPRESSION_LEVEL: int = Field(default=3, env="COMPRESSION_LEVEL")
+
+    # Pagination
+    PAGINATION_COUNT_CACHE_SECONDS: int = Field(default=30, env="PAGINATION_COUNT_CACHE_SECONDS")
+
     # Rate Limiting Configuration
     RATE_LIMIT_REQUESTS_PER_MINUTE: int = Field(default=60, env="RATE_LIMIT_REQUESTS_PER_MINUTE")
     RATE_LIMIT_BURST: int = Field(default=10, env="RATE_LIMIT_BURST")
+    RATE_LIMIT_USER_REQUESTS_PER_MINUTE: int = Field(default=120, env="RATE_LIMIT_USER_REQUESTS_PER_MINUTE")
+    # Path prefix -> "N/period" or "N/period:burst", on top of the per-client limit
+    RATE_LIMIT_ROUTES: Dict[str, str] = Field(
+        default={
+            "/api/v1/auth/login": "10/minute:5",
+            "/api/v1/auth/register": "5/minute:5",
+            "/api/v1/general-analysis/analyze": "30/minute"
+        },
+        env="RATE_LIMIT_ROUTES"
+    )
+    RATE_LIMIT_EXEMPT_PATHS: List[str] = Field(default=["/health", "/ready", "/metrics"], env="RATE_LIMIT_EXEMPT_PATHS")
+    RATE_LIMIT_BACKEND: str = Field(default="memory", env="RATE_LIMIT_BACKEND")  # memory | redis
+    RATE_LIMIT_MAX_KEYS: int = Field(default=100000, env="RATE_LIMIT_MAX_KEYS")
 
     # File Upload Configuration
     MAX_FILE_SIZE: int = Field(default=104857600, env="MAX_FILE_SIZE")  # 100MB
@@ -105,6 +162,23 @@ class Settings(BaseSettings):
     # Logging Configuration
     LOG_LEVEL: str = Field(default="INFO", env="LOG_LEVEL")
     LOG_FORMAT: str = Field(default="json", env="LOG_FORMAT")
+    LOG_DEBUG_SAMPLE_RATE: float = Field(default=1.0, env="LOG_DEBUG_SAMPLE_RATE")  # share of requests logging DEBUG
+    LOG_PREVIEW_CHARS: int = Field(default=500, env="LOG_PREVIEW_CHARS")  # payload previews in log messages
+
+    # Tracing (OpenTelemetry, see app/core/tracing.py)
+    TRACING_ENABLED: bool = Field(default=False, env="TRACING_ENABLED")
+    TRACING_EXPORTER: str = Field(default="file", env="TRACING_EXPORTER")  # console | file | otlp
+    TRACING_FILE: str = Field(default="logs/traces.jsonl", env="TRACING_FILE")
+    TRACING_OTLP_ENDPOINT: str = Field(default="http://localhost:4318/v1/traces", env="TRACING_OTLP_ENDPOINT")
+    TRACING_SAMPLE_RATIO: float = Field(default=1.0, env="TRACING_SAMPLE_RATIO")
+    TRACING_SERVICE_NAME: str = Field(default="verificai-backend", env="TRACING_SERVICE_NAME")
+
+    # On-demand profiling (admin only, see app/core/profiling.py)
+    PROFILING_ENABLED: bool = Field(default=True, env="PROFILING_ENABLED")
+    PROFILING_DIR: str = Field(default="profiles", env="PROFILING_DIR")
+    PROFILING_MAX_PROFILES: int = Field(default=50, env="PROFILING_MAX_PROFILES")
+    PROFILING_FORMAT: str = Field(default="speedscope", env="PROFILING_FORMAT")  # speedscope | html
+    PROFILING_INTERVAL: float = Field(default=0.001, env="PROFILING_INTERVAL")
 
     # Environment
     ENVIRONMENT: str = Field(default="development", env="ENVIRONMENT")
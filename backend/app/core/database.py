@@ -5,12 +5,13 @@ Database configuration and connection management for VerificAI Backend
 from sqlalchemy import create_engine, MetaData, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.pool import QueuePool
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 import redis.asyncio as redis
-from typing import Generator
+from typing import AsyncGenerator, Generator
 import logging
 
 from app.core.config import settings
+from app.core.metrics import TimedAsyncQueuePool, TimedQueuePool, instrument_engine
 from app.models.base import Base
 
 # Import all models to ensure they are registered with SQLAlchemy
@@ -26,7 +27,7 @@ logger = logging.getLogger(__name__)
 # SQLAlchemy configuration
 engine = create_engine(
     settings.DATABASE_URL,
-    poolclass=QueuePool,
+    poolclass=TimedQueuePool,
     pool_size=settings.DATABASE_POOL_SIZE,
     max_overflow=settings.DATABASE_MAX_OVERFLOW,
     pool_timeout=settings.DATABASE_POOL_TIMEOUT,
@@ -35,9 +36,41 @@ engine = create_engine(
     echo=settings.DEBUG,
 )
 
+instrument_engine(engine, "sync")
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
+def get_async_database_url(url: str) -> str:
+    """Same database through an asyncio driver (asyncpg for PostgreSQL, aiosqlite for SQLite)"""
+    scheme, _, rest = url.partition("://")
+    if "+" in scheme and scheme.split("+", 1)[1] in ("asyncpg", "aiosqlite"):
+        return url
+    if scheme.startswith("postgresql"):
+        return f"postgresql+asyncpg://{rest}"
+    if scheme.startswith("sqlite"):
+        return f"sqlite+aiosqlite://{rest}"
+    return url
+
+
+# Async engine for async def handlers: queries are awaited instead of blocking the event loop
+async_database_url = settings.DATABASE_ASYNC_URL or get_async_database_url(settings.DATABASE_URL)
+async_engine_options = {"pool_pre_ping": True, "echo": settings.DEBUG}
+if not async_database_url.startswith("sqlite"):
+    async_engine_options.update(
+        poolclass=TimedAsyncQueuePool,
+        pool_size=settings.DATABASE_POOL_SIZE,
+        max_overflow=settings.DATABASE_MAX_OVERFLOW,
+        pool_timeout=settings.DATABASE_POOL_TIMEOUT,
+        pool_recycle=settings.DATABASE_POOL_RECYCLE,
+    )
+async_engine = create_async_engine(async_database_url, **async_engine_options)
+instrument_engine(async_engine.sync_engine, "async")
+
+# expire_on_commit=False: attributes stay readable after commit (no implicit lazy load outside await)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
 # Naming convention for constraints
 convention = {
     "ix": "ix_%(column_0_label)s",
@@ -64,6 +97,17 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """Async database dependency for FastAPI routes"""
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+        except Exception as e:
+            logger.error("Database session error: %s", e)
+            await db.rollback()
+            raise
+
+
 async def get_redis() -> redis.Redis:
     """Redis dependency for FastAPI routes"""
     try:
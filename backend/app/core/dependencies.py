@@ -9,7 +9,7 @@ from sqlalchemy.orm import Session
 import redis.asyncio as redis
 
 from app.core.database import get_db, get_redis
-from app.core.security import verify_token
+from app.core.security import decode_access_token, user_cache
 from app.core.exceptions import InvalidTokenError, AuthenticationError
 from app.models.user import User
 
@@ -24,18 +24,28 @@ async def get_current_user(
     """Get current authenticated user"""
     try:
         # Verify token
-        username = verify_token(token.credentials)
-        if username is None:
+        decoded = decode_access_token(token.credentials)
+        if decoded is None:
             raise InvalidTokenError()
-
-        # Get user from database
-        user = db.query(User).filter(User.username == username).first()
-        if user is None:
-            raise AuthenticationError("User not found")
+        username, token_version = decoded
+
+        # Cached user attached to this session without a query (changes still commit)
+        user = user_cache.get(username, token_version)
+        if user is not None:
+            user = db.merge(user, load=False)
+        else:
+            user = db.query(User).filter(User.username == username).first()
+            if user is None:
+                raise AuthenticationError("User not found")
+            user_cache.put(username, user)
 
         if not user.is_active:
             raise AuthenticationError("User account is inactive")
 
+        # Issued before a password, role or activation change
+        if (user.token_version or 0) != token_version:
+            raise InvalidTokenError()
+
         return user
 
     except Exception as e:
@@ -84,13 +94,17 @@ class CommonQueryParams:
         limit: int = 100,
         sort_by: Optional[str] = None,
         sort_order: Optional[str] = "desc",
-        search: Optional[str] = None
+        search: Optional[str] = None,
+        cursor: Optional[str] = None,
+        total: Optional[str] = None
     ):
         self.skip = skip
         self.limit = min(limit, 1000)  # Max 1000 items per page
         self.sort_by = sort_by
         self.sort_order = sort_order.lower() if sort_order else "desc"
         self.search = search
+        self.cursor = cursor  # next_cursor of the previous page (replaces skip)
+        self.total = total  # exact | cached | estimate | none (see app.core.pagination)
 
         # Validate sort order
         if self.sort_order not in ["asc", "desc"]:
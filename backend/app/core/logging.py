@@ -1,16 +1,95 @@
 """
 Logging configuration for VerificAI Backend
+
+Handlers (console, rotating files) run in a QueueListener thread: request
+code only puts the record on a queue, so a slow stdout or a file rotation
+never blocks the event loop. DEBUG records are sampled per request
+(LOG_DEBUG_SAMPLE_RATE) and large payloads are logged through preview(),
+which is only rendered, and capped, when the record is actually emitted.
 """
 
+import atexit
+import copy
 import logging
 import logging.config
+import logging.handlers
+import queue
+import random
 import sys
-from typing import Any, Dict, Optional
+import zlib
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 import json
 from pathlib import Path
 
 from app.core.config import settings
+from app.core.tracing import request_id_var
+
+_listeners: List[logging.handlers.QueueListener] = []
+
+
+class Preview:
+    """
+    Size-capped view of a payload for log messages; the text is only built
+    (and truncated) if the record is emitted. Use as an argument:
+    logger.debug("LLM response: %s", preview(text))
+    """
+
+    __slots__ = ("value", "limit")
+
+    def __init__(self, value: Any, limit: Optional[int] = None):
+        self.value = value
+        self.limit = limit or settings.LOG_PREVIEW_CHARS
+
+    def __str__(self) -> str:
+        text = self.value if isinstance(self.value, str) else repr(self.value)
+        if len(text) <= self.limit:
+            return text
+        return f"{text[:self.limit]}... [{len(text)} chars]"
+
+    __repr__ = __str__
+
+
+def preview(value: Any, limit: Optional[int] = None) -> Preview:
+    return Preview(value, limit)
+
+
+class DebugSampler(logging.Filter):
+    """
+    Keep every record of INFO and above, and DEBUG records of a sample of
+    the requests: the decision is made per request id, so a sampled request
+    keeps all of its debug lines.
+    """
+
+    def __init__(self, rate: float = 1.0):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or self.rate >= 1:
+            return True
+        if self.rate <= 0:
+            return False
+        request_id = request_id_var.get()
+        if request_id is None:
+            return random.random() < self.rate
+        return zlib.crc32(request_id.encode()) % 10000 < self.rate * 10000
+
+
+class LogQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that keeps the exception apart from the message (for JSONFormatter)"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge the args now: they may change or not be thread-safe by the time the listener runs
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        if not hasattr(record, "request_id"):
+            record.request_id = request_id_var.get()
+        return record
 
 
 class JSONFormatter(logging.Formatter):
@@ -18,7 +97,7 @@ class JSONFormatter(logging.Formatter):
 
     def format(self, record: logging.LogRecord) -> str:
         log_entry = {
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": datetime.utcfromtimestamp(record.created).isoformat(),
             "level": record.levelname,
             "logger": record.name,
             "message": record.getMessage(),
@@ -29,14 +108,16 @@ class JSONFormatter(logging.Formatter):
             "process": record.process,
         }
 
-        # Add exception info if present
+        # Add exception info if present (already rendered when the record went through the queue)
         if record.exc_info:
             log_entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            log_entry["exception"] = record.exc_text
 
         # Add extra fields if present
         if hasattr(record, 'user_id'):
             log_entry["user_id"] = record.user_id
-        if hasattr(record, 'request_id'):
+        if getattr(record, 'request_id', None):
             log_entry["request_id"] = record.request_id
         if hasattr(record, 'ip_address'):
             log_entry["ip_address"] = record.ip_address
@@ -141,6 +222,39 @@ def setup_logging() -> None:
     }
 
     logging.config.dictConfig(log_config)
+    _move_handlers_to_queues([name for name in log_config["loggers"]])
+
+
+def _move_handlers_to_queues(logger_names: List[str]) -> None:
+    """Replace the handlers of each logger by a queue, drained by a listener thread"""
+    stop_logging()
+    sampler = DebugSampler(settings.LOG_DEBUG_SAMPLE_RATE)
+    queues: Dict[tuple, LogQueueHandler] = {}
+    for name in logger_names:
+        target = logging.getLogger(name or None)
+        handlers = tuple(target.handlers)
+        if not handlers:
+            continue
+        # Loggers writing to the same handlers share a queue and a listener
+        queue_handler = queues.get(handlers)
+        if queue_handler is None:
+            log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+            queue_handler = LogQueueHandler(log_queue)
+            queue_handler.addFilter(sampler)
+            listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+            listener.start()
+            _listeners.append(listener)
+            queues[handlers] = queue_handler
+        target.handlers = [queue_handler]
+
+
+def stop_logging() -> None:
+    """Flush the queued records and stop the listener threads (on shutdown)"""
+    while _listeners:
+        _listeners.pop().stop()
+
+
+atexit.register(stop_logging)
 
 
 def get_logger(name: str) -> logging.Logger:
@@ -0,0 +1,135 @@
+"""
+Prometheus metrics for VerificAI Backend
+
+Exposed on /metrics (scraped by monitoring/prometheus.yml). With several
+uvicorn workers, set PROMETHEUS_MULTIPROC_DIR to an empty directory shared by
+the workers of the pod before starting them: each process writes its values
+there and /metrics aggregates all of them, whichever worker serves the scrape.
+"""
+
+import os
+import time
+from typing import Optional, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+MULTIPROCESS_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+
+LLM_BUCKETS = (0.5, 1, 2.5, 5, 10, 20, 30, 60, 90, 120, 180, 300)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+QUEUE_BUCKETS = (0.1, 0.5, 1, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+
+# HTTP (names used by monitoring/alert_rules.yml and grafana-dashboards.yml)
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests", ["method", "endpoint", "status"]
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ["method", "endpoint"]
+)
+
+# LLM calls, one observation per HTTP request to the provider (retries included)
+LLM_REQUEST_DURATION = Histogram(
+    "llm_request_duration_seconds", "LLM provider request latency", ["model", "status"], buckets=LLM_BUCKETS
+)
+LLM_RETRIES = Counter("llm_retries_total", "LLM request retries", ["model"])
+LLM_RATE_LIMITED = Counter("llm_rate_limited_total", "LLM requests answered with 429", ["model"])
+LLM_TOKENS = Counter("llm_tokens_total", "LLM tokens", ["model", "direction"])
+
+# Analysis queue
+ANALYSIS_QUEUE_DEPTH = Gauge(
+    "analysis_queue_depth", "Analysis jobs waiting in the queue", multiprocess_mode="livesum"
+)
+ANALYSIS_QUEUE_WAIT = Histogram(
+    "analysis_queue_wait_seconds", "Time an analysis job waited before processing", buckets=QUEUE_BUCKETS
+)
+
+# Database
+DB_POOL_CHECKOUT = Histogram(
+    "db_pool_checkout_seconds", "Time waiting for a connection from the pool", ["engine"], buckets=DB_BUCKETS
+)
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds", "Query execution time", ["engine", "operation"], buckets=DB_BUCKETS
+)
+
+QUERY_OPERATIONS = {"select", "insert", "update", "delete"}
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Body and content type for /metrics"""
+    if MULTIPROCESS_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead() -> None:
+    """Drop this worker's live gauges (multiprocess mode), on shutdown"""
+    if MULTIPROCESS_DIR:
+        multiprocess.mark_process_dead(os.getpid())
+
+
+def observe_llm_request(model: str, status: str, seconds: float, attempt: int = 0) -> None:
+    """status: HTTP status code, "timeout" or "error"; attempt > 0 counts as a retry"""
+    LLM_REQUEST_DURATION.labels(model, status).observe(seconds)
+    if attempt > 0:
+        LLM_RETRIES.labels(model).inc()
+    if status == "429":
+        LLM_RATE_LIMITED.labels(model).inc()
+
+
+def record_llm_tokens(model: str, input_tokens: Optional[int], output_tokens: Optional[int]) -> None:
+    if input_tokens:
+        LLM_TOKENS.labels(model, "in").inc(input_tokens)
+    if output_tokens:
+        LLM_TOKENS.labels(model, "out").inc(output_tokens)
+
+
+def instrument_engine(engine: Engine, name: str) -> None:
+    """Record query durations of an engine (for an AsyncEngine pass its sync_engine)"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("query_start")
+        if not starts:
+            return
+        operation = statement.lstrip()[:6].lower()
+        DB_QUERY_DURATION.labels(name, operation if operation in QUERY_OPERATIONS else "other").observe(
+            time.perf_counter() - starts.pop()
+        )
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(context):
+        starts = context.connection.info.get("query_start") if context.connection is not None else None
+        if starts:
+            starts.pop()
+
+
+class PoolCheckoutTimer:
+    """Pool mixin recording how long each checkout waited for a connection"""
+
+    metrics_engine = "sync"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT.labels(self.metrics_engine).observe(time.perf_counter() - start)
+
+
+class TimedQueuePool(PoolCheckoutTimer, QueuePool):
+    metrics_engine = "sync"
+
+
+class TimedAsyncQueuePool(PoolCheckoutTimer, AsyncAdaptedQueuePool):
+    metrics_engine = "async"
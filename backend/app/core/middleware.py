@@ -1,134 +1,217 @@
 """
 Middleware components for VerificAI Backend
+
+Plain ASGI middlewares: each one wraps send() instead of going through
+BaseHTTPMiddleware, which runs the endpoint in a separate task and pipes the
+body through a memory stream (extra latency, and no real streaming).
 """
 
+import logging
+import re
 import time
 import uuid
-from typing import Callable
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.middleware.base import RequestResponseEndpoint
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders, QueryParams
+from starlette.requests import Request
 from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.core.logging import request_logger, security_logger
-from app.core.exceptions import RateLimitExceededError
+from app.core.metrics import HTTP_REQUEST_DURATION, HTTP_REQUESTS
+from app.core.profiling import OnDemandProfiler, profiler as default_profiler
+from app.core.rate_limit import RateLimiter, create_rate_limiter, retry_after_header
+from app.core.security import decode_access_token, get_current_user
+from app.core.tracing import request_span, set_error
+
+REQUEST_ID_PATTERN = re.compile(r"[A-Za-z0-9._-]{1,128}")
+
+logger = logging.getLogger(__name__)
+
+
+class RequestIDMiddleware:
+    """
+    Add request ID to all requests, and open the root tracing span of the
+    request (see app.core.tracing): the id is set on every span under it. An
+    X-Request-ID sent by the proxy is kept so logs and traces line up.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        headers = Headers(scope=scope)
+        request_id = headers.get("x-request-id")
+        if not request_id or not REQUEST_ID_PATTERN.fullmatch(request_id):
+            request_id = str(uuid.uuid4())
+        # request.state is backed by scope["state"]
+        scope.setdefault("state", {})["request_id"] = request_id
+        status_code = 500
+
+        async def send_with_request_id(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message)["X-Request-ID"] = request_id
+            await send(message)
+
+        method = scope["method"]
+        with request_span(f"{method} {scope['path']}", request_id, headers, {
+            "http.method": method,
+            "http.target": scope["path"]
+        }) as current:
+            try:
+                await self.app(scope, receive, send_with_request_id)
+            finally:
+                # Name the span after the route template once the router matched it
+                route = getattr(scope.get("route"), "path", None)
+                if route:
+                    current.update_name(f"{method} {route}")
+                    current.set_attribute("http.route", route)
+                current.set_attribute("http.status_code", status_code)
+                if status_code >= 500:
+                    set_error(current, f"HTTP {status_code}")
+
+
+class RequestLoggingMiddleware:
+    """Log HTTP requests and responses"""
 
+    def __init__(self, app: ASGIApp):
+        self.app = app
 
-class RequestIDMiddleware(BaseHTTPMiddleware):
-    """Add request ID to all requests"""
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
 
-    async def dispatch(
-        self,
-        request: Request,
-        call_next: Callable
-    ) -> Response:
-        request_id = str(uuid.uuid4())
-        request.state.request_id = request_id
+        start_time = time.time()
+        status_code = None
 
-        response = await call_next(request)
-        response.headers["X-Request-ID"] = request_id
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
 
-        return response
+        await self.app(scope, receive, send_with_status)
 
+        state = scope.get("state", {})
+        user = state.get("user")
+        client = scope.get("client")
+        request_logger.log_request(
+            method=scope["method"],
+            url=str(Request(scope).url),
+            status_code=status_code,
+            response_time=time.time() - start_time,
+            user_id=user.id if user is not None else None,
+            ip_address=client[0] if client else None,
+            request_id=state.get("request_id")
+        )
 
-class RequestLoggingMiddleware(BaseHTTPMiddleware):
-    """Log HTTP requests and responses"""
 
-    async def dispatch(
-        self,
-        request: Request,
-        call_next: Callable
-    ) -> Response:
-        start_time = time.time()
+class MetricsMiddleware:
+    """HTTP request count and latency, labeled by route template (not the raw path)"""
 
-        # Extract user info if available
-        user_id = None
-        if hasattr(request.state, 'user'):
-            user_id = request.state.user.id
+    def __init__(self, app: ASGIApp):
+        self.app = app
 
-        # Extract IP address
-        ip_address = request.client.host if request.client else None
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
 
-        # Get request ID
-        request_id = getattr(request.state, 'request_id', None)
+        start_time = time.perf_counter()
+        status_code = 500
 
-        response = await call_next(request)
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
 
-        # Calculate processing time
-        processing_time = time.time() - start_time
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router stores the matched route in the scope
+            route = scope.get("route")
+            endpoint = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            HTTP_REQUESTS.labels(method, endpoint, str(status_code)).inc()
+            HTTP_REQUEST_DURATION.labels(method, endpoint).observe(time.perf_counter() - start_time)
+
+
+# Security headers, set on every response except CORS preflight
+SECURITY_HEADERS = {
+    "X-Content-Type-Options": "nosniff",
+    "X-Frame-Options": "DENY",
+    "X-XSS-Protection": "1; mode=block",
+    "Strict-Transport-Security": "max-age=31536000; includeSubDomains",
+    "Referrer-Policy": "strict-origin-when-cross-origin",
+    "Permissions-Policy": "geolocation=(), microphone=(), camera=()",
+    "Content-Security-Policy": (
+        "default-src 'self'; "
+        "script-src 'self' 'unsafe-inline'; "
+        "style-src 'self' 'unsafe-inline'; "
+        "img-src 'self' data:; "
+        "font-src 'self'; "
+        "connect-src 'self' http://localhost:3012 http://localhost:8000"
+    )
+}
+
+
+class SecurityHeadersMiddleware:
+    """Add security headers to responses"""
 
-        # Log the request
-        request_logger.log_request(
-            method=request.method,
-            url=str(request.url),
-            status_code=response.status_code,
-            response_time=processing_time,
-            user_id=user_id,
-            ip_address=ip_address,
-            request_id=request_id
-        )
+    def __init__(self, app: ASGIApp):
+        self.app = app
 
-        return response
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "OPTIONS":
+            return await self.app(scope, receive, send)
 
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                for header, value in SECURITY_HEADERS.items():
+                    headers[header] = value
+            await send(message)
 
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
-    """Add security headers to responses"""
+        await self.app(scope, receive, send_with_headers)
 
-    async def dispatch(
-        self,
-        request: Request,
-        call_next: Callable
-    ) -> Response:
-        response = await call_next(request)
-
-        # Don't add security headers to OPTIONS requests (CORS preflight)
-        if request.method == "OPTIONS":
-            return response
-
-        # Add security headers
-        security_headers = {
-            "X-Content-Type-Options": "nosniff",
-            "X-Frame-Options": "DENY",
-            "X-XSS-Protection": "1; mode=block",
-            "Strict-Transport-Security": "max-age=31536000; includeSubDomains",
-            "Referrer-Policy": "strict-origin-when-cross-origin",
-            "Permissions-Policy": "geolocation=(), microphone=(), camera=()",
-            "Content-Security-Policy": (
-                "default-src 'self'; "
-                "script-src 'self' 'unsafe-inline'; "
-                "style-src 'self' 'unsafe-inline'; "
-                "img-src 'self' data:; "
-                "font-src 'self'; "
-                "connect-src 'self' http://localhost:3012 http://localhost:8000"
-            )
-        }
 
-        for header, value in security_headers.items():
-            response.headers[header] = value
+class ErrorHandlerMiddleware:
+    """Global error handler middleware"""
 
-        return response
+    def __init__(self, app: ASGIApp):
+        self.app = app
 
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
 
-class ErrorHandlerMiddleware(BaseHTTPMiddleware):
-    """Global error handler middleware"""
+        response_started = False
+
+        async def send_tracking_start(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
 
-    async def dispatch(
-        self,
-        request: Request,
-        call_next: Callable
-    ) -> Response:
         try:
-            response = await call_next(request)
-            return response
+            await self.app(scope, receive, send_tracking_start)
         except Exception as exc:
+            # Too late for an error response, the client already got headers
+            if response_started:
+                raise
+
             # Get request info for logging
-            request_id = getattr(request.state, 'request_id', None)
-            ip_address = request.client.host if request.client else None
+            request_id = scope.get("state", {}).get("request_id")
+            client = scope.get("client")
+            ip_address = client[0] if client else None
 
             # Log the error with full traceback
-            import traceback
-            print(f"ERROR: {exc}")
-            print(f"TRACEBACK: {traceback.format_exc()}")
+            logger.exception("Unhandled error (request %s): %s", request_id, exc)
 
             security_logger.log_security_event(
                 event_type="request_error",
@@ -139,7 +222,7 @@ class ErrorHandlerMiddleware(BaseHTTPMiddleware):
 
             # Return appropriate error response
             if hasattr(exc, 'status_code'):
-                return JSONResponse(
+                response = JSONResponse(
                     status_code=exc.status_code,
                     content={
                         "error_code": getattr(exc, 'error_code', 'UNKNOWN_ERROR'),
@@ -147,57 +230,105 @@ class ErrorHandlerMiddleware(BaseHTTPMiddleware):
                         "request_id": request_id
                     }
                 )
+            else:
+                # For unhandled exceptions
+                response = JSONResponse(
+                    status_code=500,
+                    content={
+                        "error_code": "INTERNAL_ERROR",
+                        "message": "Internal server error",
+                        "request_id": request_id
+                    }
+                )
+            await response(scope, receive, send)
 
-            # For unhandled exceptions
-            return JSONResponse(
-                status_code=500,
-                content={
-                    "error_code": "INTERNAL_ERROR",
-                    "message": "Internal server error",
-                    "request_id": request_id
-                }
-            )
 
+class RateLimitMiddleware:
+    """Per-client and per-route rate limiting (see app.core.rate_limit)"""
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    """Simple rate limiting middleware"""
-
-    def __init__(self, app, requests_per_minute: int = 60):
-        super().__init__(app)
-        self.requests_per_minute = requests_per_minute
-        self.request_counts = {}
-
-    async def dispatch(
-        self,
-        request: Request,
-        call_next: Callable
-    ) -> Response:
-        client_ip = request.client.host
-        current_time = int(time.time())
-
-        # Clean old entries (older than 1 minute)
-        cutoff_time = current_time - 60
-        self.request_counts = {
-            ip: times for ip, times in self.request_counts.items()
-            if times and times[-1] > cutoff_time
-        }
-
-        # Check rate limit
-        if client_ip not in self.request_counts:
-            self.request_counts[client_ip] = []
-
-        recent_requests = [
-            t for t in self.request_counts[client_ip]
-            if t > cutoff_time
-        ]
-
-        if len(recent_requests) >= self.requests_per_minute:
-            raise RateLimitExceededError(
-                message="Rate limit exceeded",
-                retry_after=60
-            )
+    def __init__(self, app: ASGIApp, limiter: RateLimiter = None):
+        self.app = app
+        self.limiter = limiter or create_rate_limiter()
 
-        # Record this request
-        self.request_counts[client_ip].append(current_time)
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # CORS preflight is not counted
+        if scope["type"] != "http" or scope["method"] == "OPTIONS":
+            return await self.app(scope, receive, send)
 
-        return await call_next(request)
\ No newline at end of file
+        identity, is_user = self._identity(scope)
+        retry_after = await self.limiter.check(scope["path"], identity, is_user)
+        if retry_after:
+            response = JSONResponse(
+                status_code=429,
+                content={
+                    "error_code": "RATE_LIMIT_EXCEEDED",
+                    "message": "Rate limit exceeded",
+                    "request_id": scope.get("state", {}).get("request_id")
+                },
+                headers={"Retry-After": retry_after_header(retry_after)}
+            )
+            return await response(scope, receive, send)
+
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    def _identity(scope: Scope):
+        """Authenticated user (valid bearer token), else client IP"""
+        authorization = Headers(scope=scope).get("authorization")
+        if authorization and authorization[:7].lower() == "bearer ":
+            decoded = decode_access_token(authorization[7:])
+            if decoded:
+                return f"user:{decoded[0]}", True
+        client = scope.get("client")
+        return f"ip:{client[0] if client else 'unknown'}", False
+
+
+class ProfilingMiddleware:
+    """
+    Profile a request on demand (X-Profile: 1 header or ?profile=1), for admin
+    users only: the flag is checked after authenticating the bearer token and
+    ignored otherwise. See app.core.profiling.
+    """
+
+    FLAG_VALUES = ("1", "true")
+
+    def __init__(self, app: ASGIApp, profiler: OnDemandProfiler = None):
+        self.app = app
+        self.profiler = profiler or default_profiler
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.profiler.enabled or not self._requested(scope):
+            return await self.app(scope, receive, send)
+
+        user = await self._admin_user(scope)
+        if user is None:
+            return await self.app(scope, receive, send)
+
+        profile_id = scope.get("state", {}).get("request_id") or str(uuid.uuid4())
+
+        async def send_with_profile_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)["X-Profile-ID"] = profile_id
+            await send(message)
+
+        meta = {"kind": "request", "method": scope["method"], "path": scope["path"], "user_id": user.id}
+        async with self.profiler.profile(profile_id, meta) as profiling:
+            await self.app(scope, receive, send_with_profile_id if profiling else send)
+
+    def _requested(self, scope: Scope) -> bool:
+        if Headers(scope=scope).get("x-profile", "").lower() in self.FLAG_VALUES:
+            return True
+        query_string = scope.get("query_string", b"")
+        return b"profile=" in query_string and QueryParams(query_string).get("profile", "").lower() in self.FLAG_VALUES
+
+    @staticmethod
+    async def _admin_user(scope: Scope):
+        """Admin user of the bearer token, else None (same checks as the auth dependency)"""
+        authorization = Headers(scope=scope).get("authorization")
+        if not authorization or authorization[:7].lower() != "bearer ":
+            return None
+        try:
+            user = await run_in_threadpool(get_current_user, authorization[7:])
+        except HTTPException:
+            return None
+        return user if user.is_admin else None
@@ -0,0 +1,291 @@
+"""
+Pagination utilities for VerificAI Backend
+
+List endpoints page with keyset (seek) pagination: the query is ordered by an
+indexed sort key plus the primary key as tie-breaker, and the next page starts
+after the last row returned, encoded in an opaque cursor token. Deep pages
+cost the same as the first one. OFFSET is still accepted (skip) when no
+cursor is given, for existing clients.
+
+Totals are optional: "exact" runs COUNT(*), "cached" reuses a recent count
+for the same filters, "estimate" reads the planner estimate on PostgreSQL
+(falling back to the cached count elsewhere) and "none" skips it. By default
+the first page is counted exactly and cursor pages are not counted at all
+(the client already has the total from the first page).
+"""
+
+import base64
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query, Session
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+TOTAL_MODES = ("exact", "cached", "estimate", "none")
+
+# (column, "asc" | "desc")
+SortKey = Tuple[Any, str]
+
+
+@dataclass
+class Page:
+    """One page of results"""
+    items: List[Any]
+    limit: int
+    skip: int = 0
+    next_cursor: Optional[str] = None
+    has_more: bool = False
+    total: Optional[int] = None
+    total_is_estimate: bool = False
+    sort: List[str] = field(default_factory=list)
+
+    @property
+    def has_prev(self) -> bool:
+        return self.skip > 0
+
+    def paginated_fields(self) -> Dict[str, Any]:
+        """Fields of PaginatedResponse (total falls back to what is known when it was skipped)"""
+        total = self.total if self.total is not None else self.skip + len(self.items) + (1 if self.has_more else 0)
+        return {
+            "total": total,
+            "skip": self.skip,
+            "limit": self.limit,
+            "pages": (total + self.limit - 1) // self.limit,
+            "current_page": (self.skip // self.limit) + 1,
+            "has_next": self.has_more,
+            "has_prev": self.has_prev,
+            "next_cursor": self.next_cursor,
+            "total_is_estimate": self.total_is_estimate or self.total is None
+        }
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    if isinstance(value, uuid.UUID):
+        return {"uuid": str(value)}
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+        if "uuid" in value:
+            return uuid.UUID(value["uuid"])
+    return value
+
+
+def encode_cursor(values: Sequence[Any], sort_signature: str) -> str:
+    """Opaque token for the position after a row (its sort key values)"""
+    raw = json.dumps({"s": sort_signature, "v": [_encode_value(v) for v in values]}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_signature: str) -> List[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        values = [_decode_value(v) for v in data["v"]]
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    if data.get("s") != sort_signature:
+        # The cursor was issued for a different ordering
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor does not match the requested sort")
+    return values
+
+
+def count_cache_key(name: str, user_id: Any, **filters: Any) -> str:
+    """Key of a cached total: endpoint, user and the filters applied"""
+    params = json.dumps({k: _encode_value(v) for k, v in filters.items()}, sort_keys=True, default=str)
+    return f"{name}:{user_id}:{params}"
+
+
+def _sort_signature(sort_keys: Sequence[SortKey]) -> str:
+    return ",".join(f"{column.key}:{direction}" for column, direction in sort_keys)
+
+
+def _seek_condition(sort_keys: Sequence[SortKey], values: Sequence[Any]):
+    """Rows strictly after the cursor position in the given ordering (expanded row comparison)"""
+    conditions = []
+    for i, (column, direction) in enumerate(sort_keys):
+        value = values[i]
+        after = column > value if direction == "asc" else column < value
+        equal_prefix = [sort_keys[j][0] == values[j] for j in range(i)]
+        conditions.append(and_(*equal_prefix, after) if equal_prefix else after)
+    return or_(*conditions)
+
+
+def resolve_sort(
+    sortable: Dict[str, Any],
+    sort_by: Optional[str],
+    sort_order: Optional[str],
+    default: str,
+    tiebreaker: Any
+) -> List[SortKey]:
+    """
+    Sort keys for a request. Only columns listed in sortable (backed by an
+    index) are accepted; anything else falls back to the default sort.
+    """
+    direction = "asc" if sort_order == "asc" else "desc"
+    column = sortable.get(sort_by) if sort_by else None
+    if column is None:
+        column = sortable[default]
+    keys = [(column, direction)]
+    if column.key != tiebreaker.key:
+        keys.append((tiebreaker, direction))
+    return keys
+
+
+class TotalCounter:
+    """COUNT(*) results cached for a short time, keyed by endpoint and filters"""
+
+    def __init__(self, ttl_seconds: int = 30, max_entries: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._counts: "OrderedDict[str, Tuple[int, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def count(self, query: Query, cache_key: Optional[str], mode: str) -> Tuple[Optional[int], bool]:
+        """Return (total, is_estimate) for the mode"""
+        if mode == "none":
+            return None, False
+        if mode == "estimate":
+            estimate = self._planner_estimate(query)
+            if estimate is not None:
+                return estimate, True
+            mode = "cached"
+        if mode == "cached" and cache_key:
+            with self._lock:
+                cached = self._counts.get(cache_key)
+            if cached and time.monotonic() - cached[1] < self.ttl_seconds:
+                return cached[0], False
+
+        total = query.order_by(None).count()
+        if cache_key:
+            with self._lock:
+                self._counts[cache_key] = (total, time.monotonic())
+                self._counts.move_to_end(cache_key)
+                while len(self._counts) > self.max_entries:
+                    self._counts.popitem(last=False)
+        return total, False
+
+    def invalidate(self, prefix: str) -> None:
+        """Forget counts whose key starts with prefix (after inserts/deletes)"""
+        with self._lock:
+            for key in [k for k in self._counts if k.startswith(prefix)]:
+                del self._counts[key]
+
+    @staticmethod
+    def _planner_estimate(query: Query) -> Optional[int]:
+        session = query.session
+        bind = session.get_bind()
+        if bind.dialect.name != "postgresql":
+            return None
+        try:
+            statement = query.order_by(None).statement.compile(
+                dialect=bind.dialect, compile_kwargs={"literal_binds": True}
+            )
+            plan = session.execute(text(f"EXPLAIN (FORMAT JSON) {statement}")).scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]["Plan"]["Plan Rows"])
+        except Exception as e:
+            logger.debug("Planner row estimate unavailable: %s", e)
+            return None
+
+
+def paginate(
+    query: Query,
+    sort_keys: Sequence[SortKey],
+    limit: int,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    total: Optional[str] = None,
+    count_key: Optional[str] = None,
+    row_values=None
+) -> Page:
+    """
+    Page a query. With a cursor (or skip == 0) the page is read with a keyset
+    seek; skip > 0 without a cursor keeps the OFFSET behaviour.
+    row_values(row) returns the sort key values of a row; by default they are
+    read from the row attributes named after the sort columns.
+    """
+    if total not in TOTAL_MODES:
+        total = "none" if cursor else "exact"
+    signature = _sort_signature(sort_keys)
+
+    total_count, is_estimate = total_counter.count(query, count_key, total)
+
+    ordered = query.order_by(*[
+        column.asc() if direction == "asc" else column.desc() for column, direction in sort_keys
+    ])
+    if cursor:
+        values = decode_cursor(cursor, signature)
+        ordered = ordered.filter(_seek_condition(sort_keys, values))
+        skip = 0
+    elif skip:
+        ordered = ordered.offset(skip)
+
+    rows = ordered.limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = None
+    if has_more and rows:
+        last = rows[-1]
+        values = row_values(last) if row_values else [getattr(last, column.key) for column, _ in sort_keys]
+        next_cursor = encode_cursor(values, signature)
+
+    return Page(
+        items=rows,
+        limit=limit,
+        skip=skip,
+        next_cursor=next_cursor,
+        has_more=has_more,
+        total=total_count,
+        total_is_estimate=is_estimate,
+        sort=[f"{column.key} {direction}" for column, direction in sort_keys]
+    )
+
+
+async def paginate_async(
+    db: AsyncSession,
+    build_query: Callable[[Session], Query],
+    sort_keys: Sequence[SortKey],
+    limit: int,
+    **kwargs: Any
+) -> Page:
+    """
+    paginate() on an AsyncSession. build_query(session) builds the Query on the
+    sync facade of the session; it runs through run_sync, so the queries are
+    awaited on the async driver.
+    """
+    return await db.run_sync(lambda session: paginate(build_query(session), sort_keys, limit, **kwargs))
+
+
+# Global total counter instance
+total_counter = TotalCounter(ttl_seconds=settings.PAGINATION_COUNT_CACHE_SECONDS)
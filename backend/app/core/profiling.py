@@ -0,0 +1,185 @@
+"""
+On-demand profiling for VerificAI Backend
+
+Sampling profiler (pyinstrument) for a single request or for the next N
+analyses run by the orchestrator, so a slow production request can be
+profiled without profiling everything. Nothing is sampled unless asked:
+
+- a request with the X-Profile: 1 header (or ?profile=1) from an admin user
+  is profiled (see ProfilingMiddleware); the profile is stored under its
+  request id, returned in the X-Profile-ID response header. The flag is
+  ignored for anyone else.
+- POST /api/v1/admin/profiles/analyses {"count": N} profiles the next N analyses
+  run by this worker process, stored as analysis-<id>.
+
+Profiles are flame graphs: speedscope JSON (open in https://www.speedscope.app)
+or pyinstrument HTML, per PROFILING_FORMAT. Only the newest
+PROFILING_MAX_PROFILES are kept; list and download them from
+/api/v1/admin/profiles. One profile runs at a time per process; a
+request flagged while another is being profiled runs normally.
+"""
+
+import asyncio
+import json
+import logging
+import re
+import threading
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+try:
+    from pyinstrument import Profiler
+    from pyinstrument.renderers import HTMLRenderer, SpeedscopeRenderer
+except ImportError:
+    Profiler = None
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_ID_PATTERN = re.compile(r"[A-Za-z0-9_-][A-Za-z0-9._-]{0,127}")
+
+FORMATS = {"speedscope": ".speedscope.json", "html": ".html"}
+
+
+class ProfileStore:
+    """Profiles on disk, one output file and one .meta.json per profile id"""
+
+    def __init__(self, root: str, max_profiles: int, output_format: str = "speedscope"):
+        if output_format not in FORMATS:
+            raise ValueError(f"Unknown PROFILING_FORMAT '{output_format}' (speedscope or html)")
+        self.root = Path(root)
+        self.max_profiles = max_profiles
+        self.output_format = output_format
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def valid_id(profile_id: str) -> bool:
+        return bool(PROFILE_ID_PATTERN.fullmatch(profile_id))
+
+    def save(self, profile_id: str, session, meta: Dict[str, Any]) -> Path:
+        """Render and write a profiling session (blocking), then apply the retention cap"""
+        if self.output_format == "html":
+            output = HTMLRenderer().render(session)
+        else:
+            output = SpeedscopeRenderer().render(session)
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self.root / f"{profile_id}{FORMATS[self.output_format]}"
+        path.write_text(output, encoding="utf-8")
+
+        meta = dict(meta, profile_id=profile_id, file=path.name, format=self.output_format,
+                    samples=session.sample_count, created_at=datetime.utcnow().isoformat())
+        with open(self.root / f"{profile_id}.meta.json", "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+        self._enforce_retention()
+        return path
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Metadata of the stored profiles, newest first"""
+        profiles = []
+        for meta_path in self._meta_files():
+            try:
+                with open(meta_path, "r", encoding="utf-8") as f:
+                    profiles.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return profiles
+
+    def path(self, profile_id: str) -> Optional[Path]:
+        """Output file of a profile, None if unknown"""
+        if not self.valid_id(profile_id):
+            return None
+        for extension in FORMATS.values():
+            path = self.root / f"{profile_id}{extension}"
+            if path.exists():
+                return path
+        return None
+
+    def _meta_files(self) -> List[Path]:
+        if not self.root.exists():
+            return []
+        return sorted(self.root.glob("*.meta.json"), key=lambda p: p.stat().st_mtime, reverse=True)
+
+    def _enforce_retention(self) -> None:
+        with self._lock:
+            for meta_path in self._meta_files()[self.max_profiles:]:
+                profile_id = meta_path.name[:-len(".meta.json")]
+                for extension in FORMATS.values():
+                    (self.root / f"{profile_id}{extension}").unlink(missing_ok=True)
+                meta_path.unlink(missing_ok=True)
+
+
+class OnDemandProfiler:
+    """Runs the profiler around a request or an analysis job when asked to"""
+
+    def __init__(self, store: ProfileStore, enabled: bool = True, interval: float = 0.001):
+        self.store = store
+        self.enabled = enabled and Profiler is not None
+        self.interval = interval
+        self._running = False
+        self._armed_analyses = 0
+
+    def arm_analyses(self, count: int) -> int:
+        """Profile the next count analyses of this process (0 disarms)"""
+        self._armed_analyses = max(0, count)
+        return self._armed_analyses
+
+    @property
+    def armed_analyses(self) -> int:
+        return self._armed_analyses
+
+    def take_analysis(self) -> bool:
+        """True (and one less armed) if the next analysis should be profiled"""
+        if not self.enabled or self._armed_analyses <= 0:
+            return False
+        self._armed_analyses -= 1
+        return True
+
+    @asynccontextmanager
+    async def profile(self, profile_id: str, meta: Dict[str, Any]) -> AsyncIterator[bool]:
+        """
+        Profile the enclosed block (the current task only); yields False when
+        profiling is unavailable or another profile is running. The output is
+        rendered and written in a thread after the block.
+        """
+        if not self.enabled or self._running or not self.store.valid_id(profile_id):
+            yield False
+            return
+
+        self._running = True
+        profiler = Profiler(interval=self.interval, async_mode="enabled")
+        profiler.start(target_description=profile_id)
+        started = time.perf_counter()
+        try:
+            yield True
+        finally:
+            session = profiler.stop()
+            self._running = False
+            meta = dict(meta, duration_seconds=round(time.perf_counter() - started, 3))
+            future = asyncio.get_running_loop().run_in_executor(None, self.store.save, profile_id, session, meta)
+            future.add_done_callback(self._log_result)
+
+    @staticmethod
+    def _log_result(future) -> None:
+        error = future.exception()
+        if error:
+            logger.error("Failed to write profile: %s", error)
+        else:
+            logger.info("Profile written to %s", future.result())
+
+
+# Global profiler instance
+profiler = OnDemandProfiler(
+    store=ProfileStore(
+        root=settings.PROFILING_DIR,
+        max_profiles=settings.PROFILING_MAX_PROFILES,
+        output_format=settings.PROFILING_FORMAT
+    ),
+    enabled=settings.PROFILING_ENABLED,
+    interval=settings.PROFILING_INTERVAL
+)
@@ -0,0 +1,219 @@
+"""
+Rate limiting for VerificAI Backend
+
+GCRA (generic cell rate algorithm): each bucket stores a single timestamp,
+the theoretical arrival time (TAT) of the next request, so a check is O(1)
+and an idle bucket simply expires. A limit of N per period with burst B lets
+B requests through at once, then one every period / N.
+
+Buckets are keyed by identity (authenticated user, else client IP) for the
+global limit and by identity + route prefix for the per-route limits. All
+buckets of a request are checked together and only recorded if every one
+allows it.
+
+Backends: in-process memory (per worker) or Redis (atomic Lua script, shared
+by every pod).
+"""
+
+import logging
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import redis.asyncio as redis
+except ImportError:
+    redis = None
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """limit requests per period seconds, at most burst of them at once"""
+    limit: int
+    period: float
+    burst: int
+
+    @property
+    def interval(self) -> float:
+        return self.period / self.limit
+
+    @classmethod
+    def parse(cls, spec: str, default_burst: int) -> "RateLimit":
+        """Parse "10/minute" or "10/minute:3" (explicit burst)"""
+        rate, _, burst = spec.partition(":")
+        count, _, period = rate.partition("/")
+        seconds = PERIODS.get(period.strip().rstrip("s") or "minute")
+        if seconds is None:
+            raise ValueError(f"Invalid rate limit period in '{spec}'")
+        limit = int(count)
+        return cls(limit=limit, period=seconds, burst=max(1, int(burst) if burst else min(default_burst, limit)))
+
+
+Bucket = Tuple[str, RateLimit]
+
+
+class MemoryRateLimitBackend:
+    """
+    Buckets of this process. Used from the event loop only, so no lock.
+    Least recently updated buckets are dropped lazily (expired ones on each
+    hit, any beyond max_keys).
+    """
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._tats: "OrderedDict[str, float]" = OrderedDict()
+
+    async def hit(self, buckets: Sequence[Bucket]) -> float:
+        """Record a request; returns 0 if allowed, else seconds until it would be"""
+        now = time.monotonic()
+        self._expire(now)
+
+        retry_after = 0.0
+        new_tats = []
+        for key, limit in buckets:
+            new_tat = max(self._tats.get(key, now), now) + limit.interval
+            allow_at = new_tat - limit.interval * limit.burst
+            if allow_at > now:
+                retry_after = max(retry_after, allow_at - now)
+            new_tats.append((key, new_tat))
+        if retry_after:
+            return retry_after
+
+        for key, new_tat in new_tats:
+            self._tats[key] = new_tat
+            self._tats.move_to_end(key)
+        while len(self._tats) > self.max_keys:
+            self._tats.popitem(last=False)
+        return 0.0
+
+    def _expire(self, now: float, checks: int = 2) -> None:
+        for _ in range(checks):
+            if not self._tats:
+                return
+            key, tat = next(iter(self._tats.items()))
+            if tat > now:
+                return
+            del self._tats[key]
+
+
+# KEYS: buckets; ARGV: interval and burst of each bucket. Uses the Redis clock
+# so every pod agrees; keys expire when the bucket is full again.
+GCRA_SCRIPT = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local retry_after = 0
+local new_tats = {}
+for i, key in ipairs(KEYS) do
+    local interval = tonumber(ARGV[i * 2 - 1])
+    local burst = tonumber(ARGV[i * 2])
+    local tat = tonumber(redis.call('GET', key)) or now
+    if tat < now then
+        tat = now
+    end
+    local new_tat = tat + interval
+    local allow_at = new_tat - interval * burst
+    if allow_at > now then
+        retry_after = math.max(retry_after, allow_at - now)
+    end
+    new_tats[i] = new_tat
+end
+if retry_after > 0 then
+    return tostring(retry_after)
+end
+for i, key in ipairs(KEYS) do
+    redis.call('SET', key, tostring(new_tats[i]), 'PX', math.ceil((new_tats[i] - now) * 1000))
+end
+return '0'
+"""
+
+
+class RedisRateLimitBackend:
+    """Buckets shared by all pods. Fails open (allows) when Redis is unavailable."""
+
+    def __init__(self, url: str, prefix: str = "ratelimit"):
+        if redis is None:
+            raise RuntimeError("redis is not installed, required by RATE_LIMIT_BACKEND=redis")
+        self.prefix = prefix
+        self._client = redis.from_url(url, max_connections=settings.REDIS_MAX_CONNECTIONS)
+        self._script = self._client.register_script(GCRA_SCRIPT)
+        self._last_error_logged = 0.0
+
+    async def hit(self, buckets: Sequence[Bucket]) -> float:
+        # One script call per request; identity and route share a hash slot ({...})
+        keys = [f"{self.prefix}:{key}" for key, _ in buckets]
+        args = []
+        for _, limit in buckets:
+            args.extend([limit.interval, limit.burst])
+        try:
+            return float(await self._script(keys=keys, args=args))
+        except Exception as e:
+            if time.monotonic() - self._last_error_logged > 60:
+                self._last_error_logged = time.monotonic()
+                logger.warning("Rate limit check skipped, Redis unavailable: %s", e)
+            return 0.0
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+class RateLimiter:
+    """Resolves the buckets of a request and checks them against the backend"""
+
+    def __init__(
+        self,
+        backend,
+        default_limit: RateLimit,
+        user_limit: RateLimit,
+        route_limits: Optional[Dict[str, RateLimit]] = None,
+        exempt_paths: Sequence[str] = ()
+    ):
+        self.backend = backend
+        self.default_limit = default_limit
+        self.user_limit = user_limit
+        # Longest prefix first
+        self.route_limits = sorted((route_limits or {}).items(), key=lambda item: len(item[0]), reverse=True)
+        self.exempt_paths = tuple(exempt_paths)
+
+    def buckets(self, path: str, identity: str, is_user: bool) -> List[Bucket]:
+        tag = "{" + identity + "}"
+        buckets = [(tag, self.user_limit if is_user else self.default_limit)]
+        for prefix, limit in self.route_limits:
+            if path.startswith(prefix):
+                buckets.append((f"{tag}:{prefix}", limit))
+                break
+        return buckets
+
+    async def check(self, path: str, identity: str, is_user: bool) -> float:
+        """0 if the request may proceed, else seconds to wait"""
+        if path in self.exempt_paths:
+            return 0.0
+        return await self.backend.hit(self.buckets(path, identity, is_user))
+
+
+def retry_after_header(seconds: float) -> str:
+    return str(max(1, math.ceil(seconds)))
+
+
+def create_rate_limiter() -> RateLimiter:
+    burst = settings.RATE_LIMIT_BURST
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        backend = RedisRateLimitBackend(settings.REDIS_URL)
+    else:
+        backend = MemoryRateLimitBackend(max_keys=settings.RATE_LIMIT_MAX_KEYS)
+    return RateLimiter(
+        backend=backend,
+        default_limit=RateLimit(limit=settings.RATE_LIMIT_REQUESTS_PER_MINUTE, period=60, burst=burst),
+        user_limit=RateLimit(limit=settings.RATE_LIMIT_USER_REQUESTS_PER_MINUTE, period=60, burst=burst),
+        route_limits={
+            prefix: RateLimit.parse(spec, burst) for prefix, spec in settings.RATE_LIMIT_ROUTES.items()
+        },
+        exempt_paths=settings.RATE_LIMIT_EXEMPT_PATHS
+    )
@@ -2,30 +2,47 @@
 Security utilities and password management for VerificAI Backend
 """
 
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Union, Any
+from typing import Optional, Union, Any, Dict, Tuple, TYPE_CHECKING
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy.orm import make_transient_to_detached
 import hashlib
 import secrets
 import re
+import threading
+import time
 from app.core.config import settings
 
+if TYPE_CHECKING:
+    from app.models.user import User
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
-# Password context for hashing and verification
+# Claim with the user's token_version; tokens issued before a password, role
+# or activation change carry an older version and are rejected
+TOKEN_VERSION_CLAIM = "ver"
+
+# Password context for hashing and verification. min/max equal to the
+# configured cost: hashes made with another cost need an update (rehash on login)
 pwd_context = CryptContext(
     schemes=["bcrypt"],
     deprecated="auto",
-    bcrypt__rounds=12
+    bcrypt__rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.PASSWORD_BCRYPT_ROUNDS
 )
 
 
 def create_access_token(
     subject: Union[str, Any],
-    expires_delta: Optional[timedelta] = None
+    expires_delta: Optional[timedelta] = None,
+    token_version: Optional[int] = None
 ) -> str:
     """Create JWT access token"""
     if expires_delta:
@@ -36,6 +53,8 @@ def create_access_token(
         )
 
     to_encode = {"exp": expire, "sub": str(subject)}
+    if token_version is not None:
+        to_encode[TOKEN_VERSION_CLAIM] = token_version
     encoded_jwt = jwt.encode(
         to_encode,
         settings.JWT_SECRET_KEY,
@@ -54,8 +73,46 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
-def verify_token(token: str) -> Optional[str]:
-    """Verify JWT token and return subject"""
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password; also returns a new hash when the stored one uses another cost"""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+class PasswordHasher:
+    """
+    bcrypt off the event loop, on a small dedicated thread pool.
+
+    bcrypt releases the GIL, so the pool size is the number of cores a login
+    burst can take; further requests wait on the loop instead of holding
+    request threads (the threadpool shared by every sync route and dependency).
+    """
+
+    def __init__(self, max_workers: int = 2):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hash")
+
+    async def _run(self, function, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, function, *args)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        return await self._run(verify_and_update_password, plain_password, hashed_password)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
+
+
+# Global password hasher instance
+password_hasher = PasswordHasher(max_workers=settings.PASSWORD_HASH_WORKERS)
+
+
+def decode_access_token(token: str) -> Optional[Tuple[str, int]]:
+    """Verify JWT token and return (subject, token version)"""
     try:
         payload = jwt.decode(
             token,
@@ -65,11 +122,17 @@ def verify_token(token: str) -> Optional[str]:
         subject: str = payload.get("sub")
         if subject is None:
             return None
-        return subject
-    except JWTError:
+        return subject, int(payload.get(TOKEN_VERSION_CLAIM, 0))
+    except (JWTError, TypeError, ValueError):
         return None
 
 
+def verify_token(token: str) -> Optional[str]:
+    """Verify JWT token and return subject"""
+    decoded = decode_access_token(token)
+    return decoded[0] if decoded else None
+
+
 def generate_secure_token(length: int = 32) -> str:
     """Generate a secure random token"""
     return secrets.token_urlsafe(length)
@@ -153,38 +216,87 @@ class APIKeyManager:
         return hash_api_key(api_key) == stored_hash
 
 
-from typing import TYPE_CHECKING
-if TYPE_CHECKING:
-    from app.models.user import User
+class UserCache:
+    """
+    Authenticated users cached for a short time, keyed by token subject.
+
+    Holds column values only; every hit builds a fresh detached User, so
+    requests never share an instance. Entries are dropped when the user row
+    changes (see app.models.user) and ignored when the token carries another
+    token_version, which covers other worker processes until the TTL expires.
+    """
+
+    def __init__(self, ttl_seconds: int = 30, max_entries: int = 4096):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._users: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, subject: str, token_version: int) -> Optional["User"]:
+        """Detached copy of the cached user, None on a miss or a version mismatch"""
+        with self._lock:
+            cached = self._users.get(subject)
+        if cached is None:
+            return None
+        values, cached_at = cached
+        if time.monotonic() - cached_at >= self.ttl_seconds or values["token_version"] != token_version:
+            return None
+
+        from app.models.user import User
+        user = User(**values)
+        make_transient_to_detached(user)
+        return user
+
+    def put(self, subject: str, user: "User") -> None:
+        values = {attr.key: getattr(user, attr.key) for attr in user.__mapper__.column_attrs}
+        values["token_version"] = values.get("token_version") or 0
+        with self._lock:
+            self._users[subject] = (values, time.monotonic())
+            self._users.move_to_end(subject)
+            while len(self._users) > self.max_entries:
+                self._users.popitem(last=False)
+
+    def invalidate(self, *subjects: str) -> None:
+        with self._lock:
+            for subject in subjects:
+                self._users.pop(subject, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._users.clear()
+
+
+# Global user cache instance
+user_cache = UserCache(
+    ttl_seconds=settings.AUTH_USER_CACHE_SECONDS,
+    max_entries=settings.AUTH_USER_CACHE_SIZE
+)
+
 
 def get_current_user(token: str = Depends(oauth2_scheme)):
-    """Get current authenticated user from JWT token"""
+    """Get current authenticated user from JWT token (detached, read-only use)"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    try:
-        payload = jwt.decode(
-            token,
-            settings.JWT_SECRET_KEY,
-            algorithms=[settings.JWT_ALGORITHM]
-        )
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-    except JWTError:
+    decoded = decode_access_token(token)
+    if decoded is None:
         raise credentials_exception
+    username, token_version = decoded
 
-    # This would need database access to get user by ID
-    # For now, we'll return a placeholder
-    from app.core.database import get_db
-    from app.models.user import User
-
-    db = next(get_db())
-    user = db.query(User).filter(User.username == user_id).first()
+    user = user_cache.get(username, token_version)
     if user is None:
+        from app.core.database import SessionLocal
+        from app.models.user import User
+
+        with SessionLocal() as db:
+            user = db.query(User).filter(User.username == username).first()
+            if user is not None:
+                user_cache.put(username, user)
+
+    if user is None or not user.is_active or (user.token_version or 0) != token_version:
         raise credentials_exception
 
     return user
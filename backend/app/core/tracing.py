@@ -0,0 +1,165 @@
+"""
+Tracing for VerificAI Backend
+
+OpenTelemetry spans around the stages of an analysis (prompt and criteria
+fetch, code load, prompt build, LLM attempts, parse, ID remap, save...), so
+the time of a slow request can be attributed to a stage. Off unless
+TRACING_ENABLED is set; without opentelemetry-sdk every span is a no-op and
+the instrumented code does not depend on it.
+
+Exporters (TRACING_EXPORTER), all fed by a batch processor thread:
+    console  one JSON span per line on stdout
+    file     same, appended to TRACING_FILE
+    otlp     OTLP/HTTP to TRACING_OTLP_ENDPOINT (collector, Jaeger, Tempo)
+
+Every span carries the request id set by RequestIDMiddleware (request.id),
+so the spans of a request can be found from its X-Request-ID header. An
+incoming W3C traceparent header is honored.
+"""
+
+import contextvars
+import logging
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Mapping, Optional
+
+try:
+    from opentelemetry import propagate, trace
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+    from opentelemetry.trace import SpanKind, Status, StatusCode
+except ImportError:
+    trace = None
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+REQUEST_ID_ATTRIBUTE = "request.id"
+
+# Id of the request being served (also seen by tasks and threads started with its context)
+request_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+
+_tracer = None
+_provider = None
+_trace_file = None
+
+
+class NoopSpan:
+    """Stands in for a span when tracing is off"""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        pass
+
+    def add_event(self, name: str, attributes: Optional[Dict[str, Any]] = None) -> None:
+        pass
+
+    def update_name(self, name: str) -> None:
+        pass
+
+
+NOOP_SPAN = NoopSpan()
+
+
+def _clean(attributes: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Span attributes must be str, bool, int or float: None values are dropped"""
+    cleaned = {key: value for key, value in (attributes or {}).items() if value is not None}
+    request_id = request_id_var.get()
+    if request_id:
+        cleaned[REQUEST_ID_ATTRIBUTE] = request_id
+    return cleaned
+
+
+@contextmanager
+def span(name: str, attributes: Optional[Dict[str, Any]] = None) -> Iterator[Any]:
+    """Child span of the current one; exceptions are recorded and mark it as failed"""
+    if _tracer is None:
+        yield NOOP_SPAN
+        return
+    with _tracer.start_as_current_span(name, attributes=_clean(attributes)) as current:
+        yield current
+
+
+@contextmanager
+def request_span(
+    name: str, request_id: str, headers: Mapping[str, str], attributes: Optional[Dict[str, Any]] = None
+) -> Iterator[Any]:
+    """Root (server) span of an HTTP request; sets the request id for everything run inside it"""
+    token = request_id_var.set(request_id)
+    try:
+        if _tracer is None:
+            yield NOOP_SPAN
+            return
+        with _tracer.start_as_current_span(
+            name,
+            context=propagate.extract(headers),
+            kind=SpanKind.SERVER,
+            attributes=_clean(attributes)
+        ) as current:
+            yield current
+    finally:
+        request_id_var.reset(token)
+
+
+def set_error(current: Any, description: str) -> None:
+    """Mark a span as failed without an exception (e.g. a 5xx response)"""
+    if _tracer is not None and current is not NOOP_SPAN:
+        current.set_status(Status(StatusCode.ERROR, description))
+
+
+def _json_line(finished_span) -> str:
+    return finished_span.to_json(indent=None) + os.linesep
+
+
+def _create_exporter(name: str):
+    global _trace_file
+    if name == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        return OTLPSpanExporter(endpoint=settings.TRACING_OTLP_ENDPOINT)
+    if name == "file":
+        path = Path(settings.TRACING_FILE)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _trace_file = open(path, "a", encoding="utf-8")
+        return ConsoleSpanExporter(out=_trace_file, formatter=_json_line)
+    if name == "console":
+        return ConsoleSpanExporter(formatter=_json_line)
+    raise ValueError(f"Unknown TRACING_EXPORTER '{name}' (console, file or otlp)")
+
+
+def setup_tracing() -> None:
+    """Install the tracer provider (on startup); no-op unless TRACING_ENABLED"""
+    global _tracer, _provider
+    if not settings.TRACING_ENABLED or _provider is not None:
+        return
+    if trace is None:
+        logger.warning("TRACING_ENABLED is set but opentelemetry-sdk is not installed, tracing disabled")
+        return
+
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": settings.TRACING_SERVICE_NAME}),
+        sampler=ParentBased(TraceIdRatioBased(settings.TRACING_SAMPLE_RATIO))
+    )
+    provider.add_span_processor(BatchSpanProcessor(_create_exporter(settings.TRACING_EXPORTER)))
+    trace.set_tracer_provider(provider)
+    _provider = provider
+    _tracer = provider.get_tracer("verificai")
+    logger.info("Tracing enabled (%s exporter, sample ratio %s)", settings.TRACING_EXPORTER, settings.TRACING_SAMPLE_RATIO)
+
+
+def shutdown_tracing() -> None:
+    """Flush pending spans (on shutdown)"""
+    global _tracer, _provider, _trace_file
+    if _provider is None:
+        return
+    _tracer = None
+    _provider.shutdown()
+    _provider = None
+    if _trace_file is not None:
+        _trace_file.close()
+        _trace_file = None
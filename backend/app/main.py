@@ -2,22 +2,29 @@
 FastAPI application entry point for VerificAI Code Quality System
 """
 
+import logging
 from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.base import BaseHTTPMiddleware
 from app.core.config import settings
 from app.core.database import create_tables, db_manager
-from app.core.logging import setup_logging
+from app.core.logging import setup_logging, stop_logging
 from app.core.middleware import (
     RequestIDMiddleware,
     RequestLoggingMiddleware,
     SecurityHeadersMiddleware,
     ErrorHandlerMiddleware,
-    RateLimitMiddleware
+    RateLimitMiddleware,
+    MetricsMiddleware,
+    ProfilingMiddleware
 )
-from app.api.v1 import auth, users, prompts, analysis, upload, file_paths, general_analysis, simple_analysis, code_entries
+from app.core.metrics import mark_process_dead, render_metrics
+from app.core.tracing import setup_tracing, shutdown_tracing
+from app.api.v1 import auth, users, prompts, analysis, upload, file_paths, general_analysis, simple_analysis, code_entries, batch_analysis, search, profiling
 import uvicorn
 
+logger = logging.getLogger(__name__)
+
 # Custom CORS middleware to handle OPTIONS requests
 class CustomCORSMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next):
@@ -61,11 +68,13 @@ app.add_middleware(
 
 # Add middleware stack - Order matters!
 # CustomCORSMiddleware removido para evitar conflitos
+app.add_middleware(ProfilingMiddleware)
 app.add_middleware(ErrorHandlerMiddleware)
-app.add_middleware(RateLimitMiddleware, requests_per_minute=settings.RATE_LIMIT_REQUESTS_PER_MINUTE)
+app.add_middleware(RateLimitMiddleware)
 app.add_middleware(RequestLoggingMiddleware)
 app.add_middleware(RequestIDMiddleware)
 app.add_middleware(SecurityHeadersMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 # Include API routers
 app.include_router(auth.router, prefix=settings.API_V1_STR, tags=["authentication"])
@@ -77,6 +86,9 @@ app.include_router(analysis.router, prefix=settings.API_V1_STR, tags=["analysis"
 app.include_router(upload.router, prefix=settings.API_V1_STR, tags=["upload"])
 app.include_router(general_analysis.router, prefix=settings.API_V1_STR + "/general-analysis", tags=["general_analysis"])
 app.include_router(simple_analysis.router, prefix=settings.API_V1_STR + "/simple-analysis", tags=["simple_analysis"])
+app.include_router(batch_analysis.router, prefix=settings.API_V1_STR + "/batch-analysis", tags=["batch_analysis"])
+app.include_router(search.router, prefix=settings.API_V1_STR + "/search", tags=["search"])
+app.include_router(profiling.router, prefix=settings.API_V1_STR + "/admin/profiles", tags=["profiling"])
 # Reload trigger - touched at 2025-09-18 19:32 - FORCE RELOAD
 
 @app.on_event("startup")
@@ -85,6 +97,29 @@ async def startup_event():
     # Create database tables
     create_tables()
 
+    setup_tracing()
+
+    # Batch analyses are submitted/polled by their own scheduler, apart from interactive requests
+    if settings.BATCH_SCHEDULER_ENABLED:
+        from app.services.batch_analysis import batch_analysis_service
+        batch_analysis_service.start_scheduler()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Application shutdown event"""
+    from app.services.batch_analysis import batch_analysis_service
+    await batch_analysis_service.stop_scheduler()
+
+    from app.core.database import async_engine
+    await async_engine.dispose()
+
+    from app.core.security import password_hasher
+    password_hasher.shutdown()
+
+    mark_process_dead()
+    shutdown_tracing()
+    stop_logging()
+
 @app.get("/")
 async def root():
     """Root endpoint with API information"""
@@ -115,6 +150,12 @@ async def readiness_check():
         "database": "connected" if db_health else "disconnected"
     }
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics (see app/core/metrics.py)"""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
 @app.get("/public/file-paths")
 async def get_public_file_paths():
     """Get file paths for public access - no authentication required"""
@@ -131,7 +172,7 @@ async def get_public_file_paths():
         # Extract just the full paths for simplicity
         paths = [fp.full_path for fp in file_paths if fp.full_path]
 
-        print(f"🔥🔥🔥 MAIN.PY Public endpoint returning {len(paths)} file paths - ALL FILES - NO LIMIT 🔥🔥🔥")
+        logger.debug("Public endpoint returning %d file paths", len(paths))
 
         return {
             "file_paths": paths,
@@ -140,7 +181,7 @@ async def get_public_file_paths():
         }
 
     except Exception as e:
-        print(f"Error in public endpoint: {str(e)}")
+        logger.exception("Error in public endpoint: %s", e)
         return {"file_paths": [], "total_count": 0, "message": "Error occurred"}
 
 
@@ -179,7 +220,7 @@ async def test_all_files():
         # Extract just the full paths for simplicity
         paths = [fp.full_path for fp in file_paths if fp.full_path]
 
-        print(f"🔥🔥🔥 TEST ENDPOINT: Returning {len(paths)} files - ALL FILES - NO LIMIT 🔥🔥🔥")
+        logger.debug("Test endpoint returning %d file paths", len(paths))
 
         return {
             "file_paths": paths,
@@ -189,5 +230,5 @@ async def test_all_files():
         }
 
     except Exception as e:
-        print(f"Error in test endpoint: {str(e)}")
+        logger.exception("Error in test endpoint: %s", e)
         return {"file_paths": [], "total_count": 0, "message": "Error occurred"}
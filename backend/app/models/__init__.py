@@ -8,6 +8,8 @@ from .analysis import Analysis, AnalysisStatus, AnalysisResult
 from .uploaded_file import UploadedFile
 from .file_path import FilePath
 from .code_entry import CodeEntry
+from .stats import UploadFileStats
+from .search import SearchDocument
 from .base import BaseModel, TimestampMixin
 
 __all__ = [
@@ -24,6 +26,8 @@ __all__ = [
     "UploadedFile",
     "FilePath",
     "CodeEntry",
+    "UploadFileStats",
+    "SearchDocument",
     "BaseModel",
     "TimestampMixin"
 ]
\ No newline at end of file
@@ -5,10 +5,11 @@ Analysis model for VerificAI Backend
 from datetime import datetime
 from enum import Enum
 from typing import Optional
-from sqlalchemy import Column, String, Text, DateTime, Integer, Boolean, ForeignKey, Enum as SQLEnum, JSON
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Text, DateTime, Integer, Boolean, ForeignKey, Enum as SQLEnum, JSON, Index
+from sqlalchemy.orm import relationship, deferred
 
 from app.models.base import Base, BaseModel, AuditMixin
+from app.models.types import CompressedText
 
 
 class AnalysisStatus(str, Enum):
@@ -128,7 +129,7 @@ class Analysis(Base, BaseModel, AuditMixin):
     # Input data
     repository_url = Column(String(500), nullable=True)
     file_paths = Column(Text, nullable=True)  # JSON array of file paths
-    code_content = Column(Text, nullable=True)  # Raw code content
+    code_content = deferred(Column(CompressedText, nullable=True))  # Raw code content (compressed, loaded on access)
     configuration = Column(JSON, nullable=True)  # Analysis configuration
 
     # Processing information
@@ -164,6 +165,18 @@ class Analysis(Base, BaseModel, AuditMixin):
     estimated_cost = Column(String(20), nullable=True)
     actual_cost = Column(String(20), nullable=True)
 
+    __table_args__ = (
+        Index("ix_analyses_user_created", "user_id", "created_at", "id"),
+        Index(
+            "ix_analyses_name_trgm", "name",
+            postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "ix_analyses_description_trgm", "description",
+            postgresql_using="gin", postgresql_ops={"description": "gin_trgm_ops"}
+        ).ddl_if(dialect="postgresql"),
+    )
+
     def get_file_paths(self) -> list[str]:
         """Get file paths as list"""
         if not self.file_paths:
@@ -4,13 +4,19 @@ Base model classes for VerificAI Backend
 
 from datetime import datetime
 from typing import Any
-from sqlalchemy import Column, Integer, DateTime
+from sqlalchemy import Column, Integer, DateTime, DDL, event
 from sqlalchemy.ext.declarative import as_declarative, declared_attr, declarative_base
 from sqlalchemy.sql import func
 
 # Create declarative base
 Base = declarative_base()
 
+# Trigram operator classes (gin_trgm_ops) used by the search indexes
+event.listen(
+    Base.metadata, "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql")
+)
+
 @as_declarative()
 class BaseModel:
     """Base SQLAlchemy model with common functionality"""
@@ -3,12 +3,25 @@ Code entry model for storing pasted code snippets
 """
 from datetime import datetime
 from typing import Optional
-from sqlalchemy import Column, String, Text, Integer, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, String, Text, Integer, Boolean, DateTime, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred, validates
 import uuid
 
 from app.models.base import Base
+from app.models.types import CompressedText
+
+
+# Preview kept next to the metadata so listings never need the (compressed) content
+PREVIEW_LINES = 10
+PREVIEW_MAX_CHARS = 1000
+
+
+def build_content_preview(code_content: Optional[str]) -> Optional[str]:
+    """First PREVIEW_LINES lines of the code, capped at PREVIEW_MAX_CHARS"""
+    if not code_content:
+        return None
+    return "\n".join(code_content.splitlines()[:PREVIEW_LINES])[:PREVIEW_MAX_CHARS]
 
 
 class CodeEntry(Base):
@@ -17,7 +30,8 @@ class CodeEntry(Base):
     __tablename__ = "code_entries"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    code_content = Column(Text, nullable=False)
+    code_content = deferred(Column(CompressedText, nullable=False))  # compressed, loaded on access
+    content_preview = Column(Text, nullable=True)  # set from code_content on write
     title = Column(String(500), nullable=False)
     description = Column(Text, nullable=True)
     language = Column(String(50), nullable=True)
@@ -31,6 +45,15 @@ class CodeEntry(Base):
     # Relationships
     user = relationship("User", back_populates="code_entries")
 
+    __table_args__ = (
+        Index("ix_code_entries_user_active_created", "user_id", "is_active", "created_at"),
+    )
+
+    @validates("code_content")
+    def _update_content_preview(self, key, value):
+        self.content_preview = build_content_preview(value)
+        return value
+
     @property
     def id_str(self) -> str:
         """Return UUID as string for serialization"""
@@ -44,6 +67,7 @@ class CodeEntry(Base):
         return {
             "id": str(self.id),
             "code_content": self.code_content,
+            "content_preview": self.content_preview,
             "title": self.title,
             "description": self.description,
             "language": self.language,
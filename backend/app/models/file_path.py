@@ -6,7 +6,7 @@ import os
 import uuid
 from datetime import datetime
 from typing import Optional
-from sqlalchemy import Column, String, Text, Integer, Boolean, ForeignKey, DateTime, LargeBinary, JSON
+from sqlalchemy import Column, String, Text, Integer, Boolean, ForeignKey, DateTime, LargeBinary, JSON, Index
 from sqlalchemy.orm import relationship
 
 from app.models.base import Base, BaseModel
@@ -46,6 +46,19 @@ class FilePath(Base, BaseModel):
     # Relationships
     user = relationship("User", backref="file_paths")
 
+    __table_args__ = (
+        Index("ix_file_paths_user_full_path", "user_id", "full_path"),
+        Index("ix_file_paths_user_created", "user_id", "created_at", "id"),
+        Index(
+            "ix_file_paths_file_name_trgm", "file_name",
+            postgresql_using="gin", postgresql_ops={"file_name": "gin_trgm_ops"}
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "ix_file_paths_folder_path_trgm", "folder_path",
+            postgresql_using="gin", postgresql_ops={"folder_path": "gin_trgm_ops"}
+        ).ddl_if(dialect="postgresql"),
+    )
+
     def __init__(self, **kwargs):
         """Initialize with file_id if not provided"""
         if 'file_id' not in kwargs:
@@ -14,11 +14,13 @@ from sqlalchemy import (
     UniqueConstraint,
     Boolean,
     JSON,
+    Index,
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 import enum
 
 from app.models.base import Base, BaseModel, AuditMixin
+from app.models.types import CompressedText
 
 
 class PromptType(str, enum.Enum):
@@ -138,7 +140,9 @@ class GeneralAnalysisResult(Base, BaseModel, AuditMixin):
 
     # Analysis results (JSON format)
     criteria_results = Column(JSON, nullable=False)  # Extracted criteria with analysis
-    raw_response = Column(Text, nullable=False)  # Full LLM response
+    status_counts = Column(JSON, nullable=True)  # Criteria per status ({"compliant": n, ...}), for listings
+    # Large columns are compressed and only loaded when accessed (or with undefer())
+    raw_response = deferred(Column(CompressedText, nullable=False))  # Full LLM response
 
     # Model information
     model_used = Column(String(100), nullable=True)
@@ -146,7 +150,7 @@ class GeneralAnalysisResult(Base, BaseModel, AuditMixin):
 
     # Input data for reference
     file_paths = Column(Text, nullable=True)  # JSON array of analyzed files
-    modified_prompt = Column(Text, nullable=True)  # The prompt sent to LLM
+    modified_prompt = deferred(Column(CompressedText, nullable=True))  # The prompt sent to LLM
 
     # Processing info
     processing_time = Column(String(50), nullable=True)
@@ -154,6 +158,10 @@ class GeneralAnalysisResult(Base, BaseModel, AuditMixin):
     # Relationships
     user = relationship("User", back_populates="general_analysis_results")
 
+    __table_args__ = (
+        Index("ix_general_analysis_results_user_created", "user_id", "created_at", "id"),
+    )
+
     def get_file_paths(self) -> list[str]:
         """Get file paths as list"""
         if not self.file_paths:
@@ -0,0 +1,267 @@
+"""
+Search index for VerificAI Backend
+
+search_documents holds one row per searchable item: a file path, a code
+entry (title + content) or a criteria finding of a general analysis result.
+The sources keep code and responses compressed, so the text is copied here
+in plain form and kept in sync by mapper events (same transaction as the
+write). rebuild_search_index() refills it from scratch.
+
+Indexes:
+- PostgreSQL: GIN on a weighted tsvector expression (title A, body B) for
+  ranked full-text search, and GIN trigram (pg_trgm) on title for fuzzy /
+  substring matches on names.
+- SQLite (local and tests): an FTS5 external-content table
+  search_documents_fts, synced by triggers.
+"""
+
+import re
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import (
+    Column, DDL, DateTime, ForeignKey, Index, Integer, String, Text, UniqueConstraint,
+    event, select, text
+)
+from sqlalchemy.orm import Session, attributes, undefer
+
+from app.models.base import Base
+from app.models.code_entry import CodeEntry
+from app.models.file_path import FilePath
+from app.models.prompt import GeneralAnalysisResult
+
+DOC_FILE_PATH = "file_path"
+DOC_CODE_ENTRY = "code_entry"
+DOC_CRITERIA = "criteria"
+DOC_TYPES = (DOC_FILE_PATH, DOC_CODE_ENTRY, DOC_CRITERIA)
+
+# Bodies are indexed up to this size (a tsvector is limited to 1MB)
+BODY_MAX_CHARS = 200000
+
+# Text search configuration: no stemming, code identifiers and Portuguese findings alike
+TS_CONFIG = "simple"
+SEARCH_VECTOR_SQL = (
+    f"setweight(to_tsvector('{TS_CONFIG}', coalesce(title, '')), 'A') || "
+    f"setweight(to_tsvector('{TS_CONFIG}', coalesce(body, '')), 'B')"
+)
+
+
+class SearchDocument(Base):
+    """Plain-text copy of a searchable item"""
+
+    __tablename__ = "search_documents"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    doc_type = Column(String(20), nullable=False)  # file_path, code_entry, criteria
+    ref_id = Column(String(64), nullable=False)  # id of the source row
+    section = Column(String(100), nullable=False, default="")  # criteria key for findings
+    title = Column(Text, nullable=False)
+    body = Column(Text, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("doc_type", "ref_id", "section", name="uq_search_documents_ref"),
+        Index("ix_search_documents_user_type", "user_id", "doc_type"),
+        Index(
+            "ix_search_documents_vector", text(f"({SEARCH_VECTOR_SQL})"), postgresql_using="gin"
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "ix_search_documents_title_trgm", "title",
+            postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"}
+        ).ddl_if(dialect="postgresql"),
+    )
+
+    def __repr__(self) -> str:
+        return f"<SearchDocument(type='{self.doc_type}', ref_id='{self.ref_id}', section='{self.section}')>"
+
+
+SQLITE_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS search_documents_fts USING fts5("
+    "title, body, content='search_documents', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS search_documents_ai AFTER INSERT ON search_documents BEGIN "
+    "INSERT INTO search_documents_fts(rowid, title, body) VALUES (new.id, new.title, new.body); END",
+    "CREATE TRIGGER IF NOT EXISTS search_documents_ad AFTER DELETE ON search_documents BEGIN "
+    "INSERT INTO search_documents_fts(search_documents_fts, rowid, title, body) "
+    "VALUES ('delete', old.id, old.title, old.body); END",
+    "CREATE TRIGGER IF NOT EXISTS search_documents_au AFTER UPDATE ON search_documents BEGIN "
+    "INSERT INTO search_documents_fts(search_documents_fts, rowid, title, body) "
+    "VALUES ('delete', old.id, old.title, old.body); "
+    "INSERT INTO search_documents_fts(rowid, title, body) VALUES (new.id, new.title, new.body); END",
+]
+SQLITE_FTS_DROP = [
+    "DROP TRIGGER IF EXISTS search_documents_au",
+    "DROP TRIGGER IF EXISTS search_documents_ad",
+    "DROP TRIGGER IF EXISTS search_documents_ai",
+    "DROP TABLE IF EXISTS search_documents_fts",
+]
+
+for _statement in SQLITE_FTS_DDL:
+    event.listen(SearchDocument.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+for _statement in SQLITE_FTS_DROP:
+    event.listen(SearchDocument.__table__, "before_drop", DDL(_statement).execute_if(dialect="sqlite"))
+
+
+PATH_SEPARATORS = re.compile(r"[\\/._\-]+")
+
+
+def _path_terms(path: str) -> str:
+    """Path plus its components as separate words (the text parsers keep a path as one token)"""
+    parts = [part for part in PATH_SEPARATORS.split(path) if part]
+    return f"{path} {' '.join(parts)}"
+
+
+def _file_path_documents(file_path: FilePath) -> List[Dict[str, Any]]:
+    return [{
+        "user_id": file_path.user_id,
+        "doc_type": DOC_FILE_PATH,
+        "ref_id": str(file_path.id),
+        "section": "",
+        "title": file_path.file_name,
+        "body": _path_terms(file_path.full_path or "")
+    }]
+
+
+def _code_entry_documents(entry: CodeEntry, code_content: Optional[str]) -> List[Dict[str, Any]]:
+    if entry.is_active is False:
+        return []
+    return [{
+        "user_id": entry.user_id,
+        "doc_type": DOC_CODE_ENTRY,
+        "ref_id": str(entry.id),
+        "section": "",
+        "title": entry.title,
+        "body": (code_content or "")[:BODY_MAX_CHARS]
+    }]
+
+
+def _criteria_documents(result: GeneralAnalysisResult) -> List[Dict[str, Any]]:
+    """One document per criterion of the result (title: criterion name, body: finding)"""
+    documents = []
+    for key, data in (result.criteria_results or {}).items():
+        if not isinstance(data, dict):
+            continue
+        documents.append({
+            "user_id": result.user_id,
+            "doc_type": DOC_CRITERIA,
+            "ref_id": str(result.id),
+            "section": str(key)[:100],
+            "title": data.get("name") or str(key),
+            "body": (data.get("content") or "")[:BODY_MAX_CHARS]
+        })
+    return documents
+
+
+def _replace_documents(connection, doc_type: str, ref_id: str, documents: List[Dict[str, Any]]) -> None:
+    table = SearchDocument.__table__
+    connection.execute(table.delete().where(table.c.doc_type == doc_type, table.c.ref_id == ref_id))
+    if documents:
+        now = datetime.utcnow()
+        connection.execute(table.insert(), [dict(document, updated_at=now) for document in documents])
+
+
+def _changed(target, *names: str) -> bool:
+    return any(attributes.get_history(target, name).has_changes() for name in names)
+
+
+def _code_content(connection, entry: CodeEntry) -> Optional[str]:
+    """Code of an entry, read from the row when the deferred column is not loaded"""
+    if "code_content" in entry.__dict__:
+        return entry.code_content
+    table = CodeEntry.__table__
+    return connection.execute(select(table.c.code_content).where(table.c.id == entry.id)).scalar()
+
+
+@event.listens_for(FilePath, "after_insert")
+def _file_path_inserted(mapper, connection, target):
+    _replace_documents(connection, DOC_FILE_PATH, str(target.id), _file_path_documents(target))
+
+
+@event.listens_for(FilePath, "after_update")
+def _file_path_updated(mapper, connection, target):
+    if _changed(target, "file_name", "full_path", "user_id"):
+        _replace_documents(connection, DOC_FILE_PATH, str(target.id), _file_path_documents(target))
+
+
+@event.listens_for(CodeEntry, "after_insert")
+def _code_entry_inserted(mapper, connection, target):
+    _replace_documents(
+        connection, DOC_CODE_ENTRY, str(target.id), _code_entry_documents(target, target.code_content)
+    )
+
+
+@event.listens_for(CodeEntry, "after_update")
+def _code_entry_updated(mapper, connection, target):
+    if _changed(target, "title", "code_content", "is_active", "user_id"):
+        code_content = _code_content(connection, target) if target.is_active is not False else None
+        _replace_documents(
+            connection, DOC_CODE_ENTRY, str(target.id), _code_entry_documents(target, code_content)
+        )
+
+
+@event.listens_for(GeneralAnalysisResult, "after_insert")
+def _criteria_inserted(mapper, connection, target):
+    _replace_documents(connection, DOC_CRITERIA, str(target.id), _criteria_documents(target))
+
+
+@event.listens_for(GeneralAnalysisResult, "after_update")
+def _criteria_updated(mapper, connection, target):
+    if _changed(target, "criteria_results", "user_id"):
+        _replace_documents(connection, DOC_CRITERIA, str(target.id), _criteria_documents(target))
+
+
+@event.listens_for(FilePath, "after_delete")
+def _file_path_deleted(mapper, connection, target):
+    _replace_documents(connection, DOC_FILE_PATH, str(target.id), [])
+
+
+@event.listens_for(CodeEntry, "after_delete")
+def _code_entry_deleted(mapper, connection, target):
+    _replace_documents(connection, DOC_CODE_ENTRY, str(target.id), [])
+
+
+@event.listens_for(GeneralAnalysisResult, "after_delete")
+def _criteria_deleted(mapper, connection, target):
+    _replace_documents(connection, DOC_CRITERIA, str(target.id), [])
+
+
+def _source_documents(db: Session, user_id: Optional[int], batch_size: int) -> Iterator[Dict[str, Any]]:
+    sources = [
+        (db.query(FilePath), FilePath, lambda row: _file_path_documents(row)),
+        (
+            db.query(CodeEntry).options(undefer(CodeEntry.code_content)),
+            CodeEntry,
+            lambda row: _code_entry_documents(row, row.code_content)
+        ),
+        (db.query(GeneralAnalysisResult), GeneralAnalysisResult, _criteria_documents),
+    ]
+    for query, model, build in sources:
+        if user_id is not None:
+            query = query.filter(model.user_id == user_id)
+        for row in query.yield_per(batch_size):
+            yield from build(row)
+
+
+def rebuild_search_index(db: Session, user_id: Optional[int] = None, batch_size: int = 200) -> int:
+    """Refill search_documents from the source tables; returns the number of documents"""
+    table = SearchDocument.__table__
+    delete = table.delete()
+    if user_id is not None:
+        delete = delete.where(table.c.user_id == user_id)
+    db.execute(delete)
+
+    now = datetime.utcnow()
+    count = 0
+    batch = []
+    for document in _source_documents(db, user_id, batch_size):
+        batch.append(dict(document, updated_at=now))
+        if len(batch) >= batch_size:
+            db.execute(table.insert(), batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        db.execute(table.insert(), batch)
+        count += len(batch)
+    db.commit()
+    return count
@@ -0,0 +1,132 @@
+"""
+Aggregated statistics tables for VerificAI Backend
+
+upload_file_stats keeps, per user, status and extension, the number of
+uploaded files and their total size. It is maintained incrementally by
+mapper events on UploadedFile (insert, update, delete in the same
+transaction), so dashboards read a handful of pre-aggregated rows instead of
+scanning uploaded_files. rebuild_upload_stats() recomputes it from scratch
+(initial fill, or repair after bulk changes that bypass the ORM).
+"""
+
+from typing import Optional
+from sqlalchemy import Column, String, Integer, BigInteger, ForeignKey, event, func, insert, select
+from sqlalchemy.orm import Session, attributes
+
+from app.models.base import Base
+from app.models.uploaded_file import UploadedFile
+
+# Files without extension are counted under this key (part of the primary key, so not NULL)
+NO_EXTENSION = ""
+
+
+class UploadFileStats(Base):
+    """Per-user file counts and sizes by status and extension"""
+
+    __tablename__ = "upload_file_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    status = Column(String(20), primary_key=True)
+    file_extension = Column(String(10), primary_key=True, default=NO_EXTENSION)
+    file_count = Column(Integer, nullable=False, default=0)
+    total_size = Column(BigInteger, nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        return f"<UploadFileStats(user_id={self.user_id}, status='{self.status}', ext='{self.file_extension}', count={self.file_count})>"
+
+
+def _status_value(status) -> str:
+    return getattr(status, "value", status) or ""
+
+
+def _apply_delta(connection, user_id: int, status, extension: Optional[str], count: int, size: int) -> None:
+    """Add count/size to one stats row, creating it when missing"""
+    table = UploadFileStats.__table__
+    key = {
+        "user_id": user_id,
+        "status": _status_value(status),
+        "file_extension": extension or NO_EXTENSION
+    }
+
+    dialect = connection.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        statement = dialect_insert(table).values(**key, file_count=count, total_size=size)
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.user_id, table.c.status, table.c.file_extension],
+            set_={
+                "file_count": table.c.file_count + count,
+                "total_size": table.c.total_size + size
+            }
+        )
+        connection.execute(statement)
+        return
+
+    result = connection.execute(
+        table.update()
+        .where(table.c.user_id == key["user_id"])
+        .where(table.c.status == key["status"])
+        .where(table.c.file_extension == key["file_extension"])
+        .values(file_count=table.c.file_count + count, total_size=table.c.total_size + size)
+    )
+    if result.rowcount == 0:
+        connection.execute(table.insert().values(**key, file_count=count, total_size=size))
+
+
+def _previous(target, name):
+    """Value of an attribute before the current flush"""
+    history = attributes.get_history(target, name)
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(target, name)
+
+
+@event.listens_for(UploadedFile, "after_insert")
+def _upload_inserted(mapper, connection, target):
+    _apply_delta(connection, target.user_id, target.status, target.file_extension, 1, target.file_size or 0)
+
+
+@event.listens_for(UploadedFile, "after_delete")
+def _upload_deleted(mapper, connection, target):
+    _apply_delta(
+        connection,
+        _previous(target, "user_id"), _previous(target, "status"), _previous(target, "file_extension"),
+        -1, -(_previous(target, "file_size") or 0)
+    )
+
+
+@event.listens_for(UploadedFile, "after_update")
+def _upload_updated(mapper, connection, target):
+    tracked = ("user_id", "status", "file_extension", "file_size")
+    if not any(attributes.get_history(target, name).has_changes() for name in tracked):
+        return
+    old = {name: _previous(target, name) for name in tracked}
+    _apply_delta(connection, old["user_id"], old["status"], old["file_extension"], -1, -(old["file_size"] or 0))
+    _apply_delta(connection, target.user_id, target.status, target.file_extension, 1, target.file_size or 0)
+
+
+def rebuild_upload_stats(db: Session, user_id: Optional[int] = None) -> None:
+    """Recompute upload_file_stats from uploaded_files (one GROUP BY)"""
+    table = UploadFileStats.__table__
+    delete = table.delete()
+    aggregate = select(
+        UploadedFile.user_id,
+        UploadedFile.status,
+        func.coalesce(UploadedFile.file_extension, NO_EXTENSION),
+        func.count(UploadedFile.id),
+        func.coalesce(func.sum(UploadedFile.file_size), 0)
+    ).group_by(
+        UploadedFile.user_id, UploadedFile.status, func.coalesce(UploadedFile.file_extension, NO_EXTENSION)
+    )
+    if user_id is not None:
+        delete = delete.where(table.c.user_id == user_id)
+        aggregate = aggregate.where(UploadedFile.user_id == user_id)
+
+    db.execute(delete)
+    db.execute(insert(table).from_select(
+        ["user_id", "status", "file_extension", "file_count", "total_size"], aggregate
+    ))
+    db.commit()
@@ -0,0 +1,26 @@
+"""
+Custom column types for VerificAI Backend
+"""
+
+from sqlalchemy import LargeBinary
+from sqlalchemy.types import TypeDecorator
+
+from app.core.compression import text_compressor
+
+
+class CompressedText(TypeDecorator):
+    """Text stored compressed (zstd with dictionary, see app.core.compression); reads and writes str"""
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None or isinstance(value, bytes):
+            return value
+        return text_compressor.compress(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None or isinstance(value, str):
+            # Column not migrated yet (still TEXT)
+            return value
+        return text_compressor.decompress(bytes(value))
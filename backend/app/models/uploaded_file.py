@@ -7,7 +7,7 @@ import uuid
 from datetime import datetime
 from enum import Enum
 from typing import Optional
-from sqlalchemy import Column, String, Text, DateTime, Integer, Boolean, ForeignKey, LargeBinary, JSON
+from sqlalchemy import Column, String, Text, DateTime, Integer, Boolean, ForeignKey, LargeBinary, JSON, Index
 from sqlalchemy.orm import relationship
 
 from app.models.base import Base, BaseModel
@@ -76,6 +76,20 @@ class UploadedFile(Base, BaseModel):
     # Relationships
     user = relationship("User", backref="uploaded_files")
 
+    __table_args__ = (
+        Index("ix_uploaded_files_user_status_created", "user_id", "status", "created_at"),
+        Index("ix_uploaded_files_user_created", "user_id", "created_at", "id"),
+        # Substring search (ILIKE '%term%') on PostgreSQL
+        Index(
+            "ix_uploaded_files_original_name_trgm", "original_name",
+            postgresql_using="gin", postgresql_ops={"original_name": "gin_trgm_ops"}
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "ix_uploaded_files_relative_path_trgm", "relative_path",
+            postgresql_using="gin", postgresql_ops={"relative_path": "gin_trgm_ops"}
+        ).ddl_if(dialect="postgresql"),
+    )
+
     def __init__(self, **kwargs):
         """Initialize with file_id if not provided"""
         if 'file_id' not in kwargs:
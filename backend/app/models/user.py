@@ -5,11 +5,11 @@ User model for VerificAI Backend
 from datetime import datetime, timedelta
 from enum import Enum
 from typing import Optional
-from sqlalchemy import Column, String, Boolean, DateTime, Text, Enum as SQLEnum
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Boolean, DateTime, Integer, Text, Enum as SQLEnum, event
+from sqlalchemy.orm import attributes, relationship
 from sqlalchemy.sql import func
 
-from app.core.security import get_password_hash
+from app.core.security import get_password_hash, user_cache
 from app.models.base import Base, BaseModel, AuditMixin
 
 
@@ -53,6 +53,7 @@ class User(Base, BaseModel, AuditMixin):
     password_changed_at = Column(DateTime, nullable=True)
     failed_login_attempts = Column(String(10), default="0", nullable=False)
     locked_until = Column(DateTime, nullable=True)
+    token_version = Column(Integer, default=0, server_default="0", nullable=False)  # bumped to revoke issued tokens
 
     # API access
     api_key_hash = Column(String(255), nullable=True)
@@ -69,6 +70,7 @@ class User(Base, BaseModel, AuditMixin):
     prompt_configurations = relationship("PromptConfiguration", back_populates="user", cascade="all, delete-orphan")
     general_criteria = relationship("GeneralCriteria", back_populates="user", cascade="all, delete-orphan")
     general_analysis_results = relationship("GeneralAnalysisResult", back_populates="user", cascade="all, delete-orphan")
+    code_entries = relationship("CodeEntry", back_populates="user", cascade="all, delete-orphan")
 
     def __init__(self, **kwargs):
         """Initialize user with password hashing"""
@@ -159,4 +161,22 @@ class User(Base, BaseModel, AuditMixin):
 
     def __repr__(self) -> str:
         """String representation of user"""
-        return f"<User(id={self.id}, username='{self.username}', email='{self.email}', role='{self.role}')>"
\ No newline at end of file
+        return f"<User(id={self.id}, username='{self.username}', email='{self.email}', role='{self.role}')>"
+
+
+# Changes that revoke the tokens already issued to the user (set_password sets
+# password_changed_at; a rehash on login only replaces hashed_password)
+TOKEN_VERSION_FIELDS = ("password_changed_at", "is_active", "role", "is_admin")
+
+
+@event.listens_for(User, "before_update")
+def _bump_token_version(mapper, connection, target):
+    if any(attributes.get_history(target, name).has_changes() for name in TOKEN_VERSION_FIELDS):
+        target.token_version = (target.token_version or 0) + 1
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _evict_cached_user(mapper, connection, target):
+    previous_usernames = attributes.get_history(target, "username").deleted or ()
+    user_cache.invalidate(target.username, *previous_usernames)
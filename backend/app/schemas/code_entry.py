@@ -74,7 +74,8 @@ class CodeEntryList(BaseModel):
     characters_count: int
     created_at: datetime
     is_active: bool = True
-    code_content: str  # Schema updated for code content field - VERSION 2
+    content_preview: Optional[str] = None  # projection "preview"
+    code_content: Optional[str] = None  # projection "full" only; otherwise GET /code-entries/{id}
 
     @validator('id', pre=True)
     def convert_uuid_to_str(cls, v):
@@ -34,6 +34,8 @@ class PaginatedResponse(BaseModel, Generic[T]):
     current_page: int = Field(..., description="Current page number")
     has_next: bool = Field(..., description="Whether there is a next page")
     has_prev: bool = Field(..., description="Whether there is a previous page")
+    next_cursor: Optional[str] = Field(default=None, description="Cursor of the next page (keyset pagination)")
+    total_is_estimate: bool = Field(default=False, description="Whether total is a planner estimate")
 
 
 class BaseResponse(BaseModel):
@@ -66,6 +66,7 @@ class FilePathListResponse(BaseModel):
     page: int = Field(1, description="Current page")
     per_page: int = Field(20, description="Items per page")
     total_pages: int = Field(..., description="Total number of pages")
+    next_cursor: Optional[str] = Field(None, description="Cursor of the next page")
 
 
 class FilePathDeleteRequest(BaseModel):
@@ -0,0 +1,28 @@
+"""
+Schemas for the search endpoint
+"""
+
+from typing import Optional, List
+from datetime import datetime
+from pydantic import BaseModel, Field
+
+
+class SearchHitResponse(BaseModel):
+    """One search result"""
+    type: str = Field(..., description="file_path | code_entry | criteria")
+    id: str = Field(..., description="Id of the file path, code entry or analysis result")
+    section: Optional[str] = Field(None, description="Criteria key, for criteria findings")
+    title: str = Field(..., description="File name, entry title or criterion")
+    snippet: Optional[str] = Field(None, description="Matching excerpt, terms between [ ]")
+    rank: float = Field(..., description="Relevance (higher is better)")
+    updated_at: Optional[datetime] = Field(None, description="When the item was indexed")
+
+
+class SearchResponse(BaseModel):
+    """Ranked search results"""
+    query: str
+    results: List[SearchHitResponse]
+    count: int
+    limit: int
+    offset: int
+    has_more: bool
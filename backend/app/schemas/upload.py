@@ -52,6 +52,8 @@ class FileListResponse(BaseModel):
     files: List[FileUploadResponse]
     total_count: int
     total_size: int
+    next_cursor: Optional[str] = None
+    has_more: bool = False
 
 
 class FileUpdateRequest(BaseModel):
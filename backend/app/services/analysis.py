@@ -5,11 +5,12 @@ Analysis service for VerificAI Backend
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc
+from sqlalchemy import and_, or_, desc, func
 
 from app.models.analysis import Analysis, AnalysisStatus, AnalysisResult
 from app.models.prompt import Prompt
 from app.models.user import User
+from app.services.search import contains_pattern
 from app.core.exceptions import (
     NotFoundError, ValidationError, BusinessRuleError,
     DuplicateResourceError
@@ -88,8 +89,8 @@ class AnalysisService:
         if search:
             query = query.filter(
                 or_(
-                    Analysis.name.contains(search),
-                    Analysis.description.contains(search)
+                    Analysis.name.ilike(contains_pattern(search), escape="\\"),
+                    Analysis.description.ilike(contains_pattern(search), escape="\\")
                 )
             )
 
@@ -271,30 +272,31 @@ class AnalysisService:
         if user_id:
             query = query.filter(Analysis.user_id == user_id)
 
-        total_analyses = query.count()
-        completed_analyses = query.filter(Analysis.status == AnalysisStatus.COMPLETED).count()
-        failed_analyses = query.filter(Analysis.status == AnalysisStatus.FAILED).count()
-        processing_analyses = query.filter(Analysis.status == AnalysisStatus.PROCESSING).count()
-
-        # Calculate average score for completed analyses
-        completed_query = query.filter(Analysis.status == AnalysisStatus.COMPLETED)
-        avg_scores = completed_query.with_entities(
-            Analysis.overall_score,
-            Analysis.security_score,
-            Analysis.performance_score,
-            Analysis.maintainability_score
-        ).all()
-
-        avg_overall = sum([score[0] or 0 for score in avg_scores]) / len(avg_scores) if avg_scores else 0
-        avg_security = sum([score[1] or 0 for score in avg_scores]) / len(avg_scores) if avg_scores else 0
-        avg_performance = sum([score[2] or 0 for score in avg_scores]) / len(avg_scores) if avg_scores else 0
-        avg_maintainability = sum([score[3] or 0 for score in avg_scores]) / len(avg_scores) if avg_scores else 0
-
-        # Analyses by status
-        analyses_by_status = {}
-        for status in AnalysisStatus:
-            count = query.filter(Analysis.status == status).count()
-            analyses_by_status[status.value] = count
+        # One aggregate query: counts per status and averages over completed analyses
+        completed = Analysis.status == AnalysisStatus.COMPLETED
+        status_columns = [
+            func.count(Analysis.id).filter(Analysis.status == status).label(status.value)
+            for status in AnalysisStatus
+        ]
+        row = query.with_entities(
+            func.count(Analysis.id).label("total"),
+            *status_columns,
+            func.avg(func.coalesce(Analysis.overall_score, 0)).filter(completed).label("avg_overall"),
+            func.avg(func.coalesce(Analysis.security_score, 0)).filter(completed).label("avg_security"),
+            func.avg(func.coalesce(Analysis.performance_score, 0)).filter(completed).label("avg_performance"),
+            func.avg(func.coalesce(Analysis.maintainability_score, 0)).filter(completed).label("avg_maintainability")
+        ).one()
+
+        total_analyses = row.total
+        analyses_by_status = {status.value: getattr(row, status.value) for status in AnalysisStatus}
+        completed_analyses = analyses_by_status[AnalysisStatus.COMPLETED.value]
+        failed_analyses = analyses_by_status[AnalysisStatus.FAILED.value]
+        processing_analyses = analyses_by_status[AnalysisStatus.PROCESSING.value]
+
+        avg_overall = float(row.avg_overall or 0)
+        avg_security = float(row.avg_security or 0)
+        avg_performance = float(row.avg_performance or 0)
+        avg_maintainability = float(row.avg_maintainability or 0)
 
         # Total processing time and cost (placeholders)
         total_processing_time = 0  # TODO: Calculate actual processing time
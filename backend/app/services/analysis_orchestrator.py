@@ -13,6 +13,8 @@ import logging
 from app.models.analysis import Analysis, AnalysisStatus
 from app.models.prompt import Prompt
 from app.core.config import settings
+from app.core.profiling import profiler
+from app.core.tracing import set_error, span
 from app.services.llm_provider import LLMProvider
 from app.services.file_processor import FileProcessor
 from app.services.token_optimizer import TokenOptimizer
@@ -76,7 +78,7 @@ class AnalysisOrchestrator:
         await self.queue.enqueue(analysis)
 
         # Start processing in background
-        asyncio.create_task(self._process_analysis_async(analysis.id, config))
+        asyncio.create_task(self._process_analysis_job(analysis.id, config))
 
         return analysis.id
 
@@ -115,78 +117,88 @@ class AnalysisOrchestrator:
             "error_message": job.error_message
         }
 
+    async def _process_analysis_job(self, analysis_id: int, config: AnalysisConfig) -> None:
+        """Process a job, under the profiler when the next analyses were armed for profiling"""
+        if not profiler.take_analysis():
+            return await self._process_analysis_async(analysis_id, config)
+        async with profiler.profile(f"analysis-{analysis_id}", {"kind": "analysis", "analysis_id": analysis_id}):
+            await self._process_analysis_async(analysis_id, config)
+
     async def _process_analysis_async(self, analysis_id: int, config: AnalysisConfig) -> None:
         """Process analysis job asynchronously"""
         from app.core.database import SessionLocal
 
-        db = SessionLocal()
-        try:
-            # Get analysis from database
-            analysis = db.query(Analysis).filter(Analysis.id == analysis_id).first()
-            if not analysis:
-                logger.error(f"Analysis {analysis_id} not found")
-                return
-
-            # Add to active jobs
-            self.active_jobs[str(analysis_id)] = analysis
-
-            # Update status to processing
-            analysis.start_processing()
-            db.commit()
-
-            # Process analysis
-            result = await self._process_analysis(analysis, config)
-
-            # Complete analysis
-            analysis.complete_processing()
-
-            # Create result
-            from app.models.analysis import AnalysisResult
-            analysis_result = AnalysisResult(
-                analysis_id=analysis.id,
-                summary=result.get('overall_assessment', ''),
-                detailed_findings=result.get('detailed_findings', ''),
-                recommendations=result.get('recommendations', ''),
-                confidence=result.get('confidence', 0.0),
-                model_used=result.get('model_used', ''),
-                tokens_used=result.get('token_usage', {}).get('total_tokens', 0),
-                processing_time=result.get('processing_time', 0),
-                issues=result.get('criteria_results', []),
-                metrics=result.get('metrics', {}),
-                code_snippets=result.get('code_examples', []),
-                file_analysis=result.get('file_analysis', {})
-            )
-
-            db.add(analysis_result)
-            db.commit()
-
-            # Calculate scores
-            analysis.calculate_scores()
-            db.commit()
-
-            # Mark as complete in queue
-            await self.queue.complete_job(str(analysis_id), result)
-
-            logger.info(f"Analysis {analysis_id} completed successfully")
+        with span("orchestrator.job", {"analysis.id": analysis_id, "analysis.files": len(config.files)}) as job_span:
+            db = SessionLocal()
+            try:
+                # Get analysis from database
+                analysis = db.query(Analysis).filter(Analysis.id == analysis_id).first()
+                if not analysis:
+                    logger.error("Analysis %s not found", analysis_id)
+                    return
 
-        except Exception as e:
-            logger.error(f"Error processing analysis {analysis_id}: {str(e)}")
+                # Add to active jobs
+                self.active_jobs[str(analysis_id)] = analysis
 
-            # Mark as failed
-            analysis = db.query(Analysis).filter(Analysis.id == analysis_id).first()
-            if analysis:
-                analysis.fail_processing(str(e))
+                # Update status to processing
+                analysis.start_processing()
                 db.commit()
 
-                # Mark as failed in queue
-                await self.queue.fail_job(str(analysis_id), str(e))
-
-        finally:
-            # Remove from active jobs
-            if str(analysis_id) in self.active_jobs:
-                del self.active_jobs[str(analysis_id)]
-
-            db.close()
+                # Process analysis
+                result = await self._process_analysis(analysis, config)
+
+                with span("orchestrator.db_save"):
+                    # Complete analysis
+                    analysis.complete_processing()
+
+                    # Create result
+                    from app.models.analysis import AnalysisResult
+                    analysis_result = AnalysisResult(
+                        analysis_id=analysis.id,
+                        summary=result.get('overall_assessment', ''),
+                        detailed_findings=result.get('detailed_findings', ''),
+                        recommendations=result.get('recommendations', ''),
+                        confidence=result.get('confidence', 0.0),
+                        model_used=result.get('model_used', ''),
+                        tokens_used=result.get('token_usage', {}).get('total_tokens', 0),
+                        processing_time=result.get('processing_time', 0),
+                        issues=result.get('criteria_results', []),
+                        metrics=result.get('metrics', {}),
+                        code_snippets=result.get('code_examples', []),
+                        file_analysis=result.get('file_analysis', {})
+                    )
+
+                    db.add(analysis_result)
+                    db.commit()
+
+                    # Calculate scores
+                    analysis.calculate_scores()
+                    db.commit()
+
+                # Mark as complete in queue
+                await self.queue.complete_job(str(analysis_id), result)
+
+                logger.info("Analysis %s completed successfully", analysis_id)
+
+            except Exception as e:
+                logger.error("Error processing analysis %s: %s", analysis_id, e)
+                set_error(job_span, str(e))
+
+                # Mark as failed
+                analysis = db.query(Analysis).filter(Analysis.id == analysis_id).first()
+                if analysis:
+                    analysis.fail_processing(str(e))
+                    db.commit()
+
+                    # Mark as failed in queue
+                    await self.queue.fail_job(str(analysis_id), str(e))
+
+            finally:
+                # Remove from active jobs
+                if str(analysis_id) in self.active_jobs:
+                    del self.active_jobs[str(analysis_id)]
+
+                db.close()
 
     async def _process_analysis(self, analysis: Analysis, config: AnalysisConfig) -> Dict[str, Any]:
         """Process a single analysis job"""
@@ -199,25 +211,29 @@ class AnalysisOrchestrator:
             await self.queue.update_progress(str(analysis.id), 10)
 
             # Step 2: Process files - 30%
-            processed_files = await self.file_processor.process_files(config.files)
+            with span("orchestrator.process_files", {"analysis.files": len(config.files)}):
+                processed_files = await self.file_processor.process_files(config.files)
             await self.queue.update_progress(str(analysis.id), 30)
 
             # Step 3: Optimize content - 50%
-            optimized_content = self.token_optimizer.optimize_content(processed_files, config.max_tokens)
+            with span("orchestrator.optimize_content", {"analysis.max_tokens": config.max_tokens}):
+                optimized_content = self.token_optimizer.optimize_content(processed_files, config.max_tokens)
             await self.queue.update_progress(str(analysis.id), 50)
 
             # Step 4: Execute LLM analysis - 80%
-            llm_response = await self.llm_provider.analyze_with_fallback(
-                config.prompt_content,
-                optimized_content,
-                config.llm_provider,
-                config.temperature,
-                config.max_tokens  # Adicionando max_tokens que estava faltando!
-            )
+            with span("orchestrator.llm", {"llm.provider": config.llm_provider}):
+                llm_response = await self.llm_provider.analyze_with_fallback(
+                    config.prompt_content,
+                    optimized_content,
+                    config.llm_provider,
+                    config.temperature,
+                    config.max_tokens  # Adicionando max_tokens que estava faltando!
+                )
             await self.queue.update_progress(str(analysis.id), 80)
 
             # Step 5: Process results - 100%
-            result = self._process_llm_response(llm_response, processed_files, config)
+            with span("orchestrator.parse"):
+                result = self._process_llm_response(llm_response, processed_files, config)
 
             # Add metadata
             result['processing_time'] = (datetime.utcnow() - start_time).total_seconds()
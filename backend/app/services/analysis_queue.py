@@ -4,10 +4,13 @@ Analysis queue service for VerificAI Backend
 
 import json
 import logging
+import time
 from datetime import datetime
 from typing import Dict, Optional, List, Any
 from dataclasses import dataclass, asdict
 
+from app.core.metrics import ANALYSIS_QUEUE_DEPTH, ANALYSIS_QUEUE_WAIT
+
 logger = logging.getLogger(__name__)
 
 
@@ -37,6 +40,8 @@ class AnalysisQueue:
         self.jobs: Dict[str, QueueJob] = {}
         self.queue_order: List[str] = []
         self.active_job_id: Optional[str] = None
+        # Monotonic enqueue time of the queued jobs (queue wait metric)
+        self._enqueued_at: Dict[str, float] = {}
 
     async def enqueue(self, analysis) -> None:
         """Add job to queue"""
@@ -53,6 +58,8 @@ class AnalysisQueue:
 
         self.jobs[job_id] = job
         self.queue_order.append(job_id)
+        self._enqueued_at[job_id] = time.monotonic()
+        ANALYSIS_QUEUE_DEPTH.inc()
 
         logger.info(f"Job {job_id} added to queue")
 
@@ -66,6 +73,7 @@ class AnalysisQueue:
                 job.status = 'processing'
                 job.started_at = datetime.utcnow()
                 self.active_job_id = job_id
+                self._left_queue(job_id)
 
                 logger.info(f"Job {job_id} dequeued for processing")
                 return job
@@ -98,6 +106,7 @@ class AnalysisQueue:
         """Mark job as completed"""
         if job_id in self.jobs:
             job = self.jobs[job_id]
+            self._left_queue(job_id, waited=False)
             job.status = 'completed'
             job.progress = 100.0
             job.completed_at = datetime.utcnow()
@@ -113,6 +122,7 @@ class AnalysisQueue:
         """Mark job as failed"""
         if job_id in self.jobs:
             job = self.jobs[job_id]
+            self._left_queue(job_id, waited=False)
             job.status = 'failed'
             job.error_message = error
             job.completed_at = datetime.utcnow()
@@ -130,6 +140,8 @@ class AnalysisQueue:
 
             # Can only cancel queued or processing jobs
             if job.status in ['queued', 'processing']:
+                if job.status == 'queued':
+                    self._left_queue(job_id, waited=False)
                 job.status = 'cancelled'
                 job.completed_at = datetime.utcnow()
 
@@ -142,6 +154,14 @@ class AnalysisQueue:
 
         return False
 
+    def _left_queue(self, job_id: str, waited: bool = True) -> None:
+        enqueued_at = self._enqueued_at.pop(job_id, None)
+        if enqueued_at is None:
+            return
+        ANALYSIS_QUEUE_DEPTH.dec()
+        if waited:
+            ANALYSIS_QUEUE_WAIT.observe(time.monotonic() - enqueued_at)
+
     async def get_queue_status(self) -> Dict[str, Any]:
         """Get overall queue status"""
         total_jobs = len(self.jobs)
@@ -238,4 +258,6 @@ class AnalysisQueue:
         self.jobs.clear()
         self.queue_order.clear()
         self.active_job_id = None
+        ANALYSIS_QUEUE_DEPTH.dec(len(self._enqueued_at))
+        self._enqueued_at.clear()
         logger.info("Queue reset")
\ No newline at end of file
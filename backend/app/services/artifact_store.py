@@ -0,0 +1,223 @@
+"""
+Analysis artifact store for VerificAI Backend
+
+Prompts and LLM responses are stored per analysis (one directory per
+analysis id) instead of the shared prompts/latest_*.txt files. Artifacts are
+compressed (zstd when the zstandard package is installed, gzip otherwise),
+written by a background worker so the request path does not block on disk
+I/O, and the oldest analyses are removed once the store exceeds its size cap.
+"""
+
+import asyncio
+import contextvars
+import gzip
+import json
+import logging
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Union
+
+from app.core.config import settings
+from app.core.tracing import span
+
+try:
+    import zstandard
+except ImportError:  # gzip fallback
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+ArtifactContent = Union[str, Iterable[str]]
+
+META_FILE = "meta.json"
+
+
+class ArtifactStore:
+    """Compressed, size-capped store of per-analysis artifacts"""
+
+    def __init__(self, root: str, max_bytes: int, compression: str = "auto"):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        if compression == "auto":
+            compression = "zstd" if zstandard else "gzip"
+        if compression == "zstd" and not zstandard:
+            logger.warning("zstandard is not installed, artifacts will be gzip-compressed")
+            compression = "gzip"
+        self.compression = compression
+        # A single writer keeps writes ordered and the size accounting simple
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="artifact-store")
+        self._lock = threading.Lock()
+        self._total_bytes: Optional[int] = None
+
+    @property
+    def extension(self) -> str:
+        return ".zst" if self.compression == "zstd" else ".gz"
+
+    def save_in_background(self, analysis_id: Union[int, str], user_id: int, artifacts: Dict[str, ArtifactContent]) -> None:
+        """Schedule the artifacts of an analysis to be written; returns immediately"""
+        # Run in the caller's context so the write is traced under its request
+        context = contextvars.copy_context()
+        future = self._executor.submit(context.run, self.save, analysis_id, user_id, artifacts)
+        future.add_done_callback(self._log_failure)
+
+    @staticmethod
+    def _log_failure(future) -> None:
+        error = future.exception()
+        if error:
+            logger.error("Failed to write analysis artifacts: %s", error)
+
+    def save(self, analysis_id: Union[int, str], user_id: int, artifacts: Dict[str, ArtifactContent]) -> Dict[str, Any]:
+        """Write the artifacts of an analysis (blocking)"""
+        with span("artifact.write", {"artifact.analysis_id": str(analysis_id), "artifact.count": len(artifacts)}):
+            return self._save(analysis_id, user_id, artifacts)
+
+    def _save(self, analysis_id: Union[int, str], user_id: int, artifacts: Dict[str, ArtifactContent]) -> Dict[str, Any]:
+        directory = self.root / str(analysis_id)
+        directory.mkdir(parents=True, exist_ok=True)
+
+        meta = self._read_meta(directory) or {
+            "analysis_id": str(analysis_id),
+            "user_id": user_id,
+            "created_at": datetime.utcnow().isoformat(),
+            "artifacts": {}
+        }
+
+        written = 0
+        for name, content in artifacts.items():
+            parts = [content] if isinstance(content, str) else content
+            path = directory / f"{name}{self.extension}"
+            previous = path.stat().st_size if path.exists() else 0
+            original_size = self._write_compressed(path, parts)
+            stored_size = path.stat().st_size
+            written += stored_size - previous
+            meta["artifacts"][name] = {
+                "file": path.name,
+                "size": original_size,
+                "stored_size": stored_size,
+                "compression": self.compression,
+                "created_at": datetime.utcnow().isoformat()
+            }
+
+        with open(directory / META_FILE, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+        self._account(written)
+        return meta
+
+    def _write_compressed(self, path: Path, parts: Iterable[str]) -> int:
+        original_size = 0
+        if self.compression == "zstd":
+            compressor = zstandard.ZstdCompressor(level=3)
+            with open(path, "wb") as raw, compressor.stream_writer(raw) as writer:
+                for part in parts:
+                    data = part.encode("utf-8")
+                    original_size += len(data)
+                    writer.write(data)
+        else:
+            with gzip.open(path, "wb", compresslevel=6) as writer:
+                for part in parts:
+                    data = part.encode("utf-8")
+                    original_size += len(data)
+                    writer.write(data)
+        return original_size
+
+    def load(self, analysis_id: Union[int, str], name: str) -> Optional[str]:
+        """Read one artifact, None when it does not exist (or was removed by retention)"""
+        directory = self.root / str(analysis_id)
+        meta = self._read_meta(directory)
+        if not meta or name not in meta["artifacts"]:
+            return None
+
+        info = meta["artifacts"][name]
+        path = directory / info["file"]
+        if not path.exists():
+            return None
+
+        if info.get("compression") == "zstd":
+            if not zstandard:
+                raise RuntimeError("zstandard is required to read this artifact")
+            with open(path, "rb") as raw, zstandard.ZstdDecompressor().stream_reader(raw) as reader:
+                return reader.read().decode("utf-8")
+        with gzip.open(path, "rb") as reader:
+            return reader.read().decode("utf-8")
+
+    def describe(self, analysis_id: Union[int, str]) -> Optional[Dict[str, Any]]:
+        """Metadata of the artifacts stored for an analysis"""
+        return self._read_meta(self.root / str(analysis_id))
+
+    def delete(self, analysis_id: Union[int, str]) -> None:
+        directory = self.root / str(analysis_id)
+        if directory.exists():
+            size = self._directory_size(directory)
+            shutil.rmtree(directory, ignore_errors=True)
+            self._account(-size, enforce=False)
+
+    @staticmethod
+    def _read_meta(directory: Path) -> Optional[Dict[str, Any]]:
+        meta_path = directory / META_FILE
+        if not meta_path.exists():
+            return None
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("Unreadable artifact metadata %s: %s", meta_path, e)
+            return None
+
+    @staticmethod
+    def _directory_size(directory: Path) -> int:
+        return sum(f.stat().st_size for f in directory.iterdir() if f.is_file())
+
+    def _account(self, delta: int, enforce: bool = True) -> None:
+        with self._lock:
+            if self._total_bytes is None:
+                # First use: measure what is already on disk
+                self._total_bytes = sum(
+                    self._directory_size(d) for d in self.root.iterdir() if d.is_dir()
+                ) if self.root.exists() else 0
+            else:
+                self._total_bytes += delta
+
+            if enforce and self._total_bytes > self.max_bytes:
+                self._enforce_retention()
+
+    def _enforce_retention(self) -> None:
+        """Remove the oldest analyses until the store fits its size cap (called with the lock held)"""
+        directories = sorted(
+            (d for d in self.root.iterdir() if d.is_dir()),
+            key=lambda d: d.stat().st_mtime
+        )
+        # Never remove the most recent analysis, even if it alone exceeds the cap
+        for directory in directories[:-1]:
+            if self._total_bytes <= self.max_bytes:
+                break
+            size = self._directory_size(directory)
+            shutil.rmtree(directory, ignore_errors=True)
+            self._total_bytes -= size
+            logger.info("Artifact retention removed %s (%s bytes)", directory.name, size)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "root": str(self.root),
+                "compression": self.compression,
+                "total_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes
+            }
+
+
+async def load_artifact(analysis_id: Union[int, str], name: str) -> Optional[str]:
+    """Read an artifact without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, artifact_store.load, analysis_id, name)
+
+
+# Global artifact store instance
+artifact_store = ArtifactStore(
+    root=settings.ARTIFACT_STORE_DIR,
+    max_bytes=settings.ARTIFACT_STORE_MAX_BYTES,
+    compression=settings.ARTIFACT_STORE_COMPRESSION
+)
@@ -0,0 +1,540 @@
+"""
+Batch analysis service for VerificAI Backend
+
+Non-interactive analysis runs (e.g. nightly re-analysis of every code entry)
+are written to a JSONL file, submitted through the provider batch API and
+polled by a scheduler that runs apart from the interactive LLM path, so they
+never wait on (or hold) the LLMService global lock. Finished batches are
+ingested into GeneralAnalysisResult in bulk, in a worker thread.
+
+Every worker process (and pod) sharing BATCH_ANALYSIS_DIR runs the scheduler;
+a job is only submitted or polled by the process holding its lock file, so
+each batch is submitted and ingested once.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+import httpx
+
+try:
+    import fcntl
+except ImportError:  # Windows (development): no cross-process claim, run a single worker
+    fcntl = None
+from sqlalchemy.orm import Session, undefer
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.code_entry import CodeEntry
+from app.models.prompt import GeneralAnalysisResult
+from app.services.criteria_parser import count_statuses
+from app.services.llm_service import llm_service
+from app.services.output_budget import output_budget_estimator
+from app.services.prompt_builder import PromptBuilder
+from app.services.prompt_service import get_prompt_service
+
+logger = logging.getLogger(__name__)
+
+BATCH_PENDING = "pending"
+BATCH_SUBMITTED = "submitted"
+BATCH_SUCCEEDED = "succeeded"
+BATCH_FAILED = "failed"
+BATCH_INGESTED = "ingested"
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass
+class BatchItem:
+    """One analysis inside a batch"""
+    key: str
+    user_id: int
+    code_entry_id: str
+    analysis_name: str
+    criteria: List[Dict[str, Any]]  # [{"id": 1, "text": "..."}] in prompt order
+
+
+@dataclass
+class BatchJob:
+    """Batch submission tracked through a manifest on disk"""
+    id: str
+    model: str
+    status: str = BATCH_PENDING
+    modified_prompt: str = ""  # prompt with criteria, shared by every item
+    provider_name: Optional[str] = None
+    items: List[BatchItem] = field(default_factory=list)
+    created_at: str = field(default_factory=lambda: datetime.utcnow().isoformat())
+    submitted_at: Optional[str] = None
+    completed_at: Optional[str] = None
+    error_message: Optional[str] = None
+    ingested_count: int = 0
+
+    @property
+    def directory(self) -> Path:
+        return Path(settings.BATCH_ANALYSIS_DIR) / self.id
+
+    @property
+    def requests_path(self) -> Path:
+        return self.directory / "requests.jsonl"
+
+    @property
+    def results_path(self) -> Path:
+        return self.directory / "results.jsonl"
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.directory / "manifest.json"
+
+    @property
+    def lock_path(self) -> Path:
+        return self.directory / "manifest.lock"
+
+    def save(self) -> None:
+        """Write the manifest atomically: other processes never read a partial file"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        temporary = self.directory / f"manifest.{os.getpid()}.tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(asdict(self), f, ensure_ascii=False)
+        os.replace(temporary, self.manifest_path)
+
+    @classmethod
+    def load(cls, manifest_path: Path) -> "BatchJob":
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        data["items"] = [BatchItem(**item) for item in data.get("items", [])]
+        return cls(**data)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "model": self.model,
+            "status": self.status,
+            "items": len(self.items),
+            "created_at": self.created_at,
+            "submitted_at": self.submitted_at,
+            "completed_at": self.completed_at,
+            "ingested_count": self.ingested_count,
+            "error_message": self.error_message
+        }
+
+
+def _parse_jsonl(text: str) -> List[Dict[str, Any]]:
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+async def _read_chunks(path: Path) -> AsyncIterator[bytes]:
+    """File content in chunks read in a worker thread (request files can be hundreds of MB)"""
+    with open(path, "rb") as f:
+        while True:
+            chunk = await asyncio.to_thread(f.read, UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+
+class GeminiBatchBackend:
+    """
+    Gemini Batch Mode (models/{model}:batchGenerateContent). The JSONL requests
+    are uploaded through the File API and passed as the batch input file:
+    inlined requests are capped at ~20 MB and each prompt carries the code.
+    """
+
+    def __init__(self, base_url: str, api_key: str):
+        self.base_url = base_url
+        self.api_root = base_url.rsplit("/models", 1)[0]
+        self.upload_root = self.api_root.replace("/v1beta", "/upload/v1beta")
+        self.api_key = api_key
+
+    async def upload_requests(self, client: httpx.AsyncClient, job: BatchJob) -> str:
+        """Resumable File API upload of requests.jsonl; returns the file name (files/...)"""
+        size = job.requests_path.stat().st_size
+        start = await client.post(
+            f"{self.upload_root}/files?key={self.api_key}",
+            headers={
+                "X-Goog-Upload-Protocol": "resumable",
+                "X-Goog-Upload-Command": "start",
+                "X-Goog-Upload-Header-Content-Length": str(size),
+                "X-Goog-Upload-Header-Content-Type": "application/jsonl"
+            },
+            json={"file": {"display_name": f"verificai-{job.id}-requests"}}
+        )
+        start.raise_for_status()
+        upload_url = start.headers.get("x-goog-upload-url")
+        if not upload_url:
+            raise RuntimeError("File API did not return an upload URL")
+
+        response = await client.post(
+            upload_url,
+            headers={
+                "Content-Length": str(size),
+                "X-Goog-Upload-Offset": "0",
+                "X-Goog-Upload-Command": "upload, finalize"
+            },
+            content=_read_chunks(job.requests_path)
+        )
+        response.raise_for_status()
+        return response.json()["file"]["name"]
+
+    async def submit(self, job: BatchJob) -> str:
+        async with httpx.AsyncClient(timeout=600.0) as client:
+            file_name = await self.upload_requests(client, job)
+            logger.info("Batch %s requests uploaded as %s", job.id, file_name)
+            response = await client.post(
+                f"{self.base_url}/{job.model}:batchGenerateContent?key={self.api_key}",
+                json={
+                    "batch": {
+                        "display_name": f"verificai-{job.id}",
+                        "input_config": {"file_name": file_name}
+                    }
+                }
+            )
+        response.raise_for_status()
+        return response.json()["name"]
+
+    async def poll(self, job: BatchJob) -> Optional[List[Dict[str, Any]]]:
+        """Return [{"key", "response"}] once the batch is done, None while it is running"""
+        async with httpx.AsyncClient(timeout=120.0) as client:
+            response = await client.get(f"{self.api_root}/{job.provider_name}?key={self.api_key}")
+            response.raise_for_status()
+            operation = response.json()
+
+            metadata = operation.get("metadata", {})
+            state = metadata.get("state", "")
+            if not operation.get("done"):
+                return None
+            if operation.get("error") or state.endswith(("FAILED", "CANCELLED", "EXPIRED")):
+                raise RuntimeError(f"Batch {job.provider_name} ended with state {state}: {operation.get('error')}")
+
+            output = operation.get("response", {}) or metadata.get("output", {})
+            inlined = output.get("inlinedResponses", {}).get("inlinedResponses")
+            if inlined is not None:
+                return [
+                    {"key": entry.get("metadata", {}).get("key"), "response": entry.get("response", {})}
+                    for entry in inlined
+                ]
+
+            responses_file = output.get("responsesFile")
+            if not responses_file:
+                return []
+            download = await client.get(
+                f"{self.api_root.replace('/v1beta', '/download/v1beta')}/{responses_file}:download?alt=media&key={self.api_key}"
+            )
+            download.raise_for_status()
+            return await asyncio.to_thread(_parse_jsonl, download.text)
+
+
+class LocalBatchBackend:
+    """
+    Stand-in backend that completes batches locally (development and tests).
+    Answers are built from the job's requests.jsonl, so any worker can poll a
+    batch submitted by another one.
+    """
+
+    async def submit(self, job: BatchJob) -> str:
+        return f"batches/local-{job.id}"
+
+    async def poll(self, job: BatchJob) -> Optional[List[Dict[str, Any]]]:
+        if not job.requests_path.exists():
+            raise RuntimeError(f"Requests of local batch {job.provider_name} not found")
+        entries = await asyncio.to_thread(_parse_jsonl, job.requests_path.read_text(encoding="utf-8"))
+        items = {item.key: item for item in job.items}
+        return [
+            {"key": entry["key"], "response": self._fake_response(items.get(entry["key"]))}
+            for entry in entries
+        ]
+
+    @staticmethod
+    def _fake_response(item: Optional[BatchItem]) -> Dict[str, Any]:
+        sections = []
+        for index, criterion in enumerate(item.criteria if item else [], 1):
+            sections.append(
+                f"## Critério {index}: {criterion['text']}\n"
+                f"**Status:** Não avaliado\n\nResposta gerada pelo backend local de lotes.\n"
+                f"#FIM_ANALISE_CRITERIO#\n"
+            )
+        text = "\n".join(sections) + "\n#FIM#"
+        return {
+            "candidates": [{"content": {"role": "model", "parts": [{"text": text}]}, "finishReason": "STOP"}],
+            "usageMetadata": {"candidatesTokenCount": len(text) // 4}
+        }
+
+
+class BatchAnalysisService:
+    """Builds, submits, polls and ingests batch analyses"""
+
+    def __init__(self, backend, model: str):
+        self.backend = backend
+        self.model = model
+        self._task: Optional[asyncio.Task] = None
+
+    def create_batch(
+        self,
+        db: Session,
+        user_id: int,
+        criteria_ids: List[str],
+        code_entry_ids: Optional[List[str]] = None,
+        analysis_name: str = "Reanálise em lote"
+    ) -> BatchJob:
+        """Write the JSONL requests for the given code entries (all active entries of the user by default)"""
+        prompt_service = get_prompt_service(db)
+        try:
+            compiled_prompt = prompt_service.get_compiled_prompt(4)
+            if not compiled_prompt.has_code_placeholder:
+                compiled_prompt = prompt_service.get_default_compiled_prompt()
+        except Exception as e:
+            logger.warning("Could not load prompt 4 for batch, using default: %s", e)
+            compiled_prompt = prompt_service.get_default_compiled_prompt()
+
+        selected_criteria = prompt_service.get_selected_criteria(criteria_ids)
+        if not selected_criteria:
+            raise ValueError("No valid criteria found")
+
+        rendered_prompt = prompt_service.render_prompt(compiled_prompt, selected_criteria)
+        modified_prompt = rendered_prompt.text
+        criteria = [{"id": c.id, "text": c.text} for c in selected_criteria]
+        max_output_tokens = output_budget_estimator.estimate(len(selected_criteria))
+
+        query = db.query(CodeEntry).options(undefer(CodeEntry.code_content)).filter(
+            CodeEntry.user_id == user_id, CodeEntry.is_active == True
+        )
+        if code_entry_ids:
+            query = query.filter(CodeEntry.id.in_(code_entry_ids))
+
+        job = BatchJob(id=uuid.uuid4().hex, model=self.model, modified_prompt=modified_prompt)
+        job.directory.mkdir(parents=True, exist_ok=True)
+
+        with open(job.requests_path, "w", encoding="utf-8") as f:
+            for code_entry in query.yield_per(50):
+                source_info = (
+                    f"\n\n{'=' * 60}\n"
+                    f"CÓDIGO COLADO: {code_entry.title}\n"
+                    f"LINGUAGEM: {code_entry.language or 'Não detectada'}\n"
+                    f"TAMANHO: {len(code_entry.code_content)} caracteres\n"
+                    f"{'=' * 60}\n\n"
+                )
+                prompt_builder = PromptBuilder(segments=rendered_prompt.segments)
+                prompt_builder.add_source(source_info, code_entry.code_content)
+                prompt = prompt_builder.build(cacheable=True)
+                item = BatchItem(
+                    key=f"{job.id}-{len(job.items)}",
+                    user_id=user_id,
+                    code_entry_id=str(code_entry.id),
+                    analysis_name=f"{analysis_name} - {code_entry.title}",
+                    criteria=criteria
+                )
+                job.items.append(item)
+                f.write(json.dumps({
+                    "key": item.key,
+                    "request": {
+                        "contents": [{"role": "user", "parts": [{"text": prompt}]}],
+                        "generationConfig": {"maxOutputTokens": max_output_tokens, "temperature": 0.7}
+                    }
+                }, ensure_ascii=False))
+                f.write("\n")
+
+        job.save()
+        logger.info("Batch %s created with %s requests", job.id, len(job.items))
+        return job
+
+    async def submit(self, job: BatchJob) -> BatchJob:
+        """Submit a pending batch to the provider"""
+        if not job.items:
+            job.status = BATCH_INGESTED
+            job.completed_at = datetime.utcnow().isoformat()
+            job.save()
+            return job
+
+        try:
+            job.provider_name = await self.backend.submit(job)
+            job.status = BATCH_SUBMITTED
+            job.submitted_at = datetime.utcnow().isoformat()
+            logger.info("Batch %s submitted as %s", job.id, job.provider_name)
+        except Exception as e:
+            job.status = BATCH_FAILED
+            job.error_message = str(e)
+            logger.error("Batch %s submission failed: %s", job.id, e)
+        job.save()
+        return job
+
+    async def poll(self, job: BatchJob) -> BatchJob:
+        """Check a submitted batch and ingest its results when done"""
+        try:
+            results = await self.backend.poll(job)
+        except Exception as e:
+            job.status = BATCH_FAILED
+            job.error_message = str(e)
+            job.save()
+            logger.error("Batch %s failed: %s", job.id, e)
+            return job
+
+        if results is None:
+            return job
+
+        # Parsing and the bulk insert are CPU and sync DB work: keep them off the event loop
+        await asyncio.to_thread(self._store_results, job, results)
+        return job
+
+    def _store_results(self, job: BatchJob, results: List[Dict[str, Any]]) -> None:
+        """Write results.jsonl and ingest the results (blocking, run in a worker thread)"""
+        with open(job.results_path, "w", encoding="utf-8") as f:
+            for entry in results:
+                f.write(json.dumps(entry, ensure_ascii=False))
+                f.write("\n")
+        job.status = BATCH_SUCCEEDED
+        job.completed_at = datetime.utcnow().isoformat()
+        job.save()
+
+        db = SessionLocal()
+        try:
+            job.ingested_count = self.ingest(db, job, results)
+            job.status = BATCH_INGESTED
+        except Exception as e:
+            db.rollback()
+            job.error_message = f"Ingestion failed: {e}"
+            logger.error("Batch %s ingestion failed: %s", job.id, e)
+        finally:
+            db.close()
+        job.save()
+
+    def ingest(self, db: Session, job: BatchJob, results: List[Dict[str, Any]]) -> int:
+        """Insert the batch results into general_analysis_results in a single transaction"""
+        items = {item.key: item for item in job.items}
+        rows = []
+
+        for entry in results:
+            item = items.get(entry.get("key"))
+            if not item:
+                continue
+            response = entry.get("response") or {}
+            text = llm_service._get_response_text(response)
+            if not text:
+                continue
+
+            extracted = llm_service.extract_markdown_content(text)
+            criteria_results = {}
+            for key, result in extracted["criteria_results"].items():
+                position = int(key.replace("criteria_", "")) - 1
+                if 0 <= position < len(item.criteria):
+                    criterion = item.criteria[position]
+                    result["name"] = criterion["text"]
+                    criteria_results[f"criteria_{criterion['id']}"] = result
+                else:
+                    criteria_results[key] = result
+
+            usage = response.get("usageMetadata", {})
+            if "#FIM#" in text:
+                output_budget_estimator.record(len(item.criteria), usage.get("candidatesTokenCount"))
+
+            rows.append(GeneralAnalysisResult(
+                analysis_name=item.analysis_name,
+                criteria_count=len(item.criteria),
+                user_id=item.user_id,
+                criteria_results=criteria_results,
+                status_counts=count_statuses(criteria_results),
+                raw_response=extracted["raw_response"],
+                model_used=job.model,
+                usage=dict(usage, batch_id=job.id, code_entry_id=item.code_entry_id),
+                file_paths=json.dumps([]),
+                modified_prompt=job.modified_prompt,
+                processing_time="batch"
+            ))
+
+        db.add_all(rows)
+        db.commit()
+        logger.info("Batch %s: ingested %s/%s results", job.id, len(rows), len(job.items))
+        return len(rows)
+
+    def list_jobs(self) -> List[BatchJob]:
+        base = Path(settings.BATCH_ANALYSIS_DIR)
+        if not base.exists():
+            return []
+        jobs = []
+        for manifest in base.glob("*/manifest.json"):
+            try:
+                jobs.append(BatchJob.load(manifest))
+            except Exception as e:
+                logger.warning("Could not load batch manifest %s: %s", manifest, e)
+        return sorted(jobs, key=lambda j: j.created_at, reverse=True)
+
+    def get_job(self, batch_id: str) -> Optional[BatchJob]:
+        manifest = Path(settings.BATCH_ANALYSIS_DIR) / batch_id / "manifest.json"
+        if not manifest.exists():
+            return None
+        return BatchJob.load(manifest)
+
+    @contextmanager
+    def _claim(self, job: BatchJob) -> Iterator[Optional[BatchJob]]:
+        """
+        Exclusive claim of a job across the processes sharing BATCH_ANALYSIS_DIR
+        (non-blocking lockf on its lock file, which also works on NFS). Yields
+        the manifest re-read under the lock, or None if another process holds it.
+        """
+        if fcntl is None:
+            yield job
+            return
+        with open(job.lock_path, "a") as lock_file:
+            try:
+                fcntl.lockf(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                yield None
+                return
+            try:
+                yield BatchJob.load(job.manifest_path)
+            finally:
+                fcntl.lockf(lock_file.fileno(), fcntl.LOCK_UN)
+
+    async def run_once(self) -> None:
+        """Submit pending batches and poll submitted ones (those no other process is handling)"""
+        for job in await asyncio.to_thread(self.list_jobs):
+            if job.status not in (BATCH_PENDING, BATCH_SUBMITTED):
+                continue
+            with self._claim(job) as claimed:
+                # The status is checked again under the lock: another process may have moved it on
+                if claimed is None:
+                    continue
+                if claimed.status == BATCH_PENDING:
+                    await self.submit(claimed)
+                elif claimed.status == BATCH_SUBMITTED:
+                    await self.poll(claimed)
+
+    async def _scheduler_loop(self) -> None:
+        logger.info("Batch analysis scheduler started (every %ss)", settings.BATCH_POLL_INTERVAL)
+        while True:
+            started = time.time()
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error("Batch analysis scheduler error: %s", e)
+            await asyncio.sleep(max(1, settings.BATCH_POLL_INTERVAL - (time.time() - started)))
+
+    def start_scheduler(self) -> None:
+        """Start the background scheduler (independent from the interactive LLM lock)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._scheduler_loop())
+
+    async def stop_scheduler(self) -> None:
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+
+def _create_backend():
+    if settings.BATCH_ANALYSIS_BACKEND == "local":
+        return LocalBatchBackend()
+    return GeminiBatchBackend(llm_service.base_url, llm_service.api_key)
+
+
+# Global batch analysis service instance
+batch_analysis_service = BatchAnalysisService(_create_backend(), llm_service.primary_model)
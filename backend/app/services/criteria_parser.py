@@ -0,0 +1,298 @@
+"""
+Incremental criteria parser for VerificAI Backend
+
+Parses the markdown grammar the analysis prompt asks the LLM to follow:
+
+    ## Critério N: <nome>
+    **Status:** ...
+    <conteúdo>
+    #FIM_ANALISE_CRITERIO#
+    ...
+    #FIM#
+
+The parser is a line-oriented state machine. Text can be fed in arbitrary
+chunks (e.g. from a streamed response) and every criterion is emitted as
+soon as its closing tag is seen. Each character is inspected a bounded
+number of times, so parsing time is linear in the response size even for
+malformed or adversarial output.
+"""
+
+import re
+import logging
+import unicodedata
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CRITERIA_END_TAG = "#FIM_ANALISE_CRITERIO#"
+RESPONSE_END_TAG = "#FIM#"
+LEGACY_RESPONSE_END_TAG = "#FIM_ANALISE_TOTAL#"
+
+_TAGS = (CRITERIA_END_TAG, RESPONSE_END_TAG, LEGACY_RESPONSE_END_TAG)
+
+# "## Critério 2: Nome", "## Critério: Nome", "##Criterio 1 - Nome"
+_HEADER_RE = re.compile(r'##\s*Crit[ée]rio\b[ \t]*(\d+(?:\.\d+)*)?[ \t]*[:\-]?[ \t]*(.*)', re.IGNORECASE)
+
+# Sections that close the criterion being parsed
+_SECTION_END_RE = re.compile(r'##\s*(?:Resultado|Recomenda[çc][õo]es)', re.IGNORECASE)
+
+# Prompt instructions the LLM sometimes echoes back; these lines are dropped
+_INSTRUCTION_PREFIXES = (
+    "importante: ao finalizar a análise deste critério, inclua exatamente a tag",
+    "esta tag marca o fim",
+    "esta marcação indica que",
+    "esta estrutura garante que",
+    "este é o marcador final",
+    "por favor, inclua exatamente esta tag ao final",
+    "esta instrução é apenas para orientação",
+)
+
+DEFAULT_CRITERIA_NAME = "Critério analisado"
+
+# "**Status:** Não Conforme", "Status: Parcialmente conforme"
+_STATUS_RE = re.compile(r'[*_\s]*status[*_\s]*:[*_\s]*(.*)', re.IGNORECASE)
+
+# Normalized statuses stored per criterion and counted in the result listings
+CRITERIA_STATUSES = ("compliant", "partially_compliant", "non_compliant")
+
+_COMPLIANT_WORDS = ("conforme", "compliant", "conformidade")
+
+
+@dataclass
+class ParsedCriterion:
+    """Criterion extracted from an LLM response"""
+    index: int
+    number: Optional[str]
+    name: str
+    content: str
+    complete: bool = True
+    status: Optional[str] = None  # one of CRITERIA_STATUSES, None when missing or not recognized
+
+    @property
+    def key(self) -> str:
+        """Positional key used by the analysis endpoints (criteria_1, criteria_2, ...)"""
+        return f"criteria_{self.index}"
+
+    def to_result(self) -> Dict[str, Optional[str]]:
+        """Convert to the criteria_results entry format"""
+        return {"name": self.name, "content": self.content, "status": self.status}
+
+
+class CriteriaStreamParser:
+    """Single-pass, chunk-fed parser for criteria analysis responses"""
+
+    def __init__(self, keep_text: bool = True):
+        self.keep_text = keep_text
+        self.finished = False  # #FIM# (or the legacy final tag) was seen
+        self.saw_criteria_tag = False
+        self.criteria: List[ParsedCriterion] = []
+
+        self._pending: List[str] = []
+        self._text_lines: List[str] = []
+        self._ready: List[ParsedCriterion] = []
+        self._current_number: Optional[str] = None
+        self._current_name: Optional[str] = None
+        self._current_lines: Optional[List[str]] = None
+
+    @property
+    def text(self) -> str:
+        """Response text up to the final tag, without echoed prompt instructions"""
+        return "\n".join(self._text_lines)
+
+    @property
+    def in_criterion(self) -> bool:
+        """Whether a criterion header was seen and its section is still open"""
+        return self._current_lines is not None
+
+    def feed(self, chunk: str) -> List[ParsedCriterion]:
+        """Feed a chunk of text and return the criteria completed by it"""
+        if chunk and not self.finished:
+            start = 0
+            newline = chunk.find("\n")
+            while newline != -1 and not self.finished:
+                if self._pending:
+                    self._pending.append(chunk[start:newline])
+                    line = "".join(self._pending)
+                    self._pending = []
+                else:
+                    line = chunk[start:newline]
+                self._process_line(line)
+                start = newline + 1
+                newline = chunk.find("\n", start)
+
+            if not self.finished and start < len(chunk):
+                self._pending.append(chunk[start:])
+
+        return self._drain()
+
+    def close(self) -> List[ParsedCriterion]:
+        """Flush buffered text; an open criterion is emitted as incomplete"""
+        if self._pending and not self.finished:
+            line = "".join(self._pending)
+            self._pending = []
+            self._process_line(line)
+
+        if self._current_lines is not None:
+            self._close_current(complete=False)
+
+        return self._drain()
+
+    def _drain(self) -> List[ParsedCriterion]:
+        ready, self._ready = self._ready, []
+        return ready
+
+    def _process_line(self, line: str) -> None:
+        if line.endswith("\r"):
+            line = line[:-1]
+
+        if self._is_instruction(line):
+            return
+
+        # Locate tags with cached positions so each line is scanned once per tag
+        next_pos = {tag: line.find(tag) for tag in _TAGS}
+        start = 0
+        while True:
+            found = [(pos, tag) for tag, pos in next_pos.items() if pos != -1]
+            if not found:
+                self._consume_piece(line[start:])
+                if self.keep_text:
+                    self._text_lines.append(line)
+                return
+
+            pos, tag = min(found)
+            self._consume_piece(line[start:pos])
+            start = pos + len(tag)
+
+            if tag == CRITERIA_END_TAG:
+                self.saw_criteria_tag = True
+                self._close_current(complete=True)
+            else:
+                if self._current_lines is not None:
+                    self._close_current(complete=True)
+                self.finished = True
+                if self.keep_text:
+                    self._text_lines.append(line[:pos])
+                return
+
+            for other, other_pos in next_pos.items():
+                if other_pos != -1 and other_pos < start:
+                    next_pos[other] = line.find(other, start)
+
+    def _consume_piece(self, piece: str) -> None:
+        stripped = piece.strip()
+
+        if stripped.startswith("##"):
+            header = _HEADER_RE.match(stripped)
+            if header:
+                if self._current_lines is not None:
+                    self._close_current(complete=True)
+                self._current_number = header.group(1)
+                self._current_name = header.group(2).strip().strip("*").strip()
+                self._current_lines = []
+                return
+
+            if self._current_lines is not None and _SECTION_END_RE.match(stripped):
+                self._close_current(complete=True)
+                return
+
+        if self._current_lines is not None:
+            self._current_lines.append(piece)
+
+    def _close_current(self, complete: bool) -> None:
+        if self._current_lines is None:
+            return
+
+        lines = self._current_lines
+        name = self._current_name
+
+        # Collapse runs of blank lines and trim the edges
+        content_lines: List[str] = []
+        blank = False
+        for content_line in lines:
+            if content_line.strip():
+                content_lines.append(content_line)
+                blank = False
+            elif content_lines and not blank:
+                content_lines.append("")
+                blank = True
+        while content_lines and not content_lines[-1]:
+            content_lines.pop()
+
+        if not name:
+            first_line = content_lines[0].strip() if content_lines else ""
+            if first_line and len(first_line) < 100 and not first_line.startswith("**"):
+                name = first_line
+                content_lines = content_lines[1:]
+            else:
+                name = DEFAULT_CRITERIA_NAME
+
+        criterion = ParsedCriterion(
+            index=len(self.criteria) + 1,
+            number=self._current_number,
+            name=name,
+            content="\n".join(content_lines).strip(),
+            complete=complete,
+            status=find_status(content_lines)
+        )
+        self.criteria.append(criterion)
+        self._ready.append(criterion)
+
+        self._current_number = None
+        self._current_name = None
+        self._current_lines = None
+
+    @staticmethod
+    def _is_instruction(line: str) -> bool:
+        normalized = line.lstrip("*# \t").lower()
+        if not normalized:
+            return False
+        return normalized.startswith(_INSTRUCTION_PREFIXES)
+
+
+def classify_status(value: str) -> Optional[str]:
+    """Normalize the status the LLM wrote for a criterion ("Não Conforme" -> "non_compliant")"""
+    ascii_value = unicodedata.normalize("NFKD", value).encode("ascii", "ignore").decode("ascii")
+    words = re.findall(r"[a-z]+", ascii_value.lower())[:2]
+    if not words:
+        return None
+    if words[0] in ("parcialmente", "parcial", "partially", "partial"):
+        return "partially_compliant"
+    if words[0] in ("nao", "non", "not"):
+        # "Não avaliado", "N/A" and the like are not counted
+        return "non_compliant" if len(words) > 1 and words[1] in _COMPLIANT_WORDS else None
+    if words[0] in _COMPLIANT_WORDS:
+        return "compliant"
+    return None
+
+
+def find_status(lines: Iterable[str]) -> Optional[str]:
+    """Status of the first "Status:" line of a criterion"""
+    for line in lines:
+        match = _STATUS_RE.match(line)
+        if match:
+            return classify_status(match.group(1))
+    return None
+
+
+def count_statuses(criteria_results: Dict[str, Dict[str, Any]]) -> Dict[str, int]:
+    """Criteria per status for a criteria_results dict (entries saved before "status" existed are parsed)"""
+    counts = dict.fromkeys(CRITERIA_STATUSES, 0)
+    for result in (criteria_results or {}).values():
+        if not isinstance(result, dict):
+            continue
+        if "status" in result:
+            status = result["status"]
+        else:
+            status = find_status(str(result.get("content", "")).splitlines())
+        if status in counts:
+            counts[status] += 1
+    return counts
+
+
+def parse_criteria_response(response: str) -> CriteriaStreamParser:
+    """Parse a complete response; returns the closed parser"""
+    parser = CriteriaStreamParser()
+    parser.feed(response)
+    parser.close()
+    return parser
@@ -8,6 +8,8 @@ from typing import List, Dict, Any, Optional
 from pathlib import Path
 import mimetypes
 
+from app.core.tracing import span
+
 logger = logging.getLogger(__name__)
 
 
@@ -121,86 +123,90 @@ class FileProcessor:
 
     async def process_files(self, file_paths: List[str]) -> List[ProcessedFile]:
         """Process multiple files for analysis"""
-        processed_files = []
+        with span("files.process", {"files.count": len(file_paths)}) as files_span:
+            processed_files = []
 
-        for file_path in file_paths:
-            try:
-                processed_file = await self.process_file(file_path)
-                if processed_file:
-                    processed_files.append(processed_file)
-            except Exception as e:
-                logger.error(f"Error processing file {file_path}: {str(e)}")
-                continue
+            for file_path in file_paths:
+                try:
+                    processed_file = await self.process_file(file_path)
+                    if processed_file:
+                        processed_files.append(processed_file)
+                except Exception as e:
+                    logger.error("Error processing file %s: %s", file_path, e)
+                    continue
 
-        return processed_files
+            files_span.set_attribute("files.processed", len(processed_files))
+            return processed_files
 
     async def process_file(self, file_path: str) -> Optional[ProcessedFile]:
         """Process a single file for analysis"""
-        try:
-            # Check if file exists
-            if not os.path.exists(file_path):
-                logger.error(f"File not found: {file_path}")
-                return None
+        with span("files.process_file", {"file.path": file_path}):
+            try:
+                # Check if file exists
+                if not os.path.exists(file_path):
+                    logger.error("File not found: %s", file_path)
+                    return None
 
-            # Check file extension
-            path = Path(file_path)
-            if path.suffix.lower() not in self.allowed_extensions:
-                logger.warning(f"File extension not allowed: {path.suffix}")
-                return None
+                # Check file extension
+                path = Path(file_path)
+                if path.suffix.lower() not in self.allowed_extensions:
+                    logger.warning("File extension not allowed: %s", path.suffix)
+                    return None
 
-            # Read file content
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+                # Read file content
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    content = f.read()
 
-            # Detect language
-            language = self.language_detector.detect_language(file_path)
+                # Detect language
+                language = self.language_detector.detect_language(file_path)
 
-            # Get file size
-            size = os.path.getsize(file_path)
+                # Get file size
+                size = os.path.getsize(file_path)
 
-            # Count lines
-            line_count = len(content.split('\n'))
+                # Count lines
+                line_count = len(content.split('\n'))
 
-            # Extract relevant code
-            relevant_code = self.extract_relevant_code(content, language)
+                # Extract relevant code
+                relevant_code = self.extract_relevant_code(content, language)
 
-            return ProcessedFile(
-                path=file_path,
-                content=relevant_code,
-                language=language,
-                size=size,
-                line_count=line_count
-            )
+                return ProcessedFile(
+                    path=file_path,
+                    content=relevant_code,
+                    language=language,
+                    size=size,
+                    line_count=line_count
+                )
 
-        except Exception as e:
-            logger.error(f"Error processing file {file_path}: {str(e)}")
-            return None
+            except Exception as e:
+                logger.error("Error processing file %s: %s", file_path, e)
+                return None
 
     async def process_directory(self, directory_path: str) -> List[ProcessedFile]:
         """Process all files in a directory"""
-        processed_files = []
-
-        try:
-            path = Path(directory_path)
-            if not path.exists():
-                logger.error(f"Directory not found: {directory_path}")
-                return processed_files
-
-            # Walk through directory
-            for file_path in path.rglob('*'):
-                if file_path.is_file():
-                    try:
-                        processed_file = await self.process_file(str(file_path))
-                        if processed_file:
-                            processed_files.append(processed_file)
-                    except Exception as e:
-                        logger.error(f"Error processing file {file_path}: {str(e)}")
-                        continue
-
-        except Exception as e:
-            logger.error(f"Error processing directory {directory_path}: {str(e)}")
-
-        return processed_files
+        with span("files.process_directory", {"files.directory": directory_path}):
+            processed_files = []
+
+            try:
+                path = Path(directory_path)
+                if not path.exists():
+                    logger.error("Directory not found: %s", directory_path)
+                    return processed_files
+
+                # Walk through directory
+                for file_path in path.rglob('*'):
+                    if file_path.is_file():
+                        try:
+                            processed_file = await self.process_file(str(file_path))
+                            if processed_file:
+                                processed_files.append(processed_file)
+                        except Exception as e:
+                            logger.error("Error processing file %s: %s", file_path, e)
+                            continue
+
+            except Exception as e:
+                logger.error("Error processing directory %s: %s", directory_path, e)
+
+            return processed_files
 
     def extract_relevant_code(self, file_content: str, language: str) -> str:
         """Extract relevant code sections for analysis"""
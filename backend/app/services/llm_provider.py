@@ -5,6 +5,7 @@ LLM provider service for VerificAI Backend
 import asyncio
 import json
 import logging
+import time
 from typing import Dict, Any, Optional, List
 from datetime import datetime
 
@@ -14,6 +15,7 @@ from openai import AsyncOpenAI
 from anthropic import AsyncAnthropic
 
 from app.core.config import settings
+from app.core.metrics import observe_llm_request, record_llm_tokens
 
 logger = logging.getLogger(__name__)
 
@@ -117,6 +119,7 @@ class OpenAIProvider:
         if not settings.OPENAI_API_KEY:
             raise ValueError("OpenAI API key not configured")
 
+        start_time = time.perf_counter()
         try:
             response = await self.client.chat.completions.create(
                 model=self.model,
@@ -131,6 +134,10 @@ class OpenAIProvider:
 
             content = response.choices[0].message.content
             usage = response.usage
+            observe_llm_request(self.model, "200", time.perf_counter() - start_time)
+            record_llm_tokens(self.model, usage.prompt_tokens, usage.completion_tokens)
+            # OpenAI caches long prompt prefixes automatically; the system prompt comes first and the code last
+            prompt_details = getattr(usage, 'prompt_tokens_details', None)
 
             return LLMResponse(
                 content=content,
@@ -139,12 +146,14 @@ class OpenAIProvider:
                 usage={
                     'prompt_tokens': usage.prompt_tokens,
                     'completion_tokens': usage.completion_tokens,
-                    'total_tokens': usage.total_tokens
+                    'total_tokens': usage.total_tokens,
+                    'cached_tokens': getattr(prompt_details, 'cached_tokens', 0) or 0
                 }
             )
 
         except Exception as e:
             logger.error(f"OpenAI API error: {str(e)}")
+            observe_llm_request(self.model, str(getattr(e, "status_code", "error")), time.perf_counter() - start_time)
             raise
 
     async def health_check(self) -> bool:
@@ -170,22 +179,29 @@ class AnthropicProvider:
         if not settings.ANTHROPIC_API_KEY:
             raise ValueError("Anthropic API key not configured")
 
+        start_time = time.perf_counter()
         try:
-            # Combine system prompt and user message
-            full_prompt = f"{prompt}\n\n{code}"
-
+            # Prompt first as a cached block, code last so only the code is billed at full price
             response = await self.client.messages.create(
                 model=self.model,
                 max_tokens=max_tokens,
                 temperature=temperature,
                 messages=[
-                    {"role": "user", "content": full_prompt}
+                    {
+                        "role": "user",
+                        "content": [
+                            {"type": "text", "text": prompt, "cache_control": {"type": "ephemeral"}},
+                            {"type": "text", "text": code}
+                        ]
+                    }
                 ],
                 timeout=60
             )
 
             content = response.content[0].text
             usage = response.usage
+            observe_llm_request(self.model, "200", time.perf_counter() - start_time)
+            record_llm_tokens(self.model, usage.input_tokens, usage.output_tokens)
 
             return LLMResponse(
                 content=content,
@@ -194,12 +210,15 @@ class AnthropicProvider:
                 usage={
                     'prompt_tokens': usage.input_tokens,
                     'completion_tokens': usage.output_tokens,
-                    'total_tokens': usage.input_tokens + usage.output_tokens
+                    'total_tokens': usage.input_tokens + usage.output_tokens,
+                    'cache_creation_input_tokens': getattr(usage, 'cache_creation_input_tokens', 0) or 0,
+                    'cached_tokens': getattr(usage, 'cache_read_input_tokens', 0) or 0
                 }
             )
 
         except Exception as e:
             logger.error(f"Anthropic API error: {str(e)}")
+            observe_llm_request(self.model, str(getattr(e, "status_code", "error")), time.perf_counter() - start_time)
             raise
 
     async def health_check(self) -> bool:
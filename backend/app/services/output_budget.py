@@ -0,0 +1,84 @@
+"""
+Output token budget estimation for VerificAI Backend
+"""
+
+import logging
+import threading
+from collections import deque
+from typing import Deque, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class OutputBudgetEstimator:
+    """Sizes maxOutputTokens from the number of criteria and the tokens per criterion seen so far"""
+
+    def __init__(
+        self,
+        default_tokens_per_criterion: int = 1500,
+        overhead_tokens: int = 1024,
+        safety_factor: float = 1.5,
+        min_tokens: int = 2048,
+        max_tokens: int = 32000,
+        history_size: int = 100
+    ):
+        self.default_tokens_per_criterion = default_tokens_per_criterion
+        self.overhead_tokens = overhead_tokens
+        self.safety_factor = safety_factor
+        self.min_tokens = min_tokens
+        self.max_tokens = max_tokens
+        self._samples: Deque[float] = deque(maxlen=history_size)
+        self._lock = threading.Lock()
+        self._seeded = False
+
+    def record(self, criteria_count: int, output_tokens: Optional[int]) -> None:
+        """Record the output tokens used by a complete analysis"""
+        if criteria_count <= 0 or not output_tokens:
+            return
+        with self._lock:
+            self._samples.append(output_tokens / criteria_count)
+
+    def tokens_per_criterion(self) -> float:
+        """High percentile of the recorded tokens per criterion (default when there is no history)"""
+        with self._lock:
+            samples = sorted(self._samples)
+        if len(samples) < 3:
+            return float(self.default_tokens_per_criterion)
+        return samples[min(len(samples) - 1, int(len(samples) * 0.9))]
+
+    def estimate(self, criteria_count: int) -> int:
+        """maxOutputTokens for an analysis of criteria_count criteria"""
+        criteria_count = max(1, criteria_count)
+        estimate = self.overhead_tokens + criteria_count * self.tokens_per_criterion() * self.safety_factor
+        return int(min(self.max_tokens, max(self.min_tokens, estimate)))
+
+    def seed_from_db(self, db: Session, limit: int = 100) -> None:
+        """Load the history from the most recent analysis results (only once per process)"""
+        if self._seeded:
+            return
+        self._seeded = True
+
+        from app.models.prompt import GeneralAnalysisResult
+
+        try:
+            rows = db.query(
+                GeneralAnalysisResult.criteria_count,
+                GeneralAnalysisResult.usage
+            ).order_by(GeneralAnalysisResult.created_at.desc()).limit(limit).all()
+        except Exception as e:
+            logger.warning("Could not load output token history: %s", e)
+            return
+
+        for criteria_count, usage in reversed(rows):
+            if isinstance(usage, dict):
+                self.record(criteria_count or 0, usage.get("candidatesTokenCount"))
+
+        logger.info("Output token history seeded with %s samples", len(self._samples))
+
+
+# Global estimator instance
+output_budget_estimator = OutputBudgetEstimator(max_tokens=settings.LLM_MAX_OUTPUT_TOKENS)
@@ -9,6 +9,8 @@ from sqlalchemy import and_, or_, desc
 
 from app.models.prompt import Prompt, PromptCategory, PromptStatus
 from app.models.user import User
+from app.services.search import contains_pattern
+from app.core.pagination import Page, paginate, resolve_sort, count_cache_key
 from app.core.exceptions import (
     NotFoundError, ValidationError, BusinessRuleError,
     DuplicateResourceError
@@ -50,9 +52,11 @@ class PromptService:
         filters: Optional[Dict[str, Any]] = None,
         search: Optional[str] = None,
         sort_by: Optional[str] = None,
-        sort_order: Optional[str] = "desc"
-    ) -> List[Prompt]:
-        """Get prompts with filtering, sorting, and pagination"""
+        sort_order: Optional[str] = "desc",
+        cursor: Optional[str] = None,
+        total: Optional[str] = None
+    ) -> Page:
+        """Get prompts with filtering, sorting, and keyset pagination (see app.core.pagination)"""
         query = self.db.query(Prompt)
 
         # Apply visibility filter
@@ -87,23 +91,21 @@ class PromptService:
         if search:
             query = query.filter(
                 or_(
-                    Prompt.name.contains(search),
-                    Prompt.description.contains(search)
+                    Prompt.name.ilike(contains_pattern(search), escape="\\"),
+                    Prompt.description.ilike(contains_pattern(search), escape="\\")
                 )
             )
 
-        # Apply sorting
-        if sort_by:
-            sort_column = getattr(Prompt, sort_by, None)
-            if sort_column:
-                if sort_order == "desc":
-                    query = query.order_by(desc(sort_column))
-                else:
-                    query = query.order_by(sort_column)
-        else:
-            query = query.order_by(desc(Prompt.created_at))
-
-        return query.offset(skip).limit(limit).all()
+        # Apply sorting (indexed keys only, id as tie-breaker) and pagination
+        sort_keys = resolve_sort(
+            {"created_at": Prompt.created_at, "id": Prompt.id},
+            sort_by, sort_order, default="created_at", tiebreaker=Prompt.id
+        )
+        return paginate(
+            query, sort_keys, limit,
+            cursor=cursor, skip=skip, total=total,
+            count_key=count_cache_key("prompts", user_id, search=search, **(filters or {}))
+        )
 
     def update_prompt(self, prompt_id: int, user_id: int, prompt_data: Dict[str, Any]) -> Prompt:
         """Update prompt"""
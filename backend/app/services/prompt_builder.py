@@ -0,0 +1,80 @@
+"""
+Segment-based prompt builder for VerificAI Backend
+
+The prompt template is split once around the code placeholder and the
+source code is kept as a list of parts (a header and the content of each
+file). Nothing is concatenated until the request payload is built, where
+the parts are joined exactly once.
+"""
+
+from typing import Iterator, List
+
+CODE_PLACEHOLDER = "[INSERIR CÓDIGO AQUI]"
+CODE_REFERENCE = "[O CÓDIGO-FONTE A SER ANALISADO É ENVIADO NA PRÓXIMA MENSAGEM]"
+CODE_SECTION_HEADER = "## CÓDIGO FONTE PARA ANÁLISE:\n\n"
+PREFIX_SEPARATOR = "\n\n"
+
+
+class PromptBuilder:
+    """Assembles the analysis prompt from template segments and code parts"""
+
+    def __init__(self, template: str = None, segments: List[str] = None):
+        # Segments around the placeholder; the code goes between consecutive segments.
+        # Pre-split segments (e.g. from the prompt template cache) are used as they are.
+        self.segments = segments if segments is not None else template.split(CODE_PLACEHOLDER)
+        self.code_parts: List[str] = []
+        self.code_length = 0
+        self.sources = 0
+        self._prefix = None
+
+    def add_source(self, header: str, content: str) -> None:
+        """Add a source (file or pasted code) with its identification header"""
+        self.code_parts.append(header)
+        self.code_parts.append(content)
+        self.code_length += len(header) + len(content)
+        self.sources += 1
+
+    @property
+    def prefix(self) -> str:
+        """Template with the code placeholder replaced by a reference: identical across requests"""
+        if self._prefix is None:
+            self._prefix = CODE_REFERENCE.join(self.segments)
+        return self._prefix
+
+    def suffix_parts(self) -> List[str]:
+        """Per-request part of the prompt (the code), to be sent after the cacheable prefix"""
+        return [CODE_SECTION_HEADER] + self.code_parts
+
+    def inline_parts(self) -> List[str]:
+        """Parts of the prompt with the code at the placeholder position (original layout)"""
+        parts = [self.segments[0]]
+        for segment in self.segments[1:]:
+            parts.extend(self.code_parts)
+            parts.append(segment)
+        return parts
+
+    def full_parts(self, cacheable: bool) -> List[str]:
+        """Parts of the prompt exactly as the LLM receives it"""
+        if cacheable:
+            return [self.prefix, PREFIX_SEPARATOR] + self.suffix_parts()
+        return self.inline_parts()
+
+    def length(self, cacheable: bool) -> int:
+        """Total prompt length without joining the parts"""
+        return sum(len(part) for part in self.full_parts(cacheable))
+
+    def head(self, size: int, cacheable: bool) -> str:
+        """First characters of the prompt (for logging) without joining the parts"""
+        return "".join(self._take(self.full_parts(cacheable), size))
+
+    @staticmethod
+    def _take(parts: List[str], size: int) -> Iterator[str]:
+        for part in parts:
+            if size <= 0:
+                return
+            yield part[:size]
+            size -= len(part)
+
+    def build(self, cacheable: bool = False) -> str:
+        """Join the whole prompt once"""
+        return "".join(self.full_parts(cacheable))
@@ -0,0 +1,221 @@
+"""
+Prompt prefix caching for VerificAI Backend
+
+The analysis prompt is split into a stable prefix (template + selected
+criteria) and a variable suffix (the source code), see PromptBuilder. The
+prefix is registered once with the provider (Gemini context caching) and
+later requests only send the suffix plus a reference to the cached prefix.
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def prefix_cache_key(model: str, prefix: str) -> str:
+    """Cache key for a prefix on a given model"""
+    return hashlib.sha256(f"{model}\n{prefix}".encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CachedPrefix:
+    """Handle to a prefix cached by a provider"""
+    name: str
+    model: str
+    key: str
+    expires_at: float
+    token_count: int = 0
+    last_used: float = field(default_factory=time.time)
+    hits: int = 0
+
+    def is_valid(self, margin: float = 0) -> bool:
+        return time.time() + margin < self.expires_at
+
+
+class GeminiContextCacheBackend:
+    """Gemini cachedContents API"""
+
+    def __init__(self, base_url: str, api_key: str):
+        # base_url points to .../v1beta/models; cachedContents lives at .../v1beta
+        self.api_root = base_url.rsplit("/models", 1)[0]
+        self.api_key = api_key
+
+    async def create(self, model: str, prefix: str, ttl_seconds: int) -> CachedPrefix:
+        payload = {
+            "model": f"models/{model}",
+            "contents": [{"role": "user", "parts": [{"text": prefix}]}],
+            "ttl": f"{ttl_seconds}s"
+        }
+        async with httpx.AsyncClient(timeout=60.0) as client:
+            response = await client.post(f"{self.api_root}/cachedContents?key={self.api_key}", json=payload)
+        response.raise_for_status()
+        data = response.json()
+        return CachedPrefix(
+            name=data["name"],
+            model=model,
+            key=prefix_cache_key(model, prefix),
+            expires_at=time.time() + ttl_seconds,
+            token_count=data.get("usageMetadata", {}).get("totalTokenCount", 0)
+        )
+
+    async def refresh(self, handle: CachedPrefix, ttl_seconds: int) -> None:
+        async with httpx.AsyncClient(timeout=30.0) as client:
+            response = await client.patch(
+                f"{self.api_root}/{handle.name}?updateMask=ttl&key={self.api_key}",
+                json={"ttl": f"{ttl_seconds}s"}
+            )
+        response.raise_for_status()
+        handle.expires_at = time.time() + ttl_seconds
+
+    async def delete(self, handle: CachedPrefix) -> None:
+        async with httpx.AsyncClient(timeout=30.0) as client:
+            response = await client.delete(f"{self.api_root}/{handle.name}?key={self.api_key}")
+        if response.status_code not in (200, 404):
+            response.raise_for_status()
+
+
+class LocalPromptCacheBackend:
+    """In-memory stand-in for provider caches (development and tests)"""
+
+    def __init__(self):
+        self.contents: Dict[str, str] = {}
+
+    async def create(self, model: str, prefix: str, ttl_seconds: int) -> CachedPrefix:
+        key = prefix_cache_key(model, prefix)
+        name = f"cachedContents/local-{key[:16]}"
+        self.contents[name] = prefix
+        return CachedPrefix(
+            name=name,
+            model=model,
+            key=key,
+            expires_at=time.time() + ttl_seconds,
+            token_count=len(prefix) // 4
+        )
+
+    async def refresh(self, handle: CachedPrefix, ttl_seconds: int) -> None:
+        handle.expires_at = time.time() + ttl_seconds
+
+    async def delete(self, handle: CachedPrefix) -> None:
+        self.contents.pop(handle.name, None)
+
+
+class PromptCacheManager:
+    """Keeps provider cache handles for prompt prefixes, refreshing TTLs in the background"""
+
+    def __init__(
+        self,
+        backend,
+        ttl_seconds: int = 3600,
+        refresh_margin_seconds: int = 300,
+        idle_seconds: int = 3600,
+        min_prefix_chars: int = 8000,
+        max_entries: int = 50
+    ):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.refresh_margin_seconds = refresh_margin_seconds
+        self.idle_seconds = idle_seconds
+        self.min_prefix_chars = min_prefix_chars
+        self.max_entries = max_entries
+        self._handles: Dict[str, CachedPrefix] = {}
+        self._failed: Dict[str, float] = {}
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    async def get_or_create(self, model: str, prefix: str) -> Optional[CachedPrefix]:
+        """Return a valid handle for the prefix, creating it if needed (None when caching is not possible)"""
+        if len(prefix) < self.min_prefix_chars:
+            return None
+
+        key = prefix_cache_key(model, prefix)
+        async with self._lock:
+            handle = self._handles.get(key)
+            if handle and handle.is_valid(margin=30):
+                handle.last_used = time.time()
+                handle.hits += 1
+                return handle
+
+            # Do not retry prefixes the provider refused (too small, unsupported model) for a while
+            failed_at = self._failed.get(key)
+            if failed_at and time.time() - failed_at < self.ttl_seconds:
+                return None
+
+            try:
+                handle = await self.backend.create(model, prefix, self.ttl_seconds)
+            except Exception as e:
+                logger.warning("Prompt prefix cache creation failed for %s: %s", model, e)
+                self._failed[key] = time.time()
+                return None
+
+            self._handles[key] = handle
+            self._evict_overflow()
+            logger.info("Prompt prefix cached for %s: %s (%s tokens)", model, handle.name, handle.token_count)
+
+        self._ensure_refresh_task()
+        return handle
+
+    def invalidate(self, handle: CachedPrefix) -> None:
+        """Forget a handle the provider no longer accepts"""
+        self._handles.pop(handle.key, None)
+
+    def _evict_overflow(self) -> None:
+        while len(self._handles) > self.max_entries:
+            oldest = min(self._handles.values(), key=lambda h: h.last_used)
+            self._handles.pop(oldest.key, None)
+
+    def _ensure_refresh_task(self) -> None:
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def _refresh_loop(self) -> None:
+        while self._handles:
+            await asyncio.sleep(max(1, self.refresh_margin_seconds // 2))
+            await self.refresh_expiring()
+
+    async def refresh_expiring(self) -> None:
+        """Extend handles used recently that are about to expire; drop idle ones"""
+        now = time.time()
+        for handle in list(self._handles.values()):
+            if now - handle.last_used > self.idle_seconds:
+                self._handles.pop(handle.key, None)
+                try:
+                    await self.backend.delete(handle)
+                except Exception as e:
+                    logger.debug("Could not delete cached prefix %s: %s", handle.name, e)
+                continue
+
+            if not handle.is_valid(margin=self.refresh_margin_seconds):
+                try:
+                    await self.backend.refresh(handle, self.ttl_seconds)
+                except Exception as e:
+                    logger.warning("Could not refresh cached prefix %s: %s", handle.name, e)
+                    self._handles.pop(handle.key, None)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._handles),
+            "hits": sum(h.hits for h in self._handles.values()),
+            "cached_tokens": sum(h.token_count for h in self._handles.values())
+        }
+
+
+def create_prompt_cache_manager(base_url: str, api_key: str) -> PromptCacheManager:
+    """Build the cache manager for the configured backend"""
+    if settings.LLM_PROMPT_CACHE_BACKEND == "local":
+        backend = LocalPromptCacheBackend()
+    else:
+        backend = GeminiContextCacheBackend(base_url, api_key)
+    return PromptCacheManager(
+        backend,
+        ttl_seconds=settings.LLM_PROMPT_CACHE_TTL,
+        min_prefix_chars=settings.LLM_PROMPT_CACHE_MIN_CHARS
+    )
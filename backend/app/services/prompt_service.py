@@ -2,10 +2,17 @@
 Prompt service for VerificAI Backend - Handles prompt manipulation and criteria insertion
 """
 
-from typing import List, Dict, Any
+import logging
+from typing import List, Dict, Any, Optional
 from sqlalchemy.orm import Session
 from app.models.prompt import PromptConfiguration
 from app.models.prompt import GeneralCriteria
+from app.services.prompt_template_cache import (
+    CompiledPromptTemplate, RenderedPrompt, prompt_template_cache
+)
+
+logger = logging.getLogger(__name__)
+
 
 class PromptService:
     """Service for handling prompt operations"""
@@ -14,7 +21,47 @@ class PromptService:
         self.db = db
 
     def get_general_prompt(self, prompt_id: int = None) -> str:
-        """Get the general prompt configuration from database"""
+        """Get the general prompt configuration (cached, see get_compiled_prompt)"""
+        return self.get_compiled_prompt(prompt_id).content
+
+    def get_compiled_prompt(self, prompt_id: int = None) -> CompiledPromptTemplate:
+        """Get the general prompt with its placeholders located, from the template cache"""
+        template = prompt_template_cache.get_template(
+            prompt_id,
+            load=lambda: self._load_compiled_prompt(prompt_id),
+            current_version=lambda: self._get_prompt_version(prompt_id)
+        )
+        return template or self.get_default_compiled_prompt()
+
+    def get_default_compiled_prompt(self) -> CompiledPromptTemplate:
+        """Get the default general prompt with its placeholders located"""
+        return prompt_template_cache.get_template(
+            "default",
+            load=lambda: CompiledPromptTemplate.compile(self._get_default_general_prompt()),
+            current_version=lambda: None
+        )
+
+    def render_prompt(self, template: CompiledPromptTemplate, criteria: List[GeneralCriteria]) -> RenderedPrompt:
+        """Insert criteria into a template, reusing the result for the same template version and criteria"""
+        criteria_key = tuple((criterion.id, criterion.text) for criterion in criteria)
+        return prompt_template_cache.get_rendered(
+            template,
+            criteria_key,
+            render=lambda: self.insert_criteria_into_prompt(template.content, criteria)
+        )
+
+    def _get_prompt_version(self, prompt_id: Optional[int]):
+        """updated_at of the prompt configuration (cheap revalidation query)"""
+        query = self.db.query(PromptConfiguration.updated_at).filter(PromptConfiguration.is_active == True)
+        if prompt_id:
+            query = query.filter(PromptConfiguration.id == prompt_id)
+        else:
+            query = query.filter(PromptConfiguration.prompt_type == "general").order_by(PromptConfiguration.updated_at.desc())
+        row = query.first()
+        return row[0] if row else None
+
+    def _load_compiled_prompt(self, prompt_id: Optional[int]) -> Optional[CompiledPromptTemplate]:
+        """Load the general prompt configuration from database"""
         try:
             if prompt_id:
                 # Get specific prompt by ID
@@ -30,14 +77,18 @@ class PromptService:
                 ).order_by(PromptConfiguration.updated_at.desc()).first()
 
             if prompt_config:
-                return prompt_config.content
+                return CompiledPromptTemplate.compile(
+                    prompt_config.content,
+                    config_id=prompt_config.id,
+                    version=prompt_config.updated_at
+                )
             else:
-                # Return default prompt if no configuration found
-                return self._get_default_general_prompt()
+                # Default prompt is used if no configuration found
+                return None
 
         except Exception as e:
-            print(f"Error getting general prompt: {e}")
-            return self._get_default_general_prompt()
+            logger.exception("Error getting general prompt: %s", e)
+            return None
 
     def get_selected_criteria(self, criteria_ids: List[str]) -> List[GeneralCriteria]:
         """Get selected criteria from database"""
@@ -62,7 +113,7 @@ class PromptService:
             return criteria
 
         except Exception as e:
-            print(f"Error getting selected criteria: {e}")
+            logger.exception("Error getting selected criteria: %s", e)
             return []
 
     def insert_criteria_into_prompt(self, prompt: str, criteria: List[GeneralCriteria]) -> str:
@@ -94,17 +145,14 @@ class PromptService:
             return modified_prompt
 
         except Exception as e:
-            print(f"Error inserting criteria into prompt: {e}")
+            logger.exception("Error inserting criteria into prompt: %s", e)
             return prompt  # Return original prompt if error occurs
 
     def _adjust_prompt_for_single_criteria(self, prompt: str, criteria_text: str) -> str:
         """Adjust prompt structure to show only one criteria example with the actual criteria name"""
         import re
 
-        print(f"=== ADJUSTING PROMPT FOR SINGLE CRITERIA ===")
-        print(f"Original prompt contains 'Critério 2': {'Critério 2' in prompt}")
-        print(f"Number of '## Critério' in original: {prompt.count('## Critério')}")
-        print(f"Criteria text: {criteria_text}")
+        logger.debug("Adjusting prompt for the single criterion %r", criteria_text)
 
         # Remove completely the multi-criteria example structure and replace with single-criteria structure
         # Find the format section and replace it entirely
@@ -136,11 +184,6 @@ Esta tag marca o fim completo da análise do critério acima.
 
         modified_prompt = re.sub(format_section_pattern, single_criteria_format, prompt, flags=re.DOTALL)
 
-        print(f"After replacing format section:")
-        print(f"Contains 'Critério 2': {'Critério 2' in modified_prompt}")
-        print(f"Number of '## Critério' in modified: {modified_prompt.count('## Critério')}")
-        print(f"Number of '## Critério:' (with colon): {modified_prompt.count('## Critério:')}")
-
         # Also clean up any remaining multiple criteria references that might exist
         modified_prompt = re.sub(r'## Critério \d+:', '## Critério:', modified_prompt)
 
@@ -165,11 +208,7 @@ CRÍTICO: Esta análise deve conter APENAS UM critério de avaliação.
                 instruction_text + code_analysis_marker
             )
 
-        print(f"=== FINAL PROMPT STATS ===")
-        print(f"Final prompt length: {len(modified_prompt)}")
-        print(f"Final '## Critério' count: {modified_prompt.count('## Critério')}")
-        print(f"Final '## Critério:' count: {modified_prompt.count('## Critério:')}")
-        print(f"=== END ADJUSTMENT ===")
+        logger.debug("Single-criterion prompt: %d characters", len(modified_prompt))
 
         return modified_prompt
 
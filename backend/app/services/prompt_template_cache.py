@@ -0,0 +1,115 @@
+"""
+Prompt template cache for VerificAI Backend
+
+Templates are cached by PromptConfiguration id and versioned by updated_at.
+Rendering a template for a set of criteria (criteria insertion and the
+_adjust_prompt_for_* rewrites) is done once per template version and criteria
+set; the result keeps the template already split at the code placeholder.
+The cache is cleared when prompts are saved (/prompts/save, /prompts/backup)
+and, for other workers, revalidated against updated_at after a short interval.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.prompt_builder import CODE_PLACEHOLDER
+
+CRITERIA_PLACEHOLDER = "[INSERIR_CRITÉRIOS_AQUI]"
+
+
+@dataclass
+class CompiledPromptTemplate:
+    """Prompt template with its placeholders located"""
+    config_id: Optional[int]
+    version: Optional[datetime]
+    content: str
+    has_code_placeholder: bool
+    has_criteria_placeholder: bool
+
+    @classmethod
+    def compile(cls, content: str, config_id: Optional[int] = None, version: Optional[datetime] = None) -> "CompiledPromptTemplate":
+        return cls(
+            config_id=config_id,
+            version=version,
+            content=content,
+            has_code_placeholder=CODE_PLACEHOLDER in content,
+            has_criteria_placeholder=CRITERIA_PLACEHOLDER in content
+        )
+
+
+@dataclass
+class RenderedPrompt:
+    """Template with the criteria inserted, split at the code placeholder"""
+    text: str
+    segments: List[str]
+
+
+class PromptTemplateCache:
+    """In-process cache of compiled templates and rendered prompts"""
+
+    def __init__(self, revalidate_seconds: int = 60, max_rendered: int = 256):
+        self.revalidate_seconds = revalidate_seconds
+        self.max_rendered = max_rendered
+        self._templates: Dict[Any, Tuple[CompiledPromptTemplate, float]] = {}
+        self._rendered: "OrderedDict[tuple, RenderedPrompt]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_template(
+        self,
+        key: Any,
+        load: Callable[[], Optional[CompiledPromptTemplate]],
+        current_version: Callable[[], Optional[datetime]]
+    ) -> Optional[CompiledPromptTemplate]:
+        """
+        Return the cached template for key. load() is only called on a miss;
+        current_version() (a cheap updated_at lookup) only after revalidate_seconds.
+        """
+        with self._lock:
+            cached = self._templates.get(key)
+
+        if cached:
+            template, checked_at = cached
+            if time.monotonic() - checked_at < self.revalidate_seconds:
+                return template
+            if template.config_id is not None and current_version() == template.version:
+                with self._lock:
+                    self._templates[key] = (template, time.monotonic())
+                return template
+
+        template = load()
+        if template is not None:
+            with self._lock:
+                self._templates[key] = (template, time.monotonic())
+        return template
+
+    def get_rendered(self, template: CompiledPromptTemplate, criteria_key: tuple, render: Callable[[], str]) -> RenderedPrompt:
+        """Return the template rendered for a criteria set, rendering it on a miss"""
+        key = (template.config_id, template.version, hash(template.content), criteria_key)
+        with self._lock:
+            rendered = self._rendered.get(key)
+            if rendered is not None:
+                self._rendered.move_to_end(key)
+                return rendered
+
+        text = render()
+        rendered = RenderedPrompt(text=text, segments=text.split(CODE_PLACEHOLDER))
+        with self._lock:
+            self._rendered[key] = rendered
+            while len(self._rendered) > self.max_rendered:
+                self._rendered.popitem(last=False)
+        return rendered
+
+    def invalidate(self) -> None:
+        """Drop every cached template and rendered prompt"""
+        with self._lock:
+            self._templates.clear()
+            self._rendered.clear()
+
+
+# Global prompt template cache instance
+prompt_template_cache = PromptTemplateCache(revalidate_seconds=settings.PROMPT_TEMPLATE_CACHE_REVALIDATE_SECONDS)
@@ -0,0 +1,182 @@
+"""
+Search service for VerificAI Backend
+
+Ranked search over search_documents (see app.models.search). PostgreSQL
+matches the weighted tsvector index (prefix terms) or a trigram match on the
+title, ranked by ts_rank_cd + title similarity; SQLite uses FTS5 ranked by
+bm25. Other databases fall back to LIKE without ranking.
+"""
+
+import logging
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional, Sequence
+
+from sqlalchemy import bindparam, or_, text
+from sqlalchemy.orm import Session
+
+from app.models.search import DOC_TYPES, SEARCH_VECTOR_SQL, TS_CONFIG, SearchDocument
+
+logger = logging.getLogger(__name__)
+
+# Terms beyond this are ignored (each one is an index lookup)
+MAX_TERMS = 8
+SNIPPET_WORDS = 24
+HIGHLIGHT_START = "["
+HIGHLIGHT_STOP = "]"
+
+
+def search_terms(query: str) -> List[str]:
+    """Words of a user query, without any search syntax"""
+    return re.findall(r"\w+", query or "", re.UNICODE)[:MAX_TERMS]
+
+
+def contains_pattern(term: str) -> str:
+    """LIKE pattern matching term anywhere, with wildcards escaped (escape character: backslash)"""
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+@dataclass
+class SearchHit:
+    """One ranked search result"""
+    doc_type: str
+    ref_id: str
+    section: str
+    title: str
+    snippet: Optional[str]
+    rank: float
+    updated_at: Optional[datetime] = None
+
+
+class SearchService:
+    """Service for the search endpoint"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def search(
+        self,
+        user_id: int,
+        query: str,
+        doc_types: Optional[Sequence[str]] = None,
+        limit: int = 20,
+        offset: int = 0
+    ) -> List[SearchHit]:
+        """Best matches first; at most limit hits starting at offset"""
+        terms = search_terms(query)
+        if not terms:
+            return []
+        doc_types = [t for t in (doc_types or DOC_TYPES) if t in DOC_TYPES] or list(DOC_TYPES)
+
+        dialect = self.db.get_bind().dialect.name
+        if dialect == "postgresql":
+            rows = self._search_postgresql(user_id, query, terms, doc_types, limit, offset)
+        elif dialect == "sqlite":
+            rows = self._search_sqlite(user_id, terms, doc_types, limit, offset)
+        else:
+            rows = self._search_like(user_id, terms, doc_types, limit, offset)
+
+        return [
+            SearchHit(
+                doc_type=row.doc_type,
+                ref_id=row.ref_id,
+                section=row.section,
+                title=row.title,
+                snippet=row.snippet,
+                rank=float(row.rank or 0),
+                updated_at=row.updated_at
+            )
+            for row in rows
+        ]
+
+    def _search_postgresql(self, user_id, query, terms, doc_types, limit, offset):
+        # Ranking runs on the matching ids only; headlines only for the page returned
+        statement = text(f"""
+            SELECT d.doc_type, d.ref_id, d.section, d.title, d.updated_at, ranked.rank,
+                   ts_headline('{TS_CONFIG}', coalesce(d.body, ''), to_tsquery('{TS_CONFIG}', :tsquery),
+                               'MaxFragments=1, MaxWords={SNIPPET_WORDS}, MinWords=8, '
+                               'StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}') AS snippet
+            FROM (
+                SELECT id,
+                       ts_rank_cd(({SEARCH_VECTOR_SQL}), to_tsquery('{TS_CONFIG}', :tsquery))
+                       + similarity(title, :query) AS rank
+                FROM search_documents
+                WHERE user_id = :user_id
+                  AND doc_type IN :doc_types
+                  AND (
+                      ({SEARCH_VECTOR_SQL}) @@ to_tsquery('{TS_CONFIG}', :tsquery)
+                      OR title % :query
+                      OR title ILIKE :pattern ESCAPE '\\'
+                  )
+                ORDER BY rank DESC, id DESC
+                LIMIT :limit OFFSET :offset
+            ) ranked
+            JOIN search_documents d ON d.id = ranked.id
+            ORDER BY ranked.rank DESC, d.id DESC
+        """).bindparams(bindparam("doc_types", expanding=True))
+        return self.db.execute(statement, {
+            "tsquery": " & ".join(f"{term}:*" for term in terms),
+            "query": query,
+            "pattern": contains_pattern(query.strip()),
+            "user_id": user_id,
+            "doc_types": list(doc_types),
+            "limit": limit,
+            "offset": offset
+        }).fetchall()
+
+    def _search_sqlite(self, user_id, terms, doc_types, limit, offset):
+        # Title weighs 10x the body in bm25 (lower is better, so the rank is negated)
+        statement = text(f"""
+            SELECT d.doc_type, d.ref_id, d.section, d.title, d.updated_at,
+                   -bm25(search_documents_fts, 10.0, 1.0) AS rank,
+                   snippet(search_documents_fts, 1, '{HIGHLIGHT_START}', '{HIGHLIGHT_STOP}', '...', {SNIPPET_WORDS}) AS snippet
+            FROM search_documents_fts
+            JOIN search_documents d ON d.id = search_documents_fts.rowid
+            WHERE search_documents_fts MATCH :match
+              AND d.user_id = :user_id
+              AND d.doc_type IN :doc_types
+            ORDER BY bm25(search_documents_fts, 10.0, 1.0), d.id DESC
+            LIMIT :limit OFFSET :offset
+        """).bindparams(bindparam("doc_types", expanding=True))
+        return self.db.execute(statement, {
+            # Quoted prefix terms: user input never reaches the FTS5 query syntax
+            "match": " ".join(f'"{term}"*' for term in terms),
+            "user_id": user_id,
+            "doc_types": list(doc_types),
+            "limit": limit,
+            "offset": offset
+        }).fetchall()
+
+    def _search_like(self, user_id, terms, doc_types, limit, offset):
+        logger.debug("Search without a full-text index, using LIKE")
+        conditions = [
+            or_(
+                SearchDocument.title.ilike(contains_pattern(term), escape="\\"),
+                SearchDocument.body.ilike(contains_pattern(term), escape="\\")
+            )
+            for term in terms
+        ]
+        documents = (
+            self.db.query(SearchDocument)
+            .filter(SearchDocument.user_id == user_id, SearchDocument.doc_type.in_(doc_types), *conditions)
+            .order_by(SearchDocument.updated_at.desc(), SearchDocument.id.desc())
+            .offset(offset).limit(limit).all()
+        )
+        return [
+            _LikeRow(document.doc_type, document.ref_id, document.section, document.title,
+                     document.updated_at, 0.0, (document.body or "")[:200] or None)
+            for document in documents
+        ]
+
+
+@dataclass
+class _LikeRow:
+    doc_type: str
+    ref_id: str
+    section: str
+    title: str
+    updated_at: Optional[datetime]
+    rank: float
+    snippet: Optional[str]
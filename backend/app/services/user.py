@@ -5,7 +5,7 @@ User service for VerificAI Backend
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, or_, func
 
 from app.models.user import User, UserRole
 from app.core.security import generate_secure_token, hash_api_key
@@ -248,11 +248,17 @@ class UserService:
             return None
 
         # Verify password
-        if not user.verify_password(password):
+        from app.core.security import verify_and_update_password
+        is_valid, new_hash = verify_and_update_password(password, user.hashed_password)
+        if not is_valid:
             user.increment_failed_attempts()
             self.db.commit()
             return None
 
+        # Stored with another bcrypt cost
+        if new_hash:
+            user.hashed_password = new_hash
+
         # Check if user is active
         if not user.is_active:
             return None
@@ -266,25 +272,32 @@ class UserService:
 
     def get_user_stats(self) -> Dict[str, Any]:
         """Get user statistics"""
-        total_users = self.db.query(User).count()
-        active_users = self.db.query(User).filter(User.is_active == True).count()
-        verified_users = self.db.query(User).filter(User.is_verified == True).count()
-
-        # Users by role
-        users_by_role = {}
-        for role in UserRole:
-            count = self.db.query(User).filter(User.role == role).count()
-            users_by_role[role.value] = count
-
-        # Recent users
         today = datetime.utcnow().date()
-        new_users_today = self.db.query(User).filter(User.created_at >= today).count()
-
         week_ago = today - timedelta(days=7)
-        new_users_week = self.db.query(User).filter(User.created_at >= week_ago).count()
-
         month_ago = today - timedelta(days=30)
-        new_users_month = self.db.query(User).filter(User.created_at >= month_ago).count()
+
+        # One aggregate query with FILTER clauses instead of one COUNT per figure
+        role_columns = [
+            func.count(User.id).filter(User.role == role).label(f"role_{role.value}")
+            for role in UserRole
+        ]
+        row = self.db.query(
+            func.count(User.id).label("total"),
+            func.count(User.id).filter(User.is_active == True).label("active"),
+            func.count(User.id).filter(User.is_verified == True).label("verified"),
+            func.count(User.id).filter(User.created_at >= today).label("new_today"),
+            func.count(User.id).filter(User.created_at >= week_ago).label("new_week"),
+            func.count(User.id).filter(User.created_at >= month_ago).label("new_month"),
+            *role_columns
+        ).one()
+
+        total_users = row.total
+        active_users = row.active
+        verified_users = row.verified
+        users_by_role = {role.value: getattr(row, f"role_{role.value}") for role in UserRole}
+        new_users_today = row.new_today
+        new_users_week = row.new_week
+        new_users_month = row.new_month
 
         return {
             "total_users": total_users,
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Benchmark: throughput de requisições concorrentes com a Session síncrona
+(padrão antigo: async def + SessionLocal, bloqueia o event loop) e com a
+AsyncSession (get_async_db), executando a mesma consulta de listagem.
+
+Uso:
+    python benchmark_async_db.py [--requests 2000] [--concurrency 50]
+                                 [--user-id 1] [--query-delay-ms 5]
+                                 [--output resultado.json]
+
+Usa o banco de DATABASE_URL (somente leitura). --query-delay-ms acrescenta
+pg_sleep à consulta no PostgreSQL, para simular a latência de rede/banco.
+Além de req/s e latências, mede o atraso máximo do event loop (o que um
+stream SSE ou uma chamada ao LLM em andamento sofreria).
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import SessionLocal, async_engine, engine, get_async_db
+from app.models.code_entry import CodeEntry
+
+LOOP_TICK = 0.005
+
+
+def build_app(user_id: int, delay_seconds: float) -> FastAPI:
+    """Duas rotas com a mesma consulta: uma por caminho de sessão"""
+    statement = select(CodeEntry.id, CodeEntry.title).where(
+        CodeEntry.user_id == user_id, CodeEntry.is_active == True
+    ).order_by(CodeEntry.created_at.desc()).limit(20)
+    delay = text("SELECT pg_sleep(:seconds)") if delay_seconds and engine.dialect.name == "postgresql" else None
+
+    app = FastAPI()
+
+    @app.get("/sync")
+    async def sync_route():
+        db = SessionLocal()
+        try:
+            if delay is not None:
+                db.execute(delay, {"seconds": delay_seconds})
+            rows = db.execute(statement).all()
+            return {"count": len(rows)}
+        finally:
+            db.close()
+
+    @app.get("/async")
+    async def async_route(db: AsyncSession = Depends(get_async_db)):
+        if delay is not None:
+            await db.execute(delay, {"seconds": delay_seconds})
+        rows = (await db.execute(statement)).all()
+        return {"count": len(rows)}
+
+    return app
+
+
+async def measure_loop_lag(stop: asyncio.Event, lags: list):
+    """Atraso de cada tick em relação ao esperado"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(LOOP_TICK)
+        lags.append(time.perf_counter() - start - LOOP_TICK)
+
+
+async def run_mode(app: FastAPI, path: str, requests: int, concurrency: int) -> dict:
+    latencies = []
+    lags = []
+    stop = asyncio.Event()
+    queue = asyncio.Queue()
+    for _ in range(requests):
+        queue.put_nowait(None)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        async def worker():
+            while True:
+                try:
+                    queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                start = time.perf_counter()
+                response = await client.get(path)
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+        # Aquecimento do pool de conexões
+        await client.get(path)
+
+        lag_task = asyncio.create_task(measure_loop_lag(stop, lags))
+        started = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await lag_task
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(requests / elapsed, 1),
+        "latency_p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "latency_p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2),
+        "loop_lag_max_ms": round(max(lags, default=0) * 1000, 2),
+        "loop_lag_p95_ms": round(sorted(lags)[int(len(lags) * 0.95) - 1] * 1000, 2) if lags else 0.0
+    }
+
+
+async def main_async(args) -> dict:
+    app = build_app(args.user_id, args.query_delay_ms / 1000)
+    results = {
+        "database": engine.dialect.name,
+        "query_delay_ms": args.query_delay_ms if engine.dialect.name == "postgresql" else 0,
+        "modes": {}
+    }
+    for mode in ("sync", "async"):
+        print(f"Executando {mode}...")
+        results["modes"][mode] = await run_mode(app, f"/{mode}", args.requests, args.concurrency)
+        print(f"  {results['modes'][mode]}")
+    await async_engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Session síncrona x AsyncSession")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--user-id", type=int, default=1)
+    parser.add_argument("--query-delay-ms", type=float, default=5.0)
+    parser.add_argument("--output", help="grava o resultado em JSON")
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+    sync_rps = results["modes"]["sync"]["requests_per_second"]
+    async_rps = results["modes"]["async"]["requests_per_second"]
+    print(f"\nsync: {sync_rps} req/s | async: {async_rps} req/s ({async_rps / sync_rps:.1f}x)")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Resultado gravado em {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Benchmark: rajada de logins x latência das rotas que não autenticam.
+
+Compara a verificação bcrypt feita na thread da requisição (padrão antigo:
+rota síncrona, ocupa o threadpool compartilhado por todas as rotas e
+dependências síncronas) com o pool dedicado (password_hasher). Durante a
+rajada, mede a latência de uma rota síncrona e de uma rota async simples.
+
+Uso:
+    python benchmark_login_storm.py [--logins 200] [--concurrency 100]
+                                    [--probes 200] [--output resultado.json]
+
+Não usa banco: o hash é gerado uma vez com PASSWORD_BCRYPT_ROUNDS.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+from fastapi import FastAPI
+
+from app.core.config import settings
+from app.core.security import get_password_hash, password_hasher, verify_password
+
+PASSWORD = "Benchmark#2024"
+
+
+def build_app(hashed_password: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/login-thread")
+    def login_thread():
+        return {"ok": verify_password(PASSWORD, hashed_password)}
+
+    @app.post("/login-pool")
+    async def login_pool():
+        return {"ok": await password_hasher.verify(PASSWORD, hashed_password)}
+
+    @app.get("/ping-sync")
+    def ping_sync():
+        return {"ok": True}
+
+    @app.get("/ping-async")
+    async def ping_async():
+        return {"ok": True}
+
+    return app
+
+
+def summarize(latencies: list) -> dict:
+    latencies = sorted(latencies)
+    return {
+        "count": len(latencies),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p95_ms": round(latencies[max(int(len(latencies) * 0.95) - 1, 0)] * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2)
+    }
+
+
+async def run_storm(client: httpx.AsyncClient, login_path: str, args) -> dict:
+    """Rajada de logins em paralelo com sondas sequenciais nas rotas sem autenticação"""
+    login_latencies = []
+    probe_latencies = {"/ping-sync": [], "/ping-async": []}
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def login():
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.post(login_path)
+            response.raise_for_status()
+            login_latencies.append(time.perf_counter() - start)
+
+    async def probe(path: str):
+        for _ in range(args.probes):
+            start = time.perf_counter()
+            response = await client.get(path)
+            response.raise_for_status()
+            probe_latencies[path].append(time.perf_counter() - start)
+            await asyncio.sleep(0.005)
+
+    started = time.perf_counter()
+    logins = asyncio.gather(*[login() for _ in range(args.logins)])
+    await asyncio.gather(logins, probe("/ping-sync"), probe("/ping-async"))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "seconds": round(elapsed, 3),
+        "logins_per_second": round(args.logins / elapsed, 1),
+        "login": summarize(login_latencies),
+        "ping_sync": summarize(probe_latencies["/ping-sync"]),
+        "ping_async": summarize(probe_latencies["/ping-async"])
+    }
+
+
+async def main_async(args) -> dict:
+    hashed_password = get_password_hash(PASSWORD)
+    app = build_app(hashed_password)
+    results = {
+        "bcrypt_rounds": settings.PASSWORD_BCRYPT_ROUNDS,
+        "hash_workers": settings.PASSWORD_HASH_WORKERS,
+        "logins": args.logins,
+        "concurrency": args.concurrency,
+        "modes": {}
+    }
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+        # Linha de base sem rajada
+        baseline = []
+        for _ in range(args.probes):
+            start = time.perf_counter()
+            await client.get("/ping-sync")
+            baseline.append(time.perf_counter() - start)
+        results["baseline_ping_sync"] = summarize(baseline)
+
+        for mode, path in (("thread", "/login-thread"), ("pool", "/login-pool")):
+            print(f"Executando {mode}...")
+            results["modes"][mode] = await run_storm(client, path, args)
+            print(f"  {results['modes'][mode]}")
+
+    password_hasher.shutdown()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de rajada de logins (bcrypt)")
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--probes", type=int, default=200)
+    parser.add_argument("--output", help="grava o resultado em JSON")
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+    print(f"\nping-sync p95 sem rajada: {results['baseline_ping_sync']['p95_ms']} ms")
+    for mode, data in results["modes"].items():
+        print(f"{mode}: ping-sync p95 {data['ping_sync']['p95_ms']} ms | "
+              f"ping-async p95 {data['ping_async']['p95_ms']} ms | {data['logins_per_second']} logins/s")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Resultado gravado em {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Benchmark: pilha de middlewares BaseHTTPMiddleware (versão anterior) x
+middlewares ASGI puros (app.core.middleware), em /health e num endpoint
+JSON grande.
+
+Uso:
+    python benchmark_middleware.py [--requests 3000] [--concurrency 20]
+                                   [--large-items 20000] [--output resultado.json]
+
+A pilha antiga é reproduzida aqui (mesmo trabalho por requisição) só para a
+comparação. O limitador usa limites altos para nenhuma requisição receber 429.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import os
+import time
+import uuid
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import JSONResponse
+
+from app.core.logging import request_logger
+from app.core.middleware import (
+    SECURITY_HEADERS,
+    ErrorHandlerMiddleware,
+    RateLimitMiddleware,
+    RequestIDMiddleware,
+    RequestLoggingMiddleware,
+    SecurityHeadersMiddleware
+)
+from app.core.rate_limit import MemoryRateLimitBackend, RateLimit, RateLimiter
+
+
+def unlimited_limiter() -> RateLimiter:
+    limit = RateLimit(limit=10 ** 9, period=60, burst=10 ** 9)
+    return RateLimiter(MemoryRateLimitBackend(), default_limit=limit, user_limit=limit)
+
+
+class LegacyRequestID(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        request.state.request_id = str(uuid.uuid4())
+        response = await call_next(request)
+        response.headers["X-Request-ID"] = request.state.request_id
+        return response
+
+
+class LegacyRequestLogging(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        start_time = time.time()
+        response = await call_next(request)
+        request_logger.log_request(
+            method=request.method, url=str(request.url), status_code=response.status_code,
+            response_time=time.time() - start_time, ip_address=request.client.host if request.client else None,
+            request_id=getattr(request.state, 'request_id', None)
+        )
+        return response
+
+
+class LegacySecurityHeaders(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        response = await call_next(request)
+        if request.method != "OPTIONS":
+            for header, value in SECURITY_HEADERS.items():
+                response.headers[header] = value
+        return response
+
+
+class LegacyErrorHandler(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        try:
+            return await call_next(request)
+        except Exception:
+            return JSONResponse(status_code=500, content={"error_code": "INTERNAL_ERROR"})
+
+
+class LegacyRateLimit(BaseHTTPMiddleware):
+    def __init__(self, app):
+        super().__init__(app)
+        self.limiter = unlimited_limiter()
+
+    async def dispatch(self, request, call_next):
+        identity, is_user = RateLimitMiddleware._identity(request.scope)
+        await self.limiter.check(request.url.path, identity, is_user)
+        return await call_next(request)
+
+
+def build_app(stack: str, large_items: int) -> FastAPI:
+    """Mesma ordem de main.py"""
+    app = FastAPI()
+    large = [
+        {"id": i, "file_name": f"file_{i}.py", "full_path": f"src/module_{i % 50}/file_{i}.py", "size": i * 10}
+        for i in range(large_items)
+    ]
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    @app.get("/large")
+    async def large_json():
+        return JSONResponse(large)
+
+    app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
+    if stack == "legacy":
+        for middleware in (LegacyErrorHandler, LegacyRateLimit, LegacyRequestLogging, LegacyRequestID, LegacySecurityHeaders):
+            app.add_middleware(middleware)
+    else:
+        app.add_middleware(ErrorHandlerMiddleware)
+        app.add_middleware(RateLimitMiddleware, limiter=unlimited_limiter())
+        app.add_middleware(RequestLoggingMiddleware)
+        app.add_middleware(RequestIDMiddleware)
+        app.add_middleware(SecurityHeadersMiddleware)
+    return app
+
+
+async def run(app: FastAPI, path: str, requests: int, concurrency: int) -> dict:
+    latencies = []
+    remaining = iter(range(requests))
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        async def worker():
+            for _ in remaining:
+                start = time.perf_counter()
+                response = await client.get(path)
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+        await client.get(path)
+        started = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests_per_second": round(requests / elapsed, 1),
+        "latency_p50_ms": round(statistics.median(latencies) * 1000, 3),
+        "latency_p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 3)
+    }
+
+
+async def main_async(args) -> dict:
+    # Os logs de requisição iriam para o console; aqui só o custo interessa
+    request_logger.logger.disabled = True
+    results = {"requests": args.requests, "concurrency": args.concurrency, "large_items": args.large_items, "stacks": {}}
+    for stack in ("legacy", "asgi"):
+        app = build_app(stack, args.large_items)
+        results["stacks"][stack] = {}
+        for name, path, count in (("health", "/health", args.requests), ("large", "/large", max(args.requests // 10, 1))):
+            print(f"Executando {stack} {path}...")
+            results["stacks"][stack][name] = await run(app, path, count, args.concurrency)
+            print(f"  {results['stacks'][stack][name]}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da pilha de middlewares")
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--large-items", type=int, default=20000)
+    parser.add_argument("--output", help="grava o resultado em JSON")
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+    print()
+    for name in ("health", "large"):
+        legacy = results["stacks"]["legacy"][name]["requests_per_second"]
+        asgi = results["stacks"]["asgi"][name]["requests_per_second"]
+        print(f"{name}: BaseHTTPMiddleware {legacy} req/s | ASGI {asgi} req/s ({asgi / legacy:.2f}x)")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Resultado gravado em {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,3 @@
+"""
+Suíte de benchmarks do VerificAI Backend (ver a seção Benchmarks do README)
+"""
@@ -0,0 +1,82 @@
+"""
+Utilitários comuns dos benchmarks: estatísticas de latência e o formato JSON
+dos resultados, o mesmo em todos os scripts para compare.py poder comparar
+duas execuções.
+
+Formato:
+    {
+      "benchmark": "micro",
+      "timestamp": "2024-01-01T00:00:00",
+      "environment": {"git_commit": "...", "python": "3.11.6", "platform": "...", "cpus": 8},
+      "parameters": {...},
+      "results": {"<caso>": {"p50_ms": ..., "p95_ms": ..., ...}, ...}
+    }
+"""
+import json
+import os
+import platform
+import statistics
+import subprocess
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Percentil por posição (valores já ordenados)"""
+    if not sorted_values:
+        return 0.0
+    index = min(max(int(round(len(sorted_values) * fraction)) - 1, 0), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def summarize(latencies: List[float]) -> Dict[str, Any]:
+    """Latências em segundos -> estatísticas em milissegundos"""
+    if not latencies:
+        return {"count": 0}
+    values = sorted(latencies)
+    return {
+        "count": len(values),
+        "mean_ms": round(statistics.fmean(values) * 1000, 3),
+        "p50_ms": round(statistics.median(values) * 1000, 3),
+        "p95_ms": round(percentile(values, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(values, 0.99) * 1000, 3),
+        "min_ms": round(values[0] * 1000, 3),
+        "max_ms": round(values[-1] * 1000, 3)
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def build_report(benchmark: str, parameters: Dict[str, Any], results: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "benchmark": benchmark,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "environment": {
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count()
+        },
+        "parameters": parameters,
+        "results": results
+    }
+
+
+def write_report(report: Dict[str, Any], output: Optional[str]) -> None:
+    if not output:
+        return
+    directory = os.path.dirname(output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"Resultado gravado em {output}")
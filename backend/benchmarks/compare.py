@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Compara dois resultados de benchmark (mesmo script) e aponta regressões.
+
+Uso:
+    python benchmarks/compare.py base.json novo.json [--metric p50_ms] [--threshold 0.10]
+                                 [--output comparacao.json]
+
+Compara a métrica (latência em ms, menor é melhor) de cada caso presente nos
+dois arquivos, inclusive os aninhados (ex.: steps.analyze do cenário). Sai
+com código 1 se algum caso piorou mais que --threshold, para uso em CI.
+"""
+import argparse
+import json
+import sys
+import os
+from typing import Any, Dict
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import write_report
+
+
+def collect(results: Dict[str, Any], metric: str, prefix: str = "") -> Dict[str, float]:
+    """{"caso": valor} para cada dicionário de resultados que tem a métrica"""
+    values = {}
+    for key, value in results.items():
+        if not isinstance(value, dict):
+            continue
+        name = f"{prefix}{key}"
+        if isinstance(value.get(metric), (int, float)):
+            values[name] = float(value[metric])
+        values.update(collect(value, metric, f"{name}."))
+    return values
+
+
+def compare(base: Dict[str, Any], new: Dict[str, Any], metric: str, threshold: float) -> Dict[str, Any]:
+    base_values = collect(base["results"], metric)
+    new_values = collect(new["results"], metric)
+    cases = {}
+    for name in sorted(base_values.keys() & new_values.keys()):
+        old, current = base_values[name], new_values[name]
+        change = (current - old) / old if old else 0.0
+        cases[name] = {
+            "base": old,
+            "new": current,
+            "change": round(change, 4),
+            "status": "regression" if change > threshold else "improvement" if change < -threshold else "ok"
+        }
+    return {
+        "benchmark": new.get("benchmark"),
+        "metric": metric,
+        "threshold": threshold,
+        "base_commit": base.get("environment", {}).get("git_commit"),
+        "new_commit": new.get("environment", {}).get("git_commit"),
+        "regressions": [name for name, case in cases.items() if case["status"] == "regression"],
+        "only_in_base": sorted(base_values.keys() - new_values.keys()),
+        "only_in_new": sorted(new_values.keys() - base_values.keys()),
+        "cases": cases
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara dois resultados de benchmark")
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--metric", default="p50_ms")
+    parser.add_argument("--threshold", type=float, default=0.10, help="piora relativa tolerada (0.10 = 10%%)")
+    parser.add_argument("--output", help="grava a comparação em JSON")
+    args = parser.parse_args()
+
+    with open(args.base, "r", encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.new, "r", encoding="utf-8") as f:
+        new = json.load(f)
+    if base.get("benchmark") != new.get("benchmark"):
+        print(f"ERRO: benchmarks diferentes ({base.get('benchmark')} x {new.get('benchmark')})")
+        return 2
+
+    comparison = compare(base, new, args.metric, args.threshold)
+    for name, case in comparison["cases"].items():
+        marker = {"regression": "PIOROU", "improvement": "melhorou", "ok": ""}[case["status"]]
+        print(f"{name}: {case['base']} -> {case['new']} {args.metric} ({case['change']:+.1%}) {marker}")
+
+    write_report(comparison, args.output)
+    if comparison["regressions"]:
+        print(f"\n{len(comparison['regressions'])} regressões acima de {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Servidor HTTP local que imita as APIs de LLM usadas pelo backend, para
+benchmarks e testes de carga sem custo nem rate limit real:
+
+    Gemini     POST /v1beta/models/{modelo}:generateContent
+               POST /v1beta/models/{modelo}:streamGenerateContent?alt=sse
+               POST/PATCH/DELETE /v1beta/cachedContents (cache de prefixo)
+    OpenAI     POST /v1/chat/completions (stream ou não)
+    Anthropic  POST /v1/messages (stream ou não)
+
+A resposta é uma análise no formato do prompt (critérios fechados por
+#FIM_ANALISE_CRITERIO# e #FIM#, ver benchmarks/fixtures.py). maxOutputTokens
+(ou max_tokens) é respeitado: uma resposta maior é cortada com finishReason
+MAX_TOKENS e o pedido de continuação recebe o resto, como na API real.
+
+Uso:
+    python benchmarks/fake_llm_server.py [--port 8090] [--latency 1.5] [--jitter 0.3]
+                                         [--rate-429 0.1] [--criteria 5]
+                                         [--response-chars 8000] [--chunk-chars 400]
+
+No backend:
+    GEMINI_BASE_URL=http://localhost:8090/v1beta/models
+    OPENAI_BASE_URL=http://localhost:8090/v1
+    ANTHROPIC_BASE_URL=http://localhost:8090
+
+GET /_stats devolve os contadores (requisições, 429 injetados, caracteres
+gerados) e POST /_stats/reset zera; os cenários gravam esses números junto
+com o resultado.
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import os
+import time
+import uuid
+from collections import Counter
+from dataclasses import asdict, dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from benchmarks.fixtures import llm_response
+
+CHARS_PER_TOKEN = 4
+
+
+@dataclass
+class FakeLLMConfig:
+    latency: float = 1.0          # segundos até o primeiro byte (ou a resposta inteira)
+    jitter: float = 0.2           # variação aleatória de +/- jitter segundos na latência
+    rate_429: float = 0.0         # fração das requisições respondidas com 429
+    retry_after: int = 1          # Retry-After dos 429
+    criteria: int = 5             # critérios por resposta
+    response_chars: int = 6000    # tamanho aproximado da resposta completa
+    chunk_chars: int = 400        # tamanho de cada evento em streaming
+    chunk_interval: float = 0.02  # segundos entre eventos em streaming
+    seed: Optional[int] = None
+
+
+class FakeLLM:
+    """Geração das respostas e contadores, compartilhados pelos três formatos de API"""
+
+    def __init__(self, config: FakeLLMConfig):
+        self.config = config
+        self.random = random.Random(config.seed)
+        self.response = llm_response(config.criteria, config.response_chars)
+        self.stats: Counter = Counter()
+
+    async def wait_latency(self) -> None:
+        delay = self.config.latency + self.random.uniform(-self.config.jitter, self.config.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def should_rate_limit(self, provider: str) -> bool:
+        self.stats[f"{provider}.requests"] += 1
+        if self.config.rate_429 and self.random.random() < self.config.rate_429:
+            self.stats[f"{provider}.429"] += 1
+            return True
+        return False
+
+    def rate_limit_response(self, body: Dict[str, Any]) -> JSONResponse:
+        return JSONResponse(status_code=429, content=body, headers={"Retry-After": str(self.config.retry_after)})
+
+    def generate(self, offset: int, max_tokens: Optional[int]) -> Tuple[str, bool]:
+        """Trecho da resposta a partir de offset (continuação); True se foi cortado por max_tokens"""
+        remaining = self.response[offset:]
+        if max_tokens and len(remaining) > max_tokens * CHARS_PER_TOKEN:
+            remaining = remaining[:max_tokens * CHARS_PER_TOKEN]
+            truncated = True
+        else:
+            truncated = False
+        self.stats["generated_chars"] += len(remaining)
+        return remaining, truncated
+
+    def chunks(self, text: str) -> List[str]:
+        size = max(self.config.chunk_chars, 1)
+        return [text[i:i + size] for i in range(0, len(text), size)] or [""]
+
+    async def paced(self, text: str) -> AsyncIterator[Tuple[int, str]]:
+        """Trechos do texto no ritmo de streaming, com o índice de cada um"""
+        pieces = self.chunks(text)
+        for index, piece in enumerate(pieces):
+            if index:
+                await asyncio.sleep(self.config.chunk_interval)
+            yield index, piece
+
+
+def sse(data: Dict[str, Any], event: Optional[str] = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def prompt_tokens(messages: List[Dict[str, Any]]) -> int:
+    return len(json.dumps(messages, ensure_ascii=False)) // CHARS_PER_TOKEN
+
+
+def build_app(config: FakeLLMConfig) -> FastAPI:
+    app = FastAPI(title="Fake LLM")
+    llm = FakeLLM(config)
+    app.state.llm = llm
+
+    # Gemini
+
+    def gemini_offset(contents: List[Dict[str, Any]]) -> int:
+        """Texto já gerado: turnos "model" enviados de volta num pedido de continuação"""
+        return sum(
+            len(part.get("text", ""))
+            for turn in contents if turn.get("role") == "model"
+            for part in turn.get("parts", [])
+        )
+
+    def gemini_body(text: str, finish_reason: Optional[str], usage: Optional[Dict[str, int]]) -> Dict[str, Any]:
+        candidate: Dict[str, Any] = {"content": {"role": "model", "parts": [{"text": text}]}, "index": 0}
+        if finish_reason:
+            candidate["finishReason"] = finish_reason
+        body: Dict[str, Any] = {"candidates": [candidate], "modelVersion": "fake"}
+        if usage:
+            body["usageMetadata"] = usage
+        return body
+
+    @app.post("/v1beta/models/{model_action}")
+    async def gemini(model_action: str, request: Request):
+        model, _, action = model_action.partition(":")
+        if llm.should_rate_limit("gemini"):
+            return llm.rate_limit_response({"error": {
+                "code": 429, "status": "RESOURCE_EXHAUSTED", "message": f"Quota exceeded for {model} (fake)"
+            }})
+
+        payload = await request.json()
+        contents = payload.get("contents", [])
+        max_tokens = payload.get("generationConfig", {}).get("maxOutputTokens")
+        text, truncated = llm.generate(gemini_offset(contents), max_tokens)
+        finish_reason = "MAX_TOKENS" if truncated else "STOP"
+        usage = {
+            "promptTokenCount": prompt_tokens(contents),
+            "candidatesTokenCount": len(text) // CHARS_PER_TOKEN,
+        }
+        usage["totalTokenCount"] = usage["promptTokenCount"] + usage["candidatesTokenCount"]
+        await llm.wait_latency()
+
+        if action == "streamGenerateContent":
+            async def events():
+                pieces = llm.chunks(text)
+                async for index, piece in llm.paced(text):
+                    last = index == len(pieces) - 1
+                    yield sse(gemini_body(piece, finish_reason if last else None, usage if last else None))
+            return StreamingResponse(events(), media_type="text/event-stream")
+
+        return gemini_body(text, finish_reason, usage)
+
+    @app.post("/v1beta/cachedContents")
+    async def gemini_cache_create(request: Request):
+        payload = await request.json()
+        llm.stats["gemini.cache_create"] += 1
+        return {
+            "name": f"cachedContents/fake-{uuid.uuid4().hex[:16]}",
+            "model": payload.get("model"),
+            "usageMetadata": {"totalTokenCount": prompt_tokens(payload.get("contents", []))}
+        }
+
+    @app.patch("/v1beta/cachedContents/{name}")
+    async def gemini_cache_refresh(name: str):
+        llm.stats["gemini.cache_refresh"] += 1
+        return {"name": f"cachedContents/{name}"}
+
+    @app.delete("/v1beta/cachedContents/{name}")
+    async def gemini_cache_delete(name: str):
+        llm.stats["gemini.cache_delete"] += 1
+        return {}
+
+    # OpenAI
+
+    @app.post("/v1/chat/completions")
+    async def openai_chat(request: Request):
+        if llm.should_rate_limit("openai"):
+            return llm.rate_limit_response({"error": {
+                "message": "Rate limit reached (fake)", "type": "requests", "code": "rate_limit_exceeded"
+            }})
+
+        payload = await request.json()
+        messages = payload.get("messages", [])
+        text, truncated = llm.generate(0, payload.get("max_tokens") or payload.get("max_completion_tokens"))
+        finish_reason = "length" if truncated else "stop"
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        model = payload.get("model", "fake")
+        usage = {"prompt_tokens": prompt_tokens(messages), "completion_tokens": len(text) // CHARS_PER_TOKEN}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        await llm.wait_latency()
+
+        if payload.get("stream"):
+            async def events():
+                async for _, piece in llm.paced(text):
+                    yield sse({"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                               "model": model, "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]})
+                yield sse({"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                           "model": model, "choices": [{"index": 0, "delta": {}, "finish_reason": finish_reason}]})
+                yield "data: [DONE]\n\n"
+            return StreamingResponse(events(), media_type="text/event-stream")
+
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": finish_reason}],
+            "usage": usage
+        }
+
+    # Anthropic
+
+    @app.post("/v1/messages")
+    async def anthropic_messages(request: Request):
+        if llm.should_rate_limit("anthropic"):
+            return llm.rate_limit_response({"type": "error", "error": {
+                "type": "rate_limit_error", "message": "Rate limit exceeded (fake)"
+            }})
+
+        payload = await request.json()
+        messages = payload.get("messages", [])
+        text, truncated = llm.generate(0, payload.get("max_tokens"))
+        stop_reason = "max_tokens" if truncated else "end_turn"
+        message_id = f"msg_{uuid.uuid4().hex[:24]}"
+        model = payload.get("model", "fake")
+        usage = {"input_tokens": prompt_tokens(messages), "output_tokens": len(text) // CHARS_PER_TOKEN}
+        await llm.wait_latency()
+
+        if payload.get("stream"):
+            async def events():
+                yield sse({"type": "message_start", "message": {
+                    "id": message_id, "type": "message", "role": "assistant", "model": model, "content": [],
+                    "stop_reason": None, "usage": {"input_tokens": usage["input_tokens"], "output_tokens": 0}
+                }}, "message_start")
+                yield sse({"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}},
+                          "content_block_start")
+                async for _, piece in llm.paced(text):
+                    yield sse({"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": piece}},
+                              "content_block_delta")
+                yield sse({"type": "content_block_stop", "index": 0}, "content_block_stop")
+                yield sse({"type": "message_delta", "delta": {"stop_reason": stop_reason},
+                           "usage": {"output_tokens": usage["output_tokens"]}}, "message_delta")
+                yield sse({"type": "message_stop"}, "message_stop")
+            return StreamingResponse(events(), media_type="text/event-stream")
+
+        return {
+            "id": message_id,
+            "type": "message",
+            "role": "assistant",
+            "model": model,
+            "content": [{"type": "text", "text": text}],
+            "stop_reason": stop_reason,
+            "usage": usage
+        }
+
+    # Contadores
+
+    @app.get("/_stats")
+    async def stats():
+        return {"config": asdict(llm.config), "counters": dict(llm.stats)}
+
+    @app.post("/_stats/reset")
+    async def reset_stats():
+        llm.stats.clear()
+        return {"counters": {}}
+
+    return app
+
+
+def main():
+    defaults = FakeLLMConfig()
+    parser = argparse.ArgumentParser(description="Servidor de LLM falso para benchmarks (Gemini, OpenAI, Anthropic)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency", type=float, default=defaults.latency, help="segundos até o primeiro byte")
+    parser.add_argument("--jitter", type=float, default=defaults.jitter, help="variação da latência (+/- segundos)")
+    parser.add_argument("--rate-429", type=float, default=defaults.rate_429, help="fração de respostas 429 (0 a 1)")
+    parser.add_argument("--retry-after", type=int, default=defaults.retry_after)
+    parser.add_argument("--criteria", type=int, default=defaults.criteria, help="critérios por resposta")
+    parser.add_argument("--response-chars", type=int, default=defaults.response_chars)
+    parser.add_argument("--chunk-chars", type=int, default=defaults.chunk_chars, help="tamanho dos eventos em streaming")
+    parser.add_argument("--chunk-interval", type=float, default=defaults.chunk_interval)
+    parser.add_argument("--seed", type=int, help="semente do sorteio de latência e 429 (reprodutível)")
+    args = parser.parse_args()
+
+    config = FakeLLMConfig(
+        latency=args.latency, jitter=args.jitter, rate_429=args.rate_429, retry_after=args.retry_after,
+        criteria=args.criteria, response_chars=args.response_chars, chunk_chars=args.chunk_chars,
+        chunk_interval=args.chunk_interval, seed=args.seed
+    )
+    print(f"LLM falso em http://{args.host}:{args.port} ({asdict(config)})")
+    print(f"  GEMINI_BASE_URL=http://{args.host}:{args.port}/v1beta/models")
+    uvicorn.run(build_app(config), host=args.host, port=args.port, log_level="warning")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
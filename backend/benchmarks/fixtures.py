@@ -0,0 +1,75 @@
+"""
+Fixtures dos benchmarks: código real do sistema de teste (tests/sistema_teste,
+olivia-back em NestJS e olivia-front em Next.js) e respostas de LLM sintéticas
+no formato que o prompt de análise pede (ver app/services/criteria_parser.py).
+"""
+from pathlib import Path
+from typing import List
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+FIXTURE_DIR = BACKEND_DIR / "tests" / "sistema_teste"
+
+CODE_EXTENSIONS = {".ts", ".tsx", ".js", ".jsx"}
+
+STATUSES = ("Conforme", "Não Conforme", "Parcialmente Conforme")
+
+CRITERION_BODY = (
+    "**Status:** {status}\n"
+    "**Confiança:** {confidence}%\n\n"
+    "### Evidências\n"
+    "- `src/modules/pacientes/pacientes.service.ts`: o serviço acessa o repositório diretamente "
+    "no controller e mistura validação com regra de negócio.\n"
+    "- `src/components/Agenda/AgendaTable.jsx`: estado duplicado entre componentes irmãos.\n\n"
+    "### Recomendações\n"
+    "1. Extrair a validação para DTOs com class-validator.\n"
+    "2. Centralizar o estado da agenda num único hook.\n"
+)
+
+
+def fixture_files(limit: int = 0) -> List[Path]:
+    """Arquivos de código das fixtures, em ordem estável (limit=0: todos)"""
+    files = sorted(
+        path for path in FIXTURE_DIR.rglob("*")
+        if path.is_file() and path.suffix in CODE_EXTENSIONS and "node_modules" not in path.parts
+    )
+    return files[:limit] if limit else files
+
+
+def code_sample(min_chars: int) -> str:
+    """Código das fixtures concatenado (repetido se preciso) até min_chars caracteres"""
+    files = fixture_files()
+    if not files:
+        raise FileNotFoundError(f"Nenhuma fixture encontrada em {FIXTURE_DIR}")
+    parts, size = [], 0
+    while size < min_chars:
+        for path in files:
+            text = path.read_text(encoding="utf-8", errors="replace")
+            parts.append(f"// Arquivo: {path.relative_to(FIXTURE_DIR)}\n{text}\n")
+            size += len(parts[-1])
+            if size >= min_chars:
+                break
+    return "".join(parts)
+
+
+def llm_response(criteria: int, target_chars: int = 0, complete: bool = True) -> str:
+    """
+    Resposta de análise com `criteria` critérios, cada um fechado por
+    #FIM_ANALISE_CRITERIO#, e #FIM# no final (complete=False omite o #FIM#
+    e o fechamento do último critério, como numa resposta truncada). O texto
+    de cada critério é repetido até a resposta chegar perto de target_chars.
+    """
+    criteria = max(criteria, 1)
+    body_repeat = 1
+    if target_chars:
+        single = len(CRITERION_BODY.format(status=STATUSES[0], confidence=90)) + 80
+        body_repeat = max(1, target_chars // (criteria * single))
+
+    sections = []
+    for index in range(1, criteria + 1):
+        body = CRITERION_BODY.format(status=STATUSES[index % len(STATUSES)], confidence=70 + index % 30)
+        sections.append(f"## Critério {index}: Critério de qualidade {index}\n" + body * body_repeat)
+
+    text = "#FIM_ANALISE_CRITERIO#\n\n".join(sections)
+    if complete:
+        return text + "#FIM_ANALISE_CRITERIO#\n\n#FIM#\n"
+    return text
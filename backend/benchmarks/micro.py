@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks das funções do caminho de análise, com as fixtures de
+tests/sistema_teste e respostas de LLM sintéticas em três tamanhos:
+
+    extract_markdown_content     parse da resposta do LLM (app.services.llm_service)
+    detect_programming_language  detecção de linguagem do código colado (app.api.v1.code_entries)
+    TokenOptimizer               estimate_tokens, optimize_code, optimize_content, create_chunks
+                                 (app.services.llm_provider)
+    FileProcessor                process_directory, extract_relevant_code, get_file_stats
+                                 (app.services.file_processor)
+
+Uso:
+    python benchmarks/micro.py [--repeat 20] [--filter token] [--output resultados/micro.json]
+
+Cada caso roda uma vez para aquecer e depois --repeat rodadas; a latência é
+por chamada. Compare duas execuções com benchmarks/compare.py.
+"""
+import argparse
+import asyncio
+import logging
+import sys
+import os
+import time
+from typing import Any, Callable, Dict, List, Tuple
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import build_report, summarize, write_report
+from benchmarks.fixtures import FIXTURE_DIR, code_sample, fixture_files, llm_response
+
+# (nome, caracteres da resposta, critérios)
+RESPONSE_SIZES = (("small", 2_000, 2), ("medium", 20_000, 8), ("large", 200_000, 20))
+# (nome, caracteres de código)
+CODE_SIZES = (("small", 1_000), ("medium", 20_000), ("large", 200_000))
+
+
+def measure(func: Callable[[], Any], repeat: int) -> Dict[str, Any]:
+    """Latência por chamada: rodadas de `number` chamadas, number calibrado para rodadas de ~20 ms"""
+    func()
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= 0.02 or number >= 1_000_000:
+            break
+        number *= 2
+
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        latencies.append((time.perf_counter() - start) / number)
+
+    result = summarize(latencies)
+    result["calls_per_round"] = number
+    result["ops_per_second"] = round(1 / (sum(latencies) / len(latencies)), 1)
+    return result
+
+
+def extract_markdown_cases() -> List[Tuple[str, Callable[[], Any], Dict[str, Any]]]:
+    from app.services.llm_service import llm_service
+
+    cases = []
+    for name, chars, criteria in RESPONSE_SIZES:
+        for complete in (True, False):
+            response = llm_response(criteria, chars, complete=complete)
+            label = f"extract_markdown_content.{name}" + ("" if complete else ".truncated")
+            cases.append((label, lambda r=response: llm_service.extract_markdown_content(r),
+                          {"chars": len(response), "criteria": criteria}))
+    return cases
+
+
+def detect_language_cases() -> List[Tuple[str, Callable[[], Any], Dict[str, Any]]]:
+    from app.api.v1.code_entries import detect_programming_language
+
+    cases = []
+    for name, chars in CODE_SIZES:
+        code = code_sample(chars)
+        cases.append((f"detect_programming_language.{name}", lambda c=code: detect_programming_language(c),
+                      {"chars": len(code)}))
+    return cases
+
+
+def token_optimizer_cases() -> List[Tuple[str, Callable[[], Any], Dict[str, Any]]]:
+    from app.services.llm_provider import TokenOptimizer
+
+    optimizer = TokenOptimizer()
+    files = [
+        {"path": str(path.relative_to(FIXTURE_DIR)), "content": path.read_text(encoding="utf-8", errors="replace"),
+         "language": "typescript" if path.suffix in (".ts", ".tsx") else "javascript"}
+        for path in fixture_files()
+    ]
+    cases = [("TokenOptimizer.optimize_content.fixtures", lambda: optimizer.optimize_content(files),
+              {"files": len(files), "chars": sum(len(f["content"]) for f in files)})]
+    for name, chars in CODE_SIZES:
+        code = code_sample(chars)
+        cases.append((f"TokenOptimizer.estimate_tokens.{name}", lambda c=code: optimizer.estimate_tokens(c), {"chars": len(code)}))
+        cases.append((f"TokenOptimizer.optimize_code.{name}", lambda c=code: optimizer.optimize_code(c, "javascript"),
+                      {"chars": len(code)}))
+        cases.append((f"TokenOptimizer.create_chunks.{name}", lambda c=code: optimizer.create_chunks(c), {"chars": len(code)}))
+    return cases
+
+
+def file_processor_cases() -> List[Tuple[str, Callable[[], Any], Dict[str, Any]]]:
+    from app.services.file_processor import FileProcessor
+
+    processor = FileProcessor()
+    paths = [str(path) for path in fixture_files()]
+    cases = [
+        ("FileProcessor.process_directory.fixtures",
+         lambda: asyncio.run(processor.process_directory(str(FIXTURE_DIR))), {"files": len(paths)}),
+        ("FileProcessor.get_file_stats.fixtures", lambda: processor.get_file_stats(paths), {"files": len(paths)})
+    ]
+    for name, chars in CODE_SIZES:
+        code = code_sample(chars)
+        cases.append((f"FileProcessor.extract_relevant_code.{name}",
+                      lambda c=code: processor.extract_relevant_code(c, "javascript"), {"chars": len(code)}))
+    return cases
+
+
+SUITES = (extract_markdown_cases, detect_language_cases, token_optimizer_cases, file_processor_cases)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks do caminho de análise")
+    parser.add_argument("--repeat", type=int, default=20, help="rodadas medidas por caso")
+    parser.add_argument("--filter", help="roda só os casos cujo nome contém este texto")
+    parser.add_argument("--output", help="grava o resultado em JSON")
+    args = parser.parse_args()
+
+    # Os logs de depuração das funções medidas não entram na medição
+    logging.disable(logging.WARNING)
+
+    results = {}
+    for suite in SUITES:
+        for name, func, info in suite():
+            if args.filter and args.filter.lower() not in name.lower():
+                continue
+            print(f"Executando {name}...")
+            results[name] = dict(info, **measure(func, args.repeat))
+            print(f"  p50 {results[name]['p50_ms']} ms | {results[name]['ops_per_second']} ops/s")
+
+    report = build_report("micro", {"repeat": args.repeat, "filter": args.filter}, results)
+    write_report(report, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
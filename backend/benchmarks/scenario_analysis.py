@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Cenário de carga ponta a ponta: N usuários simultâneos fazendo
+upload -> análise -> resultados contra um backend rodando, com o LLM
+substituído por benchmarks/fake_llm_server.py.
+
+Cada usuário, a cada iteração:
+    1. envia os arquivos de fixture (POST /upload/) ou cola o código
+       (POST /code-entries, com --source code-entry)
+    2. analisa os critérios (POST /general-analysis/analyze-selected)
+    3. lista os resultados e abre o recém-criado (GET /general-analysis/results[/{id}])
+
+Uso:
+    # terminal 1
+    python benchmarks/fake_llm_server.py --latency 1.5 --rate-429 0.05
+    # terminal 2 (limites altos para o rate limiter não distorcer a medição)
+    GEMINI_BASE_URL=http://localhost:8090/v1beta/models LLM_PROMPT_CACHE_BACKEND=local \\
+        RATE_LIMIT_REQUESTS_PER_MINUTE=100000 RATE_LIMIT_USER_REQUESTS_PER_MINUTE=100000 \\
+        uvicorn app.main:app --port 8000
+    # terminal 3
+    python benchmarks/scenario_analysis.py --users 10 --iterations 3 --output resultados/cenario.json
+
+Os usuários bench_<n> são criados na primeira execução e reaproveitados
+depois. Os critérios usados são os primeiros --criteria ativos (rode
+seed_criteria.py num banco vazio).
+"""
+import argparse
+import asyncio
+import json
+import sys
+import os
+import time
+import uuid
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from benchmarks.common import build_report, summarize, write_report
+from benchmarks.fixtures import FIXTURE_DIR, code_sample, fixture_files
+
+STEPS = ("upload", "analyze", "results_list", "result_detail")
+
+
+class ScenarioError(Exception):
+    pass
+
+
+class Recorder:
+    """Latências por etapa, erros por etapa e status, e a duração de cada iteração completa"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Counter = Counter()
+        self.iterations: List[float] = []
+
+    async def call(self, step: str, request) -> httpx.Response:
+        start = time.perf_counter()
+        try:
+            response = await request
+        except httpx.HTTPError as e:
+            self.errors[f"{step}:{type(e).__name__}"] += 1
+            raise ScenarioError(f"{step}: {e}") from e
+        self.latencies[step].append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            self.errors[f"{step}:{response.status_code}"] += 1
+            raise ScenarioError(f"{step}: HTTP {response.status_code} {response.text[:200]}")
+        return response
+
+
+async def retry_rate_limited(send, attempts: int = 10) -> httpx.Response:
+    """Preparação (login/registro): espera e repete enquanto o rate limiter responder 429"""
+    for _ in range(attempts):
+        response = await send()
+        if response.status_code != 429:
+            return response
+        await asyncio.sleep(float(response.headers.get("Retry-After", "1")))
+    return response
+
+
+async def authenticate(client: httpx.AsyncClient, username: str, password: str) -> str:
+    """Token do usuário de benchmark, criando-o se ainda não existir"""
+    async def login():
+        return await client.post("/api/v1/login", data={"username": username, "password": password})
+
+    response = await retry_rate_limited(login)
+    if response.status_code == 401:
+        registered = await retry_rate_limited(lambda: client.post("/api/v1/register", json={
+            "username": username,
+            "email": f"{username}@benchmark.local",
+            "full_name": f"Benchmark {username}",
+            "password": password,
+            "confirm_password": password
+        }))
+        if registered.status_code >= 400:
+            raise ScenarioError(f"Falha ao registrar {username}: {registered.status_code} {registered.text[:200]}")
+        response = await retry_rate_limited(login)
+    if response.status_code >= 400:
+        raise ScenarioError(f"Falha no login de {username}: {response.status_code} {response.text[:200]}")
+    return response.json()["access_token"]
+
+
+async def upload_files(client: httpx.AsyncClient, recorder: Recorder, files, run_id: str) -> List[str]:
+    relative_paths = []
+    for path in files:
+        relative_path = f"benchmark-{run_id}/{path.relative_to(FIXTURE_DIR).as_posix()}"
+        await recorder.call("upload", client.post(
+            "/api/v1/upload/",
+            files={"file": (path.name, path.read_bytes(), "text/plain")},
+            data={"file_id": f"file_{uuid.uuid4().hex}", "original_name": path.name, "relative_path": relative_path}
+        ))
+        relative_paths.append(relative_path)
+    return relative_paths
+
+
+async def user_session(index: int, args, criteria_ids: List[str], files, code: str,
+                       recorder: Recorder, run_id: str) -> None:
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout) as client:
+        token = await authenticate(client, f"{args.user_prefix}_{index}", args.password)
+        client.headers["Authorization"] = f"Bearer {token}"
+
+        for iteration in range(args.iterations):
+            started = time.perf_counter()
+            try:
+                request: Dict[str, Any] = {
+                    "criteria_ids": criteria_ids,
+                    "analysis_name": f"Benchmark {run_id} u{index} i{iteration}",
+                    "temperature": 0.1
+                }
+                if args.source == "upload":
+                    request["file_paths"] = await upload_files(client, recorder, files, run_id)
+                    request["use_code_entry"] = False
+                else:
+                    response = await recorder.call("upload", client.post("/api/v1/code-entries", json={
+                        "title": f"Benchmark {run_id} u{index} i{iteration}",
+                        "code_content": code,
+                        "language": "typescript",
+                        "lines_count": code.count("\n") + 1,
+                        "characters_count": len(code)
+                    }))
+                    request["code_entry_id"] = str(response.json()["id"])
+                    request["use_code_entry"] = True
+
+                analysis = (await recorder.call(
+                    "analyze", client.post("/api/v1/general-analysis/analyze-selected", json=request)
+                )).json()
+
+                await recorder.call("results_list", client.get("/api/v1/general-analysis/results", params={"limit": 20}))
+                if analysis.get("db_result_id"):
+                    await recorder.call(
+                        "result_detail", client.get(f"/api/v1/general-analysis/results/{analysis['db_result_id']}")
+                    )
+                else:
+                    recorder.errors["analyze:not_saved"] += 1
+            except ScenarioError as e:
+                print(f"  usuário {index}, iteração {iteration + 1}: {e}")
+                continue
+            recorder.iterations.append(time.perf_counter() - started)
+
+
+async def fake_llm_stats(url: Optional[str], reset: bool = False) -> Optional[Dict[str, Any]]:
+    if not url:
+        return None
+    try:
+        async with httpx.AsyncClient(base_url=url, timeout=10) as client:
+            response = await (client.post("/_stats/reset") if reset else client.get("/_stats"))
+            return response.json()
+    except httpx.HTTPError as e:
+        print(f"Aviso: LLM falso indisponível em {url}: {e}")
+        return None
+
+
+async def main_async(args) -> Dict[str, Any]:
+    run_id = uuid.uuid4().hex[:8]
+    files = fixture_files(args.files)
+    code = code_sample(args.code_chars)
+
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout) as client:
+        token = await authenticate(client, f"{args.user_prefix}_0", args.password)
+        response = await client.get("/api/v1/general-analysis/criteria", headers={"Authorization": f"Bearer {token}"})
+        response.raise_for_status()
+        criteria_ids = [criterion["id"] for criterion in response.json()][:args.criteria]
+    if not criteria_ids:
+        raise ScenarioError("Nenhum critério ativo no banco: rode seed_criteria.py")
+
+    await fake_llm_stats(args.fake_llm_url, reset=True)
+    recorder = Recorder()
+    print(f"Executando {args.users} usuários x {args.iterations} iterações ({args.source}, {len(criteria_ids)} critérios)...")
+    started = time.perf_counter()
+    await asyncio.gather(*[
+        user_session(index, args, criteria_ids, files, code, recorder, run_id) for index in range(args.users)
+    ])
+    elapsed = time.perf_counter() - started
+
+    results = {
+        "elapsed_seconds": round(elapsed, 2),
+        "completed_iterations": len(recorder.iterations),
+        "failed_iterations": args.users * args.iterations - len(recorder.iterations),
+        "iterations_per_minute": round(len(recorder.iterations) / elapsed * 60, 2),
+        "iteration": summarize(recorder.iterations),
+        "steps": {step: summarize(recorder.latencies[step]) for step in STEPS if recorder.latencies[step]},
+        "errors": dict(recorder.errors),
+        "fake_llm": await fake_llm_stats(args.fake_llm_url)
+    }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cenário upload -> análise -> resultados com N usuários simultâneos")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--users", type=int, default=5, help="usuários simultâneos")
+    parser.add_argument("--iterations", type=int, default=2, help="iterações por usuário")
+    parser.add_argument("--source", choices=("upload", "code-entry"), default="upload")
+    parser.add_argument("--files", type=int, default=3, help="arquivos de fixture por análise (--source upload)")
+    parser.add_argument("--code-chars", type=int, default=20_000, help="tamanho do código colado (--source code-entry)")
+    parser.add_argument("--criteria", type=int, default=3, help="critérios por análise")
+    parser.add_argument("--user-prefix", default="bench")
+    parser.add_argument("--password", default="Benchmark#2024")
+    parser.add_argument("--timeout", type=float, default=600, help="timeout por requisição (s)")
+    parser.add_argument("--fake-llm-url", default="http://localhost:8090", help="'' para não ler os contadores")
+    parser.add_argument("--output", help="grava o resultado em JSON")
+    args = parser.parse_args()
+
+    try:
+        results = asyncio.run(main_async(args))
+    except ScenarioError as e:
+        print(f"ERRO: {e}")
+        return 1
+
+    print()
+    print(f"Iterações: {results['completed_iterations']} ok, {results['failed_iterations']} com erro "
+          f"({results['iterations_per_minute']}/min)")
+    for step, summary in results["steps"].items():
+        print(f"  {step}: p50 {summary['p50_ms']} ms | p95 {summary['p95_ms']} ms | max {summary['max_ms']} ms")
+    if results["errors"]:
+        print(f"  erros: {json.dumps(results['errors'])}")
+
+    parameters = {key: value for key, value in vars(args).items() if key not in ("password", "output")}
+    write_report(build_report("scenario_analysis", parameters, results), args.output)
+    return 0 if results["completed_iterations"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+"""
+Tests for the incremental criteria parser (app/services/criteria_parser.py)
+"""
+
+import random
+import time
+
+import pytest
+
+from app.services.criteria_parser import (
+    CRITERIA_END_TAG,
+    RESPONSE_END_TAG,
+    CriteriaStreamParser,
+    classify_status,
+    count_statuses,
+    parse_criteria_response,
+)
+
+pytestmark = [pytest.mark.unit, pytest.mark.service]
+
+
+def build_response(count: int, numbers=None, names=None, final_tag: bool = True) -> str:
+    """Response in the grammar the analysis prompt asks for"""
+    sections = []
+    for i in range(count):
+        number = numbers[i] if numbers else i + 1
+        name = names[i] if names else f"Nome do critério {i + 1}"
+        sections.append(
+            f"## Critério {number}: {name}\n"
+            f"**Status:** {'Conforme' if i % 2 else 'Não conforme'}\n\n"
+            f"Conteúdo da análise {i + 1}.\n\n\n"
+            f"- item com `código` e ## no meio\r\n"
+            f"{CRITERIA_END_TAG}\n"
+        )
+    return "\n".join(sections) + (f"\n{RESPONSE_END_TAG}\n" if final_tag else "")
+
+
+def feed_in_chunks(text: str, rng: random.Random, max_chunk: int):
+    """Feed random-sized chunks; returns (parser, criteria in the order feed/close emitted them)"""
+    parser = CriteriaStreamParser()
+    emitted = []
+    position = 0
+    while position < len(text):
+        size = rng.randint(1, max_chunk)
+        emitted.extend(parser.feed(text[position:position + size]))
+        position += size
+    emitted.extend(parser.close())
+    return parser, emitted
+
+
+def best_time(func, repeat: int = 3) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+class TestChunkedFeed:
+
+    @pytest.mark.parametrize("seed", range(20))
+    def test_random_chunks_match_one_shot(self, seed):
+        rng = random.Random(seed)
+        text = build_response(rng.randint(1, 15), final_tag=rng.random() < 0.7)
+        # Occasionally cut the response mid-criterion, as a truncated stream would
+        if rng.random() < 0.3:
+            text = text[:rng.randint(1, len(text))]
+
+        expected = parse_criteria_response(text)
+        parser, emitted = feed_in_chunks(text, rng, max_chunk=rng.choice((1, 3, 17, 256)))
+
+        assert parser.criteria == expected.criteria
+        assert emitted == expected.criteria
+        assert parser.finished == expected.finished
+        assert parser.text == expected.text
+
+    def test_criteria_are_emitted_as_soon_as_closed(self):
+        parser = CriteriaStreamParser()
+        assert parser.feed("## Critério 1: Nomes\nconteúdo\n") == []
+        assert parser.in_criterion
+
+        emitted = parser.feed(f"{CRITERIA_END_TAG}\n## Critério 2: Outro")
+        assert [criterion.name for criterion in emitted] == ["Nomes"]
+        assert parser.feed(f"\ntexto\n{RESPONSE_END_TAG}\n") and parser.finished
+
+    def test_text_after_final_tag_is_ignored(self):
+        parser = parse_criteria_response(build_response(2) + "## Critério 3: Depois do fim\nx\n")
+        assert len(parser.criteria) == 2
+        assert parser.finished
+
+    def test_open_criterion_is_incomplete_on_close(self):
+        parser = parse_criteria_response("## Critério 1: Cortado\nanálise interrompida")
+        assert [(c.name, c.content, c.complete) for c in parser.criteria] == [
+            ("Cortado", "análise interrompida", False)
+        ]
+        assert not parser.finished
+
+
+class TestPositionalKeys:
+
+    def test_keys_follow_response_order_not_criterion_numbers(self):
+        parser = parse_criteria_response(build_response(3, numbers=[7, 2, 7]))
+        assert [c.key for c in parser.criteria] == ["criteria_1", "criteria_2", "criteria_3"]
+        assert [c.number for c in parser.criteria] == ["7", "2", "7"]
+
+    def test_repeated_criteria_are_not_deduplicated(self):
+        parser = parse_criteria_response(build_response(3, numbers=[1, 1, 1], names=["Igual"] * 3))
+        assert len(parser.criteria) == 3
+        assert {c.name for c in parser.criteria} == {"Igual"}
+        assert len({c.key for c in parser.criteria}) == 3
+
+    def test_no_limit_on_the_number_of_criteria(self):
+        parser = parse_criteria_response(build_response(25))
+        assert len(parser.criteria) == 25
+        assert parser.criteria[-1].key == "criteria_25"
+        assert parser.criteria[-1].name == "Nome do critério 25"
+
+
+class TestStatus:
+
+    @pytest.mark.parametrize("value,expected", [
+        ("Conforme", "compliant"),
+        ("CONFORME ✅", "compliant"),
+        ("Parcialmente Conforme", "partially_compliant"),
+        ("parcialmente conforme (ver recomendações)", "partially_compliant"),
+        ("Não Conforme", "non_compliant"),
+        ("Nao-conforme", "non_compliant"),
+        ("Não avaliado", None),
+        ("N/A", None),
+        ("Nenhum", None),
+        ("", None),
+    ])
+    def test_classify_status(self, value, expected):
+        assert classify_status(value) == expected
+
+    def test_status_is_parsed_per_criterion(self):
+        parser = parse_criteria_response(build_response(3))
+        assert [c.status for c in parser.criteria] == ["non_compliant", "compliant", "non_compliant"]
+        assert parser.criteria[0].to_result()["status"] == "non_compliant"
+
+    def test_count_statuses(self):
+        criteria_results = {
+            "criteria_1": {"name": "A", "content": "x", "status": "compliant"},
+            "criteria_2": {"name": "B", "content": "x", "status": None},
+            # Saved before the status was stored: parsed from the content
+            "criteria_3": {"name": "C", "content": "**Status:** Parcialmente Conforme\ntexto"},
+            "criteria_4": {"name": "D", "content": "**Status:** Não avaliado"},
+        }
+        assert count_statuses(criteria_results) == {
+            "compliant": 1, "partially_compliant": 1, "non_compliant": 0
+        }
+
+
+PATHOLOGICAL_INPUTS = {
+    # Headers that are never closed by a criteria tag
+    "unterminated_headers": lambda n: "## Critério 1: sem fim\nlinha\n" * (n // 28),
+    # One huge line without a newline, fed in small chunks
+    "huge_line": lambda n: "a" * n,
+    # Criteria tags repeated on the same line
+    "repeated_markers": lambda n: CRITERIA_END_TAG * (n // len(CRITERIA_END_TAG)),
+    # Partial tags that never complete
+    "partial_markers": lambda n: "#FIM_ANALISE_CRITERI" * (n // 20),
+}
+
+
+class TestPathologicalInputs:
+
+    @pytest.mark.parametrize("name", sorted(PATHOLOGICAL_INPUTS))
+    def test_parsing_time_grows_linearly(self, name):
+        build = PATHOLOGICAL_INPUTS[name]
+
+        def parse(size):
+            text = build(size)
+            return lambda: feed_in_chunks(text, random.Random(0), max_chunk=64)
+
+        small = best_time(parse(50_000))
+        large = best_time(parse(400_000))
+        # 8x the input: linear is ~8x, quadratic would be ~64x
+        assert large / max(small, 1e-4) < 32
+
+    def test_unterminated_headers_emit_one_criterion_each(self):
+        parser = parse_criteria_response("## Critério 1: sem fim\nlinha\n" * 100)
+        assert len(parser.criteria) == 100
+        assert all(c.complete for c in parser.criteria[:-1])
+        assert not parser.criteria[-1].complete
+
+    def test_repeated_markers_without_headers_emit_nothing(self):
+        parser = parse_criteria_response(CRITERIA_END_TAG * 1000)
+        assert parser.criteria == []
+        assert parser.saw_criteria_tag
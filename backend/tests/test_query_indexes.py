@@ -0,0 +1,173 @@
+"""
+Index regression: seeds a database, runs EXPLAIN on the hot API queries and
+checks that each one uses its expected composite index.
+
+Runs on in-memory SQLite; set INDEX_CHECK_DATABASE_URL to a disposable
+PostgreSQL database to check its planner (everything is rolled back).
+"""
+
+import os
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, insert, select, text
+
+from app.core.database import Base
+from app.models.analysis import Analysis, AnalysisStatus
+from app.models.code_entry import CodeEntry
+from app.models.file_path import FilePath
+from app.models.prompt import GeneralAnalysisResult
+from app.models.uploaded_file import UploadedFile, FileStatus
+from app.models.user import User, UserRole
+
+pytestmark = [pytest.mark.integration, pytest.mark.model]
+
+DATABASE_URL = os.environ.get("INDEX_CHECK_DATABASE_URL", "sqlite://")
+USERS = 20
+ROWS_PER_USER = 100
+USER_ID = 1
+
+
+def seed(connection):
+    """Data with the real shape: many users, all with the same repository paths"""
+    now = datetime.utcnow()
+    connection.execute(insert(User.__table__), [
+        {
+            "id": u,
+            "username": f"user{u}",
+            "email": f"user{u}@example.com",
+            "hashed_password": "x",
+            "role": UserRole.DEVELOPER,
+            "created_at": now,
+            "updated_at": now
+        }
+        for u in range(1, USERS + 1)
+    ])
+
+    uploads, paths, entries, results, analyses = [], [], [], [], []
+    statuses = [FileStatus.COMPLETED.value, FileStatus.ERROR.value, FileStatus.UPLOADING.value]
+    for u in range(1, USERS + 1):
+        for i in range(ROWS_PER_USER):
+            created = now - timedelta(minutes=i)
+            name = f"src/module_{i % 50}/file_{i}.py"
+            uploads.append({
+                "file_id": uuid.uuid4().hex, "original_name": f"file_{i}.py", "file_path": name,
+                "relative_path": name, "file_size": 1000 + i, "file_extension": "py",
+                "storage_path": f"uploads/{u}/{name}", "status": statuses[i % 3], "user_id": u,
+                "created_at": created, "updated_at": created
+            })
+            paths.append({
+                "file_id": uuid.uuid4().hex, "full_path": name, "file_name": f"file_{i}.py",
+                "file_extension": "py", "folder_path": f"src/module_{i % 50}", "user_id": u,
+                "created_at": created, "updated_at": created
+            })
+            entries.append({
+                "id": uuid.uuid4(), "code_content": "print('x')\n", "title": f"Entry {i}",
+                "lines_count": 1, "characters_count": 11, "user_id": u, "is_active": i % 10 != 0,
+                "created_at": created, "updated_at": created
+            })
+            results.append({
+                "analysis_name": f"Analysis {i}", "criteria_count": 3, "user_id": u,
+                "criteria_results": {}, "raw_response": "", "created_at": created, "updated_at": created
+            })
+            analyses.append({
+                "name": f"Analysis {i}", "status": AnalysisStatus.COMPLETED, "user_id": u, "prompt_id": 1,
+                "progress_percentage": 100, "created_at": created, "updated_at": created
+            })
+
+    for model, rows in (
+        (UploadedFile, uploads), (FilePath, paths), (CodeEntry, entries),
+        (GeneralAnalysisResult, results), (Analysis, analyses)
+    ):
+        connection.execute(insert(model.__table__), rows)
+
+
+def hot_queries():
+    """(description, query, expected index) - the same conditions used in app/api/v1"""
+    return [
+        (
+            "upload list_files",
+            select(UploadedFile.id).where(UploadedFile.user_id == USER_ID)
+            .order_by(UploadedFile.created_at.desc(), UploadedFile.id.desc()).limit(101),
+            "ix_uploaded_files_user_created"
+        ),
+        (
+            "upload list_files (status)",
+            select(UploadedFile.id).where(
+                UploadedFile.user_id == USER_ID, UploadedFile.status == FileStatus.COMPLETED.value
+            ).order_by(UploadedFile.created_at.desc()).limit(101),
+            "ix_uploaded_files_user_status_created"
+        ),
+        (
+            "code_entries list / latest entry",
+            select(CodeEntry.id).where(CodeEntry.user_id == USER_ID, CodeEntry.is_active == True)
+            .order_by(CodeEntry.created_at.desc()).limit(101),
+            "ix_code_entries_user_active_created"
+        ),
+        (
+            "general-analysis results",
+            select(GeneralAnalysisResult.id).where(GeneralAnalysisResult.user_id == USER_ID)
+            .order_by(GeneralAnalysisResult.created_at.desc(), GeneralAnalysisResult.id.desc()).limit(21),
+            "ix_general_analysis_results_user_created"
+        ),
+        (
+            "file-paths duplicate check",
+            select(FilePath.id).where(
+                FilePath.full_path == "src/module_1/file_1.py", FilePath.user_id == USER_ID
+            ),
+            "ix_file_paths_user_full_path"
+        ),
+        (
+            "file-paths list",
+            select(FilePath.id).where(FilePath.user_id == USER_ID)
+            .order_by(FilePath.created_at.desc(), FilePath.id.desc()).limit(21),
+            "ix_file_paths_user_created"
+        ),
+        (
+            "analysis list_analyses",
+            select(Analysis.id).where(Analysis.user_id == USER_ID)
+            .order_by(Analysis.created_at.desc(), Analysis.id.desc()).limit(101),
+            "ix_analyses_user_created"
+        ),
+    ]
+
+
+def explain(connection, statement) -> str:
+    dialect = connection.dialect
+    sql = str(statement.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+    if dialect.name == "sqlite":
+        rows = connection.execute(text(f"EXPLAIN QUERY PLAN {sql}")).fetchall()
+        return "\n".join(str(row[-1]) for row in rows)
+    rows = connection.execute(text(f"EXPLAIN {sql}")).fetchall()
+    return "\n".join(row[0] for row in rows)
+
+
+@pytest.fixture(scope="module")
+def seeded_connection():
+    """Seeded database inside a transaction that is rolled back at the end"""
+    engine = create_engine(DATABASE_URL)
+    connection = engine.connect()
+    transaction = connection.begin()
+    try:
+        Base.metadata.create_all(bind=connection)
+        seed(connection)
+        connection.execute(text("ANALYZE"))
+        if engine.dialect.name == "postgresql":
+            # With few rows the planner prefers a seq scan; what matters here is whether the index applies
+            connection.execute(text("SET LOCAL enable_seqscan = off"))
+        yield connection
+    finally:
+        transaction.rollback()
+        connection.close()
+        engine.dispose()
+
+
+@pytest.mark.parametrize(
+    "statement,index_name",
+    [(statement, index_name) for _, statement, index_name in hot_queries()],
+    ids=[description for description, _, _ in hot_queries()]
+)
+def test_hot_query_uses_index(seeded_connection, statement, index_name):
+    plan = explain(seeded_connection, statement)
+    assert index_name in plan, f"expected {index_name} in the plan:\n{plan}"
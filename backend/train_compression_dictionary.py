@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Script para treinar o dicionário zstd usado nas colunas comprimidas
+(prompts, respostas do LLM e código colado).
+
+Uso: python train_compression_dictionary.py [--samples 2000] [--size 112640]
+
+O dicionário é gravado em COMPRESSION_DICTIONARY_DIR com um nome novo
+(text_vN.dict); os anteriores devem ser mantidos para ler as linhas antigas.
+"""
+import argparse
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from pathlib import Path
+
+from app.core.compression import DICTIONARY_SUFFIX, train_dictionary
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.code_entry import CodeEntry
+from app.models.prompt import GeneralAnalysisResult
+
+
+def collect_samples(db, limit: int):
+    """Amostras recentes de cada coluna comprimida"""
+    per_column = max(1, limit // 3)
+    rows = db.query(GeneralAnalysisResult.raw_response, GeneralAnalysisResult.modified_prompt).order_by(
+        GeneralAnalysisResult.created_at.desc()
+    ).limit(per_column).all()
+    for raw_response, modified_prompt in rows:
+        yield raw_response
+        yield modified_prompt
+
+    for (code_content,) in db.query(CodeEntry.code_content).order_by(
+        CodeEntry.created_at.desc()
+    ).limit(per_column).all():
+        yield code_content
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Treina o dicionário de compressão")
+    parser.add_argument("--samples", type=int, default=2000)
+    parser.add_argument("--size", type=int, default=112640)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        samples = [s for s in collect_samples(db, args.samples) if s]
+    finally:
+        db.close()
+
+    if len(samples) < 10:
+        print(f"ERRO: amostras insuficientes ({len(samples)}), são necessárias pelo menos 10")
+        return 1
+
+    dictionary = train_dictionary(samples, size=args.size)
+
+    directory = Path(settings.COMPRESSION_DICTIONARY_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    version = len(list(directory.glob(f"*{DICTIONARY_SUFFIX}"))) + 1
+    path = directory / f"text_v{version:03d}{DICTIONARY_SUFFIX}"
+    path.write_bytes(dictionary)
+
+    print(f"OK: dicionário treinado com {len(samples)} amostras -> {path} ({len(dictionary)} bytes)")
+    print("Reinicie o backend para usar o novo dicionário nas próximas gravações")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -188,7 +188,7 @@ const GeneralAnalysisPage: React.FC = () => {
 
       try {
         console.log('Carregando resultados salvos do banco de dados...');
-        const savedResults = await analysisService.getAnalysisResults();
+        const savedResults = await analysisService.getAnalysisResults({ limit: 1 });
 
         if (savedResults.success && savedResults.results && savedResults.results.length > 0) {
           // Carregar todos os critérios para obter o mapeamento de ID numérico
@@ -206,8 +206,8 @@ const GeneralAnalysisPage: React.FC = () => {
             }
           });
 
-          // Pegar apenas a análise mais recente
-          const mostRecentResult = savedResults.results[0]; // Já vem ordenado por timestamp decrescente
+          // Pegar apenas a análise mais recente (a listagem traz só o resumo, o corpo vem do detalhe)
+          const mostRecentResult = await analysisService.getAnalysisResult(savedResults.results[0].id);
           console.log('📊 Usando apenas a análise mais recente:', mostRecentResult.analysis_name);
 
           // Converter resultado salvo para o formato esperado pelo componente
@@ -124,18 +124,24 @@ export const analysisService = {
     }
   },
 
-  getAnalysisResults: async () => {
+  getAnalysisResults: async (params: { limit?: number; cursor?: string } = {}) => {
     try {
-      // Use the authenticated endpoint to get current user's results
-      const response = await apiClient.get('/general-analysis/results');
+      // Use the authenticated endpoint to get current user's results (summaries, paginated)
+      const response = await apiClient.get('/general-analysis/results', { params });
       return response.data;
     } catch (error) {
       console.error('Error fetching analysis results:', error);
       // Return empty results to avoid breaking the UI
-      return { success: true, results: [], total: 0 };
+      return { success: true, results: [], count: 0, next_cursor: null, has_more: false };
     }
   },
 
+  getAnalysisResult: async (resultId: number) => {
+    // Full result (criteria_results, raw_response, modified_prompt)
+    const response = await apiClient.get(`/general-analysis/results/${resultId}/detail`);
+    return response.data.result;
+  },
+
   deleteAnalysisResult: async (resultId: number) => {
     try {
       const response = await apiClient.delete(`/general-analysis/results/${resultId}`);
@@ -212,7 +218,7 @@ export const analysisService = {
       console.log('🔍 DEBUG: Tentando buscar código via endpoint /code-entries...');
 
       // 1. Primeiro busca a lista de entries
-      const listResponse = await apiClient.get('/code-entries');
+      const listResponse = await apiClient.get('/code-entries', { params: { limit: 1 } });
       const entries = listResponse.data;
       console.log('🔍 DEBUG: Entries recebidos:', entries?.length || 0, 'items');
 